@@ -1,11 +1,16 @@
-from flask import Flask, request, jsonify, render_template, make_response, g, redirect, url_for
-from datetime import datetime, timedelta
-import logging, os
-from .db_api import get_connection
-from .config import LOG_DIR
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, Response, request, jsonify, render_template, make_response, g, redirect, url_for, stream_with_context, send_file
+import logging, os, re, hashlib
+from datetime import date
+from .db_api import get_connection, pool
+from . import request_context, instrumentation, log_setup, http_cache
+from .request_context import get_request_connection
+from .config import SESSION_CACHE, EVENT_CACHE, IMAGES, ANALYTICS, FEED, MESSAGES, PASSWORDS, LOGIN_THROTTLE, SESSIONS, CATEGORIES, HTTP
+from .passwords import Busy, LoginThrottle, PasswordHasher
+from .sessions import SessionMaintenance, SessionSweeper, SignedSessions
+from .cache import TTLCache, MISSING
 import secrets
 from functools import wraps
+import click
 
 
 from src.services.events_service import EventsService
@@ -13,41 +18,84 @@ from src.services.auth_service import AuthService
 from src.services.bookings_service import BookingsService
 from src.services.account_service import AccountService
 from src.services.organizer_service import OrganizerService
+from src.services.event_cache import EventListCache
+from src.services.counter_service import BookingCounterService
+from src.services.analytics_service import AnalyticsService
+from src.services.feed_service import FeedService, NotFound as FeedTargetNotFound
+from src.services.category_service import CategoryService
+from src.services.watchlist_service import WatchlistService, parse_event_ids, NotFound as WatchlistEventNotFound
+from src.services.message_service import MessageService, Notifier, NotFound as MessageRecipientNotFound
+from src.services import analytics_charts
+from src.services.image_service import (
+    ImageStore, EventImageService, BadImage, TooLarge, ImageBusy, MIME_BY_EXT, parse_sizes, read_chunks
+)
+from .migrations import MigrationRunner, MigrationError
+from .index_advisor import IndexAdvisor
 from src.services.organizer_booking_service import (
-    OrganizerBookingService, NotFound, NotPending, NoCapacity, BadStatus
+    OrganizerBookingService, NotFound, NotPending, NoCapacity, BadStatus, BadBulkRequest, OWNED_BOOKING_SQL
 )
 
-events_service = EventsService(get_connection)
-
 app = Flask(__name__, static_folder="../static", template_folder="../templates", static_url_path="/static")
+# gzip/brotli ab HTTP["compress_min_size"]; zuerst registriert, damit der Hook als letzter läuft
+http_cache.init_app(app, HTTP)
+# Request-ID (X-Request-ID) für Logzeilen und Response-Header
+log_setup.init_app(app)
+request_context.init_app(app)
+# Query-Zeiten, Server-Timing-Header, /metrics, Stichproben-Profiling (PROFILE_ROUTES)
+instrumentation.init_app(app)
+
+# Session-Token -> User (gültig max. SESSION_CACHE["ttl"] bzw. bis Session abläuft)
+session_cache = TTLCache(SESSION_CACHE["maxsize"], SESSION_CACHE["ttl"])
+unknown_token_cache = TTLCache(SESSION_CACHE["negative_size"], SESSION_CACHE["negative_ttl"])
+
+# Event-Listings (GET /api/event) + Buchungs-Overlay pro User
+event_list_cache = EventListCache(EVENT_CACHE["maxsize"], EVENT_CACHE["ttl"], EVENT_CACHE["overlay_maxsize"],
+                                  EVENT_CACHE["stamp_interval"])
+
+# Feed-Seiten pro User (Tags: user/org/event), neue Events kommen über events_service hinein
+feed_cache = TTLCache(FEED["cache_size"], FEED["ttl"])
+feed_service = FeedService(get_request_connection, feed_cache, FEED["fanout_limit"])
+
+# Kategoriebaum im Speicher (eigene Pool-Verbindung, auch vom ASGI-Listing genutzt)
+category_service = CategoryService(get_connection, CATEGORIES["check_interval"])
+
+events_service = EventsService(get_request_connection, event_list_cache, feed_service, category_service)
+# Passwort-Hashing im Prozesspool + Drossel für Fehlversuche (siehe passwords.py)
+password_hasher = PasswordHasher(PASSWORDS["method"], PASSWORDS["workers"], PASSWORDS["max_pending"],
+                                 PASSWORDS["timeout"])
+login_throttle = LoginThrottle(LOGIN_THROTTLE["max_account"], LOGIN_THROTTLE["max_ip"], LOGIN_THROTTLE["window"])
+# Sessions: signierte Tokens (optional) + Hintergrund-Thread für Sweep/Revocation-Abgleich
+signed_sessions = (SignedSessions(SESSIONS["secret"], SESSIONS["max_age"], get_connection)
+                   if SESSIONS["mode"] == "signed" else None)
+session_maintenance = SessionMaintenance(SessionSweeper(get_connection, SESSIONS["sweep_batch"]),
+                                         SESSIONS["sweep_interval"], signed_sessions, SESSIONS["revocation_sync"])
+auth_service = AuthService(get_request_connection, session_cache, unknown_token_cache,
+                           password_hasher, login_throttle, request_context.release_request_connection,
+                           signed_sessions, SESSIONS["max_age"])
+
+# der Thread startet mit dem ersten Request (bzw. im ASGI-Lifespan), nicht schon beim Import:
+# pytest, "flask <befehl>" und Skripte, die nur app importieren, sollen keinen Sweep anstoßen
+@app.before_request
+def start_session_maintenance():
+    if not app.testing:
+        session_maintenance.start()
 
 # ===============================
 # SECTION: Hilfsfunktionen
 # nur hier sind SQL-Queries innerhalb app.py, sonst ausgelagert
+# alle Queries eines Requests laufen über dieselbe Verbindung (siehe request_context)
 # ===============================
 
 def user_owns_event(event_id: int, user_id: int) -> bool:
-    with get_connection() as con, con.cursor() as cur:
+    with get_request_connection() as con, con.cursor() as cur:
         cur.execute("SELECT 1 FROM event WHERE id=%s AND organizer_id=%s", (event_id, user_id))
         return cur.fetchone() is not None
 
-def is_organizer_user(user_id: int) -> bool:
-    with get_connection() as con, con.cursor() as cur:
-        cur.execute("SELECT 1 FROM organizer WHERE user_id=%s", (user_id,))
-        return cur.fetchone() is not None
-
-def organizer_owns_booking(booking_id: int, organizer_id: int) -> bool:
-    with get_connection() as con, con.cursor() as cur:
-        cur.execute(
-            """
-            SELECT 1
-            FROM booking b
-            JOIN event   e ON e.id = b.event_id
-            WHERE b.id=%s AND e.organizer_id=%s
-            """,
-            (booking_id, organizer_id),
-        )
-        return cur.fetchone() is not None
+# liefert die Buchung (id, event_id, user_id), wenn sie zu einem Event des Organizers gehört
+def organizer_booking(booking_id: int, organizer_id: int):
+    with get_request_connection() as con, con.cursor() as cur:
+        cur.execute(OWNED_BOOKING_SQL, (booking_id, organizer_id))
+        return cur.fetchone()
 
 def require_login(fn):
     @wraps(fn)
@@ -55,7 +103,6 @@ def require_login(fn):
         u = current_user()
         if not u:
             return jsonify({"error": "unauthorized"}), 401
-        g.user = u
         return fn(*args, **kwargs)
     return wrapper
 
@@ -65,49 +112,25 @@ def require_organizer(fn):
         u = current_user()
         if not u:
             return jsonify({"error": "unauthorized"}), 401
-        if not is_organizer_user(u["id"]):
+        if not u["is_organizer"]:
             return jsonify({"error": "forbidden"}), 403
-        g.user = u
         return fn(*args, **kwargs)
     return wrapper
 
+# löst die Session einmal pro Request auf (Identität + Organizer-Flag), Ergebnis liegt in g.user
 def current_user():
-    token = request.cookies.get("session")
-    if not token:
-        return None
-    with get_connection() as con, con.cursor() as cur:
-        cur.execute("""
-            SELECT u.id, u.email, u.full_name,
-                   (o.user_id IS NOT NULL) AS is_organizer,
-                   o.company
-            FROM session s
-            JOIN user u ON u.id = s.user_id
-            LEFT JOIN organizer o ON o.user_id = u.id
-            WHERE s.token=%s AND s.expires_at > NOW()
-        """, (token,))
-        return cur.fetchone()
-
-# ===============================
-# SECTION: Logging Funktion (nicht fertig)
-# ===============================
-
-fname = os.path.join(LOG_DIR, datetime.now().strftime("%Y-%m-%d") + ".log")
-logging.basicConfig(filename=fname, level=logging.INFO,
-                    format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if "user" not in g:
+        g.user = auth_service.session_user(request.cookies.get("session"))
+    return g.user
 
 # ===============================
-# SECTION: Mini Cache (nicht fertig)
+# SECTION: Logging
+# JSON-Zeilen mit Request-ID nach LOGGING["file"], geschrieben von einem Hintergrund-Thread
+# (Requests legen nur in eine Queue), Rotation täglich + nach Größe, siehe log_setup
 # ===============================
 
-_cache = {}
-def cache_get(key):
-    v = _cache.get(key)
-    if not v: return None
-    data, ttl = v
-    if datetime.now() > ttl: _cache.pop(key, None); return None
-    return data
-def cache_set(key, data, seconds=30):
-    _cache[key] = (data, datetime.now() + timedelta(seconds=seconds))
+log_setup.setup_logging()
+log = logging.getLogger("app")
 
 # ===============================
 # SECTION: Home-Seite + Database-Check
@@ -124,30 +147,64 @@ def health():
         with get_connection() as con, con.cursor() as cur:
             cur.execute("SELECT VERSION() AS v")
             v = cur.fetchone()["v"]
-            return jsonify(ok=True, version=v)
+        return jsonify(ok=True, version=v, pool=pool.stats())
     except Exception as e:
-        logging.error(f"health error: {e}")
+        log.error("health check failed", extra={"error": str(e)})
         return jsonify(ok=False, error=str(e)), 500
 
+# Kennzahlen der In-Process-Caches
+@app.get("/health-cache")
+def health_cache():
+    return jsonify(
+        session=session_cache.stats(),
+        unknown_tokens=unknown_token_cache.stats(),
+        events=event_list_cache.stats(),
+        feed=feed_cache.stats(),
+        message_waiters=message_notifier.stats(),
+        passwords=password_hasher.stats(),
+        login_throttle=login_throttle.stats(),
+        sessions=session_maintenance.stats(),
+        categories=category_service.stats(),
+    )
+
 # ===============================
 # SECTION: Event APIs
 # ===============================
 
-events_service = EventsService(get_connection)
-
-# listet alle Events
+# listet Events seitenweise (Keyset-Cursor, optional ?fields=)
+# ETag/Last-Modified aus dem Versionsstempel -> 304 ohne Listing-Query, solange sich nichts geändert hat
 @app.get("/api/event")
 def list_event():
     u = current_user()
-    rows = events_service.list_event(request.args, u)
-    return jsonify(rows)
+    try:
+        stamp, last_modified = events_service.listing_stamp(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # my_paid/already_booked hängen am User -> User-ID gehört ins ETag
+    etag = http_cache.etag_for(stamp, u["id"] if u else None, request.query_string)
+    resp = http_cache.not_modified(etag, last_modified)
+    if resp is not None:
+        return resp
+
+    try:
+        rows, next_cursor = events_service.list_event(request.args, u, stamp)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    resp = jsonify(rows)
+    # nächste Seite: GET /api/event?...&cursor=<X-Next-Cursor>
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return http_cache.set_validators(resp, etag, last_modified)
 
 # stellt Booking Anfrage ('pending')
 @app.post("/api/event/<int:eid>/book")
 @require_login
 def book_event(eid):
     u = current_user()
-    data = request.get_json(force=True) if request.data else {}
+    data = request.get_json(force=True, silent=True) if request.data else {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "invalid json"}), 400
     result, status = events_service.book_event(eid, u, data)
     return jsonify(result), status
 
@@ -160,7 +217,7 @@ def cancel_booking(eid):
     if not u:
         return jsonify({"error": "unauthorized"}), 401
     
-    if is_organizer_user(u["id"]):
+    if u["is_organizer"]:
         return jsonify({"error": "organizer_cannot_book"}), 403
 
     result, status = events_service.cancel_booking(eid, u)
@@ -169,8 +226,18 @@ def cancel_booking(eid):
 # liefert Event mit jeweiliger ID
 @app.get("/api/event/<int:eid>")
 def get_event(eid):
+    found = events_service.event_stamp(eid)
+    if found is not None:
+        updated_at, last_modified = found
+        etag = http_cache.etag_for("event", eid, updated_at)
+        resp = http_cache.not_modified(etag, last_modified)
+        if resp is not None:
+            return resp
     row, status = events_service.get_event(eid)
-    return jsonify(row), status
+    resp = make_response(jsonify(row), status)
+    if status == 200 and found is not None:
+        http_cache.set_validators(resp, etag, last_modified)
+    return resp
 
 # Legt neues Event an
 @app.post("/api/event")
@@ -186,8 +253,7 @@ def create_event():
 
     eid = events_service.create_event(organizer_id, data)
 
-    _cache.pop("event", None)
-    logging.info(f"user:create_event id={eid}")
+    log.info("user:create_event", extra={"event_id": eid, "user_id": organizer_id})
 
     return jsonify({"id": eid}), 201
 
@@ -205,8 +271,7 @@ def update_event(eid):
     except ValueError:
         return jsonify({"error": "no fields"}), 400
 
-    _cache.pop("event", None)
-    logging.info(f"user:update_event id={eid}")
+    log.info("user:update_event", extra={"event_id": eid, "user_id": g.user["id"]})
     return jsonify({"updated": changed})
 
 # löscht bestehendes Event
@@ -218,38 +283,54 @@ def delete_event(eid):
         return jsonify({"error": "forbidden"}), 403
 
     deleted = events_service.delete_event(eid)
+    if deleted:
+        analytics_service.event_deleted(g.user["id"])
 
-    _cache.pop("event", None)
-    logging.info(f"user:delete_event id={eid}")
+    log.info("user:delete_event", extra={"event_id": eid, "user_id": g.user["id"]})
 
     return jsonify({"deleted": deleted})
 
-# lädt Kategorien
+# lädt Kategorien aus dem Baum-Cache (flach nach Name, ?tree=1 verschachtelt); ETag ändert sich mit dem Baum
 @app.get("/api/category")
 def list_categories():
-    with get_connection() as con, con.cursor() as cur:
-        cur.execute("SELECT id, name FROM categorie ORDER BY name")
-        return jsonify(cur.fetchall())
+    tree = category_service.tree()
+    nested = request.args.get("tree") == "1"
+    etag = f"{tree.etag}-t" if nested else tree.etag
+    cache_control = f"public, max-age={CATEGORIES['max_age']}"
+    resp = http_cache.not_modified(etag, cache_control=cache_control)
+    if resp is not None:
+        return resp
+    if nested:
+        resp = jsonify(tree.as_tree())
+    else:
+        resp = Response(tree.payload, mimetype="application/json")
+    http_cache.set_validators(resp, etag, cache_control=cache_control)
+    return resp
 
 # ===============================
 # SECTION: Authentifizierungsfunktionen
 # ===============================
 
-auth_service = AuthService(get_connection)
+# JSON-Antwort mit Retry-After bei 429 (Drossel) / 503 (Hash-Pool ausgelastet)
+def auth_response(payload, status):
+    resp = make_response(jsonify(payload), status)
+    if "retry_after" in payload:
+        resp.headers["Retry-After"] = str(payload["retry_after"])
+    return resp
 
 # Erstellt normalen User
 @app.post("/api/user")
 def register_user():
     data = request.get_json(force=True)
     payload, status = auth_service.register_user(data)
-    return jsonify(payload), status
+    return auth_response(payload, status)
 
 # Erstellt Unternehmen
 @app.post("/api/organizer")
 def register_company():
     data = request.get_json(force=True)
     payload, status = auth_service.register_company(data)
-    return jsonify(payload), status
+    return auth_response(payload, status)
 
 # Authentifizierungsseite
 @app.get("/auth")
@@ -260,10 +341,10 @@ def auth_page():
 @app.post("/api/login")
 def login():
     data = request.get_json(force=True)
-    result, status = auth_service.login(data)
+    result, status = auth_service.login(data, request.remote_addr)
 
     if status != 200:
-        return jsonify(result), status
+        return auth_response(result, status)
 
     cookie = result.pop("cookie")
     resp = make_response(jsonify(result))
@@ -273,7 +354,7 @@ def login():
         httponly=True,
         samesite="Lax",
         secure=False,  # in Prod: True
-        max_age=7*24*3600
+        max_age=SESSIONS["max_age"]
     )
     return resp
 
@@ -292,14 +373,13 @@ def me():
     u = current_user()
     if not u:
         return jsonify({"error":"unauthorized"}), 401
-    u["is_organizer"] = is_organizer_user(u["id"])
-    return jsonify(u)
+    return jsonify(dict(u, is_organizer=bool(u["is_organizer"])))
 
 # ===============================
 # SECTION: Buchungen + Reviews
 # ===============================
 
-bookings_service = BookingsService(get_connection)
+bookings_service = BookingsService(get_request_connection)
 
 # liefert Buchungen für jeweiligen User
 @app.get("/api/my-bookings")
@@ -338,11 +418,213 @@ def create_or_update_review():
     bookings_service.upsert_review(u["id"], event_id, rating, comment)
     return jsonify({"ok": True})
 
+# ===============================
+# SECTION: Watchlist
+# ===============================
+
+watchlist_service = WatchlistService(get_request_connection)
+
+# beobachtete Events mit freien Plätzen und eigener Buchung (eine Abfrage für die ganze Liste)
+@app.get("/api/watchlist")
+@require_login
+def watchlist_api():
+    return jsonify(watchlist_service.list(g.user["id"]))
+
+# mehrere Events auf einmal: {"event_ids": [1, 2, 3]}
+@app.post("/api/watchlist")
+@require_login
+def watchlist_add():
+    data = request.get_json(silent=True) or {}
+    try:
+        ids = parse_event_ids(data.get("event_ids"), WatchlistService.MAX_BULK)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"added": watchlist_service.add(g.user["id"], ids)})
+
+@app.delete("/api/watchlist")
+@require_login
+def watchlist_remove():
+    data = request.get_json(silent=True) or {}
+    try:
+        ids = parse_event_ids(data.get("event_ids"), WatchlistService.MAX_BULK)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"removed": watchlist_service.remove(g.user["id"], ids)})
+
+@app.put("/api/watchlist/<int:eid>")
+@require_login
+def watchlist_add_one(eid):
+    try:
+        added = watchlist_service.add_one(g.user["id"], eid)
+    except WatchlistEventNotFound:
+        return jsonify({"error": "not_found"}), 404
+    return jsonify({"watching": True}), (201 if added else 200)
+
+@app.delete("/api/watchlist/<int:eid>")
+@require_login
+def watchlist_remove_one(eid):
+    return jsonify({"watching": False, "removed": watchlist_service.remove(g.user["id"], [eid])})
+
+# ===============================
+# SECTION: Feed (Organizern/Events folgen)
+# ===============================
+
+# kommende Events von gefolgten Organizern + gefolgten Events, nächste Seite über ?cursor=<X-Next-Cursor>
+@app.get("/api/feed")
+@require_login
+def feed_api():
+    try:
+        rows, next_cursor = feed_service.get_feed(g.user["id"], request.args.get("cursor"), request.args.get("limit"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    resp = jsonify(rows)
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return resp
+
+@app.post("/api/organizer/<int:oid>/follow")
+@require_login
+def follow_organizer(oid):
+    try:
+        added = feed_service.follow_organizer(g.user["id"], oid)
+    except FeedTargetNotFound:
+        return jsonify({"error": "not_found"}), 404
+    return jsonify({"following": True}), (201 if added else 200)
+
+@app.delete("/api/organizer/<int:oid>/follow")
+@require_login
+def unfollow_organizer(oid):
+    return jsonify({"following": False, "removed": feed_service.unfollow_organizer(g.user["id"], oid)})
+
+@app.post("/api/event/<int:eid>/follow")
+@require_login
+def follow_event(eid):
+    try:
+        added = feed_service.follow_event(g.user["id"], eid)
+    except FeedTargetNotFound:
+        return jsonify({"error": "not_found"}), 404
+    return jsonify({"following": True}), (201 if added else 200)
+
+@app.delete("/api/event/<int:eid>/follow")
+@require_login
+def unfollow_event(eid):
+    return jsonify({"following": False, "removed": feed_service.unfollow_event(g.user["id"], eid)})
+
+# ===============================
+# SECTION: Nachrichten
+# Long-Poll/SSE warten auf message_notifier (gleicher Prozess) statt die DB zu pollen;
+# während des Wartens ist keine DB-Verbindung belegt
+# ===============================
+
+message_notifier = Notifier()
+message_service = MessageService(get_request_connection, message_notifier, MESSAGES["max_body"])
+# für Long-Poll/SSE: leiht sich pro Abfrage kurz eine Pool-Verbindung statt der Request-Verbindung
+message_poller = MessageService(get_connection, message_notifier, MESSAGES["max_body"])
+
+def poll_timeout() -> float:
+    return max(0.0, min(request.args.get("timeout", MESSAGES["poll_timeout"], type=float),
+                        MESSAGES["max_poll_timeout"]))
+
+def sse_event(event: str, data, event_id=None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+# Gespräche, neueste zuerst, nächste Seite über ?cursor=<X-Next-Cursor>
+@app.get("/api/messages")
+@require_login
+def message_inbox():
+    try:
+        rows, next_cursor = message_service.inbox(g.user["id"], request.args.get("cursor"), request.args.get("limit"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    resp = jsonify(rows)
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return resp
+
+@app.get("/api/messages/unread")
+@require_login
+def message_unread():
+    return jsonify({"unread": message_service.unread_count(g.user["id"])})
+
+# neue Nachrichten seit ?since=<id> (ohne: ab jetzt); wartet bis ?timeout= Sekunden
+@app.get("/api/messages/poll")
+@require_login
+def message_poll():
+    uid = g.user["id"]
+    since = request.args.get("since", type=int)
+    if since is None and request.args.get("since"):
+        return jsonify({"error": "bad_since"}), 400
+    timeout = poll_timeout()
+    request_context.release_request_connection()
+    if since is None:
+        since = message_poller.latest_id(uid)
+    rows = message_poller.poll(uid, since, timeout)
+    return jsonify({"messages": rows, "last_id": rows[-1]["id"] if rows else since})
+
+# Server-Sent Events; Wiederaufnahme über Last-Event-ID (setzt der Browser selbst)
+@app.get("/api/messages/stream")
+@require_login
+def message_stream():
+    uid = g.user["id"]
+    since = request.headers.get("Last-Event-ID", type=int) or request.args.get("since", type=int)
+    if since is None and request.args.get("since"):
+        return jsonify({"error": "bad_since"}), 400
+    request_context.release_request_connection()
+    if since is None:
+        since = message_poller.latest_id(uid)
+
+    def generate(since):
+        with message_notifier.listen(uid) as waiter:
+            yield "retry: 3000\n\n"
+            while True:
+                rows = message_poller.new_since(uid, since)
+                for m in rows:
+                    since = m["id"]
+                    yield sse_event("message", m, since)
+                if not rows and not waiter.wait(MESSAGES["poll_timeout"]):
+                    yield ": keepalive\n\n"
+
+    return Response(generate(since), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Verlauf mit einem User, neueste zuerst; ältere Nachrichten über ?cursor=<X-Next-Cursor>
+@app.get("/api/messages/<int:peer_id>")
+@require_login
+def message_thread(peer_id):
+    try:
+        rows, next_cursor = message_service.thread(
+            g.user["id"], peer_id, request.args.get("cursor"), request.args.get("limit")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    resp = jsonify(rows)
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return resp
+
+@app.post("/api/messages/<int:peer_id>")
+@require_login
+def message_send(peer_id):
+    data = request.get_json(silent=True) or {}
+    try:
+        msg = message_service.send(g.user["id"], peer_id, data.get("body"))
+    except MessageRecipientNotFound:
+        return jsonify({"error": "not_found"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(msg), 201
+
+@app.post("/api/messages/<int:peer_id>/read")
+@require_login
+def message_read(peer_id):
+    return jsonify({"read": message_service.mark_read(g.user["id"], peer_id)})
+
 # ===============================
 # SECTION: Accounteinstellungen
 # ===============================
 
-account_service = AccountService(get_connection)
+account_service = AccountService(get_request_connection, session_cache, password_hasher)
 
 # Accounteinstellungen-Seite
 @app.get("/account")
@@ -366,13 +648,18 @@ def update_account():
     new_pwd  = data.get("password")
     new_comp = data.get("company")  # nur relevant, wenn Nutzer Organizer ist
 
-    account_service.update_account(
-        user_id=u["id"],
-        new_full=new_full,
-        new_mail=new_mail,
-        new_pwd=new_pwd,
-        new_comp=new_comp,
-    )
+    # Verbindung nicht während des Hashens festhalten
+    request_context.release_request_connection()
+    try:
+        account_service.update_account(
+            user_id=u["id"],
+            new_full=new_full,
+            new_mail=new_mail,
+            new_pwd=new_pwd,
+            new_comp=new_comp,
+        )
+    except Busy as e:
+        return auth_response({"error": "busy", "retry_after": e.retry_after}, 503)
 
     return jsonify({"ok": True})
 
@@ -380,7 +667,7 @@ def update_account():
 # SECTION: Eventeinstellungen (für Organizer)
 # ===============================
 
-organizer_service = OrganizerService(get_connection)
+organizer_service = OrganizerService(get_request_connection)
 
 # liefert Seite für Event (nur für Organizer)
 @app.get("/organizer/events")
@@ -393,8 +680,13 @@ def organizer_events_page():
 @require_organizer
 def organizer_events_api():
     u = g.user
+    stamp, last_modified = organizer_service.events_stamp(u["id"])
+    etag = http_cache.etag_for("organizer", u["id"], stamp)
+    resp = http_cache.not_modified(etag, last_modified)
+    if resp is not None:
+        return resp
     rows = organizer_service.list_my_events(u["id"])
-    return jsonify(rows)
+    return http_cache.set_validators(jsonify(rows), etag, last_modified)
 
 # liefert Bearbeitungsseite für ein bestimmtes Event zurück
 @app.get("/organizer/event/<int:eid>/edit")
@@ -420,19 +712,7 @@ def organizer_event_get(eid):
 # SECTION: Booking Liste für Organizer
 # ===============================
 
-organizer_booking_service = OrganizerBookingService(get_connection)
-
-# listet Buchungen Events von Organizer auf
-@app.get("/api/organizer/bookings")
-@require_organizer
-def organizer_bookings_list():
-    u = g.user
-    status = request.args.get("status", "pending")
-    if status not in ("pending", "paid", "cancelled"):
-        return jsonify({"error": "bad_status"}), 400
-
-    rows = organizer_booking_service.list_by_status(u["id"], status)
-    return jsonify(rows)
+organizer_booking_service = OrganizerBookingService(get_request_connection, event_list_cache)
 
 # Organizer nimmt eine Buchungsanfrage an
 @app.post("/api/organizer/booking/<int:bid>/approve")
@@ -440,11 +720,12 @@ def organizer_bookings_list():
 def organizer_booking_approve(bid):
     org = g.user
 
-    if not organizer_owns_booking(bid, org["id"]):
+    booking = organizer_booking(bid, org["id"])
+    if not booking:
         return jsonify({"error": "forbidden"}), 403
 
     try:
-        res = organizer_booking_service.approve(bid)
+        res = organizer_booking_service.approve(booking)
         return jsonify(res)
     except NotFound:
         return jsonify({"error": "not_found"}), 404
@@ -462,18 +743,46 @@ def organizer_booking_reject(bid):
     org = g.user
 
     # Ownership bleibt hier
-    if not organizer_owns_booking(bid, org["id"]):
+    booking = organizer_booking(bid, org["id"])
+    if not booking:
         return jsonify({"error": "forbidden"}), 403
 
     try:
-        res = organizer_booking_service.reject(bid)
+        res = organizer_booking_service.reject(booking)
         return jsonify(res)
     except NotFound:
         return jsonify({"error": "not_found"}), 404
     except NotPending:
         return jsonify({"error": "not_pending"}), 409
 
-# Buchungen auflisten (nur für Organizer)
+# viele Anfragen auf einmal annehmen/ablehnen:
+# {"action": "approve"|"reject", "booking_ids": [...]} oder {"action": ..., "event_id": X, "limit": N}
+@app.post("/api/organizer/bookings/bulk")
+@require_organizer
+def organizer_bookings_bulk():
+    org = g.user
+    data = request.get_json(force=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "invalid_payload"}), 400
+
+    try:
+        res = organizer_booking_service.bulk(
+            org["id"],
+            data.get("action"),
+            booking_ids=data.get("booking_ids"),
+            event_id=data.get("event_id"),
+            limit=data.get("limit"),
+        )
+    except BadBulkRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except NotFound:
+        return jsonify({"error": "not_found"}), 404
+
+    log.info("user:bulk_action", extra={"action": data.get("action"), "organizer_id": org["id"],
+                                        "n": len(res["results"])})
+    return jsonify(res)
+
+# Buchungen auflisten (nur für Organizer), seitenweise: nächste Seite über ?cursor=<X-Next-Cursor>
 @app.get("/api/organizer/bookings")
 @require_organizer
 def organizer_bookings_api():
@@ -481,17 +790,278 @@ def organizer_bookings_api():
     status = request.args.get("status", "pending")
 
     try:
-        rows = organizer_booking_service.list_api(u["id"], status)
-        return jsonify(rows)
+        rows, next_cursor = organizer_booking_service.list_api(
+            u["id"], status, request.args.get("cursor"), request.args.get("limit")
+        )
+    except BadStatus:
+        return jsonify({"error": "bad_status"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    resp = jsonify(rows)
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return resp
+
+# alle Buchungen eines Status als JSON-Stream (konstanter Speicher, auch bei sehr vielen Buchungen)
+@app.get("/api/organizer/bookings/export")
+@require_organizer
+def organizer_bookings_export():
+    u = g.user
+    status = request.args.get("status", "pending")
+
+    rows = organizer_booking_service.stream_by_status(u["id"], status)
+    try:
+        first = next(rows, None)   # Status prüfen + Query starten, bevor Header rausgehen
     except BadStatus:
         return jsonify({"error": "bad_status"}), 400
 
+    def generate():
+        yield "["
+        if first is not None:
+            yield app.json.dumps(first)
+            for row in rows:
+                yield "," + app.json.dumps(row)
+        yield "]"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
 # Seite für alle Requests
 @app.get("/organizer/requests")
 @require_organizer
 def organizer_requests_page():
     return render_template("org_requests.html")
 
+# ===============================
+# SECTION: Event-Bilder
+# Originale + Thumbnails liegen im Dateisystem (IMAGES["dir"]), die URL enthält den Inhalts-Hash:
+# Auslieferung ohne DB-Zugriff, Browser/Proxies cachen "immutable", If-None-Match -> 304
+# ===============================
+
+image_store = ImageStore(IMAGES["dir"], parse_sizes(IMAGES["thumb_sizes"]), IMAGES["max_bytes"], IMAGES["max_pixels"])
+image_service = EventImageService(get_request_connection, image_store)
+
+IMAGE_NAME = re.compile(r"^([0-9a-f]{64})\.(jpg|png|gif|webp)$")
+
+# Bilder eines Events (nur Metadaten + URLs)
+@app.get("/api/event/<int:eid>/images")
+def list_event_images(eid):
+    return jsonify(image_service.list_images(eid))
+
+# Upload: multipart-Feld "file" oder rohe Bytes im Body (Content-Type image/*)
+@app.post("/api/event/<int:eid>/images")
+@require_organizer
+def upload_event_image(eid):
+    if not user_owns_event(eid, g.user["id"]):
+        return jsonify({"error": "forbidden"}), 403
+    # etwas Luft für den multipart-Overhead, die eigentliche Grenze prüft ImageStore.put
+    if (request.content_length or 0) > IMAGES["max_bytes"] + 64 * 1024:
+        return jsonify({"error": "too_large"}), 413
+
+    upload = request.files.get("file")
+    try:
+        img = image_service.add_image(eid, read_chunks(upload.stream if upload else request.stream))
+    except TooLarge:
+        return jsonify({"error": "too_large"}), 413
+    except BadImage as e:
+        return jsonify({"error": "bad_image", "detail": str(e)}), 400
+    except ImageBusy:
+        return jsonify({"error": "busy"}), 503, {"Retry-After": "1"}
+
+    log.info("user:upload_image", extra={"event_id": eid, "image_id": img["id"], "bytes": img["size"]})
+    return jsonify(img), 201
+
+@app.delete("/api/event/<int:eid>/images/<int:iid>")
+@require_organizer
+def delete_event_image(eid, iid):
+    if not user_owns_event(eid, g.user["id"]):
+        return jsonify({"error": "forbidden"}), 403
+    try:
+        deleted = image_service.delete_image(eid, iid)
+    except ImageBusy:
+        return jsonify({"error": "busy"}), 503, {"Retry-After": "1"}
+    return jsonify({"deleted": deleted}), (200 if deleted else 404)
+
+# Auslieferung: /api/images/<sha256>.<ext>[?size=<Thumbnail-Größe>]
+@app.get("/api/images/<name>")
+def serve_image(name):
+    m = IMAGE_NAME.match(name)
+    if not m:
+        return jsonify({"error": "not_found"}), 404
+    sha, ext = m.groups()
+    size = request.args.get("size", type=int)
+    if size is not None and size not in image_store.thumb_sizes:
+        return jsonify({"error": "bad size", "sizes": image_store.thumb_sizes}), 400
+
+    etag = sha if size is None else f"{sha}-{size}"
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        path = image_store.original_path(sha, ext) if size is None else image_store.ensure_thumb(sha, ext, size)
+        if not path or not os.path.exists(path):
+            return jsonify({"error": "not_found"}), 404
+        resp = send_file(os.path.abspath(path), mimetype=MIME_BY_EXT[ext] if size is None else "image/jpeg",
+                         conditional=True, etag=False)
+    resp.set_etag(etag)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = IMAGES["max_age"]
+    resp.cache_control.immutable = True
+    return resp
+
+# ===============================
+# SECTION: Analytics (für Organizer)
+# Dashboards lesen nur die Tages-Rollups (event_daily_stats/organizer_daily_stats), siehe analytics_service;
+# Charts werden serverseitig gerendert und pro Datenversion gecacht
+# ===============================
+
+analytics_service = AnalyticsService(get_request_connection, ANALYTICS["refresh_seconds"], ANALYTICS["batch"],
+                                     ANALYTICS["overlap_ids"], ANALYTICS["overlap_seconds"])
+# (organizer, chart, event, format, version) -> Bytes; neue Daten = neue Version = neuer Key
+chart_cache = TTLCache(ANALYTICS["chart_cache_size"], 24 * 3600)
+
+def analytics_days() -> int:
+    return max(1, min(request.args.get("days", ANALYTICS["default_days"], type=int), 3650))
+
+@app.get("/organizer/analytics")
+@require_organizer
+def organizer_analytics_page():
+    return render_template("org_analytics.html")
+
+@app.get("/api/organizer/analytics")
+@require_organizer
+def organizer_analytics_api():
+    analytics_service.refresh_if_stale()
+    return jsonify(analytics_service.organizer_report(g.user["id"], analytics_days()))
+
+@app.get("/api/organizer/analytics/event/<int:eid>")
+@require_organizer
+def organizer_event_analytics_api(eid):
+    analytics_service.refresh_if_stale()
+    report = analytics_service.event_report(g.user["id"], eid, analytics_days())
+    if report is None:
+        return jsonify({"error": "not_found"}), 404
+    return jsonify(report)
+
+# /api/organizer/analytics/chart/<bookings|fill|rating>.<png|svg>[?event_id=..&days=..]
+@app.get("/api/organizer/analytics/chart/<kind>.<fmt>")
+@require_organizer
+def organizer_analytics_chart(kind, fmt):
+    if kind not in analytics_charts.KINDS or fmt not in analytics_charts.FORMATS:
+        return jsonify({"error": "not_found"}), 404
+    org_id = g.user["id"]
+    eid = request.args.get("event_id", type=int)
+    days = analytics_days()
+    analytics_service.refresh_if_stale()
+
+    key = (org_id, kind, eid, days, fmt, analytics_service.version(org_id), date.today())
+    etag = hashlib.sha1(repr(key).encode()).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"})
+
+    body = chart_cache.get(key)
+    if body is MISSING:
+        if eid is None:
+            report, title = analytics_service.organizer_report(org_id, days), "Alle Events"
+        else:
+            report = analytics_service.event_report(org_id, eid, days)
+            if report is None:
+                return jsonify({"error": "not_found"}), 404
+            title = report["event"]["title"]
+        body = analytics_charts.render(kind, report["daily"], title, fmt)
+        chart_cache.set(key, body)
+
+    resp = Response(body, mimetype=analytics_charts.FORMATS[fmt])
+    resp.set_etag(etag)
+    # privat (Organizer-Daten), Browser muss revalidieren -> 304 solange sich nichts geändert hat
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+# ===============================
+# SECTION: Wartung (CLI)
+# ===============================
+
+counter_service = BookingCounterService(get_connection, event_list_cache)
+
+# prüft event.paid_qty/pending_qty gegen booking: flask --app src.app reconcile-counters [--repair]
+@app.cli.command("reconcile-counters")
+@click.option("--repair", is_flag=True, help="Abweichende Zähler neu berechnen und schreiben.")
+def reconcile_counters(repair):
+    drift = counter_service.reconcile(repair=repair)
+    for row in drift:
+        click.echo(
+            f"event {row['event_id']}: paid {row['paid_qty']} -> {row['actual_paid']}, "
+            f"pending {row['pending_qty']} -> {row['actual_pending']}"
+            + (" (repariert)" if repair else "")
+        )
+    click.echo(f"{len(drift)} Event(s) mit Abweichung")
+    if drift and not repair:
+        raise SystemExit(1)
+
+# Analytics-Rollups aktualisieren (z.B. per Cron): flask --app src.app analytics-refresh
+@app.cli.command("analytics-refresh")
+def analytics_refresh():
+    result = AnalyticsService(get_connection).refresh()
+    if result is None:
+        raise click.ClickException("refresh already running")
+    click.echo(f"{result['events']} Event(s), {result['organizers']} Organizer neu berechnet")
+
+# vergangene Feed-Einträge löschen (z.B. täglich per Cron): flask --app src.app feed-prune
+@app.cli.command("feed-prune")
+@click.option("--keep-days", type=int, default=1, help="Einträge so viele Tage nach Beginn noch behalten.")
+def feed_prune(keep_days):
+    n = FeedService(get_connection).prune(keep_days)
+    click.echo(f"{n} Feed-Einträge gelöscht")
+
+# abgelaufene Sessions sofort löschen (läuft sonst alle SESSION_SWEEP_INTERVAL Sekunden im Hintergrund)
+@app.cli.command("sessions-sweep")
+def sessions_sweep():
+    n = SessionSweeper(get_connection, SESSIONS["sweep_batch"]).sweep()
+    if n is None:
+        raise click.ClickException("sweep already running")
+    click.echo(f"{n} abgelaufene Session(s) gelöscht")
+
+# Schema-Migrationen aus db/migrations/: flask --app src.app migrate [--status] [--target N]
+@app.cli.command("migrate")
+@click.option("--status", "show_status", is_flag=True, help="Nur anzeigen, was angewendet/offen ist.")
+@click.option("--target", type=int, default=None, help="Nur bis einschließlich dieser Version migrieren.")
+def migrate(show_status, target):
+    runner = MigrationRunner(get_connection)
+    if show_status:
+        for m in runner.status():
+            click.echo(f"{m['version']:04d} {m['name']:<30} {m['state']}")
+        return
+    try:
+        done = runner.migrate(target)
+    except MigrationError as e:
+        raise click.ClickException(str(e))
+    for m in done:
+        click.echo(f"{m.version:04d} {m.name} angewendet")
+    click.echo(f"{len(done)} Migration(en) angewendet")
+
+# EXPLAIN für alle Service-Queries gegen die befüllte DB:
+# flask --app src.app index-advisor [--all] [--json] [--min-rows N]
+@app.cli.command("index-advisor")
+@click.option("--all", "show_all", is_flag=True, help="Auch unauffällige Pläne ausgeben.")
+@click.option("--json", "as_json", is_flag=True, help="Bericht als JSON.")
+@click.option("--min-rows", type=int, default=100, help="Full Scans erst ab so vielen geschätzten Zeilen melden.")
+def index_advisor(show_all, as_json, min_rows):
+    report = IndexAdvisor(get_connection).run(min_rows=min_rows)
+    if not show_all:
+        report = [r for r in report if r["issues"] or r.get("error")]
+    if as_json:
+        click.echo(app.json.dumps(report, indent=2))
+    else:
+        for r in report:
+            if r.get("error"):
+                click.echo(f"[{r['scenario']}] Fehler: {r['error']}")
+                continue
+            click.echo(
+                f"[{r['scenario']}] {r['table']}: type={r['type']} key={r['key']} rows={r['rows']}"
+                f" {', '.join(r['issues']) or 'ok'}\n    {r['sql'][:160]}"
+            )
+    flagged = {r["scenario"] for r in report if r["issues"]}
+    click.echo(f"{len(flagged)} Szenario(s) mit Auffälligkeiten")
+
 # ===============================
 # SECTION: Startet App + Debug Modus
 # ===============================
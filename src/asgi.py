@@ -0,0 +1,303 @@
+# ASGI-Modus: uvicorn src.asgi:app --workers 1
+#
+# Die lastintensiven/langsamen Routen laufen hier als Coroutinen über aiomysql,
+# ein Prozess hält so sehr viele gleichzeitige (langsame) Clients, ohne pro Request
+# einen Thread zu blockieren. Routen-Verträge (Pfade, JSON, Statuscodes, Header)
+# sind dieselben wie in app.py; alles andere wird an die Flask-App durchgereicht.
+# Der synchrone Betrieb (flask run / WSGI-Server mit src.app:app) bleibt unverändert.
+import json
+import logging
+from contextlib import asynccontextmanager
+from functools import wraps
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+from . import async_db, http_cache, log_setup
+from .app import (
+    app as flask_app, category_service, event_list_cache, message_notifier, session_cache, session_maintenance,
+    signed_sessions, unknown_token_cache,
+)
+from .config import HTTP, MESSAGES
+from src.services.async_services import (
+    AsyncAuthService, AsyncBookingsService, AsyncEventsService, AsyncMessageService, AsyncOrganizerBookingService,
+)
+from src.services.organizer_booking_service import BadStatus, NoCapacity, NotFound, NotPending
+
+# dieselben Caches wie die Flask-App (gleicher Prozess) -> Invalidierungen wirken für beide
+auth_service = AsyncAuthService(async_db.connection, session_cache, unknown_token_cache, signed=signed_sessions)
+# Kategoriebaum wird selten (check_interval) synchron über den Pool geprüft, sonst reiner Speicherzugriff
+events_service = AsyncEventsService(async_db.connection, event_list_cache, categories=category_service)
+bookings_service = AsyncBookingsService(async_db.connection)
+organizer_booking_service = AsyncOrganizerBookingService(async_db.connection, event_list_cache)
+# gleicher Notifier wie in app.py: Nachrichten über Flask-Routen wecken auch die async Long-Polls
+message_service = AsyncMessageService(async_db.connection, message_notifier)
+
+
+# ===============================
+# SECTION: Hilfsfunktionen
+# ===============================
+
+def json_response(data, status: int = 200, headers=None, request=None) -> Response:
+    # Flask-JSON-Provider, damit z.B. Datumswerte genau wie in app.py serialisiert werden
+    body = flask_app.json.dumps(data).encode()
+    headers = dict(headers or {})
+    if request is not None and status == 200:
+        # wie der after_request-Hook in http_cache (die Flask-Antworten komprimiert der selbst)
+        body, coding = http_cache.encode_body(body, request.headers.get("accept-encoding"), HTTP)
+        headers["Vary"] = "Accept-Encoding"
+        if coding is not None:
+            headers["Content-Encoding"] = coding
+            if "ETag" in headers:
+                headers["ETag"] = "W/" + headers["ETag"]
+    return Response(body, status_code=status, headers=headers, media_type="application/json")
+
+async def current_user(request):
+    if not hasattr(request.state, "user"):
+        request.state.user = await auth_service.session_user(request.cookies.get("session"))
+    return request.state.user
+
+def require_login(fn):
+    @wraps(fn)
+    async def wrapper(request):
+        if not await current_user(request):
+            return json_response({"error": "unauthorized"}, 401)
+        return await fn(request)
+    return wrapper
+
+def require_organizer(fn):
+    @wraps(fn)
+    async def wrapper(request):
+        u = await current_user(request)
+        if not u:
+            return json_response({"error": "unauthorized"}, 401)
+        if not u["is_organizer"]:
+            return json_response({"error": "forbidden"}, 403)
+        return await fn(request)
+    return wrapper
+
+async def json_body(request) -> dict:
+    """JSON-Objekt aus dem Body ({} ohne Body); ValueError bei kaputtem JSON oder Nicht-Objekt."""
+    body = await request.body()
+    if not body:
+        return {}
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError("invalid json")
+    return data
+
+
+# ===============================
+# SECTION: Event APIs
+# ===============================
+
+async def list_event(request):
+    u = await current_user(request)
+    try:
+        stamp, last_modified = await events_service.listing_stamp(request.query_params)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    etag = http_cache.etag_for(stamp, u["id"] if u else None, request.url.query.encode())
+    headers = http_cache.validator_headers(etag, last_modified)
+    if http_cache.is_fresh(etag, last_modified, request.headers.get("if-none-match"),
+                           request.headers.get("if-modified-since")):
+        # wie Werkzeug: 304 ohne Entity-Header (Last-Modified), nur ETag/Cache-Control
+        return Response(status_code=304, headers={k: v for k, v in headers.items() if k != "Last-Modified"})
+
+    try:
+        rows, next_cursor = await events_service.list_event(request.query_params, u, stamp)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return json_response(rows, headers=headers, request=request)
+
+@require_login
+async def book_event(request):
+    u = request.state.user
+    try:
+        data = await json_body(request)
+    except ValueError:
+        return json_response({"error": "invalid json"}, 400)
+    result, status = await events_service.book_event(request.path_params["eid"], u, data)
+    return json_response(result, status)
+
+@require_login
+async def cancel_booking(request):
+    u = request.state.user
+    if u["is_organizer"]:
+        return json_response({"error": "organizer_cannot_book"}, 403)
+    result, status = await events_service.cancel_booking(request.path_params["eid"], u)
+    return json_response(result, status)
+
+async def me(request):
+    u = await current_user(request)
+    if not u:
+        return json_response({"error": "unauthorized"}, 401)
+    return json_response(dict(u, is_organizer=bool(u["is_organizer"])))
+
+@require_login
+async def my_bookings(request):
+    rows = await bookings_service.list_user_bookings(request.state.user["id"])
+    return json_response(rows, request=request)
+
+
+# ===============================
+# SECTION: Booking Liste für Organizer
+# ===============================
+
+@require_organizer
+async def organizer_bookings_api(request):
+    u = request.state.user
+    args = request.query_params
+    try:
+        rows, next_cursor = await organizer_booking_service.list_api(
+            u["id"], args.get("status", "pending"), args.get("cursor"), args.get("limit")
+        )
+    except BadStatus:
+        return json_response({"error": "bad_status"}, 400)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    return json_response(rows, headers={"X-Next-Cursor": next_cursor} if next_cursor else None, request=request)
+
+async def _change_booking(request, action: str):
+    org = request.state.user
+    booking = await organizer_booking_service.owned_booking(request.path_params["bid"], org["id"])
+    if not booking:
+        return json_response({"error": "forbidden"}, 403)
+
+    try:
+        if action == "approve":
+            res = await organizer_booking_service.approve(booking)
+        else:
+            res = await organizer_booking_service.reject(booking)
+        return json_response(res)
+    except NotFound:
+        return json_response({"error": "not_found"}, 404)
+    except NotPending:
+        return json_response({"error": "not_pending"}, 409)
+    except NoCapacity as e:
+        return json_response({"error": "no_capacity", "free": e.free}, 409)
+
+@require_organizer
+async def organizer_booking_approve(request):
+    return await _change_booking(request, "approve")
+
+@require_organizer
+async def organizer_booking_reject(request):
+    return await _change_booking(request, "reject")
+
+
+# ===============================
+# SECTION: Nachrichten (Long-Poll/SSE)
+# ===============================
+
+def _query_number(request, name: str, cast, default=None):
+    try:
+        return cast(request.query_params[name])
+    except (KeyError, ValueError):
+        return default
+
+@require_login
+async def message_poll(request):
+    uid = request.state.user["id"]
+    timeout = max(0.0, min(_query_number(request, "timeout", float, MESSAGES["poll_timeout"]),
+                           MESSAGES["max_poll_timeout"]))
+    since = _query_number(request, "since", int)
+    if since is None and request.query_params.get("since"):
+        return json_response({"error": "bad_since"}, 400)
+    if since is None:
+        since = await message_service.latest_id(uid)
+    rows = await message_service.poll(uid, since, timeout)
+    return json_response({"messages": rows, "last_id": rows[-1]["id"] if rows else since})
+
+@require_login
+async def message_stream(request):
+    uid = request.state.user["id"]
+    try:
+        since = int(request.headers["last-event-id"])
+    except (KeyError, ValueError):
+        since = _query_number(request, "since", int)
+    if since is None and request.query_params.get("since"):
+        return json_response({"error": "bad_since"}, 400)
+    if since is None:
+        since = await message_service.latest_id(uid)
+
+    async def generate():
+        yield "retry: 3000\n\n"
+        async for m in message_service.stream(uid, since, MESSAGES["poll_timeout"]):
+            if m is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"id: {m['id']}\nevent: message\ndata: {flask_app.json.dumps(m)}\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ===============================
+# SECTION: App
+# ===============================
+
+class RequestIdMiddleware:
+    """
+    Request-ID wie in Flask (log_setup): aus X-Request-ID übernommen oder neu erzeugt,
+    in den Logs der async Routen gebunden und als Response-Header zurückgegeben.
+    Fehlt der Header, wird er gesetzt, damit die an Flask durchgereichten Requests dieselbe ID nutzen.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = [(k, v) for k, v in scope["headers"] if k != b"x-request-id"]
+        incoming = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"x-request-id"), None)
+        rid = log_setup.new_request_id(incoming)
+        scope = dict(scope, headers=headers + [(b"x-request-id", rid.encode())])
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"x-request-id"]
+                message["headers"].append((b"x-request-id", rid.encode()))
+            await send(message)
+
+        token = log_setup.bind_request_id(rid)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            log_setup.reset_request_id(token)
+
+@asynccontextmanager
+async def lifespan(_app):
+    await async_db.init_pool()
+    logging.getLogger("app").info("asgi: async pool ready")
+    if not flask_app.testing:
+        session_maintenance.start()
+    try:
+        yield
+    finally:
+        session_maintenance.stop()
+        await async_db.close_pool()
+
+routes = [
+    Route("/api/event", list_event, methods=["GET"]),
+    Route("/api/event/{eid:int}/book", book_event, methods=["POST"]),
+    Route("/api/event/{eid:int}/book", cancel_booking, methods=["DELETE"]),
+    Route("/api/me", me, methods=["GET"]),
+    Route("/api/my-bookings", my_bookings, methods=["GET"]),
+    Route("/api/organizer/bookings", organizer_bookings_api, methods=["GET"]),
+    Route("/api/organizer/booking/{bid:int}/approve", organizer_booking_approve, methods=["POST"]),
+    Route("/api/organizer/booking/{bid:int}/reject", organizer_booking_reject, methods=["POST"]),
+    Route("/api/messages/poll", message_poll, methods=["GET"]),
+    Route("/api/messages/stream", message_stream, methods=["GET"]),
+    Route("/health-async", lambda request: json_response({"ok": True, "pool": async_db.stats()})),
+    # alles andere (Seiten, Schreib-APIs, Export, ...) synchron über Flask im Threadpool
+    Mount("/", app=WSGIMiddleware(flask_app)),
+]
+
+app = Starlette(routes=routes, lifespan=lifespan, middleware=[Middleware(RequestIdMiddleware)])
@@ -0,0 +1,92 @@
+import asyncio
+import random
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+import aiomysql
+
+from .config import DB, DB_POOL
+from .db_api import PoolTimeout, is_retryable
+
+# Pool für den ASGI-Modus (src/asgi.py), wird im Lifespan des Servers angelegt.
+# Gleiche Größen/Timeouts wie der synchrone Pool in db_api.
+_pool: Optional[aiomysql.Pool] = None
+_stats = {"checkouts": 0, "timeouts": 0}
+
+
+async def init_pool() -> aiomysql.Pool:
+    global _pool
+    if _pool is None:
+        _pool = await aiomysql.create_pool(
+            host=DB["host"],
+            port=DB["port"],
+            user=DB["user"],
+            password=DB["password"],
+            db=DB["database"],
+            minsize=DB_POOL["min_size"],
+            maxsize=DB_POOL["max_size"],
+            pool_recycle=int(DB_POOL["max_lifetime"]),
+            autocommit=True,
+            charset="utf8mb4",
+            cursorclass=aiomysql.DictCursor,
+        )
+    return _pool
+
+
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
+
+
+@asynccontextmanager
+async def connection():
+    """
+    Leiht eine Verbindung aus dem async Pool: `async with connection() as con`.
+    Wartet höchstens DB_POOL["timeout"] Sekunden, sonst PoolTimeout (wie im sync Pool).
+    """
+    if _pool is None:
+        raise RuntimeError("async pool not initialised (init_pool)")
+    try:
+        con = await asyncio.wait_for(_pool.acquire(), DB_POOL["timeout"])
+    except asyncio.TimeoutError:
+        _stats["timeouts"] += 1
+        raise PoolTimeout("no database connection available")
+    _stats["checkouts"] += 1
+    try:
+        yield con
+    finally:
+        # offene Transaktionen verwirft aiomysql beim Zurückgeben (Verbindung wird geschlossen)
+        _pool.release(con)
+
+
+def stats() -> dict:
+    s = dict(_stats)
+    if _pool is not None:
+        s["size"] = _pool.size
+        s["idle"] = _pool.freesize
+        s["in_use"] = _pool.size - _pool.freesize
+    return s
+
+
+async def run_transaction(get_connection: Callable, work: Callable[[Any], Awaitable[Any]],
+                          attempts: int = 5, backoff: float = 0.02) -> Any:
+    """Async-Gegenstück zu db_api.run_transaction: `await work(cur)` in einer Transaktion, Retry bei Deadlocks."""
+    for attempt in range(attempts):
+        async with get_connection() as con:
+            await con.begin()
+            try:
+                async with con.cursor() as cur:
+                    result = await work(cur)
+                await con.commit()
+                return result
+            except Exception as e:
+                try:
+                    await con.rollback()
+                except Exception:
+                    pass
+                if not is_retryable(e) or attempt == attempts - 1:
+                    raise
+        await asyncio.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
@@ -0,0 +1,78 @@
+# Minimaler asyncio-HTTP/1.1-Client für die Benchmarks (Keep-Alive, ohne Threads).
+import asyncio
+import json
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class Connection:
+    """Eine Keep-Alive-Verbindung; wird bei Fehlern beim nächsten Request neu aufgebaut."""
+
+    def __init__(self, base_url: str):
+        u = urlsplit(base_url)
+        self.host = u.hostname
+        self.port = u.port or 80
+        self.netloc = u.netloc
+        self._reader = self._writer = None
+
+    async def request(self, method: str, path: str, body=None,
+                      cookie: Optional[str] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Gibt (status, headers (klein geschrieben), body) zurück."""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            return await self._roundtrip(method, path, body, cookie)
+        except Exception:
+            self.close()
+            raise
+
+    async def _roundtrip(self, method, path, body, cookie):
+        data = b"" if body is None else json.dumps(body).encode()
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.netloc}\r\nConnection: keep-alive\r\n"
+        if cookie:
+            head += f"Cookie: session={cookie}\r\n"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+        self._writer.write((head + "\r\n").encode() + data)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("closed")
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip()
+            # Set-Cookie kann mehrfach kommen, für die Benchmarks reicht das letzte
+            headers[name] = value
+
+        if "chunked" in headers.get("transfer-encoding", ""):
+            chunks: List[bytes] = []
+            while True:
+                size = int((await self._reader.readline()).strip(), 16)
+                chunks.append(await self._reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            payload = b"".join(c[:-2] for c in chunks)
+        else:
+            payload = await self._reader.readexactly(int(headers.get("content-length", 0)))
+
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, headers, payload
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+def session_cookie(headers: Dict[str, str]) -> Optional[str]:
+    """Wert des session-Cookies aus einem Set-Cookie-Header."""
+    raw = headers.get("set-cookie", "")
+    name, _, rest = raw.partition("=")
+    return rest.split(";", 1)[0] if name.strip() == "session" else None
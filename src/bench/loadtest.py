@@ -0,0 +1,326 @@
+# Lasttest mit realistischem Request-Mix gegen einen laufenden Server.
+#
+#   python -m src.bench.seed --reset ...                       # Daten erzeugen
+#   flask --app src.app run --with-threads                      # oder gunicorn / uvicorn src.asgi:app
+#   python -m src.bench.loadtest run --url http://127.0.0.1:5000 --duration 30 --concurrency 32
+#   python -m src.bench.loadtest compare bench-results/a.json bench-results/b.json
+#
+# Ergebnis je Operation: Durchsatz, p50/p95/p99, Statuscodes und Queries pro Request
+# (aus X-Query-Count), gespeichert als JSON in bench-results/ (mit Commit-Hash),
+# damit Läufe über Commits hinweg verglichen werden können.
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+
+from src.db_api import connect
+from .client import Connection, session_cookie
+from .seed import BENCH_PASSWORD, CITIES, TOPICS
+from .serving import percentile
+
+# Gewichte des Standard-Mixes (Anteile, müssen nicht 100 ergeben)
+DEFAULT_MIX = {
+    "list": 45,         # GET /api/event (erste Seiten, Keyset weiter)
+    "search": 15,       # GET /api/event mit q/location/category/Preis
+    "book": 12,         # POST /api/event/<id>/book
+    "org_list": 10,     # GET /api/organizer/bookings
+    "approve": 6,       # POST /api/organizer/booking/<id>/approve
+    "login": 2,         # POST /api/login (teuer: Passwort-Hash)
+    "me": 10,           # GET /api/me
+}
+
+
+def parse_mix(raw: Optional[str]) -> Dict[str, int]:
+    if not raw:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"unknown operation {name!r}")
+        mix[name] = int(weight)
+    return mix
+
+
+class OpStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.queries: List[int] = []
+        self.errors = 0
+
+    def add(self, seconds: float, status: int, headers: Dict[str, str]) -> None:
+        self.latencies.append(seconds)
+        self.statuses[str(status)] += 1
+        if "x-query-count" in headers:
+            self.queries.append(int(headers["x-query-count"]))
+
+    def summary(self, elapsed: float) -> dict:
+        lat = sorted(self.latencies)
+        return {
+            "count": len(lat),
+            "errors": self.errors,
+            "rps": round(len(lat) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(lat, 50) * 1000, 2),
+            "p95_ms": round(percentile(lat, 95) * 1000, 2),
+            "p99_ms": round(percentile(lat, 99) * 1000, 2),
+            "max_ms": round((lat[-1] if lat else 0) * 1000, 2),
+            "status": dict(self.statuses),
+            "queries_per_request": round(sum(self.queries) / len(self.queries), 2) if self.queries else None,
+        }
+
+
+def load_fixture(users: int, organizers: int) -> dict:
+    """Ids und Logins aus der (geseedeten) DB, die die Szenarien brauchen."""
+    con = connect()
+    try:
+        with con.cursor() as cur:
+            cur.execute("SELECT id FROM event WHERE start_date > NOW() ORDER BY id")
+            events = [r["id"] for r in cur.fetchall()]
+            cur.execute("SELECT id FROM categorie")
+            categories = [r["id"] for r in cur.fetchall()]
+            cur.execute("""
+                SELECT u.email FROM user u
+                 WHERE u.email LIKE 'bench%%@example.com'
+                   AND NOT EXISTS (SELECT 1 FROM organizer o WHERE o.user_id = u.id)
+                 ORDER BY RAND() LIMIT %s
+            """, (users,))
+            user_emails = [r["email"] for r in cur.fetchall()]
+            cur.execute("""
+                SELECT u.email FROM user u
+                  JOIN organizer o ON o.user_id = u.id
+                 WHERE u.email LIKE 'bench%%@example.com'
+                 ORDER BY (SELECT COUNT(*) FROM event e WHERE e.organizer_id = u.id) DESC
+                 LIMIT %s
+            """, (organizers,))
+            org_emails = [r["email"] for r in cur.fetchall()]
+    finally:
+        con.close()
+    if not events or not user_emails or not org_emails:
+        raise SystemExit("keine Benchmark-Daten – erst python -m src.bench.seed ausführen")
+    return {"events": events, "categories": categories, "users": user_emails, "organizers": org_emails}
+
+
+async def login_all(base: str, emails: List[str]) -> List[str]:
+    async def one(email):
+        con = Connection(base)
+        try:
+            for _ in range(20):
+                status, headers, _ = await con.request("POST", "/api/login",
+                                                       {"email": email, "password": BENCH_PASSWORD})
+                # Hash-Pool ausgelastet (viele gleichzeitige Logins beim Start) -> später nochmal
+                if status != 503:
+                    break
+                await asyncio.sleep(float(headers.get("retry-after", "1")))
+            return session_cookie(headers) if status == 200 else None
+        finally:
+            con.close()
+    cookies = await asyncio.gather(*[one(e) for e in emails])
+    return [c for c in cookies if c]
+
+
+class Worker:
+    """Ein simulierter Client: wählt pro Iteration eine Operation nach Gewicht."""
+
+    def __init__(self, base, fixture, sessions, org_sessions, mix, stats, rng):
+        self.con = Connection(base)
+        self.fixture = fixture
+        self.sessions = sessions
+        self.org_sessions = org_sessions
+        self.ops = list(mix)
+        self.weights = [mix[o] for o in self.ops]
+        self.stats = stats
+        self.rng = rng
+        self.cursor = None
+
+    async def _timed(self, op: str, method: str, path: str, body=None, cookie=None):
+        t0 = time.perf_counter()
+        try:
+            status, headers, payload = await self.con.request(method, path, body, cookie)
+        except (OSError, ConnectionError, ValueError, asyncio.IncompleteReadError):
+            self.stats[op].errors += 1
+            return None, {}, b""
+        if status >= 500:
+            self.stats[op].errors += 1
+        self.stats[op].add(time.perf_counter() - t0, status, headers)
+        return status, headers, payload
+
+    async def step(self) -> None:
+        op = self.rng.choices(self.ops, self.weights)[0]
+        await getattr(self, "op_" + op)()
+
+    async def op_list(self):
+        path = "/api/event?limit=20" + (f"&cursor={self.cursor}" if self.cursor else "")
+        cookie = self.rng.choice(self.sessions) if self.rng.random() < 0.5 else None
+        _, headers, _ = await self._timed("list", "GET", path, cookie=cookie)
+        # wie ein User, der ein paar Seiten weiterblättert
+        self.cursor = headers.get("x-next-cursor") if self.rng.random() < 0.7 else None
+
+    async def op_search(self):
+        r = self.rng
+        params = r.choice([
+            {"q": r.choice(TOPICS)},
+            {"location": r.choice(CITIES)},
+            {"category_id": r.choice(self.fixture["categories"])} if self.fixture["categories"] else {"q": "Jazz"},
+            {"min_price": 0, "max_price": r.choice([1000, 2500, 5000])},
+            {"q": r.choice(TOPICS), "location": r.choice(CITIES)},
+        ])
+        await self._timed("search", "GET", "/api/event?limit=20&" + urlencode(params))
+
+    async def op_book(self):
+        eid = self.rng.choice(self.fixture["events"])
+        await self._timed("book", "POST", f"/api/event/{eid}/book", {"qty": self.rng.randint(1, 2)},
+                          cookie=self.rng.choice(self.sessions))
+
+    async def op_org_list(self):
+        await self._timed("org_list", "GET", "/api/organizer/bookings?status=pending&limit=50",
+                          cookie=self.rng.choice(self.org_sessions))
+
+    async def op_approve(self):
+        cookie = self.rng.choice(self.org_sessions)
+        # Kandidaten holen zählt nicht zur approve-Latenz
+        status, _, payload = await self.con.request("GET", "/api/organizer/bookings?status=pending&limit=20",
+                                                    cookie=cookie)
+        rows = json.loads(payload) if status == 200 else []
+        if not rows:
+            return
+        bid = self.rng.choice(rows)["booking_id"]
+        await self._timed("approve", "POST", f"/api/organizer/booking/{bid}/approve", cookie=cookie)
+
+    async def op_login(self):
+        email = self.rng.choice(self.fixture["users"])
+        await self._timed("login", "POST", "/api/login", {"email": email, "password": BENCH_PASSWORD})
+
+    async def op_me(self):
+        await self._timed("me", "GET", "/api/me", cookie=self.rng.choice(self.sessions))
+
+
+async def run(base: str, duration: float, concurrency: int, mix: Dict[str, int], warmup: float = 3.0,
+              users: int = 200, organizers: int = 20, seed: int = 1) -> dict:
+    fixture = load_fixture(users, organizers)
+    sessions = await login_all(base, fixture["users"])
+    org_sessions = await login_all(base, fixture["organizers"])
+    if not sessions or not org_sessions:
+        raise SystemExit("Login fehlgeschlagen – Server erreichbar und mit src.bench.seed befüllt?")
+
+    rng = random.Random(seed)
+    stats = {op: OpStats() for op in mix}
+    workers = [Worker(base, fixture, sessions, org_sessions, mix, stats, random.Random(rng.random()))
+               for _ in range(concurrency)]
+
+    async def loop(worker, until):
+        while time.perf_counter() < until:
+            await worker.step()
+
+    # Warmup (Caches, Pool) wird nicht gemessen
+    await asyncio.gather(*[loop(w, time.perf_counter() + warmup) for w in workers])
+    for op in mix:
+        stats[op] = OpStats()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[loop(w, t0 + duration) for w in workers])
+    elapsed = time.perf_counter() - t0
+    for w in workers:
+        w.con.close()
+
+    ops = {op: s.summary(elapsed) for op, s in stats.items()}
+    all_lat = sorted(x for s in stats.values() for x in s.latencies)
+    all_q = [q for s in stats.values() for q in s.queries]
+    total = {
+        "count": len(all_lat),
+        "errors": sum(s.errors for s in stats.values()),
+        "rps": round(len(all_lat) / elapsed, 1),
+        "p50_ms": round(percentile(all_lat, 50) * 1000, 2),
+        "p95_ms": round(percentile(all_lat, 95) * 1000, 2),
+        "p99_ms": round(percentile(all_lat, 99) * 1000, 2),
+        "queries_per_request": round(sum(all_q) / len(all_q), 2) if all_q else None,
+    }
+    return {"elapsed_s": round(elapsed, 2), "total": total, "ops": ops}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(old: dict, new: dict) -> List[str]:
+    """Zeilen mit den Veränderungen (in %) von old -> new je Operation."""
+    def delta(a, b):
+        if not a:
+            return "   n/a"
+        return f"{(b - a) / a * 100:+6.1f}%"
+
+    lines = [f"{old.get('commit')} -> {new.get('commit')}"]
+    for op in ["total"] + sorted(set(old["ops"]) | set(new["ops"])):
+        a = old["total"] if op == "total" else old["ops"].get(op)
+        b = new["total"] if op == "total" else new["ops"].get(op)
+        if not a or not b:
+            continue
+        lines.append(
+            f"{op:<9} rps {a['rps']:>8} -> {b['rps']:<8} ({delta(a['rps'], b['rps'])})  "
+            f"p95 {a['p95_ms']:>7} -> {b['p95_ms']:<7} ({delta(a['p95_ms'], b['p95_ms'])})  "
+            f"p99 {a['p99_ms']:>7} -> {b['p99_ms']:<7} ({delta(a['p99_ms'], b['p99_ms'])})"
+        )
+    return lines
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Lasttest für die HTTP-API")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run")
+    r.add_argument("--url", default="http://127.0.0.1:5000")
+    r.add_argument("--duration", type=float, default=30)
+    r.add_argument("--warmup", type=float, default=3)
+    r.add_argument("--concurrency", type=int, default=32)
+    r.add_argument("--mix", default=None, help="z.B. list=50,search=20,book=10 (Standard: DEFAULT_MIX)")
+    r.add_argument("--users", type=int, default=200, help="eingeloggte Käufer")
+    r.add_argument("--organizers", type=int, default=20, help="eingeloggte Organizer")
+    r.add_argument("--seed", type=int, default=1)
+    r.add_argument("--label", default="", help="frei wählbarer Name des Laufs (z.B. sync/async)")
+    r.add_argument("--out", default="bench-results", help="Verzeichnis für die JSON-Ergebnisse")
+
+    c = sub.add_parser("compare")
+    c.add_argument("old")
+    c.add_argument("new")
+
+    args = ap.parse_args(argv)
+
+    if args.cmd == "compare":
+        with open(args.old) as f_old, open(args.new) as f_new:
+            print("\n".join(compare(json.load(f_old), json.load(f_new))))
+        return
+
+    mix = parse_mix(args.mix)
+    result = asyncio.run(run(args.url, args.duration, args.concurrency, mix, args.warmup,
+                             args.users, args.organizers, args.seed))
+    result.update(
+        commit=git_commit(), label=args.label, url=args.url, started=datetime.now().isoformat(timespec="seconds"),
+        config={"duration": args.duration, "concurrency": args.concurrency, "mix": mix,
+                "users": args.users, "organizers": args.organizers, "seed": args.seed},
+    )
+
+    for op, s in [("total", result["total"])] + sorted(result["ops"].items()):
+        print(f"{op:<9} n={s['count']:<7} rps={s['rps']:<8} p50={s['p50_ms']}ms p95={s['p95_ms']}ms "
+              f"p99={s['p99_ms']}ms q/req={s['queries_per_request']} errors={s['errors']}")
+
+    os.makedirs(args.out, exist_ok=True)
+    name = f"{datetime.now():%Y%m%d-%H%M%S}_{result['commit']}{'_' + args.label if args.label else ''}.json"
+    path = os.path.join(args.out, name)
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"-> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# Login-Durchsatz und wie stark Logins andere Routen ausbremsen.
+#
+#   # nur der Hasher, ohne Server: Inline (im Thread) vs. Prozesspool
+#   python -m src.bench.login hasher --workers 0,2,4 --concurrency 16 --logins 400
+#
+#   # gegen einen laufenden Server (mit src.bench.seed befüllt):
+#   python -m src.bench.login http --url http://127.0.0.1:5000 --concurrency 32 --duration 20
+#
+# In beiden Fällen läuft nebenher eine "Probe" (kurze Aufgabe bzw. GET --probe-path), deren
+# Latenz zeigt, ob das Hashen die übrigen Requests verhungern lässt.
+# Für den HTTP-Lauf die Drossel ggf. lockern (alle Requests kommen von einer IP), z.B.
+# LOGIN_MAX_FAILURES_IP=0; gemessen werden nur gültige Logins.
+import argparse
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+from src.passwords import PasswordHasher
+from .client import Connection
+from .loadtest import load_fixture
+from .seed import BENCH_PASSWORD
+from .serving import summarize
+
+
+def _probe_work() -> None:
+    # ~0.1 ms reines Python: braucht den GIL wie ein normaler Request-Handler
+    sum(i * i for i in range(2000))
+
+
+def bench_hasher(method: str, workers: int, concurrency: int, logins: int) -> Dict:
+    hasher = PasswordHasher(method, workers, max_pending=concurrency, timeout=60)
+    pwhash = hasher.hash(BENCH_PASSWORD)  # startet auch den Pool (nicht mitgemessen)
+    todo = list(range(logins))
+    lock = threading.Lock()
+    latencies: List[float] = []
+    probe: List[float] = []
+    done = threading.Event()
+
+    def client():
+        while True:
+            with lock:
+                if not todo:
+                    return
+                todo.pop()
+            t0 = time.perf_counter()
+            hasher.verify(pwhash, BENCH_PASSWORD)
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+
+    def prober():
+        while not done.is_set():
+            t0 = time.perf_counter()
+            _probe_work()
+            probe.append(time.perf_counter() - t0)
+            time.sleep(0.005)
+
+    p = threading.Thread(target=prober)
+    p.start()
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    done.set()
+    p.join()
+    hasher.shutdown()
+    return {"workers": workers, "logins": summarize(latencies, 0, elapsed), "probe": summarize(probe, 0, elapsed)}
+
+
+async def bench_http(base: str, concurrency: int, duration: float, probe_path: str, probes: int,
+                     users: int) -> Dict:
+    emails = load_fixture(users, 1)["users"]
+    statuses: Counter = Counter()
+    latencies: List[float] = []
+    probe: List[float] = []
+    until = time.perf_counter() + duration
+
+    async def login_client(i: int):
+        con = Connection(base)
+        n = i
+        while time.perf_counter() < until:
+            n += concurrency
+            t0 = time.perf_counter()
+            try:
+                status, _, _ = await con.request("POST", "/api/login",
+                                                 {"email": emails[n % len(emails)], "password": BENCH_PASSWORD})
+            except (OSError, ConnectionError, ValueError, asyncio.IncompleteReadError):
+                status = 0
+            statuses[status] += 1
+            if status == 200:
+                latencies.append(time.perf_counter() - t0)
+        con.close()
+
+    async def probe_client():
+        con = Connection(base)
+        while time.perf_counter() < until:
+            t0 = time.perf_counter()
+            try:
+                await con.request("GET", probe_path)
+                probe.append(time.perf_counter() - t0)
+            except (OSError, ConnectionError, ValueError, asyncio.IncompleteReadError):
+                pass
+            await asyncio.sleep(0.01)
+        con.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[login_client(i) for i in range(concurrency)], *[probe_client() for _ in range(probes)])
+    elapsed = time.perf_counter() - t0
+    return {"logins": summarize(latencies, 0, elapsed), "statuses": dict(statuses),
+            "probe": summarize(probe, 0, elapsed)}
+
+
+def _line(name: str, s: Dict) -> str:
+    return f"{name:<8} n={s['requests']:<6} rps={s['rps']:<8} p50={s['p50_ms']}ms p95={s['p95_ms']}ms p99={s['p99_ms']}ms"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Login-Benchmark (Passwort-Hashing)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    h = sub.add_parser("hasher")
+    h.add_argument("--method", default="scrypt")
+    h.add_argument("--workers", default="0,2,4", help="kommagetrennt, 0 = im Thread")
+    h.add_argument("--concurrency", type=int, default=16)
+    h.add_argument("--logins", type=int, default=400)
+
+    r = sub.add_parser("http")
+    r.add_argument("--url", default="http://127.0.0.1:5000")
+    r.add_argument("--concurrency", type=int, default=32)
+    r.add_argument("--duration", type=float, default=20)
+    r.add_argument("--probe-path", default="/api/event?limit=20")
+    r.add_argument("--probes", type=int, default=4)
+    r.add_argument("--users", type=int, default=200)
+
+    for p in (h, r):
+        p.add_argument("--json", dest="as_json", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "hasher":
+        results = [bench_hasher(args.method, int(w), args.concurrency, args.logins)
+                   for w in args.workers.split(",")]
+        if args.as_json:
+            print(json.dumps(results, indent=2))
+            return
+        for res in results:
+            print(f"workers={res['workers']}")
+            print("  " + _line("logins", res["logins"]))
+            print("  " + _line("probe", res["probe"]))
+        return
+
+    res = asyncio.run(bench_http(args.url, args.concurrency, args.duration, args.probe_path, args.probes, args.users))
+    if args.as_json:
+        print(json.dumps(res, indent=2))
+        return
+    print(_line("logins", res["logins"]), "statuses", res["statuses"])
+    print(_line("probe", res["probe"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# Befüllt die lokale DB für Benchmarks (auf Basis von db/data.sql).
+#
+#   python -m src.bench.seed --users 5000 --organizers 100 --events 2000 --bookings 50000 --reviews 10000
+#
+# Alle erzeugten Accounts (auch die aus data.sql) haben das Passwort BENCH_PASSWORD,
+# E-Mails bench<i>@example.com (Organizer: die ersten --organizers User).
+# --reset leert vorher ALLE Tabellen der konfigurierten Datenbank.
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from werkzeug.security import generate_password_hash
+
+from src.db_api import connect
+from src.migrations import split_statements
+
+BENCH_PASSWORD = "bench-pw"
+DATA_SQL = os.path.join(os.path.dirname(__file__), "..", "db", "data.sql")
+
+BATCH = 1000
+
+TOPICS = ["Rock", "Jazz", "Techno", "Python", "Kunst", "Theater", "Startup", "Yoga", "Wein", "Film",
+           "Klassik", "Comedy", "Data", "Foto", "Lesung", "Kochen"]
+KINDS = ["Festival", "Meetup", "Workshop", "Konzert", "Abend", "Konferenz", "Tour", "Kurs"]
+CITIES = ["Mainz", "Berlin", "Hamburg", "München", "Köln", "Frankfurt", "Leipzig", "Online"]
+
+# Tabellen in Lösch-Reihenfolge für --reset (Kinder zuerst)
+_TABLES = ["conversation_member", "message_counter", "feed_item", "feed_large_organizer",
+           "event_daily_stats", "organizer_daily_stats", "analytics_state", "analytics_version",
+           "booking_audit", "reviews", "booking", "watchlist", "event_image", "event_subscription",
+           "organizer_subscription", "subscription", "messages", "event_categorie", "event",
+           "categorie", "session_revocation", "session", "change_stamp", "organizer", "user"]
+
+
+def _insert_many(cur, sql: str, rows: List[tuple]) -> None:
+    for i in range(0, len(rows), BATCH):
+        cur.executemany(sql, rows[i:i + BATCH])
+
+
+def _ids(cur, sql: str, args=None) -> List[int]:
+    cur.execute(sql, args)
+    return [r["id"] for r in cur.fetchall()]
+
+
+def reset(cur) -> None:
+    cur.execute("SET FOREIGN_KEY_CHECKS=0")
+    try:
+        for table in _TABLES:
+            cur.execute(f"TRUNCATE TABLE {table}")
+    finally:
+        cur.execute("SET FOREIGN_KEY_CHECKS=1")
+
+
+def load_sample_data(cur, password_hash: str) -> None:
+    """db/data.sql einspielen (falls noch nicht da) und dessen Platzhalter-Passwörter ersetzen."""
+    cur.execute("SELECT 1 FROM user WHERE email='alice@example.com'")
+    if not cur.fetchone():
+        with open(DATA_SQL, encoding="utf-8") as f:
+            for stmt in split_statements(f.read()):
+                if not stmt.upper().startswith("USE "):
+                    cur.execute(stmt)
+    cur.execute("UPDATE user SET password=%s WHERE password LIKE 'hash-%%'", (password_hash,))
+
+
+def seed(cur, users: int, organizers: int, events: int, bookings: int, reviews: int,
+         categories: int = 20, rng: random.Random = None) -> Dict[str, int]:
+    rng = rng or random.Random(42)
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    load_sample_data(cur, password_hash)
+
+    cur.execute("SELECT COUNT(*) AS n FROM user WHERE email LIKE 'bench%@example.com'")
+    offset = cur.fetchone()["n"]
+
+    # Kategorien als Baum (jede hängt an einer früheren oder ist Wurzel)
+    cur.execute("SELECT COUNT(*) AS n FROM categorie")
+    first = cur.fetchone()["n"]
+    for i in range(categories):
+        parents = _ids(cur, "SELECT id FROM categorie")
+        parent = rng.choice(parents) if parents and rng.random() < 0.6 else None
+        cur.execute("INSERT INTO categorie(name, parent_id) VALUES(%s,%s)", (f"Kategorie {first + i + 1}", parent))
+    category_ids = _ids(cur, "SELECT id FROM categorie")
+
+    _insert_many(cur, "INSERT INTO user(full_name, email, password) VALUES(%s,%s,%s)", [
+        (f"Bench User {offset + i}", f"bench{offset + i}@example.com", password_hash) for i in range(users)
+    ])
+    new_users = _ids(cur, "SELECT id FROM user WHERE email LIKE 'bench%@example.com' ORDER BY id")[offset:]
+    org_ids = new_users[:organizers]
+    _insert_many(cur, "INSERT INTO organizer(user_id, company) VALUES(%s,%s)",
+                 [(uid, f"Bench Events {uid}") for uid in org_ids])
+
+    now = datetime.now().replace(microsecond=0)
+    event_rows = []
+    for _ in range(events):
+        start = now + timedelta(days=rng.randint(-30, 365), hours=rng.randint(8, 21))
+        topic, kind = rng.choice(TOPICS), rng.choice(KINDS)
+        event_rows.append((
+            rng.choice(org_ids), f"{topic} {kind}", f"{kind} rund um {topic} – {rng.choice(TOPICS)} inklusive",
+            rng.choice(CITIES), start, start + timedelta(hours=rng.randint(1, 6)),
+            rng.choice([0, 500, 1500, 2500, 4900, 9900]), rng.choice([20, 50, 100, 250, 1000]),
+        ))
+    cur.execute("SELECT COALESCE(MAX(id), 0) AS m FROM event")
+    last_event = cur.fetchone()["m"]
+    _insert_many(cur, """
+        INSERT INTO event(organizer_id, title, description, location, start_date, end_date, price_in_cents, capacity)
+        VALUES(%s,%s,%s,%s,%s,%s,%s,%s)
+    """, event_rows)
+    event_caps = {r["id"]: r["capacity"] for r in _capacities(cur, last_event)}
+    event_ids = list(event_caps)
+
+    _insert_many(cur, "INSERT IGNORE INTO event_categorie(event_id, category_id) VALUES(%s,%s)", [
+        (eid, cid) for eid in event_ids for cid in rng.sample(category_ids, min(2, len(category_ids)))[:rng.randint(1, 2)]
+    ])
+
+    # Buchungen: höchstens eine pro (User, Event), Kapazität wird eingehalten
+    buyers = new_users[organizers:] or new_users
+    booking_rows, taken, used = [], set(), dict.fromkeys(event_ids, 0)
+    for _ in range(bookings * 2):
+        if len(booking_rows) >= bookings:
+            break
+        uid, eid = rng.choice(buyers), rng.choice(event_ids)
+        qty = rng.randint(1, 4)
+        if (uid, eid) in taken or used[eid] + qty > event_caps[eid]:
+            continue
+        taken.add((uid, eid))
+        status = rng.choices(["pending", "paid", "cancelled"], [40, 50, 10])[0]
+        if status != "cancelled":
+            used[eid] += qty
+        booking_rows.append((uid, eid, qty, status))
+    _insert_many(cur, "INSERT INTO booking(user_id, event_id, qty, status) VALUES(%s,%s,%s,%s)", booking_rows)
+
+    paid = [(u, e) for u, e, _, s in booking_rows if s == "paid"]
+    review_rows = [(u, e, rng.randint(1, 5), rng.choice(["", "super", "ok", "nie wieder"]))
+                   for u, e in rng.sample(paid, min(reviews, len(paid)))]
+    _insert_many(cur, "INSERT IGNORE INTO reviews(user_id, event_id, rating, comment) VALUES(%s,%s,%s,%s)",
+                 review_rows)
+
+    # Zähler wie in Migration 0001 aus booking neu berechnen
+    cur.execute("""
+        UPDATE event e
+        SET e.paid_qty    = (SELECT COALESCE(SUM(qty),0) FROM booking b WHERE b.event_id = e.id AND b.status = 'paid'),
+            e.pending_qty = (SELECT COALESCE(SUM(qty),0) FROM booking b WHERE b.event_id = e.id AND b.status = 'pending')
+    """)
+    return {"users": len(new_users), "organizers": len(org_ids), "events": len(event_ids),
+            "bookings": len(booking_rows), "reviews": len(review_rows), "categories": categories}
+
+
+def _capacities(cur, after_id: int):
+    cur.execute("SELECT id, capacity FROM event WHERE id > %s ORDER BY id", (after_id,))
+    return cur.fetchall()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark-Daten erzeugen")
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--organizers", type=int, default=50)
+    ap.add_argument("--events", type=int, default=1000)
+    ap.add_argument("--bookings", type=int, default=20000)
+    ap.add_argument("--reviews", type=int, default=5000)
+    ap.add_argument("--categories", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=42, help="Zufalls-Seed (gleiche Daten bei gleichem Seed)")
+    ap.add_argument("--reset", action="store_true", help="vorher ALLE Tabellen leeren")
+    args = ap.parse_args(argv)
+
+    con = connect()
+    try:
+        with con.cursor() as cur:
+            if args.reset:
+                reset(cur)
+            t0 = time.perf_counter()
+            counts = seed(cur, args.users, args.organizers, args.events, args.bookings, args.reviews,
+                          args.categories, random.Random(args.seed))
+        print(", ".join(f"{k}={v}" for k, v in counts.items()) + f" in {time.perf_counter() - t0:.1f}s")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Vergleich sync (WSGI) vs. async (ASGI) bei vielen gleichzeitigen Clients.
+#
+# Server vorher getrennt starten, z.B.:
+#   sync:  gunicorn -w 1 --threads 32 -b 127.0.0.1:5000 src.app:app
+#   async: uvicorn --workers 1 --port 8000 src.asgi:app
+# dann:
+#   python -m src.bench.serving --url sync=http://127.0.0.1:5000 --url async=http://127.0.0.1:8000 \
+#          --path "/api/event?limit=20" --concurrency 50,200,1000 --requests 20000
+#
+# Der Client ist reines asyncio (keine Threads), damit er selbst bei tausenden
+# Verbindungen nicht zum Flaschenhals wird.
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+
+from .client import Connection
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """p-Quantil (0..100) einer aufsteigend sortierten Liste, nearest-rank."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    lat = sorted(latencies)
+    return {
+        "requests": len(lat) + errors,
+        "errors": errors,
+        "rps": round(len(lat) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(lat, 50) * 1000, 2),
+        "p95_ms": round(percentile(lat, 95) * 1000, 2),
+        "p99_ms": round(percentile(lat, 99) * 1000, 2),
+        "max_ms": round((lat[-1] if lat else 0) * 1000, 2),
+    }
+
+
+async def _client(base: str, path: str, todo: List[int], latencies: List[float],
+                  errors: List[int], cookie: Optional[str]) -> None:
+    con = Connection(base)
+    while todo:
+        todo.pop()
+        try:
+            t0 = time.perf_counter()
+            status, _, _ = await con.request("GET", path, cookie=cookie)
+            if status >= 500:
+                errors[0] += 1
+            else:
+                latencies.append(time.perf_counter() - t0)
+        except (OSError, ConnectionError, ValueError, asyncio.IncompleteReadError):
+            errors[0] += 1
+    con.close()
+
+
+async def run(base: str, path: str, concurrency: int, requests: int, cookie: Optional[str] = None) -> Dict:
+    todo = list(range(requests))
+    latencies: List[float] = []
+    errors = [0]
+    t0 = time.perf_counter()
+    await asyncio.gather(*[
+        _client(base, path, todo, latencies, errors, cookie) for _ in range(concurrency)
+    ])
+    return summarize(latencies, errors[0], time.perf_counter() - t0)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Sync vs. Async Serving-Benchmark")
+    ap.add_argument("--url", action="append", required=True, help="name=http://host:port (mehrfach)")
+    ap.add_argument("--path", default="/api/event?limit=20")
+    ap.add_argument("--concurrency", default="50,200,1000", help="kommagetrennte Stufen")
+    ap.add_argument("--requests", type=int, default=10000, help="Requests pro Stufe")
+    ap.add_argument("--cookie", default=None, help="Session-Token für eingeloggte Routen")
+    ap.add_argument("--json", dest="as_json", action="store_true")
+    args = ap.parse_args(argv)
+
+    results = []
+    for spec in args.url:
+        name, _, base = spec.partition("=")
+        for c in (int(x) for x in args.concurrency.split(",")):
+            r = asyncio.run(run(base, args.path, c, args.requests, args.cookie))
+            r.update(target=name, concurrency=c)
+            results.append(r)
+            if not args.as_json:
+                print(f"{name:>6} c={c:<5} rps={r['rps']:<8} p50={r['p50_ms']}ms "
+                      f"p95={r['p95_ms']}ms p99={r['p99_ms']}ms errors={r['errors']}")
+    if args.as_json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
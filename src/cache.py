@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+
+# Rückgabewert von get(), wenn nichts (gültiges) im Cache liegt.
+# Damit kann auch None gecacht werden (z.B. "Token unbekannt").
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-sicherer In-Process-Cache mit LRU-Verdrängung und TTL pro Eintrag.
+
+    Einträge können mit Tags versehen werden, um mehrere Keys gezielt auf einmal
+    zu invalidieren (z.B. alle Sessions eines Users).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, expires, tags)
+        self._tags: dict = {}                                         # tag -> set(keys)
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._stats["misses"] += 1
+                return default
+            value, expires, _ = item
+            if expires <= time.monotonic():
+                self._remove_locked(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[Hashable] = ()) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            self.pop(key)
+            return
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._data:
+                self._remove_locked(key)
+            self._data[key] = (value, time.monotonic() + ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                oldest = next(iter(self._data))
+                self._remove_locked(oldest)
+                self._stats["evictions"] += 1
+
+    def pop(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            self._remove_locked(key)
+            self._stats["invalidations"] += 1
+            return item[0]
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        """Entfernt alle Einträge mit diesem Tag, gibt die Anzahl zurück."""
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove_locked(key)
+            self._stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats["invalidations"] += len(self._data)
+            self._data.clear()
+            self._tags.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            s["size"] = len(self._data)
+            s["maxsize"] = self.maxsize
+        lookups = s["hits"] + s["misses"]
+        s["hit_ratio"] = round(s["hits"] / lookups, 4) if lookups else 0.0
+        return s
+
+    def _remove_locked(self, key: Hashable) -> None:
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
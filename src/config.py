@@ -12,4 +12,137 @@ DB = {
 
 LOG_DIR = "logs"
 
-os.makedirs(LOG_DIR, exist_ok=True)
\ No newline at end of file
+os.makedirs(LOG_DIR, exist_ok=True)
+
+DB_POOL = {
+    "min_size": int(os.getenv("DB_POOL_MIN", "1")),
+    "max_size": int(os.getenv("DB_POOL_MAX", "10")),
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+    "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+    "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+    "ping_after": float(os.getenv("DB_POOL_PING_AFTER", "30")),
+}
+
+SESSION_CACHE = {
+    "maxsize": int(os.getenv("SESSION_CACHE_SIZE", "10000")),
+    "ttl": float(os.getenv("SESSION_CACHE_TTL", "60")),
+    "negative_size": int(os.getenv("SESSION_CACHE_NEGATIVE_SIZE", "10000")),
+    "negative_ttl": float(os.getenv("SESSION_CACHE_NEGATIVE_TTL", "10")),
+}
+
+EVENT_CACHE = {
+    "maxsize": int(os.getenv("EVENT_CACHE_SIZE", "512")),
+    "ttl": float(os.getenv("EVENT_CACHE_TTL", "30")),
+    "overlay_maxsize": int(os.getenv("EVENT_CACHE_OVERLAY_SIZE", "4096")),
+    # Versionsstempel für GET /api/event höchstens so alt (Sekunden); Änderungen aus anderen
+    # Prozessen werden spätestens danach sichtbar, lokale sofort
+    "stamp_interval": float(os.getenv("EVENT_STAMP_INTERVAL", "1")),
+}
+
+INSTRUMENTATION = {
+    # Statements ab dieser Dauer werden einzeln geloggt
+    "slow_query_ms": float(os.getenv("SLOW_QUERY_MS", "200")),
+    # max. verschiedene (normalisierte) Statements in /metrics
+    "max_statements": int(os.getenv("METRICS_MAX_STATEMENTS", "500")),
+    # Stichproben-Profiling: "endpoint:rate,..." z.B. "list_event:0.05,organizer_bookings_api"
+    "profile_routes": os.getenv("PROFILE_ROUTES", ""),
+    "profile_dir": os.getenv("PROFILE_DIR", os.path.join(LOG_DIR, "profiles")),
+    # Zugriff auf /metrics: Bearer-Token und/oder Adressen (hinter einem Proxy auf demselben Host
+    # kommt alles von 127.0.0.1 -> dort METRICS_ALLOW_IPS="" setzen und nur das Token benutzen)
+    "metrics_token": os.getenv("METRICS_TOKEN", ""),
+    "metrics_allow_ips": {ip.strip() for ip in os.getenv("METRICS_ALLOW_IPS", "127.0.0.1,::1").split(",") if ip.strip()},
+}
+
+LOGGING = {
+    "level": os.getenv("LOG_LEVEL", "INFO"),
+    "file": os.getenv("LOG_FILE", os.path.join(LOG_DIR, "app.log")),
+    # Rotation: zum Zeitpunkt (midnight, H, ...) und zusätzlich ab max_bytes
+    "when": os.getenv("LOG_ROTATE_WHEN", "midnight"),
+    "max_bytes": int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024))),
+    "backup_count": int(os.getenv("LOG_BACKUP_COUNT", "14")),
+    # max. wartende Records; ist die Queue voll, wird verworfen statt blockiert
+    "queue_size": int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+    # Stichprobe für INFO-Logs mit hohem Volumen: "logger:rate,..." (WARNING+ immer)
+    "sample": os.getenv("LOG_SAMPLE", "perf:0.1"),
+    "stderr": os.getenv("LOG_STDERR", "0") == "1",
+}
+
+IMAGES = {
+    # Originale + Thumbnails (content-adressiert, siehe services/image_service.py)
+    "dir": os.getenv("MEDIA_DIR", "media"),
+    "max_bytes": int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024))),
+    "max_pixels": int(os.getenv("IMAGE_MAX_PIXELS", "40000000")),
+    "thumb_sizes": os.getenv("IMAGE_THUMB_SIZES", "160,320,640"),
+    # URLs enthalten den Inhalts-Hash -> Antworten ändern sich nie
+    "max_age": int(os.getenv("IMAGE_MAX_AGE", str(365 * 24 * 3600))),
+}
+
+ANALYTICS = {
+    # Dashboards stoßen höchstens so oft einen (inkrementellen) Rollup-Refresh an
+    "refresh_seconds": float(os.getenv("ANALYTICS_REFRESH_SECONDS", "60")),
+    # Events pro Refresh-Transaktion
+    "batch": int(os.getenv("ANALYTICS_BATCH", "500")),
+    # spät committete Buchungen/Reviews: so viele IDs bzw. Sekunden vor dem Wasserstand erneut prüfen
+    "overlap_ids": int(os.getenv("ANALYTICS_OVERLAP_IDS", "1000")),
+    "overlap_seconds": int(os.getenv("ANALYTICS_OVERLAP_SECONDS", "300")),
+    # gerenderte Charts (Key enthält die Datenversion -> kein Ablauf nötig)
+    "chart_cache_size": int(os.getenv("ANALYTICS_CHART_CACHE_SIZE", "256")),
+    "default_days": int(os.getenv("ANALYTICS_DEFAULT_DAYS", "90")),
+}
+
+FEED = {
+    # Organizer mit mehr Followern bekommen kein Fan-out mehr, sondern werden beim Lesen gemischt
+    "fanout_limit": int(os.getenv("FEED_FANOUT_LIMIT", "1000")),
+    "cache_size": int(os.getenv("FEED_CACHE_SIZE", "10000")),
+    "ttl": float(os.getenv("FEED_CACHE_TTL", "30")),
+}
+
+MESSAGES = {
+    "max_body": int(os.getenv("MESSAGE_MAX_BODY", "5000")),
+    # Long-Poll/SSE: so lange wird höchstens auf eine Benachrichtigung gewartet
+    "poll_timeout": float(os.getenv("MESSAGE_POLL_TIMEOUT", "25")),
+    "max_poll_timeout": float(os.getenv("MESSAGE_MAX_POLL_TIMEOUT", "60")),
+}
+
+PASSWORDS = {
+    # Werkzeug-Methode inkl. Kosten, z.B. "scrypt:32768:8:1" oder "pbkdf2:sha256:600000";
+    # ältere Hashes werden beim nächsten Login mit diesen Parametern neu berechnet
+    "method": os.getenv("PASSWORD_HASH_METHOD", "scrypt"),
+    # Prozesse für das Hashen (0 = im Request-Thread rechnen)
+    "workers": int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))),
+    # gleichzeitige Aufträge (laufend + wartend); darüber 503 mit Retry-After
+    "max_pending": int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32")),
+    "timeout": float(os.getenv("PASSWORD_HASH_TIMEOUT", "5")),
+}
+
+LOGIN_THROTTLE = {
+    # Fehlversuche je Fenster, 0 = keine Grenze
+    "max_account": int(os.getenv("LOGIN_MAX_FAILURES_ACCOUNT", "5")),
+    "max_ip": int(os.getenv("LOGIN_MAX_FAILURES_IP", "50")),
+    "window": float(os.getenv("LOGIN_THROTTLE_WINDOW", "900")),
+}
+
+SESSIONS = {
+    # "db": Token in der session-Tabelle; "signed": signierte Tokens ohne DB-Lookup (braucht secret)
+    "mode": os.getenv("SESSION_MODE", "db"),
+    "secret": os.getenv("SESSION_SECRET", ""),
+    "max_age": int(os.getenv("SESSION_MAX_AGE", str(7 * 24 * 3600))),
+    # abgelaufene Sessions löschen (Sekunden, 0 = nur per CLI "flask sessions-sweep")
+    "sweep_interval": float(os.getenv("SESSION_SWEEP_INTERVAL", "600")),
+    "sweep_batch": int(os.getenv("SESSION_SWEEP_BATCH", "1000")),
+    # Abmeldungen anderer Prozesse spätestens nach so vielen Sekunden übernehmen (signed)
+    "revocation_sync": float(os.getenv("SESSION_REVOCATION_SYNC", "2")),
+}
+
+CATEGORIES = {
+    # so oft wird per Fingerprint geprüft, ob sich categorie geändert hat (Sekunden)
+    "check_interval": float(os.getenv("CATEGORY_CHECK_INTERVAL", "30")),
+    "max_age": int(os.getenv("CATEGORY_MAX_AGE", "60")),
+}
+
+HTTP = {
+    # Antworten ab dieser Größe (Bytes) werden komprimiert (brotli falls installiert, sonst gzip)
+    "compress_min_size": int(os.getenv("HTTP_COMPRESS_MIN_SIZE", "1024")),
+    "gzip_level": int(os.getenv("HTTP_GZIP_LEVEL", "6")),
+    "brotli_quality": int(os.getenv("HTTP_BROTLI_QUALITY", "5")),
+}
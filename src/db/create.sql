@@ -31,10 +31,18 @@ CREATE TABLE event (
   end_date DATETIME NOT NULL,
   price_in_cents INT NOT NULL,
   capacity INT NOT NULL,
+  -- bewusst denormalisiert: SUM(booking.qty) je Status, transaktional von den Services gepflegt
+  -- (Abgleich: flask --app src.app reconcile-counters)
+  paid_qty INT NOT NULL DEFAULT 0,
+  pending_qty INT NOT NULL DEFAULT 0,
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  -- Versionsstempel für ETag/Last-Modified (ändert sich auch mit den Zählern)
+  updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
   FOREIGN KEY (organizer_id) REFERENCES user(id),
   CHECK (price_in_cents >= 0),
-  CHECK (capacity >= 0)
+  CHECK (capacity >= 0),
+  CHECK (paid_qty >= 0),
+  CHECK (pending_qty >= 0)
 );
 
 -- Self-ref 1:n (categorie.parent → categorie.child). Rollen: parent / child.
@@ -60,14 +68,18 @@ CREATE TABLE event_categorie (
 
 -- n:1 + n:1 (booking → user[booker], booking → event). Rolle: booker bucht event.
 -- BOOKING: 3NF/BCNF. Determinant = id (Surrogat-PK).
--- qty/status hängen nur von id. (Optional: UNIQUE(user_id, event_id) verhindert Mehrfachbuchungen.)
+-- qty/status hängen nur von id.
+-- active ist 1 für pending/paid, sonst NULL → UNIQUE(user_id, event_id, active) erlaubt
+-- genau eine aktive Buchung pro User/Event, beliebig viele stornierte (NULL kollidiert nicht).
 CREATE TABLE booking (
   id INT AUTO_INCREMENT PRIMARY KEY,
   user_id INT NOT NULL,
   event_id INT NOT NULL,
   qty INT NOT NULL,
   status VARCHAR(20) NOT NULL DEFAULT 'pending',
+  active TINYINT AS (IF(status IN ('pending','paid'), 1, NULL)) STORED,
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE KEY uq_booking_active (user_id, event_id, active),
   FOREIGN KEY (user_id)  REFERENCES user(id),
   FOREIGN KEY (event_id) REFERENCES event(id) ON DELETE CASCADE,
   CHECK (qty > 0)
@@ -109,10 +121,34 @@ CREATE TABLE messages (
   recipient_id INT NOT NULL,
   body TEXT NOT NULL,
   created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  -- Paar unabhängig von der Richtung (Verlauf = ein Range-Scan über idx_messages_pair)
+  user_lo INT AS (LEAST(sender_id, recipient_id)) STORED,
+  user_hi INT AS (GREATEST(sender_id, recipient_id)) STORED,
   FOREIGN KEY (sender_id)    REFERENCES user(id) ON DELETE CASCADE,
   FOREIGN KEY (recipient_id) REFERENCES user(id) ON DELETE CASCADE
 );
 
+-- Inbox-Zeile je (User, Gesprächspartner): letzte Nachricht + Ungelesen-Zähler.
+-- Bewusst redundant zu messages, damit die Inbox kein GROUP BY über alle Nachrichten braucht.
+CREATE TABLE conversation_member (
+  user_id INT NOT NULL,
+  peer_id INT NOT NULL,
+  last_message_id INT NOT NULL,
+  last_read_id INT NOT NULL DEFAULT 0,
+  unread INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, peer_id),
+  KEY idx_member_inbox (user_id, last_message_id),
+  FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE,
+  FOREIGN KEY (peer_id) REFERENCES user(id) ON DELETE CASCADE
+);
+
+-- ungelesene Nachrichten gesamt pro User (Badge ohne COUNT(*))
+CREATE TABLE message_counter (
+  user_id INT PRIMARY KEY,
+  unread INT NOT NULL DEFAULT 0,
+  FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE
+);
+
 -- m:n (user[follower] ↔ user[organizer]). Rollen: follower folgt organizer.
 CREATE TABLE subscription (
   follower_id INT NOT NULL,
@@ -124,12 +160,17 @@ CREATE TABLE subscription (
 );
 
 -- n:1 (event_image → event). Rolle: event hat viele images.
--- EVENT_IMAGE: 3NF/BCNF. Determinant = id; Daten liegen nur einmal (LONGBLOB) → keine Redundanz.
+-- EVENT_IMAGE: 3NF/BCNF. Determinant = id; Bytes liegen content-adressiert im Dateisystem (sha256),
+-- data (LONGBLOB) nur noch für Altbestand, der beim ersten Zugriff übernommen wird.
 CREATE TABLE event_image (
   id INT AUTO_INCREMENT PRIMARY KEY,
   event_id INT NOT NULL,
   mime_type VARCHAR(100) NOT NULL,
-  data LONGBLOB NOT NULL,
+  data LONGBLOB NULL,
+  sha256 CHAR(64) NULL,
+  size INT NULL,
+  width INT NULL,
+  height INT NULL,
   uploaded_at DATETIME DEFAULT CURRENT_TIMESTAMP,
   FOREIGN KEY (event_id) REFERENCES event(id) ON DELETE CASCADE
 );
@@ -157,6 +198,21 @@ CREATE TABLE session (
   FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE
 );
 
+-- Zeitpunkt der letzten Löschung je Bereich (z.B. event_deleted), Teil der ETags
+CREATE TABLE change_stamp (
+  name VARCHAR(40) PRIMARY KEY,
+  changed_at DATETIME(6) NOT NULL
+);
+
+-- abgemeldete signierte Session-Tokens (src/sessions.py); Zeilen leben bis zum Token-Ablauf
+CREATE TABLE session_revocation (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  jti CHAR(16) NOT NULL,
+  expires_at DATETIME NOT NULL,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  KEY idx_session_revocation_exp (expires_at)
+);
+
 -- user(follower) folgt user(organizer)
 -- ORGANIZER_SUBSCRIPTION: BCNF. Komposit-PK (follower_id, organizer_id) ist alleiniger Determinant.
 -- created_at hängt vom ganzen Schlüssel.
@@ -184,9 +240,94 @@ CREATE TABLE event_subscription (
   CONSTRAINT fk_eventsub_event    FOREIGN KEY (event_id)    REFERENCES event(id) ON DELETE CASCADE
 ) COMMENT='n:m — follower → event';
 
--- Indizes
-CREATE INDEX idx_users_email            ON user(email);
+-- Feed "Demnächst von Organizern, denen ich folge" (services/feed_service.py), abgeleitet aus
+-- organizer_subscription + event; start_date bewusst redundant für die Sortierung per PK.
+-- Fan-out-Ziel: ein Eintrag pro (Follower, Event) kleiner Organizer, Seiten per PK-Range
+CREATE TABLE feed_item (
+  user_id INT NOT NULL,
+  start_date DATETIME NOT NULL,
+  event_id INT NOT NULL,
+  organizer_id INT NOT NULL,
+  PRIMARY KEY (user_id, start_date, event_id),
+  KEY idx_feed_item_event (event_id),
+  KEY idx_feed_item_user_organizer (user_id, organizer_id),
+  FOREIGN KEY (user_id)  REFERENCES user(id)  ON DELETE CASCADE,
+  FOREIGN KEY (event_id) REFERENCES event(id) ON DELETE CASCADE
+);
+
+-- Organizer mit zu vielen Followern für Fan-out (Events werden beim Lesen gemischt)
+CREATE TABLE feed_large_organizer (
+  organizer_id INT PRIMARY KEY,
+  since DATETIME DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (organizer_id) REFERENCES user(id) ON DELETE CASCADE
+);
+
+-- Analytics-Rollups (FR-Eo-05): Tageswerte je Event/Organizer, gepflegt von services/analytics_service.py.
+-- Abgeleitete Daten (bewusst denormalisiert), jederzeit aus booking/reviews neu berechenbar.
+CREATE TABLE event_daily_stats (
+  event_id INT NOT NULL,
+  day DATE NOT NULL,
+  organizer_id INT NOT NULL,
+  bookings INT NOT NULL DEFAULT 0,
+  booked_qty INT NOT NULL DEFAULT 0,
+  pending_qty INT NOT NULL DEFAULT 0,
+  paid_qty INT NOT NULL DEFAULT 0,
+  cancelled_qty INT NOT NULL DEFAULT 0,
+  rejected_qty INT NOT NULL DEFAULT 0,
+  reviews INT NOT NULL DEFAULT 0,
+  rating_sum INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (event_id, day),
+  KEY idx_event_daily_organizer (organizer_id, day),
+  FOREIGN KEY (event_id) REFERENCES event(id) ON DELETE CASCADE
+);
+
+CREATE TABLE organizer_daily_stats (
+  organizer_id INT NOT NULL,
+  day DATE NOT NULL,
+  bookings INT NOT NULL DEFAULT 0,
+  booked_qty INT NOT NULL DEFAULT 0,
+  pending_qty INT NOT NULL DEFAULT 0,
+  paid_qty INT NOT NULL DEFAULT 0,
+  cancelled_qty INT NOT NULL DEFAULT 0,
+  rejected_qty INT NOT NULL DEFAULT 0,
+  reviews INT NOT NULL DEFAULT 0,
+  rating_sum INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (organizer_id, day),
+  FOREIGN KEY (organizer_id) REFERENCES organizer(user_id) ON DELETE CASCADE
+);
+
+-- Wasserstände des letzten Refresh (booking.id, booking_audit.id, reviews.created_at als Unix-Zeit)
+CREATE TABLE analytics_state (
+  name VARCHAR(50) PRIMARY KEY,
+  value BIGINT NOT NULL
+);
+
+-- wird pro Refresh eines Organizers erhöht -> Schlüssel für gecachte Charts
+CREATE TABLE analytics_version (
+  organizer_id INT PRIMARY KEY,
+  version INT NOT NULL
+);
+
+-- Indizes (user.email ist schon über UNIQUE indiziert)
+-- Änderungen am Schema zusätzlich als Migration in db/migrations/ ablegen (flask --app src.app migrate)
 CREATE INDEX idx_events_starts          ON event(start_date);
-CREATE INDEX idx_bookings_user_event    ON booking(user_id, event_id);
 CREATE INDEX idx_session_user           ON session(user_id);
-CREATE INDEX idx_session_exp            ON session(expires_at);
\ No newline at end of file
+CREATE INDEX idx_session_exp            ON session(expires_at);
+-- Organizer-Listen: Events eines Organizers, Buchungen je Event/Status nach Datum
+CREATE INDEX idx_event_organizer               ON event(organizer_id, start_date);
+CREATE INDEX idx_event_updated                 ON event(updated_at);
+CREATE INDEX idx_event_organizer_updated       ON event(organizer_id, updated_at);
+CREATE INDEX idx_booking_event_status_created  ON booking(event_id, status, created_at);
+-- Kategorie-Filter (event_categorie ist nur nach event_id zuerst indiziert), Reviews je Event, Bilder nach Inhalt
+CREATE INDEX idx_event_categorie_category      ON event_categorie(category_id, event_id);
+CREATE INDEX idx_reviews_event                 ON reviews(event_id);
+CREATE INDEX idx_event_image_sha               ON event_image(sha256);
+-- Nachrichten: Verlauf je Paar, neue Nachrichten je Empfänger (Long-Poll)
+CREATE INDEX idx_messages_pair                 ON messages(user_lo, user_hi, id);
+CREATE INDEX idx_messages_recipient            ON messages(recipient_id, id);
+-- Analytics-Refresh: geänderte Reviews seit dem letzten Lauf
+CREATE INDEX idx_reviews_created               ON reviews(created_at);
+
+-- Volltextsuche für GET /api/event?q= bzw. ?location= (statt LIKE '%...%')
+CREATE FULLTEXT INDEX ft_event_search   ON event(title, description, location);
+CREATE FULLTEXT INDEX ft_event_location ON event(location);
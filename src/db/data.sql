@@ -59,4 +59,9 @@ INSERT INTO booking (user_id, event_id, qty, status) VALUES
 ((SELECT id FROM user  WHERE email='bob@example.com'),
  (SELECT id FROM event WHERE title='City Concert' LIMIT 1), 2, 'paid'),
 ((SELECT id FROM user  WHERE email='carol@example.com'),
- (SELECT id FROM event WHERE title='City Concert' LIMIT 1), 1, 'pending');
\ No newline at end of file
+ (SELECT id FROM event WHERE title='City Concert' LIMIT 1), 1, 'pending');
+
+-- Zähler passend zu den Bookings oben setzen
+UPDATE event e
+SET e.paid_qty    = (SELECT COALESCE(SUM(qty),0) FROM booking b WHERE b.event_id = e.id AND b.status = 'paid'),
+    e.pending_qty = (SELECT COALESCE(SUM(qty),0) FROM booking b WHERE b.event_id = e.id AND b.status = 'pending');
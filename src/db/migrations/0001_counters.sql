@@ -0,0 +1,12 @@
+-- Nachrüsten der Buchungszähler für bestehende Datenbanken
+-- (neue Datenbanken bekommen die Spalten direkt aus create.sql)
+ALTER TABLE event
+  ADD COLUMN paid_qty    INT NOT NULL DEFAULT 0 AFTER capacity,
+  ADD COLUMN pending_qty INT NOT NULL DEFAULT 0 AFTER paid_qty,
+  ADD CHECK (paid_qty >= 0),
+  ADD CHECK (pending_qty >= 0);
+
+-- Initialbefüllung aus booking
+UPDATE event e
+SET e.paid_qty    = (SELECT COALESCE(SUM(qty),0) FROM booking b WHERE b.event_id = e.id AND b.status = 'paid'),
+    e.pending_qty = (SELECT COALESCE(SUM(qty),0) FROM booking b WHERE b.event_id = e.id AND b.status = 'pending');
@@ -0,0 +1,4 @@
+-- Volltextindizes für bestehende Datenbanken nachrüsten
+-- (neue Datenbanken bekommen sie direkt aus create.sql)
+CREATE FULLTEXT INDEX ft_event_search   ON event(title, description, location);
+CREATE FULLTEXT INDEX ft_event_location ON event(location);
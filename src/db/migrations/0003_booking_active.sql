@@ -0,0 +1,11 @@
+-- "eine aktive Buchung pro User/Event" als Constraint nachrüsten
+-- (neue Datenbanken bekommen das direkt aus create.sql).
+-- Vorher prüfen, ob es schon doppelte aktive Buchungen gibt (muss leer sein):
+--   SELECT user_id, event_id, COUNT(*) FROM booking
+--    WHERE status IN ('pending','paid') GROUP BY user_id, event_id HAVING COUNT(*) > 1;
+ALTER TABLE booking
+  ADD COLUMN active TINYINT AS (IF(status IN ('pending','paid'), 1, NULL)) STORED AFTER status,
+  ADD UNIQUE KEY uq_booking_active (user_id, event_id, active);
+
+-- wird vom UNIQUE-Index (gleiches Präfix) abgedeckt
+DROP INDEX idx_bookings_user_event ON booking;
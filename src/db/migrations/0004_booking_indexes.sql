@@ -0,0 +1,4 @@
+-- Indizes für die Organizer-Buchungslisten nachrüsten
+-- (neue Datenbanken bekommen sie direkt aus create.sql)
+CREATE INDEX idx_event_organizer               ON event(organizer_id, start_date);
+CREATE INDEX idx_booking_event_status_created  ON booking(event_id, status, created_at);
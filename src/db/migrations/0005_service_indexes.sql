@@ -0,0 +1,11 @@
+-- Indizes passend zu den Queries der Services
+-- (neue Datenbanken bekommen sie direkt aus create.sql)
+
+-- Kategorie-Filter in GET /api/event: event_categorie ist nur nach (event_id, category_id) indiziert
+CREATE INDEX idx_event_categorie_category ON event_categorie(category_id, event_id);
+
+-- Reviews eines Events (UNIQUE(user_id, event_id) hilft dafür nicht)
+CREATE INDEX idx_reviews_event ON reviews(event_id);
+
+-- doppelt zum UNIQUE-Index auf user.email
+DROP INDEX idx_users_email ON user;
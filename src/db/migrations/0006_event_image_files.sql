@@ -0,0 +1,10 @@
+-- Event-Bilder im Dateisystem (content-adressiert), in der DB nur noch Metadaten.
+-- Bestehende Blobs bleiben in `data`, bis sie beim ersten Zugriff übernommen werden.
+ALTER TABLE event_image MODIFY data LONGBLOB NULL;
+ALTER TABLE event_image ADD COLUMN sha256 CHAR(64) NULL;
+ALTER TABLE event_image ADD COLUMN size INT NULL;
+ALTER TABLE event_image ADD COLUMN width INT NULL;
+ALTER TABLE event_image ADD COLUMN height INT NULL;
+
+-- Löschen prüft, ob derselbe Inhalt noch von einem anderen Bild genutzt wird
+CREATE INDEX idx_event_image_sha ON event_image(sha256);
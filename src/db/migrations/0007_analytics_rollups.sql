@@ -0,0 +1,47 @@
+-- Tageswerte für Organizer-Analytics (FR-Eo-05), gepflegt von services/analytics_service.py
+CREATE TABLE event_daily_stats (
+  event_id INT NOT NULL,
+  day DATE NOT NULL,
+  organizer_id INT NOT NULL,
+  bookings INT NOT NULL DEFAULT 0,
+  booked_qty INT NOT NULL DEFAULT 0,
+  pending_qty INT NOT NULL DEFAULT 0,
+  paid_qty INT NOT NULL DEFAULT 0,
+  cancelled_qty INT NOT NULL DEFAULT 0,
+  rejected_qty INT NOT NULL DEFAULT 0,
+  reviews INT NOT NULL DEFAULT 0,
+  rating_sum INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (event_id, day),
+  KEY idx_event_daily_organizer (organizer_id, day),
+  FOREIGN KEY (event_id) REFERENCES event(id) ON DELETE CASCADE
+);
+
+CREATE TABLE organizer_daily_stats (
+  organizer_id INT NOT NULL,
+  day DATE NOT NULL,
+  bookings INT NOT NULL DEFAULT 0,
+  booked_qty INT NOT NULL DEFAULT 0,
+  pending_qty INT NOT NULL DEFAULT 0,
+  paid_qty INT NOT NULL DEFAULT 0,
+  cancelled_qty INT NOT NULL DEFAULT 0,
+  rejected_qty INT NOT NULL DEFAULT 0,
+  reviews INT NOT NULL DEFAULT 0,
+  rating_sum INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (organizer_id, day),
+  FOREIGN KEY (organizer_id) REFERENCES organizer(user_id) ON DELETE CASCADE
+);
+
+-- Wasserstände des letzten Refresh (booking.id, booking_audit.id, reviews.created_at als Unix-Zeit)
+CREATE TABLE analytics_state (
+  name VARCHAR(50) PRIMARY KEY,
+  value BIGINT NOT NULL
+);
+
+-- wird pro Refresh eines Organizers erhöht -> Schlüssel für gecachte Charts
+CREATE TABLE analytics_version (
+  organizer_id INT PRIMARY KEY,
+  version INT NOT NULL
+);
+
+-- Reviews werden per Upsert geändert (created_at = NOW()), Refresh sucht sie über created_at
+CREATE INDEX idx_reviews_created ON reviews(created_at);
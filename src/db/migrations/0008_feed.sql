@@ -0,0 +1,21 @@
+-- Feed "Demnächst von Organizern, denen ich folge" (services/feed_service.py)
+
+-- Fan-out-Ziel: ein Eintrag pro (Follower, Event) kleiner Organizer, Seiten per PK-Range
+CREATE TABLE feed_item (
+  user_id INT NOT NULL,
+  start_date DATETIME NOT NULL,
+  event_id INT NOT NULL,
+  organizer_id INT NOT NULL,
+  PRIMARY KEY (user_id, start_date, event_id),
+  KEY idx_feed_item_event (event_id),
+  KEY idx_feed_item_user_organizer (user_id, organizer_id),
+  FOREIGN KEY (user_id)  REFERENCES user(id)  ON DELETE CASCADE,
+  FOREIGN KEY (event_id) REFERENCES event(id) ON DELETE CASCADE
+);
+
+-- Organizer mit zu vielen Followern für Fan-out (Events werden beim Lesen gemischt)
+CREATE TABLE feed_large_organizer (
+  organizer_id INT PRIMARY KEY,
+  since DATETIME DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (organizer_id) REFERENCES user(id) ON DELETE CASCADE
+);
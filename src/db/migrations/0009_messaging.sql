@@ -0,0 +1,36 @@
+-- Nachrichten (services/message_service.py): Verlauf je Paar, Inbox-Zeilen, Ungelesen-Zähler
+
+-- Paar unabhängig von der Richtung, damit der Verlauf ein einziger Range-Scan ist
+ALTER TABLE messages ADD COLUMN user_lo INT AS (LEAST(sender_id, recipient_id)) STORED;
+ALTER TABLE messages ADD COLUMN user_hi INT AS (GREATEST(sender_id, recipient_id)) STORED;
+CREATE INDEX idx_messages_pair ON messages(user_lo, user_hi, id);
+-- neue Nachrichten an einen User (Long-Poll: recipient_id = ? AND id > ?)
+CREATE INDEX idx_messages_recipient ON messages(recipient_id, id);
+
+CREATE TABLE conversation_member (
+  user_id INT NOT NULL,
+  peer_id INT NOT NULL,
+  last_message_id INT NOT NULL,
+  last_read_id INT NOT NULL DEFAULT 0,
+  unread INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, peer_id),
+  KEY idx_member_inbox (user_id, last_message_id),
+  FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE,
+  FOREIGN KEY (peer_id) REFERENCES user(id) ON DELETE CASCADE
+);
+
+CREATE TABLE message_counter (
+  user_id INT PRIMARY KEY,
+  unread INT NOT NULL DEFAULT 0,
+  FOREIGN KEY (user_id) REFERENCES user(id) ON DELETE CASCADE
+);
+
+-- Bestand übernehmen (alte Nachrichten gelten als gelesen)
+INSERT INTO conversation_member(user_id, peer_id, last_message_id, last_read_id)
+SELECT sender_id, recipient_id, MAX(id), MAX(id) FROM messages GROUP BY sender_id, recipient_id
+ON DUPLICATE KEY UPDATE last_message_id = GREATEST(last_message_id, VALUES(last_message_id)),
+                        last_read_id = GREATEST(last_read_id, VALUES(last_read_id));
+INSERT INTO conversation_member(user_id, peer_id, last_message_id, last_read_id)
+SELECT recipient_id, sender_id, MAX(id), MAX(id) FROM messages GROUP BY recipient_id, sender_id
+ON DUPLICATE KEY UPDATE last_message_id = GREATEST(last_message_id, VALUES(last_message_id)),
+                        last_read_id = GREATEST(last_read_id, VALUES(last_read_id));
@@ -0,0 +1,9 @@
+-- Abgemeldete signierte Session-Tokens (SESSIONS["mode"] = "signed", siehe src/sessions.py).
+-- Jeder Prozess lädt neue Zeilen per PK-Range nach; der Sweeper löscht abgelaufene.
+CREATE TABLE session_revocation (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  jti CHAR(16) NOT NULL,
+  expires_at DATETIME NOT NULL,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  KEY idx_session_revocation_exp (expires_at)
+);
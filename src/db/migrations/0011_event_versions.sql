@@ -0,0 +1,14 @@
+-- Versionsstempel für Conditional GET (src/http_cache.py)
+
+-- jede Änderung an einem Event (auch paid_qty/pending_qty bei Buchungen) setzt updated_at neu
+ALTER TABLE event ADD COLUMN updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+-- MAX(updated_at) global bzw. pro Organizer direkt aus dem Index
+CREATE INDEX idx_event_updated ON event(updated_at);
+CREATE INDEX idx_event_organizer_updated ON event(organizer_id, updated_at);
+
+-- Löschungen hinterlassen keine Zeile mit updated_at -> Zeitpunkt der letzten Löschung
+CREATE TABLE change_stamp (
+  name VARCHAR(40) PRIMARY KEY,
+  changed_at DATETIME(6) NOT NULL
+);
@@ -1,11 +1,9 @@
 USE eventdb;
 
--- Hilfsview: bereits verkaufte Tickets (einfach gehalten)
+-- Hilfsview: bereits verkaufte Tickets (aus den Zählern, keine Aggregation über booking)
 CREATE OR REPLACE VIEW v_sold AS
-SELECT e.id AS event_id, IFNULL(SUM(b.qty),0) AS sold
-FROM event e
-LEFT JOIN booking b ON b.event_id = e.id AND b.status <> 'cancelled'
-GROUP BY e.id;
+SELECT e.id AS event_id, e.paid_qty + e.pending_qty AS sold
+FROM event e;
 
 -- -- Trigger: Audit-Log bei Status-Änderung
 -- DROP TRIGGER IF EXISTS bookings_status_ai;
@@ -1,10 +1,401 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
 import pymysql
-from .config import DB
+from pymysql.constants import CR, ER, SERVER_STATUS
+from .config import DB, DB_POOL
+
+# Fehler, nach denen die Verbindung nicht mehr benutzbar ist
+_DISCONNECT_ERRORS = {
+    CR.CR_SERVER_GONE_ERROR, CR.CR_SERVER_LOST, CR.CR_CONN_HOST_ERROR,
+    CR.CR_SERVER_LOST_EXTENDED, CR.CR_COMMANDS_OUT_OF_SYNC,
+}
+
+# Fehler, nach denen eine Transaktion gefahrlos wiederholt werden kann
+RETRYABLE_ERRORS = {ER.LOCK_DEADLOCK, ER.LOCK_WAIT_TIMEOUT}
+
+
+def is_disconnect(exc: Optional[BaseException]) -> bool:
+    if isinstance(exc, pymysql.err.InterfaceError):
+        return True
+    return isinstance(exc, pymysql.err.OperationalError) and bool(exc.args) and exc.args[0] in _DISCONNECT_ERRORS
 
-def get_connection():
+
+def is_retryable(exc: BaseException) -> bool:
+    return isinstance(exc, pymysql.err.OperationalError) and bool(exc.args) and exc.args[0] in RETRYABLE_ERRORS
+
+
+def connect():
+    """Öffnet eine neue (ungepoolte) Verbindung zur Datenbank."""
     return pymysql.connect(
         host=DB["host"], port=DB["port"],
         user=DB["user"], password=DB["password"],
         database=DB["database"], cursorclass=pymysql.cursors.DictCursor,
         autocommit=True
-    )
\ No newline at end of file
+    )
+
+
+class PoolTimeout(Exception):
+    """Innerhalb von `timeout` Sekunden wurde keine Verbindung frei."""
+    pass
+
+
+class _Slot:
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """
+    Dünner Proxy um eine pymysql-Verbindung aus dem Pool.
+    Verhält sich wie die Verbindung selbst (`with ... as con, con.cursor() as cur`),
+    gibt sie beim Verlassen des Kontexts bzw. bei close() aber an den Pool zurück.
+    """
+
+    def __init__(self, pool: "ConnectionPool", slot: _Slot):
+        self._pool = pool
+        self._slot = slot
+
+    def __getattr__(self, name):
+        slot = self.__dict__.get("_slot")
+        if slot is None:
+            raise pymysql.err.InterfaceError(0, "connection already returned to pool")
+        return getattr(slot.raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._release(is_disconnect(exc))
+        return False
+
+    def close(self):
+        self._release(False)
+
+    def _release(self, broken: bool):
+        slot, self._slot = self._slot, None
+        if slot is not None:
+            self._pool._release(slot, broken)
+
+
+class ConnectionPool:
+    """
+    Begrenzter, thread-sicherer Verbindungspool.
+
+    - min_size:     so viele Verbindungen werden nicht weggeräumt
+    - max_size:     harte Obergrenze (idle + ausgeliehen)
+    - timeout:      max. Wartezeit beim Ausleihen, danach PoolTimeout
+    - max_idle:     unbenutzte Verbindungen darüber hinaus werden geschlossen
+    - max_lifetime: ältere Verbindungen werden beim Zurückgeben/Ausleihen ersetzt
+    - ping_after:   Health-Check (ping) beim Ausleihen, wenn so lange unbenutzt
+    """
+
+    def __init__(
+        self,
+        connect: Callable,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 5.0,
+        max_idle: float = 300.0,
+        max_lifetime: float = 3600.0,
+        ping_after: float = 30.0,
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("invalid pool size")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle: deque = deque()   # links = am längsten unbenutzt
+        self._size = 0                # idle + ausgeliehen + gerade im Aufbau
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "closed": 0,
+            "health_check_failures": 0,
+        }
+
+    # ---------- Ausleihen ----------
+
+    def connection(self, timeout: Optional[float] = None) -> PooledConnection:
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = timed_out = False
+        to_close = []
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise pymysql.err.InterfaceError(0, "pool closed")
+                to_close += self._reap_locked()
+                if self._idle:
+                    slot = self._idle.pop()   # LIFO: warme Verbindungen zuerst
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    slot = None
+                    break
+                waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    timed_out = True
+                    break
+                self._cond.wait(remaining)
+
+            if not timed_out:
+                wait_time = time.monotonic() - started
+                self._stats["checkouts"] += 1
+                if waited:
+                    self._stats["waits"] += 1
+                    self._stats["wait_time_total"] += wait_time
+                    self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+
+        self._close_all(to_close)
+        if timed_out:
+            raise PoolTimeout(f"no connection available after {timeout:.1f}s")
+
+        if slot is not None and not self._healthy(slot):
+            # Platz bleibt reserviert und wird direkt neu belegt
+            self._close_all([slot])
+            slot = None
+        if slot is None:
+            slot = self._new_slot()
+        return PooledConnection(self, slot)
+
+    __call__ = connection
+
+    def _new_slot(self) -> _Slot:
+        # Platz in _size ist bereits reserviert
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+        return _Slot(raw)
+
+    def _healthy(self, slot: _Slot) -> bool:
+        now = time.monotonic()
+        if now - slot.created_at > self.max_lifetime:
+            return False
+        if now - slot.last_used < self.ping_after:
+            return True
+        try:
+            slot.raw.ping(reconnect=False)
+            return True
+        except Exception:
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            return False
+
+    # ---------- Zurückgeben ----------
+
+    def _release(self, slot: _Slot, broken: bool = False):
+        raw = slot.raw
+        if not broken and getattr(raw, "open", True):
+            # offene Transaktion (z.B. nach Exception zwischen begin/commit) verwerfen
+            try:
+                if raw.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                    raw.rollback()
+            except Exception:
+                broken = True
+        else:
+            broken = True
+
+        now = time.monotonic()
+        if broken or self._closed or now - slot.created_at > self.max_lifetime:
+            self._discard(slot)
+            return
+
+        slot.last_used = now
+        with self._cond:
+            self._idle.append(slot)
+            to_close = self._reap_locked()
+            self._cond.notify()
+        self._close_all(to_close)
+
+    def _discard(self, slot: _Slot):
+        """Schließt eine Verbindung und gibt ihren Platz frei."""
+        self._close_all([slot])
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    # ---------- Aufräumen ----------
+
+    def _reap_locked(self) -> list:
+        """Entfernt zu lange unbenutzte bzw. zu alte Verbindungen (Lock muss gehalten werden)."""
+        now = time.monotonic()
+        reaped = []
+        while self._idle and self._size > self.min_size:
+            oldest = self._idle[0]
+            if now - oldest.last_used <= self.max_idle and now - oldest.created_at <= self.max_lifetime:
+                break
+            reaped.append(self._idle.popleft())
+            self._size -= 1
+        if reaped:
+            self._cond.notify(len(reaped))
+        return reaped
+
+    def _close_all(self, slots):
+        for slot in slots:
+            try:
+                slot.raw.close()
+            except Exception:
+                pass
+        if slots:
+            with self._cond:
+                self._stats["closed"] += len(slots)
+
+    def close(self):
+        """Schließt alle freien Verbindungen; ausgeliehene werden beim Zurückgeben geschlossen."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        self._close_all(idle)
+
+    # ---------- Kennzahlen ----------
+
+    def stats(self) -> dict:
+        with self._cond:
+            s = dict(self._stats)
+            s["size"] = self._size
+            s["idle"] = len(self._idle)
+            s["in_use"] = self._size - len(self._idle)
+        s["wait_time_total_ms"] = round(s.pop("wait_time_total") * 1000, 3)
+        s["wait_time_max_ms"] = round(s.pop("wait_time_max") * 1000, 3)
+        return s
+
+
+pool = ConnectionPool(connect, **DB_POOL)
+
+
+# ---------- Query-Zeiten ----------
+
+# wird pro Statement mit (sql, sekunden, rowcount) aufgerufen; setzt instrumentation.init_app
+_query_observer: Optional[Callable[[str, float, int], None]] = None
+
+
+def set_query_observer(observer: Optional[Callable[[str, float, int], None]]) -> None:
+    global _query_observer
+    _query_observer = observer
+
+
+class TimedCursor:
+    """Cursor-Proxy: misst Dauer und Zeilenzahl jedes Statements und meldet sie dem Observer."""
+
+    def __init__(self, cur, observer: Callable[[str, float, int], None]):
+        self._cur = cur
+        self._observer = observer
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cur.close()
+        return False
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return self._cur.execute(query, args)
+        finally:
+            self._observer(query, time.perf_counter() - started, self._cur.rowcount)
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            return self._cur.executemany(query, args)
+        finally:
+            self._observer(query, time.perf_counter() - started, self._cur.rowcount)
+
+
+class InstrumentedConnection:
+    """
+    Verbindung aus get_connection(): Cursor melden ihre Statements an den Query-Observer.
+    Damit landen auch Zugriffe außerhalb der Request-Verbindung (Kategorien, Session-Sweeper,
+    Long-Poll, Zähler-Reparatur, CLI) in /metrics und im Slow-Query-Log.
+    """
+
+    def __init__(self, con):
+        self._con = con
+
+    def __getattr__(self, name):
+        return getattr(self._con, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._con.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        self._con.close()
+
+    def cursor(self, *args, **kwargs):
+        cur = self._con.cursor(*args, **kwargs)
+        observer = _query_observer
+        return TimedCursor(cur, observer) if observer is not None else cur
+
+
+def get_connection() -> InstrumentedConnection:
+    """Leiht eine Verbindung aus dem Pool (API wie vorher: `with get_connection() as con`)."""
+    return InstrumentedConnection(pool.connection())
+
+
+def run_transaction(get_connection: Callable, work: Callable[[Any], Any],
+                    attempts: int = 5, backoff: float = 0.02) -> Any:
+    """
+    Führt work(cur) in einer Transaktion aus und committet.
+    Deadlocks und Lock-Wait-Timeouts werden mit exponentiellem Backoff (+ Jitter)
+    bis zu `attempts`-mal wiederholt; jede andere Exception führt zu Rollback + raise.
+    work muss deshalb ohne Seiteneffekte außerhalb der DB wiederholbar sein.
+    """
+    for attempt in range(attempts):
+        with get_connection() as con:
+            con.begin()
+            try:
+                with con.cursor() as cur:
+                    result = work(cur)
+                con.commit()
+                return result
+            except Exception as e:
+                try:
+                    con.rollback()
+                except Exception:
+                    pass
+                if not is_retryable(e) or attempt == attempts - 1:
+                    raise
+        time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
@@ -0,0 +1,128 @@
+# Conditional GET + Kompression für die JSON-APIs.
+#
+# - ETag/Last-Modified kommen aus billigen Versionsstempeln (z.B. MAX(event.updated_at) über
+#   einen Index), die VOR der eigentlichen Abfrage geprüft werden: passt If-None-Match bzw.
+#   If-Modified-Since, gibt es sofort 304 ohne Listing-Query.
+# - Antworten ab HTTP["compress_min_size"] Bytes werden je nach Accept-Encoding mit brotli
+#   oder gzip komprimiert (Brotli steht in requirements.txt; fehlt das Paket, bleibt es bei
+#   gzip). Komprimierte Antworten bekommen ein schwaches ETag; If-None-Match vergleicht
+#   ohnehin schwach (RFC 9110), 304 funktionieren also weiter.
+#   Gestreamte Antworten (SSE, CSV-Export) und send_file bleiben unangetastet.
+import gzip
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from flask import Flask, Response, request
+from werkzeug.http import http_date, parse_accept_header, parse_date, parse_etags, quote_etag
+
+try:  # optional, ohne Paket nur gzip
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ("application/json", "application/javascript", "image/svg+xml", "text/")
+CODINGS = (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def etag_for(*parts: Any) -> str:
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+
+def _utc(dt: Optional[datetime]) -> Optional[datetime]:
+    # DATETIME-Spalten sind naive UTC-Zeiten; HTTP-Daten haben Sekundenauflösung
+    if dt is None:
+        return None
+    return dt.replace(microsecond=0, tzinfo=dt.tzinfo or timezone.utc)
+
+
+def stable_last_modified(changed_at: Optional[datetime], now: Optional[datetime]) -> Optional[datetime]:
+    """
+    Last-Modified hat nur Sekundenauflösung: eine weitere Änderung in derselben Sekunde wäre
+    per If-Modified-Since nicht zu erkennen (-> falsches 304). Deshalb nur, wenn die letzte
+    Änderung mindestens eine Sekunde vor `now` (DB-Zeit beim Laden des Stempels) liegt;
+    spätere Änderungen fallen dann sicher in eine spätere Sekunde. Sonst None (nur ETag).
+    """
+    if changed_at is None or now is None or now - changed_at < timedelta(seconds=1):
+        return None
+    return changed_at
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None,
+                      cache_control: str = "private, no-cache") -> Dict[str, str]:
+    headers = {"ETag": quote_etag(etag), "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(_utc(last_modified))
+    return headers
+
+
+def is_fresh(etag: str, last_modified: Optional[datetime],
+             if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+    """Hat der Client diese Version schon? (Header-Werte roh, damit auch asgi.py es nutzen kann)"""
+    if if_none_match:
+        # If-None-Match hat Vorrang vor If-Modified-Since
+        return parse_etags(if_none_match).contains_weak(etag)
+    since = parse_date(if_modified_since) if if_modified_since else None
+    return last_modified is not None and since is not None and _utc(last_modified) <= since
+
+
+def set_validators(resp: Response, etag: str, last_modified: Optional[datetime] = None,
+                   cache_control: str = "private, no-cache") -> Response:
+    resp.headers.update(validator_headers(etag, last_modified, cache_control))
+    return resp
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None,
+                 cache_control: str = "private, no-cache") -> Optional[Response]:
+    """304-Antwort, wenn der Client diese Version schon hat, sonst None."""
+    if not is_fresh(etag, last_modified, request.headers.get("If-None-Match"),
+                    request.headers.get("If-Modified-Since")):
+        return None
+    return set_validators(Response(status=304), etag, last_modified, cache_control)
+
+
+def _compressible(resp: Response) -> bool:
+    return (
+        resp.status_code == 200
+        and request.method != "HEAD"
+        and not resp.direct_passthrough
+        and not resp.is_streamed
+        and "Content-Encoding" not in resp.headers
+        and (resp.mimetype or "").startswith(COMPRESSIBLE)
+    )
+
+
+def compress(data: bytes, coding: str, cfg: dict) -> bytes:
+    if coding == "br":
+        return brotli.compress(data, quality=cfg["brotli_quality"])
+    return gzip.compress(data, compresslevel=cfg["gzip_level"], mtime=0)
+
+
+def encode_body(data: bytes, accept_encoding: Optional[str], cfg: dict) -> Tuple[bytes, Optional[str]]:
+    """(Body, Content-Encoding oder None) passend zu Accept-Encoding; kleine Bodies bleiben roh."""
+    if len(data) < cfg["compress_min_size"] or not accept_encoding:
+        return data, None
+    coding = parse_accept_header(accept_encoding).best_match(CODINGS)
+    if coding is None:
+        return data, None
+    return compress(data, coding, cfg), coding
+
+
+def init_app(app: Flask, cfg: dict) -> None:
+    # als erster after_request-Hook registriert -> läuft als letzter (nach allen Header-Hooks)
+    @app.after_request
+    def _compress_response(resp):
+        if not _compressible(resp):
+            return resp
+        resp.vary.add("Accept-Encoding")
+        if resp.content_length is not None and resp.content_length < cfg["compress_min_size"]:
+            return resp
+        data, coding = encode_body(resp.get_data(), request.headers.get("Accept-Encoding"), cfg)
+        if coding is None:
+            return resp
+        resp.set_data(data)
+        resp.headers["Content-Encoding"] = coding
+        etag, weak = resp.get_etag()
+        if etag and not weak:
+            resp.set_etag(etag, weak=True)
+        return resp
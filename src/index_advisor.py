@@ -0,0 +1,222 @@
+from typing import Any, Callable, Dict, List, Optional
+
+from src.services.auth_service import AuthService
+from src.services.bookings_service import BookingsService
+from src.services.counter_service import BookingCounterService
+from src.services.events_service import EventsService
+from src.services.organizer_booking_service import OrganizerBookingService
+from src.services.organizer_service import OrganizerService
+
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "INSERT", "REPLACE")
+
+
+class ExplainCursor:
+    """
+    Cursor-Proxy für den Index-Advisor: vor jedem Statement wird EXPLAIN
+    ausgeführt und der Plan mitgeschrieben.
+
+    SELECTs laufen danach normal, damit die Services echte Daten bekommen.
+    Schreibende Statements werden nur erklärt, nicht ausgeführt; rowcount ist
+    dann 1, damit die Services auch ihre Folge-Statements absetzen.
+    """
+
+    def __init__(self, cur, advisor: "IndexAdvisor"):
+        self._cur = cur
+        self._advisor = advisor
+        self._skipped = False
+        self.rowcount = 0
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cur.close()
+        return False
+
+    def execute(self, query, args=None):
+        verb = query.lstrip().split(None, 1)[0].upper()
+        if verb in _EXPLAINABLE:
+            self._cur.execute("EXPLAIN " + query, args)
+            self._advisor.record(query, self._cur.fetchall())
+        if verb == "SELECT":
+            self._skipped = False
+            result = self._cur.execute(query, args)
+            self.rowcount = self._cur.rowcount
+            return result
+        self._skipped = True
+        self.rowcount = 1
+        return 1
+
+    def executemany(self, query, args):
+        args = list(args)
+        return self.execute(query, args[0]) if args else 0
+
+    def fetchone(self):
+        return None if self._skipped else self._cur.fetchone()
+
+    def fetchall(self):
+        return [] if self._skipped else self._cur.fetchall()
+
+
+class _ExplainConnection:
+    def __init__(self, con, advisor: "IndexAdvisor"):
+        self._con = con
+        self._advisor = advisor
+
+    def __getattr__(self, name):
+        return getattr(self._con, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._con.__exit__(exc_type, exc, tb)
+
+    def cursor(self, *args, **kwargs):
+        return ExplainCursor(self._con.cursor(*args, **kwargs), self._advisor)
+
+
+def plan_issues(row: Dict[str, Any], min_rows: int = 100) -> List[str]:
+    """
+    Auffälligkeiten einer EXPLAIN-Zeile: Full Table Scan / Full Index Scan
+    (erst ab min_rows geschätzten Zeilen), Filesort, temporäre Tabelle.
+    """
+    issues = []
+    table = row.get("table") or ""
+    rows = row.get("rows") or 0
+    if table and not table.startswith("<") and rows >= min_rows:
+        if row.get("type") == "ALL":
+            issues.append("full_scan")
+        elif row.get("type") == "index":
+            issues.append("full_index_scan")
+    extra = row.get("Extra") or ""
+    if "Using filesort" in extra:
+        issues.append("filesort")
+    if "Using temporary" in extra:
+        issues.append("temporary")
+    return issues
+
+
+class IndexAdvisor:
+    """
+    Führt die Queries der Services gegen eine (befüllte) Datenbank aus und
+    sammelt zu jedem Statement den EXPLAIN-Plan.
+
+    Die SQL-Texte kommen direkt aus den Services (keine Kopien), Parameter aus
+    Beispieldaten der Datenbank. Geschrieben wird dabei nichts.
+    """
+
+    def __init__(self, get_connection: Callable):
+        self._get_connection = get_connection
+        self._scenario = None
+        self._seen = set()
+        self.plans: List[Dict[str, Any]] = []
+
+    def get_connection(self):
+        return _ExplainConnection(self._get_connection(), self)
+
+    def record(self, query: str, plan: List[Dict[str, Any]]) -> None:
+        sql = " ".join(query.split())
+        if (self._scenario, sql) in self._seen:
+            return
+        self._seen.add((self._scenario, sql))
+        self.plans.append({"scenario": self._scenario, "sql": sql, "plan": plan})
+
+    # ---------- Beispieldaten + Szenarien ----------
+
+    def _sample(self) -> Dict[str, Any]:
+        with self._get_connection() as con, con.cursor() as cur:
+            cur.execute("""
+                SELECT e.id AS event_id, e.organizer_id, e.title, e.location,
+                       (SELECT b.id FROM booking b WHERE b.event_id = e.id LIMIT 1) AS booking_id,
+                       (SELECT b.user_id FROM booking b WHERE b.event_id = e.id LIMIT 1) AS user_id
+                  FROM event e
+                 ORDER BY (SELECT COUNT(*) FROM booking b WHERE b.event_id = e.id) DESC
+                 LIMIT 1
+            """)
+            sample = cur.fetchone()
+            if not sample:
+                raise RuntimeError("database has no events – seed it first")
+            cur.execute("SELECT category_id FROM event_categorie LIMIT 1")
+            row = cur.fetchone()
+            sample["category_id"] = row["category_id"] if row else 1
+            cur.execute("SELECT token FROM session LIMIT 1")
+            row = cur.fetchone()
+            sample["token"] = row["token"] if row else "x" * 43
+            cur.execute("SELECT email FROM user LIMIT 1")
+            sample["email"] = cur.fetchone()["email"]
+        sample["user_id"] = sample["user_id"] or sample["organizer_id"]
+        return sample
+
+    def scenarios(self, s: Dict[str, Any]) -> List[tuple]:
+        gc = self.get_connection
+        events = EventsService(gc)
+        org_bookings = OrganizerBookingService(gc)
+        user = {"id": s["user_id"]}
+        word = (s["title"] or "event").split()[0]
+        booking = {"id": s["booking_id"] or 0, "event_id": s["event_id"], "user_id": s["user_id"]}
+
+        return [
+            ("event_list", lambda: events.list_event({}, None)),
+            ("event_list_user", lambda: events.list_event({}, user)),
+            ("event_list_q", lambda: events.list_event({"q": word}, None)),
+            ("event_list_q_date", lambda: events.list_event({"q": word, "sort": "date"}, None)),
+            ("event_list_location", lambda: events.list_event({"location": s["location"] or "x"}, None)),
+            ("event_list_category", lambda: events.list_event({"category_id": str(s["category_id"])}, None)),
+            ("event_list_price_date", lambda: events.list_event(
+                {"min_price": "0", "max_price": "100000", "from": "2000-01-01"}, None)),
+            ("event_get", lambda: events.get_event(s["event_id"])),
+            ("event_book", lambda: events.book_event(s["event_id"], user, {"qty": 1})),
+            ("event_cancel", lambda: events.cancel_booking(s["event_id"], user)),
+            ("my_bookings", lambda: BookingsService(gc).list_user_bookings(s["user_id"])),
+            ("organizer_events", lambda: OrganizerService(gc).list_my_events(s["organizer_id"])),
+            ("organizer_bookings", lambda: org_bookings.list_by_status(s["organizer_id"], "pending")),
+            ("organizer_bookings_paid", lambda: org_bookings.list_by_status(s["organizer_id"], "paid")),
+            ("organizer_approve", lambda: org_bookings.approve(booking)),
+            ("organizer_reject", lambda: org_bookings.reject(booking)),
+            ("organizer_bulk_event", lambda: org_bookings.bulk(
+                s["organizer_id"], "approve", event_id=s["event_id"])),
+            ("session_user", lambda: AuthService(gc).session_user(s["token"])),
+            ("login", lambda: AuthService(gc).login({"email": s["email"], "password": "-"})),
+            ("counter_drift", lambda: BookingCounterService(gc).find_drift()),
+        ]
+
+    def run(self, min_rows: int = 100, only: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Alle Szenarien ausführen. Gibt eine Zeile pro (Szenario, Statement, Tabelle)
+        zurück, mit den Auffälligkeiten des Plans in "issues".
+        """
+        sample = self._sample()
+        report = []
+        for name, call in self.scenarios(sample):
+            if only and name not in only:
+                continue
+            self._scenario = name
+            error = None
+            try:
+                call()
+            except Exception as e:
+                # Fachliche Fehler (z.B. not_pending) sind hier egal, die Pläne sind schon erfasst
+                error = f"{type(e).__name__}: {e}"
+            if error:
+                report.append({"scenario": name, "sql": None, "table": None, "type": None,
+                               "key": None, "rows": None, "extra": None, "issues": [], "error": error})
+        for p in self.plans:
+            for row in p["plan"]:
+                report.append({
+                    "scenario": p["scenario"],
+                    "sql": p["sql"],
+                    "table": row.get("table"),
+                    "type": row.get("type"),
+                    "key": row.get("key"),
+                    "rows": row.get("rows"),
+                    "extra": row.get("Extra"),
+                    "issues": plan_issues(row, min_rows),
+                })
+        return report
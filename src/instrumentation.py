@@ -0,0 +1,278 @@
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from flask import Flask, g, has_request_context, jsonify, request
+
+from . import db_api, log_setup
+from .config import INSTRUMENTATION
+
+perf_log = logging.getLogger("perf")
+# eigener Logger, nicht unter "perf": Profile sind schon über PROFILE_ROUTES gesampelt,
+# LOG_SAMPLE darf sie nicht noch einmal ausdünnen
+profile_log = logging.getLogger("profile")
+
+# Bucket-Obergrenzen in ms (letzter Bucket: alles darüber)
+TIME_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+_WS = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST = re.compile(r"(VALUES\s*\([^)]*\))(?:\s*,\s*\([^)]*\))+", re.IGNORECASE)
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Statement-Text ohne Parameter/Literale, damit gleiche Queries zusammengezählt werden:
+    Whitespace zusammenfassen, %s/Strings/Zahlen -> ?, IN (?, ?, ...) -> IN (?+).
+    """
+    s = _WS.sub(" ", sql).strip()
+    s = s.replace("%s", "?")
+    s = _STRING.sub("?", s)
+    s = _NUMBER.sub("?", s)
+    s = _IN_LIST.sub("(?+)", s)
+    s = _VALUES_LIST.sub(r"\1, ...", s)
+    return s
+
+
+class Histogram:
+    """Feste Buckets + count/sum/max. Nicht thread-sicher (Lock hält die Registry)."""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        while i < len(self.bounds) and value > self.bounds[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Obergrenze des Buckets, in den das q-Quantil fällt (Schätzung)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "avg": round(self.sum / self.count, 3) if self.count else None,
+            "max": round(self.max, 3),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {("le_" + str(b)): n for b, n in zip(self.bounds, self.counts)} | {"inf": self.counts[-1]},
+        }
+
+
+class Metrics:
+    """Aggregierte Kennzahlen pro Route und pro (normalisiertem) Statement."""
+
+    def __init__(self, max_statements: int = 500):
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Histogram]] = {}
+        self._statements: Dict[str, List[float]] = {}  # sql -> [count, total_ms, max_ms, rows]
+
+    def observe_request(self, route: str, total_ms: float, db_ms: float, queries: int) -> None:
+        with self._lock:
+            h = self._routes.get(route)
+            if h is None:
+                h = self._routes[route] = {
+                    "total_ms": Histogram(TIME_BUCKETS_MS),
+                    "db_ms": Histogram(TIME_BUCKETS_MS),
+                    "app_ms": Histogram(TIME_BUCKETS_MS),
+                    "queries": Histogram(QUERY_BUCKETS),
+                }
+            h["total_ms"].observe(total_ms)
+            h["db_ms"].observe(db_ms)
+            h["app_ms"].observe(max(0.0, total_ms - db_ms))
+            h["queries"].observe(queries)
+
+    def observe_statement(self, sql: str, ms: float, rows: int) -> None:
+        with self._lock:
+            st = self._statements.get(sql)
+            if st is None:
+                if len(self._statements) >= self.max_statements:
+                    sql = "<other>"
+                st = self._statements.setdefault(sql, [0, 0.0, 0.0, 0])
+            st[0] += 1
+            st[1] += ms
+            st[2] = max(st[2], ms)
+            st[3] += rows
+
+    def snapshot(self, top: int = 50) -> dict:
+        with self._lock:
+            routes = {r: {k: h.to_dict() for k, h in hs.items()} for r, hs in self._routes.items()}
+            statements = sorted(self._statements.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+        return {
+            "routes": routes,
+            "statements": [
+                {"sql": sql, "count": c, "total_ms": round(t, 3), "avg_ms": round(t / c, 3),
+                 "max_ms": round(m, 3), "rows": rows}
+                for sql, (c, t, m, rows) in statements
+            ],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._statements.clear()
+
+
+metrics = Metrics(INSTRUMENTATION["max_statements"])
+
+
+class Profiler:
+    """
+    Stichproben-cProfile für einzelne Endpoints: enable("list_event", 0.05) profiliert
+    ~5 % der Requests dieser Route und legt die Stats in profile_dir ab.
+    """
+
+    def __init__(self, routes: Dict[str, float], profile_dir: str, top: int = 30):
+        self.routes = dict(routes)
+        self.profile_dir = profile_dir
+        self.top = top
+
+    def enable(self, endpoint: str, rate: float = 1.0) -> None:
+        self.routes[endpoint] = rate
+
+    def disable(self, endpoint: str) -> None:
+        self.routes.pop(endpoint, None)
+
+    def should_profile(self, endpoint: Optional[str]) -> bool:
+        rate = self.routes.get(endpoint or "")
+        return bool(rate) and random.random() < rate
+
+    def dump(self, prof: cProfile.Profile, endpoint: str) -> str:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{endpoint}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+                                              f"-{random.randrange(1 << 16):04x}.prof")
+        prof.dump_stats(path)
+        return path
+
+    def summary(self, prof: cProfile.Profile) -> str:
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(self.top)
+        return out.getvalue()
+
+
+def parse_profile_routes(raw: str) -> Dict[str, float]:
+    """"list_event:0.1,organizer_bookings_api" -> {"list_event": 0.1, "organizer_bookings_api": 1.0}"""
+    routes = {}
+    for part in (raw or "").split(","):
+        name, _, rate = part.strip().partition(":")
+        if name:
+            routes[name] = float(rate) if rate else 1.0
+    return routes
+
+
+profiler = Profiler(parse_profile_routes(INSTRUMENTATION["profile_routes"]), INSTRUMENTATION["profile_dir"])
+
+
+# ---------- Erfassung im Request ----------
+
+def record_query(sql: str, seconds: float, rows: int) -> None:
+    """
+    Vom Cursor-Proxy (db_api.TimedCursor) pro Statement aufgerufen, für jede Verbindung aus
+    get_connection(). Außerhalb eines Requests (Hintergrund-Threads, CLI) nur /metrics + Slow-Log.
+    """
+    ms = seconds * 1000
+    in_request = has_request_context()
+    if in_request:
+        g.query_count = g.get("query_count", 0) + 1
+        g.db_time = g.get("db_time", 0.0) + seconds
+    metrics.observe_statement(normalize_sql(sql), ms, max(rows or 0, 0))
+    if ms >= INSTRUMENTATION["slow_query_ms"]:
+        perf_log.warning("slow_query", extra={"query_ms": round(ms, 3), "sql": normalize_sql(sql),
+                                              "route": _route_name() if in_request else "<background>"})
+
+
+def _route_name() -> str:
+    rule = request.url_rule
+    return f"{request.method} {rule.rule if rule else '<unmatched>'}"
+
+
+def _start_request():
+    g.started = time.perf_counter()
+    if profiler.should_profile(request.endpoint):
+        g.profile = cProfile.Profile()
+        g.profile.enable()
+
+
+def _finish_request(resp):
+    started = g.get("started")
+    if started is None:
+        return resp
+    total_ms = (time.perf_counter() - started) * 1000
+    db_ms = g.get("db_time", 0.0) * 1000
+    queries = g.get("query_count", 0)
+    app_ms = max(0.0, total_ms - db_ms)
+
+    resp.headers["Server-Timing"] = f"db;dur={db_ms:.2f}, app;dur={app_ms:.2f}, total;dur={total_ms:.2f}"
+
+    route = _route_name()
+    metrics.observe_request(route, total_ms, db_ms, queries)
+
+    line = {"route": route, "status": resp.status_code, "total_ms": round(total_ms, 2),
+            "db_ms": round(db_ms, 2), "app_ms": round(app_ms, 2), "queries": queries}
+
+    prof = g.pop("profile", None)
+    if prof is not None:
+        prof.disable()
+        line["profile"] = profiler.dump(prof, request.endpoint)
+        profile_log.info(profiler.summary(prof), extra={"route": route, "profile": line["profile"]})
+
+    # eine Zeile pro Request -> wird per LOG_SAMPLE ausgedünnt, /metrics zählt trotzdem alle
+    perf_log.info("request", extra=line)
+    return resp
+
+
+def metrics_allowed() -> bool:
+    """
+    /metrics enthält SQL-Texte und Pool-/Logging-Interna: nur mit METRICS_TOKEN
+    (Authorization: Bearer <token>) oder von einer Adresse aus METRICS_ALLOW_IPS.
+    """
+    token = INSTRUMENTATION["metrics_token"]
+    auth = request.headers.get("Authorization", "")
+    if token and auth.startswith("Bearer ") and hmac.compare_digest(auth[7:].encode(), token.encode()):
+        return True
+    return request.remote_addr in INSTRUMENTATION["metrics_allow_ips"]
+
+
+def metrics_view():
+    if not metrics_allowed():
+        return jsonify({"error": "forbidden"}), 403
+    top = max(1, min(request.args.get("top", 50, type=int), metrics.max_statements))
+    return jsonify(metrics.snapshot(top) | {"logging": log_setup.stats()})
+
+
+def init_app(app: Flask) -> None:
+    db_api.set_query_observer(record_query)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
@@ -0,0 +1,269 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from typing import Dict, Optional
+
+from flask import Flask, g, request
+
+from .config import LOGGING
+
+# Request-ID des laufenden Requests (Flask und ASGI-Routen), landet in jeder Logzeile
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Attribute, die jeder LogRecord hat – alles andere kam über extra={...} und wird als Feld geschrieben
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id",
+                                                                            "sample_rate"}
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """Übernimmt eine gültige X-Request-ID vom Client/Proxy, sonst neue ID."""
+    if incoming and _VALID_REQUEST_ID.match(incoming):
+        return incoming
+    return uuid.uuid4().hex
+
+
+def bind_request_id(rid: Optional[str]) -> contextvars.Token:
+    return _request_id.set(rid)
+
+
+def reset_request_id(token: contextvars.Token) -> None:
+    _request_id.reset(token)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+class JsonFormatter(logging.Formatter):
+    """Eine JSON-Zeile pro Record: ts, level, logger, msg, request_id + Felder aus extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        rid = getattr(record, "request_id", None)
+        if rid:
+            line["request_id"] = rid
+        rate = getattr(record, "sample_rate", None)
+        if rate is not None:
+            line["sample_rate"] = rate
+        for k, v in vars(record).items():
+            if k not in _RECORD_ATTRS and not k.startswith("_"):
+                line[k] = v
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line["exc"] = record.exc_text
+        if record.stack_info:
+            line["stack"] = record.stack_info
+        return json.dumps(line, ensure_ascii=False, default=str)
+
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """
+    Rotiert zum Zeitpunkt (when, Standard Mitternacht) UND sobald die Datei max_bytes erreicht.
+    Mehrere Rotationen im selben Intervall bekommen .1, .2, ... angehängt statt sich zu überschreiben.
+    """
+
+    def __init__(self, filename: str, when: str = "midnight", max_bytes: int = 0, backup_count: int = 0):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if super().shouldRollover(record):
+            return True
+        if not self.max_bytes:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        return self.stream.tell() + len(self.format(record)) + 1 > self.max_bytes
+
+    def rotation_filename(self, default_name: str) -> str:
+        name = super().rotation_filename(default_name)
+        candidate, n = name, 0
+        while os.path.exists(candidate):
+            n += 1
+            candidate = f"{name}.{n}"
+        return candidate
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lässt von INFO/DEBUG der konfigurierten Logger (inkl. Kind-Logger) nur den Anteil rate durch,
+    WARNING und höher immer. Durchgelassene Records tragen sample_rate (zum Hochrechnen).
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+        self.dropped = 0
+
+    def _rate(self, name: str) -> Optional[float]:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self._rate(record.name)
+        if rate is None or rate >= 1:
+            return True
+        if random.random() < rate:
+            record.sample_rate = rate
+            return True
+        self.dropped += 1
+        return False
+
+
+class RequestIdFilter(logging.Filter):
+    """Hängt die Request-ID an – läuft im aufrufenden Thread, also bevor der Record in die Queue geht."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = _request_id.get()
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Legt Records nur in die Queue, geschrieben wird im Listener-Thread.
+    Ist die Queue voll, wird der Record verworfen (gezählt) statt den Request zu blockieren.
+    """
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Nachricht + Traceback schon hier auflösen: args/exc_info können sich später ändern
+        record = logging.makeLogRecord(vars(record))
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sample_rates(raw: str) -> Dict[str, float]:
+    """"perf:0.1,werkzeug:0.5" -> {"perf": 0.1, "werkzeug": 0.5}"""
+    rates = {}
+    for part in (raw or "").split(","):
+        name, _, rate = part.strip().partition(":")
+        if name and rate:
+            rates[name] = float(rate)
+    return rates
+
+
+_lock = threading.Lock()
+_state: Dict[str, object] = {}
+
+
+def setup_logging(cfg: dict = LOGGING) -> QueueListener:
+    """
+    Root-Logger -> NonBlockingQueueHandler -> QueueListener (eigener Thread) -> Datei (+ stderr).
+    Mehrfacher Aufruf ersetzt die vorherige Konfiguration. Fremde Handler am Root bleiben unangetastet.
+    """
+    with _lock:
+        shutdown_logging()
+        os.makedirs(os.path.dirname(cfg["file"]) or ".", exist_ok=True)
+
+        formatter = JsonFormatter()
+        file_handler = SizedTimedRotatingFileHandler(cfg["file"], cfg["when"], cfg["max_bytes"], cfg["backup_count"])
+        file_handler.setFormatter(formatter)
+        handlers = [file_handler]
+        if cfg.get("stderr"):
+            console = logging.StreamHandler()
+            console.setFormatter(formatter)
+            handlers.append(console)
+
+        handler = NonBlockingQueueHandler(queue.Queue(cfg["queue_size"]))
+        sampler = SamplingFilter(parse_sample_rates(cfg.get("sample", "")))
+        handler.addFilter(sampler)
+        handler.addFilter(RequestIdFilter())
+
+        listener = QueueListener(handler.queue, *handlers, respect_handler_level=True)
+        listener.start()
+
+        root = logging.getLogger()
+        root.addHandler(handler)
+        root.setLevel(cfg["level"])
+        _state.update(handler=handler, listener=listener, sampler=sampler)
+        return listener
+
+
+def shutdown_logging() -> None:
+    """Queue leeren, Listener-Thread beenden, Dateien schließen."""
+    handler = _state.pop("handler", None)
+    listener = _state.pop("listener", None)
+    _state.pop("sampler", None)
+    if handler is not None:
+        logging.getLogger().removeHandler(handler)
+    if listener is not None:
+        listener.stop()
+        for h in listener.handlers:
+            h.close()
+
+
+atexit.register(shutdown_logging)
+
+
+def stats() -> dict:
+    handler, sampler = _state.get("handler"), _state.get("sampler")
+    if handler is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "queued": handler.queue.qsize(),
+        "dropped_queue_full": handler.dropped,
+        "dropped_sampled": sampler.dropped,
+    }
+
+
+# ---------- Flask: Request-ID ----------
+
+def _bind_request():
+    g.request_id = new_request_id(request.headers.get("X-Request-ID"))
+    g._request_id_token = bind_request_id(g.request_id)
+
+
+def _add_request_id_header(resp):
+    rid = g.get("request_id")
+    if rid:
+        resp.headers["X-Request-ID"] = rid
+    return resp
+
+
+def _unbind_request(exc=None):
+    token = g.pop("_request_id_token", None)
+    if token is not None:
+        reset_request_id(token)
+
+
+def init_app(app: Flask) -> None:
+    app.before_request(_bind_request)
+    app.after_request(_add_request_id_header)
+    app.teardown_request(_unbind_request)
@@ -0,0 +1,156 @@
+import hashlib
+import logging
+import os
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import pymysql
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "db", "migrations")
+
+_FILENAME = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+# "gibt es schon" / "gibt es nicht mehr": eine Migration, die (teilweise) schon
+# angewendet wurde oder deren Stand bereits in create.sql steckt, läuft trotzdem durch
+IGNORABLE_ERRORS = {
+    1050,  # ER_TABLE_EXISTS_ERROR
+    1060,  # ER_DUP_FIELDNAME
+    1061,  # ER_DUP_KEYNAME
+    1091,  # ER_CANT_DROP_FIELD_OR_KEY
+}
+
+_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+      version    INT PRIMARY KEY,
+      name       VARCHAR(200) NOT NULL,
+      checksum   CHAR(64) NOT NULL,
+      applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+    checksum: str
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Alle NNNN_name.sql-Dateien des Verzeichnisses, nach Version sortiert."""
+    migrations = {}
+    for filename in os.listdir(directory):
+        m = _FILENAME.match(filename)
+        if not m:
+            continue
+        version = int(m.group(1))
+        if version in migrations:
+            raise MigrationError(f"duplicate version {version}: {filename}")
+        path = os.path.join(directory, filename)
+        with open(path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        migrations[version] = Migration(version, m.group(2), path, checksum)
+    return [migrations[v] for v in sorted(migrations)]
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Zerlegt ein SQL-Skript in einzelne Statements (Trenner: ';' am Zeilenende).
+    Zeilenkommentare (--) fallen weg; DELIMITER/Prozeduren werden nicht unterstützt.
+    """
+    statements, current = [], []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("--"):
+            continue
+        current.append(line)
+        if stripped.endswith(";"):
+            statements.append("\n".join(current).rstrip().rstrip(";").strip())
+            current = []
+    if current:
+        statements.append("\n".join(current).strip())
+    return [s for s in statements if s]
+
+
+class MigrationRunner:
+    """
+    Wendet die nummerierten Migrationen aus db/migrations/ der Reihe nach an
+    und merkt sich angewendete Versionen (mit Prüfsumme) in schema_migrations.
+
+    MySQL-DDL ist nicht transaktional; Statements, die an "existiert schon"
+    scheitern, werden deshalb übersprungen statt die Migration abzubrechen.
+    """
+
+    LOCK_NAME = "schema_migrations"
+
+    def __init__(self, get_connection: Callable, directory: str = MIGRATIONS_DIR):
+        self.get_connection = get_connection
+        self.directory = directory
+
+    def applied(self) -> Dict[int, Dict]:
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(_CREATE_TABLE)
+            cur.execute("SELECT version, name, checksum, applied_at FROM schema_migrations")
+            return {r["version"]: r for r in cur.fetchall()}
+
+    def status(self) -> List[Dict]:
+        """Jede Migration mit Zustand applied / pending / changed (Datei nach dem Anwenden geändert)."""
+        applied = self.applied()
+        out = []
+        for m in load_migrations(self.directory):
+            row = applied.get(m.version)
+            if row is None:
+                state = "pending"
+            elif row["checksum"] != m.checksum:
+                state = "changed"
+            else:
+                state = "applied"
+            out.append({"version": m.version, "name": m.name, "state": state,
+                        "applied_at": row["applied_at"] if row else None})
+        return out
+
+    def pending(self, target: Optional[int] = None) -> List[Migration]:
+        applied = self.applied()
+        return [
+            m for m in load_migrations(self.directory)
+            if m.version not in applied and (target is None or m.version <= target)
+        ]
+
+    def migrate(self, target: Optional[int] = None) -> List[Migration]:
+        """Alle offenen Migrationen (bis einschließlich target) anwenden; gibt die angewendeten zurück."""
+        with self.get_connection() as con, con.cursor() as cur:
+            # parallel startende Instanzen sollen nicht gleichzeitig migrieren
+            cur.execute("SELECT GET_LOCK(%s, 30) AS ok", (self.LOCK_NAME,))
+            if not cur.fetchone()["ok"]:
+                raise MigrationError("could not acquire migration lock")
+            try:
+                done = []
+                for m in self.pending(target):
+                    self._apply(cur, m)
+                    done.append(m)
+                return done
+            finally:
+                cur.execute("SELECT RELEASE_LOCK(%s)", (self.LOCK_NAME,))
+
+    @staticmethod
+    def _apply(cur, migration: Migration) -> None:
+        with open(migration.path, encoding="utf-8") as f:
+            statements = split_statements(f.read())
+
+        for stmt in statements:
+            try:
+                cur.execute(stmt)
+            except pymysql.MySQLError as e:
+                code = e.args[0] if e.args else None
+                if code not in IGNORABLE_ERRORS:
+                    raise MigrationError(f"{migration.version:04d}_{migration.name}: {e}") from e
+                logging.info(f"migration {migration.version:04d}: skipped ({e.args[1] if len(e.args) > 1 else e})")
+
+        cur.execute(
+            "INSERT INTO schema_migrations(version, name, checksum) VALUES (%s,%s,%s)",
+            (migration.version, migration.name, migration.checksum),
+        )
@@ -0,0 +1,201 @@
+# Passwort-Hashing außerhalb der Request-Threads + Login-Drossel.
+#
+# scrypt/pbkdf2 kosten pro Aufruf zig Millisekunden CPU und halten dabei den GIL;
+# ein Schwall Login-Versuche legt sonst alle anderen Routen im selben Prozess lahm.
+#
+# - PasswordHasher: Hashen/Prüfen in einem begrenzten Prozesspool. Höchstens max_pending
+#   Aufträge gleichzeitig, darüber wird sofort mit Busy abgelehnt (-> 503 + Retry-After),
+#   statt Request-Threads in einer unbegrenzten Warteschlange zu parken.
+# - method (PASSWORDS["method"]) ist einstellbar; Hashes mit anderen Parametern werden beim
+#   nächsten erfolgreichen Login neu berechnet (needs_rehash).
+# - LoginThrottle: Fehlversuche pro Account und pro IP in einem festen Zeitfenster.
+#   Zähler liegen im Prozess (wie die Caches), bei mehreren Workern gilt das Limit je Worker.
+import atexit
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Optional, Tuple
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from .cache import MISSING, TTLCache
+
+log = logging.getLogger("app.passwords")
+
+
+class Busy(Exception):
+    """Zu viele Hash-Aufträge in Arbeit; der Client soll es später erneut versuchen."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("password hashing busy")
+        self.retry_after = retry_after
+
+
+def normalize_method(method: str) -> str:
+    """
+    Vollständige Werkzeug-Methode, wie sie im Hash-Präfix steht
+    ("scrypt" -> "scrypt:32768:8:1", "pbkdf2" -> "pbkdf2:sha256:<iterationen>").
+    """
+    name, *params = method.split(":")
+    if name == "scrypt":
+        defaults = ["32768", "8", "1"]
+    elif name == "pbkdf2":
+        defaults = ["sha256", str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        raise ValueError(f"unsupported password hash method {method!r}")
+    return ":".join([name] + params + defaults[len(params):])
+
+
+def hash_method(pwhash: str) -> str:
+    return pwhash.split("$", 1)[0]
+
+
+def _verify(pwhash: str, password: str) -> bool:
+    # Werkzeug wirft bei kaputten/fremden Hashes (z.B. Testdaten "hash-...") ValueError
+    try:
+        return check_password_hash(pwhash, password)
+    except (ValueError, TypeError):
+        return False
+
+
+class PasswordHasher:
+    """
+    workers=0: im aufrufenden Thread rechnen (CLI, Tests), Admission-Control gilt trotzdem.
+    Der Pool wird erst beim ersten Auftrag gestartet ("spawn", damit kein Fork mitten aus
+    einem Server mit laufenden Threads passiert).
+    """
+
+    def __init__(self, method: str = "scrypt", workers: int = 2, max_pending: int = 16, timeout: float = 5.0):
+        self.method = normalize_method(method)
+        self.workers = workers
+        self.max_pending = max(1, max_pending)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._dummy: Optional[str] = None
+        self._stats = {"hashed": 0, "verified": 0, "rejected": 0, "timeouts": 0}
+        self._pending = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                atexit.register(self.shutdown)
+            return self._pool
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _run(self, fn: Callable, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise Busy()
+        with self._lock:
+            self._pending += 1
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._release()
+
+        try:
+            future: Future = self._executor().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # Slot erst freigeben, wenn der Worker wirklich fertig ist (auch nach Timeout)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise Busy(retry_after=max(1, math.ceil(self.timeout)))
+
+    def hash(self, password: str) -> str:
+        pwhash = self._run(generate_password_hash, password, self.method)
+        with self._lock:
+            self._stats["hashed"] += 1
+        return pwhash
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        return hash_method(pwhash) != self.method
+
+    def verify(self, pwhash: Optional[str], password: str) -> Tuple[bool, bool]:
+        """
+        (ok, needs_rehash). Ohne pwhash (unbekannte E-Mail) wird gegen einen Dummy-Hash
+        geprüft, damit die Antwortzeit nicht verrät, ob es den Account gibt.
+        """
+        if pwhash is None:
+            if self._dummy is None:
+                self._dummy = self.hash("dummy-password")
+            self._run(_verify, self._dummy, password)
+            return False, False
+        ok = self._run(_verify, pwhash, password)
+        with self._lock:
+            self._stats["verified"] += 1
+        return ok, ok and self.needs_rehash(pwhash)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, method=self.method, workers=self.workers,
+                        pending=self._pending, max_pending=self.max_pending)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+class LoginThrottle:
+    """
+    Sperrt nach max_account Fehlversuchen für eine E-Mail bzw. max_ip für eine IP,
+    bis das Fenster (window Sekunden ab dem ersten Fehlversuch) abgelaufen ist.
+    Erfolgreicher Login setzt den Account-Zähler zurück, nicht den der IP.
+    """
+
+    def __init__(self, max_account: int = 5, max_ip: int = 50, window: float = 900, maxsize: int = 100_000):
+        self.max_account = max_account
+        self.max_ip = max_ip
+        self.window = window
+        # key -> (Fehlversuche, Fensterende monotonic)
+        self._failures = TTLCache(maxsize, window)
+        self._lock = threading.Lock()
+
+    def _keys(self, email: str, ip: Optional[str]):
+        keys = [(("account", email.strip().lower()), self.max_account)]
+        if ip:
+            keys.append((("ip", ip), self.max_ip))
+        return keys
+
+    def retry_after(self, email: str, ip: Optional[str]) -> int:
+        """Sekunden bis zum nächsten erlaubten Versuch, 0 = erlaubt."""
+        now = time.monotonic()
+        wait = 0.0
+        for key, limit in self._keys(email, ip):
+            item = self._failures.get(key)
+            if item is not MISSING and limit > 0 and item[0] >= limit:
+                wait = max(wait, item[1] - now)
+        return math.ceil(wait)
+
+    def failed(self, email: str, ip: Optional[str]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key, _ in self._keys(email, ip):
+                item = self._failures.get(key)
+                count, until = (0, now + self.window) if item is MISSING else item
+                self._failures.set(key, (count + 1, until), ttl=until - now)
+
+    def succeeded(self, email: str) -> None:
+        self._failures.pop(("account", email.strip().lower()))
+
+    def stats(self) -> dict:
+        return self._failures.stats()
@@ -0,0 +1,67 @@
+from flask import Flask, g, has_request_context
+from .db_api import get_connection
+
+
+class RequestConnection:
+    """
+    Proxy auf die eine Verbindung des aktuellen Requests.
+    `with` und close() geben sie NICHT zurück – das passiert erst in teardown_request.
+    """
+
+    def __init__(self, con):
+        self._con = con
+
+    def __getattr__(self, name):
+        return getattr(self._con, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def close(self):
+        pass
+
+
+def get_request_connection():
+    """
+    Liefert die Verbindung des laufenden Requests (beim ersten Aufruf aus dem Pool geholt).
+    Außerhalb eines Requests (CLI, Tests, Threads) wie get_connection().
+    """
+    if not has_request_context():
+        return get_connection()
+    con = g.get("_db")
+    if con is None:
+        con = g._db = get_connection()
+    return RequestConnection(con)
+
+
+def query_count() -> int:
+    """Anzahl der Queries im aktuellen Request."""
+    return g.get("query_count", 0)
+
+
+def _release_request_connection(exc=None):
+    con = g.pop("_db", None)
+    if con is not None:
+        con.__exit__(type(exc) if exc else None, exc, None)
+
+
+def release_request_connection() -> None:
+    """
+    Verbindung schon vor Request-Ende zurückgeben (z.B. vor langem Warten im Long-Poll);
+    ein späteres get_request_connection() holt eine neue.
+    """
+    if has_request_context():
+        _release_request_connection()
+
+
+def _add_query_count_header(resp):
+    resp.headers["X-Query-Count"] = str(query_count())
+    return resp
+
+
+def init_app(app: Flask) -> None:
+    app.after_request(_add_query_count_header)
+    app.teardown_request(_release_request_connection)
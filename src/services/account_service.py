@@ -1,9 +1,11 @@
 from typing import Optional
-from werkzeug.security import generate_password_hash
+from src.passwords import PasswordHasher
 
 class AccountService:
-    def __init__(self, get_connection):
+    def __init__(self, get_connection, session_cache=None, hasher=None):
         self.get_connection = get_connection
+        self.session_cache = session_cache
+        self.hasher = hasher or PasswordHasher(workers=0)
 
     def update_account(
         self,
@@ -13,6 +15,9 @@ class AccountService:
         new_pwd: Optional[str]  = None,
         new_comp: Optional[str] = None,
     ) -> None:
+        """Wirft passwords.Busy, wenn das neue Passwort gerade nicht gehasht werden kann."""
+        # vor dem Holen der Verbindung hashen, damit sie nicht während des Hashens belegt ist
+        pwd_hash = self.hasher.hash(new_pwd) if new_pwd else None
         with self.get_connection() as con, con.cursor() as cur:
             fields, params = [], []
             if new_full:
@@ -21,8 +26,7 @@ class AccountService:
             if new_mail:
                 fields.append("email=%s")
                 params.append(new_mail)
-            if new_pwd:
-                pwd_hash = generate_password_hash(new_pwd)
+            if pwd_hash:
                 fields.append("password=%s")
                 params.append(pwd_hash)
 
@@ -44,4 +48,8 @@ class AccountService:
                     cur.execute(
                         "INSERT INTO organizer(user_id, company) VALUES(%s,%s)",
                         (user_id, new_comp),
-                    )
\ No newline at end of file
+                    )
+
+        # gecachte Sessions des Users enthalten Name/E-Mail/Company -> verwerfen
+        if self.session_cache is not None:
+            self.session_cache.invalidate_tag(("user", user_id))
@@ -0,0 +1,55 @@
+# services/analytics_charts.py
+#
+# Serverseitige Charts aus den Reihen von analytics_service.daily_series.
+# Nur die objektorientierte matplotlib-API (Figure statt pyplot): kein globaler Zustand,
+# kein GUI-Backend, damit mehrere Request-Threads gleichzeitig rendern können.
+import io
+from datetime import date
+from typing import Any, Dict
+
+from matplotlib.figure import Figure
+
+KINDS = ("bookings", "fill", "rating")
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+_STATUS_COLORS = (("paid_qty", "bezahlt", "#2e7d32"), ("pending_qty", "offen", "#f9a825"),
+                  ("cancelled_qty", "storniert", "#9e9e9e"), ("rejected_qty", "abgelehnt", "#c62828"))
+
+
+def render(kind: str, series: Dict[str, Any], title: str, fmt: str = "png") -> bytes:
+    fig = Figure(figsize=(8, 3.5), dpi=100, layout="constrained")
+    ax = fig.subplots()
+    days = [date.fromisoformat(d) for d in series["days"]]
+
+    if kind == "bookings":
+        bottom = [0] * len(days)
+        for key, label, color in _STATUS_COLORS:
+            ax.bar(days, series.get(key, []), bottom=bottom, label=label, color=color, width=0.9)
+            bottom = [b + v for b, v in zip(bottom, series.get(key, []))]
+        ax.set_ylabel("Tickets pro Buchungstag")
+        ax.legend(loc="upper left", fontsize="small")
+    elif kind == "fill":
+        ax.plot(days, [v if v is not None else float("nan") for v in series["fill_rate"]],
+                label="Auslastung", color="#1565c0")
+        ax.plot(days, [v if v is not None else float("nan") for v in series["conversion"]],
+                label="Conversion offen → bezahlt", color="#2e7d32", linestyle="--")
+        ax.set_ylim(0, 1.05)
+        ax.yaxis.set_major_formatter(lambda v, _: f"{v:.0%}")
+        ax.legend(loc="upper left", fontsize="small")
+    elif kind == "rating":
+        ax.plot(days, [v if v is not None else float("nan") for v in series["rating_avg"]],
+                color="#6a1b9a", marker="o", markersize=3)
+        ax.set_ylim(1, 5)
+        ax.set_ylabel("Ø Bewertung (kumuliert)")
+    else:
+        raise ValueError(f"unknown chart {kind}")
+
+    ax.set_title(title)
+    ax.grid(axis="y", alpha=0.3)
+    fig.autofmt_xdate()
+    if not days:
+        ax.text(0.5, 0.5, "noch keine Daten", transform=ax.transAxes, ha="center", va="center")
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt)
+    return buf.getvalue()
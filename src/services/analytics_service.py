@@ -0,0 +1,324 @@
+# services/analytics_service.py
+#
+# Besucher-Analytics für Organizer (FR-Eo-05) auf vorberechneten Tageswerten:
+#   event_daily_stats      (event_id, day)     Buchungen nach aktuellem Status, Reviews
+#   organizer_daily_stats  (organizer_id, day) Summe über die Events des Organizers
+# refresh() rechnet nur Events neu, die sich seit dem letzten Lauf geändert haben
+# (Wasserstände in analytics_state: booking.id, booking_audit.id, reviews.created_at),
+# Dashboards lesen ausschließlich die Rollups.
+#
+# IDs/Zeitstempel werden beim INSERT vergeben, sichtbar wird die Zeile erst beim Commit: Buchung 100
+# kann nach einem Lauf committen, der 101 schon gesehen hat. Jeder Lauf schaut deshalb überlappend
+# die letzten overlap_ids IDs bzw. overlap_seconds Sekunden vor dem Wasserstand noch einmal an.
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.db_api import run_transaction
+
+STATUSES = ("pending", "paid", "cancelled", "rejected")
+# Spalten der Rollup-Tabellen (Reihenfolge = Matrix-Spalten in build_daily_rows)
+COLUMNS = ("bookings", "booked_qty", "pending_qty", "paid_qty", "cancelled_qty", "rejected_qty",
+           "reviews", "rating_sum")
+_STATUS_COL = {s: COLUMNS.index(f"{s}_qty") for s in STATUSES}
+
+LOCK_NAME = "analytics_refresh"
+
+STATE_SQL = "SELECT name, value FROM analytics_state"
+SAVE_STATE_SQL = """
+    INSERT INTO analytics_state(name, value) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE value = VALUES(value)
+"""
+HIGH_WATER_SQL = """
+    SELECT (SELECT COALESCE(MAX(id), 0) FROM booking)                          AS booking,
+           (SELECT COALESCE(MAX(id), 0) FROM booking_audit)                    AS booking_audit,
+           (SELECT COALESCE(UNIX_TIMESTAMP(MAX(created_at)), 0) FROM reviews)  AS reviews
+"""
+# Events mit neuen Buchungen, Statuswechseln oder Reviews seit dem letzten Lauf (abzüglich Überlappung);
+# geänderte Reviews zählen mit, weil upsert_review created_at neu setzt
+DIRTY_EVENTS_SQL = """
+    SELECT event_id FROM booking WHERE id > %s AND id <= %s
+    UNION
+    SELECT b.event_id FROM booking_audit a JOIN booking b ON b.id = a.booking_id WHERE a.id > %s AND a.id <= %s
+    UNION
+    SELECT event_id FROM reviews WHERE created_at >= FROM_UNIXTIME(%s)
+"""
+BOOKING_GROUPS_SQL = """
+    SELECT event_id, DATE(created_at) AS day, status, COUNT(*) AS n, SUM(qty) AS qty
+      FROM booking
+     WHERE event_id IN ({ids})
+  GROUP BY event_id, day, status
+"""
+REVIEW_GROUPS_SQL = """
+    SELECT event_id, DATE(created_at) AS day, COUNT(*) AS n, SUM(rating) AS rating_sum
+      FROM reviews
+     WHERE event_id IN ({ids})
+  GROUP BY event_id, day
+"""
+EVENT_ORGANIZERS_SQL = "SELECT id, organizer_id FROM event WHERE id IN ({ids})"
+
+_COLS = ", ".join(COLUMNS)
+INSERT_EVENT_STATS_SQL = f"""
+    INSERT INTO event_daily_stats(event_id, day, organizer_id, {_COLS})
+    VALUES ({", ".join(["%s"] * (len(COLUMNS) + 3))})
+"""
+ORGANIZER_ROLLUP_SQL = f"""
+    INSERT INTO organizer_daily_stats(organizer_id, day, {_COLS})
+    SELECT organizer_id, day, {", ".join(f"SUM({c})" for c in COLUMNS)}
+      FROM event_daily_stats
+     WHERE organizer_id IN ({{ids}})
+  GROUP BY organizer_id, day
+"""
+BUMP_VERSION_SQL = """
+    INSERT INTO analytics_version(organizer_id, version) VALUES (%s, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1
+"""
+VERSION_SQL = "SELECT version FROM analytics_version WHERE organizer_id = %s"
+
+ORGANIZER_DAYS_SQL = f"""
+    SELECT day, {_COLS} FROM organizer_daily_stats WHERE organizer_id = %s ORDER BY day
+"""
+EVENT_DAYS_SQL = f"""
+    SELECT day, {_COLS} FROM event_daily_stats WHERE event_id = %s ORDER BY day
+"""
+EVENT_TOTALS_SQL = f"""
+    SELECT e.id AS event_id, e.title, e.start_date, e.capacity,
+           {", ".join(f"COALESCE(SUM(s.{c}), 0) AS {c}" for c in COLUMNS)}
+      FROM event e
+ LEFT JOIN event_daily_stats s ON s.event_id = e.id
+     WHERE e.organizer_id = %s
+  GROUP BY e.id, e.title, e.start_date, e.capacity
+  ORDER BY e.start_date DESC
+"""
+CAPACITY_SQL = "SELECT COALESCE(SUM(capacity), 0) AS capacity FROM event WHERE organizer_id = %s"
+OWNED_EVENT_SQL = "SELECT id, title, capacity FROM event WHERE id = %s AND organizer_id = %s"
+
+
+def _in(ids: Sequence[int]) -> str:
+    return ", ".join(["%s"] * len(ids))
+
+
+def build_daily_rows(booking_groups: List[Dict], review_groups: List[Dict],
+                     organizers: Dict[int, int]) -> List[tuple]:
+    """
+    Gruppierte Buchungs-/Review-Zeilen -> eine Zeile (event_id, day, organizer_id, *COLUMNS) pro
+    Event und Tag. Pivot nach Status per np.add.at statt Python-Schleifen über Dicts.
+    Events ohne Organizer (inzwischen gelöscht) fallen weg.
+    """
+    keys = sorted({(r["event_id"], r["day"]) for r in booking_groups} |
+                  {(r["event_id"], r["day"]) for r in review_groups})
+    keys = [k for k in keys if k[0] in organizers]
+    if not keys:
+        return []
+    index = {k: i for i, k in enumerate(keys)}
+    m = np.zeros((len(keys), len(COLUMNS)), dtype=np.int64)
+
+    b = [r for r in booking_groups if (r["event_id"], r["day"]) in index]
+    if b:
+        rows = np.fromiter((index[(r["event_id"], r["day"])] for r in b), np.int64, len(b))
+        n = np.fromiter((r["n"] for r in b), np.int64, len(b))
+        qty = np.fromiter((r["qty"] or 0 for r in b), np.int64, len(b))
+        col = np.fromiter((_STATUS_COL.get(r["status"], -1) for r in b), np.int64, len(b))
+        np.add.at(m[:, COLUMNS.index("bookings")], rows, n)
+        np.add.at(m[:, COLUMNS.index("booked_qty")], rows, qty)
+        known = col >= 0
+        np.add.at(m, (rows[known], col[known]), qty[known])
+
+    rv = [r for r in review_groups if (r["event_id"], r["day"]) in index]
+    if rv:
+        rows = np.fromiter((index[(r["event_id"], r["day"])] for r in rv), np.int64, len(rv))
+        np.add.at(m[:, COLUMNS.index("reviews")], rows, np.fromiter((r["n"] for r in rv), np.int64, len(rv)))
+        np.add.at(m[:, COLUMNS.index("rating_sum")], rows,
+                  np.fromiter((r["rating_sum"] or 0 for r in rv), np.int64, len(rv)))
+
+    return [(eid, day, organizers[eid], *map(int, vals)) for (eid, day), vals in zip(keys, m)]
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    out = np.full(num.shape, np.nan)
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+def _clean(values: np.ndarray, digits: int = 4) -> List[Optional[float]]:
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def daily_series(rows: List[Dict], capacity: int = 0, since: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Tageszeilen (aufsteigend nach day) -> Reihen für Dashboard/Charts.
+    Kumulierte Werte (Auslastung, Conversion, Ø-Bewertung) laufen über die ganze Historie,
+    `since` schneidet nur die Ausgabe ab.
+    """
+    if not rows:
+        empty = {k: [] for k in ("days", *COLUMNS, "fill_rate", "conversion", "rating_avg")}
+        return dict(empty, totals=_totals(np.zeros(len(COLUMNS), np.int64), capacity))
+    m = np.array([[r[c] or 0 for c in COLUMNS] for r in rows], dtype=np.int64)
+    cum = np.cumsum(m, axis=0)
+    col = {c: i for i, c in enumerate(COLUMNS)}
+    active = cum[:, col["pending_qty"]] + cum[:, col["paid_qty"]]
+
+    series = {
+        "days": [r["day"].isoformat() for r in rows],
+        **{c: m[:, i].tolist() for c, i in col.items()},
+        "fill_rate": _clean(active / capacity) if capacity else [None] * len(rows),
+        "conversion": _clean(_ratio(cum[:, col["paid_qty"]], cum[:, col["booked_qty"]])),
+        "rating_avg": _clean(_ratio(cum[:, col["rating_sum"]], cum[:, col["reviews"]]), 2),
+    }
+    if since is not None:
+        keep = next((i for i, r in enumerate(rows) if r["day"] >= since), len(rows))
+        series = {k: v[keep:] for k, v in series.items()}
+    series["totals"] = _totals(cum[-1], capacity)
+    return series
+
+
+def _totals(sums: np.ndarray, capacity: int) -> Dict[str, Any]:
+    t = {c: int(v) for c, v in zip(COLUMNS, sums)}
+    active = t["pending_qty"] + t["paid_qty"]
+    t["capacity"] = int(capacity)
+    t["fill_rate"] = round(active / capacity, 4) if capacity else None
+    t["conversion"] = round(t["paid_qty"] / t["booked_qty"], 4) if t["booked_qty"] else None
+    t["rating_avg"] = round(t["rating_sum"] / t["reviews"], 2) if t["reviews"] else None
+    return t
+
+
+def event_table(rows: List[Dict]) -> List[Dict]:
+    """Summen je Event + Quoten, vektorisiert über alle Events eines Organizers."""
+    if not rows:
+        return []
+    m = np.array([[r[c] for c in COLUMNS] for r in rows], dtype=np.int64)
+    cap = np.array([r["capacity"] or 0 for r in rows], dtype=np.int64)
+    col = {c: i for i, c in enumerate(COLUMNS)}
+    fill = _clean(_ratio(m[:, col["pending_qty"]] + m[:, col["paid_qty"]], cap))
+    conv = _clean(_ratio(m[:, col["paid_qty"]], m[:, col["booked_qty"]]))
+    rating = _clean(_ratio(m[:, col["rating_sum"]], m[:, col["reviews"]]), 2)
+    return [
+        {"event_id": r["event_id"], "title": r["title"], "start_date": r["start_date"], "capacity": r["capacity"],
+         **{c: int(v) for c, v in zip(COLUMNS, vals)},
+         "fill_rate": f, "conversion": c, "rating_avg": a}
+        for r, vals, f, c, a in zip(rows, m, fill, conv, rating)
+    ]
+
+
+class AnalyticsService:
+    def __init__(self, get_connection: Callable, refresh_seconds: float = 60, batch: int = 500,
+                 overlap_ids: int = 1000, overlap_seconds: int = 300):
+        self.get_connection = get_connection
+        self.refresh_seconds = refresh_seconds
+        self.batch = batch
+        self.overlap_ids = overlap_ids
+        self.overlap_seconds = overlap_seconds
+        self._last_refresh = 0.0
+
+    # ---------- Rollups pflegen ----------
+
+    def refresh_if_stale(self) -> Optional[Dict[str, int]]:
+        """Vom Dashboard aufgerufen: höchstens alle refresh_seconds ein (inkrementeller) Lauf pro Prozess."""
+        if time.monotonic() - self._last_refresh < self.refresh_seconds:
+            return None
+        self._last_refresh = time.monotonic()
+        return self.refresh()
+
+    def refresh(self) -> Optional[Dict[str, int]]:
+        """
+        Rechnet geänderte Events neu und danach deren Organizer.
+        None, wenn gerade ein anderer Prozess aktualisiert (GET_LOCK ohne Warten).
+        """
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute("SELECT GET_LOCK(%s, 0) AS ok", (LOCK_NAME,))
+            if not cur.fetchone()["ok"]:
+                return None
+            try:
+                return self._refresh()
+            finally:
+                cur.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+
+    def _refresh(self) -> Dict[str, int]:
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(STATE_SQL)
+            state = {r["name"]: r["value"] for r in cur.fetchall()}
+            cur.execute(HIGH_WATER_SQL)
+            high = cur.fetchone()
+            cur.execute(DIRTY_EVENTS_SQL, (
+                max(0, state.get("booking", 0) - self.overlap_ids), high["booking"],
+                max(0, state.get("booking_audit", 0) - self.overlap_ids), high["booking_audit"],
+                max(0, state.get("reviews", 0) - self.overlap_seconds),
+            ))
+            dirty = sorted(r["event_id"] for r in cur.fetchall())
+
+        organizers = set()
+        for i in range(0, len(dirty), self.batch):
+            organizers |= run_transaction(self.get_connection,
+                                          lambda cur, ids=dirty[i:i + self.batch]: self._rebuild_events(cur, ids))
+        if organizers:
+            run_transaction(self.get_connection, lambda cur: self._rebuild_organizers(cur, sorted(organizers)))
+
+        def save(cur):
+            # reviews: ">=" im nächsten Lauf, damit Reviews aus derselben Sekunde nicht verloren gehen
+            cur.executemany(SAVE_STATE_SQL, [(k, int(high[k] or 0)) for k in ("booking", "booking_audit", "reviews")])
+        run_transaction(self.get_connection, save)
+        return {"events": len(dirty), "organizers": len(organizers)}
+
+    def event_deleted(self, organizer_id: int) -> None:
+        """
+        event_daily_stats des Events ist per CASCADE weg; die Organizer-Summe enthält es aber noch.
+        Sofort neu rechnen und die Version erhöhen, damit Dashboard und gecachte Charts stimmen.
+        """
+        run_transaction(self.get_connection, lambda cur: self._rebuild_organizers(cur, [organizer_id]))
+
+    def _rebuild_events(self, cur, ids: List[int]) -> set:
+        cur.execute(EVENT_ORGANIZERS_SQL.format(ids=_in(ids)), ids)
+        organizers = {r["id"]: r["organizer_id"] for r in cur.fetchall()}
+        cur.execute(BOOKING_GROUPS_SQL.format(ids=_in(ids)), ids)
+        bookings = cur.fetchall()
+        cur.execute(REVIEW_GROUPS_SQL.format(ids=_in(ids)), ids)
+        reviews = cur.fetchall()
+
+        cur.execute(f"DELETE FROM event_daily_stats WHERE event_id IN ({_in(ids)})", ids)
+        rows = build_daily_rows(bookings, reviews, organizers)
+        if rows:
+            cur.executemany(INSERT_EVENT_STATS_SQL, rows)
+        return set(organizers.values())
+
+    def _rebuild_organizers(self, cur, ids: List[int]) -> None:
+        cur.execute(f"DELETE FROM organizer_daily_stats WHERE organizer_id IN ({_in(ids)})", ids)
+        cur.execute(ORGANIZER_ROLLUP_SQL.format(ids=_in(ids)), ids)
+        cur.executemany(BUMP_VERSION_SQL, [(oid,) for oid in ids])
+
+    # ---------- Lesen (nur Rollups) ----------
+
+    def version(self, organizer_id: int) -> int:
+        """Ändert sich bei jedem Refresh, der Daten des Organizers neu berechnet hat (Chart-Cache-Key)."""
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(VERSION_SQL, (organizer_id,))
+            row = cur.fetchone()
+            return row["version"] if row else 0
+
+    def organizer_report(self, organizer_id: int, days: int = 90) -> Dict[str, Any]:
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(ORGANIZER_DAYS_SQL, (organizer_id,))
+            rows = cur.fetchall()
+            cur.execute(CAPACITY_SQL, (organizer_id,))
+            capacity = cur.fetchone()["capacity"]
+            cur.execute(EVENT_TOTALS_SQL, (organizer_id,))
+            events = cur.fetchall()
+        return {
+            "daily": daily_series(rows, int(capacity), date.today() - timedelta(days=days)),
+            "events": event_table(events),
+        }
+
+    def event_report(self, organizer_id: int, event_id: int, days: int = 90) -> Optional[Dict[str, Any]]:
+        """None, wenn das Event nicht dem Organizer gehört."""
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(OWNED_EVENT_SQL, (event_id, organizer_id))
+            event = cur.fetchone()
+            if not event:
+                return None
+            cur.execute(EVENT_DAYS_SQL, (event_id,))
+            rows = cur.fetchall()
+        return {
+            "event": event,
+            "daily": daily_series(rows, event["capacity"] or 0, date.today() - timedelta(days=days)),
+        }
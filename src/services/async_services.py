@@ -0,0 +1,249 @@
+# services/async_services.py
+# Async-Gegenstücke der Services für den ASGI-Modus (src/asgi.py).
+# Die Klassen halten eine Instanz des synchronen Services ohne Verbindung (self.base) und
+# benutzen deren SQL, Parsing, Fehler-Mapping und Caches; nur die I/O läuft über aiomysql.
+# Bewusst keine Unterklassen: ein Async-Service soll nicht dort durchgehen, wo ein
+# synchroner erwartet wird (gleichnamige Methoden würden still Coroutinen liefern).
+# get_connection ist hier async_db.connection (`async with get_connection() as con`).
+# Es gibt nur die Methoden der async Routen, alle anderen laufen über die Flask-App.
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import pymysql
+from pymysql.constants import ER
+
+from src.async_db import run_transaction
+from src.services.auth_service import SESSION_SQL, USER_SQL, AuthService
+from src.services.bookings_service import USER_BOOKINGS_SQL
+from src.services.message_service import LATEST_ID_SQL, NEW_SINCE_SQL, MessageService, Notifier
+from src.services.events_service import (
+    CANCEL_AUDIT_SQL, CANCEL_SQL, FREE_SQL, INSERT_BOOKING_SQL, LISTING_STAMP_SQL, OVERLAY_SQL, PENDING_QTY_SQL,
+    RELEASE_PENDING_SQL, RESERVE_SQL, AlreadyBooked, EventNotFound, EventsService, SoldOut,
+)
+from src.services.organizer_booking_service import (
+    APPROVE_SQL, AUDIT_SQL, FAILURE_SQL, OWNED_BOOKING_SQL, REJECT_SQL, OrganizerBookingService,
+)
+
+
+class AsyncAuthService:
+    def __init__(self, get_connection, session_cache=None, unknown_token_cache=None, signed=None):
+        self.get_connection = get_connection
+        self.base = AuthService(None, session_cache, unknown_token_cache, signed=signed)
+
+    async def session_user(self, token: str):
+        if not token:
+            return None
+
+        base = self.base
+        if base._is_signed(token):
+            done, found = base._signed_lookup(token)
+            if done:
+                return found
+            async with self.get_connection() as con, con.cursor() as cur:
+                await cur.execute(USER_SQL, (found,))
+                return base._store_user(found, await cur.fetchone())
+
+        hit, user = base._cached_session(token)
+        if hit:
+            return user
+
+        async with self.get_connection() as con, con.cursor() as cur:
+            await cur.execute(SESSION_SQL, (token,))
+            row = await cur.fetchone()
+
+        return base._store_session(token, row)
+
+
+class AsyncEventsService:
+    def __init__(self, get_connection, list_cache=None, categories=None):
+        self.get_connection = get_connection
+        self.list_cache = list_cache
+        self.base = EventsService(None, list_cache, categories=categories)
+
+    async def listing_stamp(self, query_args):
+        category_id = self.base._filter_key(query_args)[-1]
+        row, generation = self.list_cache.cached_stamp() if self.list_cache else (None, 0)
+        if row is None:
+            async with self.get_connection() as con, con.cursor() as cur:
+                await cur.execute(LISTING_STAMP_SQL)
+                row = await cur.fetchone()
+            if self.list_cache:
+                self.list_cache.store_stamp(row, generation)
+        return self.base._listing_stamp(row, category_id)
+
+    async def list_event(self, query_args, user, stamp=None):
+        key, sort, after, limit, fields = self.base._parse_page(query_args)
+
+        page_key = key + (sort, after, limit)
+        rows = self.list_cache.get_listing(page_key, stamp) if self.list_cache else None
+        if rows is None:
+            rows = await self._query_listing(key, sort, after, limit + 1)
+            if self.list_cache:
+                self.list_cache.set_listing(page_key, rows, stamp)
+
+        overlay = None
+        if self.base._wants_overlay(fields):
+            overlay = await self._user_overlay(user["id"]) if user else {}
+        return self.base._finish_page(rows, sort, after, limit, fields, overlay)
+
+    async def _query_listing(self, filters, sort, after, limit):
+        sql, args = self.base._listing_sql(filters, sort, after, limit)
+        async with self.get_connection() as con, con.cursor() as cur:
+            await cur.execute(sql, args)
+            return self.base._listing_rows(list(await cur.fetchall()))
+
+    async def _user_overlay(self, user_id: int) -> dict:
+        overlay = self.list_cache.get_overlay(user_id) if self.list_cache else None
+        if overlay is not None:
+            return overlay
+
+        async with self.get_connection() as con, con.cursor() as cur:
+            await cur.execute(OVERLAY_SQL, (user_id,))
+            overlay = {r["event_id"]: int(r["my_paid"]) for r in await cur.fetchall()}
+
+        if self.list_cache:
+            self.list_cache.set_overlay(user_id, overlay)
+        return overlay
+
+    async def book_event(self, eid, user, data):
+        if not user:
+            return {"error": "unauthorized"}, 401
+
+        qty = EventsService._qty(data)
+        if qty is None:
+            return {"error": "invalid qty"}, 400
+
+        try:
+            await run_transaction(self.get_connection, lambda cur: self._reserve(cur, eid, user["id"], qty))
+        except (EventNotFound, SoldOut, AlreadyBooked, pymysql.err.OperationalError) as e:
+            return EventsService._booking_error(e)
+
+        if self.list_cache:
+            self.list_cache.booking_changed(user["id"], eid)
+        return {"ok": True}, 200
+
+    @staticmethod
+    async def _reserve(cur, eid: int, user_id: int, qty: int) -> None:
+        await cur.execute(RESERVE_SQL, (qty, eid, qty))
+        if cur.rowcount == 0:
+            await cur.execute(FREE_SQL, (eid,))
+            ev = await cur.fetchone()
+            if not ev:
+                raise EventNotFound()
+            raise SoldOut(max(0, ev["free"]))
+
+        try:
+            await cur.execute(INSERT_BOOKING_SQL, (user_id, eid, qty))
+        except pymysql.err.IntegrityError as e:
+            if e.args and e.args[0] == ER.DUP_ENTRY:
+                raise AlreadyBooked()
+            raise
+
+    async def cancel_booking(self, eid, user):
+        async def work(cur):
+            await cur.execute(PENDING_QTY_SQL, (user["id"], eid))
+            qty = (await cur.fetchone())["qty"]
+
+            await cur.execute(CANCEL_AUDIT_SQL, (user["id"], eid))
+            await cur.execute(CANCEL_SQL, (user["id"], eid))
+            changed = cur.rowcount
+
+            if changed:
+                await cur.execute(RELEASE_PENDING_SQL, (qty, eid))
+            return changed
+
+        changed = await run_transaction(self.get_connection, work)
+        return self.base._cancel_result(eid, user, changed)
+
+
+class AsyncBookingsService:
+    def __init__(self, get_connection):
+        self.get_connection = get_connection
+
+    async def list_user_bookings(self, user_id: int):
+        async with self.get_connection() as con, con.cursor() as cur:
+            await cur.execute(USER_BOOKINGS_SQL, (user_id, user_id))
+            return list(await cur.fetchall())
+
+
+class AsyncOrganizerBookingService:
+    def __init__(self, get_connection, list_cache=None):
+        self.get_connection = get_connection
+        self.list_cache = list_cache
+        self.base = OrganizerBookingService(None, list_cache)
+
+    async def owned_booking(self, booking_id: int, organizer_id: int) -> Optional[Dict[str, Any]]:
+        """Ownership-Prüfung wie organizer_booking() in app.py."""
+        async with self.get_connection() as con, con.cursor() as cur:
+            await cur.execute(OWNED_BOOKING_SQL, (booking_id, organizer_id))
+            return await cur.fetchone()
+
+    async def list_api(
+        self, organizer_id: int, status: str, cursor: Optional[str] = None, limit=None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        OrganizerBookingService._check_status(status)
+        return await self.list_by_status(organizer_id, status, cursor, limit)
+
+    async def list_by_status(self, organizer_id: int, status: str, cursor: Optional[str] = None, limit=None):
+        sql, args, limit = self.base._page_query(organizer_id, status, cursor, limit)
+        async with self.get_connection() as con, con.cursor() as cur:
+            await cur.execute(sql, args)
+            return OrganizerBookingService._page_result(list(await cur.fetchall()), limit)
+
+    async def approve(self, booking: Dict[str, Any]) -> Dict[str, Any]:
+        await self._change_status(booking, APPROVE_SQL, "paid")
+        if self.list_cache:
+            self.list_cache.booking_changed(booking["user_id"], booking["event_id"], paid_changed=True)
+        return {"ok": True, "updated": 1}
+
+    async def reject(self, booking: Dict[str, Any]) -> dict:
+        await self._change_status(booking, REJECT_SQL, "cancelled")
+        if self.list_cache:
+            self.list_cache.booking_changed(booking["user_id"], booking["event_id"])
+        return {"ok": True, "updated": 1}
+
+    async def _change_status(self, booking: Dict[str, Any], sql: str, new_status: str) -> None:
+        async def work(cur):
+            await cur.execute(sql, (booking["id"],))
+            if cur.rowcount == 0:
+                await cur.execute(FAILURE_SQL, (booking["id"],))
+                raise OrganizerBookingService._failure(await cur.fetchone())
+            await cur.execute(AUDIT_SQL, (booking["id"], "pending", new_status))
+
+        await run_transaction(self.get_connection, work)
+
+
+class AsyncMessageService:
+    """Long-Poll/SSE als Coroutinen: ein wartender Client ist nur ein asyncio.Event im Notifier."""
+
+    def __init__(self, get_connection, notifier: Notifier):
+        self.get_connection = get_connection
+        self.notifier = notifier
+
+    async def latest_id(self, user_id: int) -> int:
+        async with self.get_connection() as con, con.cursor() as cur:
+            await cur.execute(LATEST_ID_SQL, (user_id,))
+            return (await cur.fetchone())["id"]
+
+    async def new_since(self, user_id: int, since_id: int, limit: int = MessageService.MAX_LIMIT):
+        async with self.get_connection() as con, con.cursor() as cur:
+            await cur.execute(NEW_SINCE_SQL, (user_id, since_id, limit))
+            return list(await cur.fetchall())
+
+    async def poll(self, user_id: int, since_id: int, timeout: float):
+        with self.notifier.listen(user_id, asyncio.get_running_loop()) as waiter:
+            rows = await self.new_since(user_id, since_id)
+            if rows or not await waiter.wait_async(timeout):
+                return rows
+        return await self.new_since(user_id, since_id)
+
+    async def stream(self, user_id: int, since_id: int, keepalive: float):
+        """Async-Generator: (id, message) für neue Nachrichten, None als Keepalive."""
+        with self.notifier.listen(user_id, asyncio.get_running_loop()) as waiter:
+            while True:
+                rows = await self.new_since(user_id, since_id)
+                for m in rows:
+                    since_id = m["id"]
+                    yield m
+                if not rows and not await waiter.wait_async(keepalive):
+                    yield None
@@ -1,18 +1,67 @@
-from werkzeug.security import generate_password_hash
 import secrets
 from datetime import datetime, timedelta
-from werkzeug.security import check_password_hash
+from src.cache import MISSING
+from src.passwords import Busy, PasswordHasher
+
+# Session-Token -> User-Daten + Organizer-Flag + Restlaufzeit der Session in Sekunden
+LOGIN_SQL = "SELECT id,email,password,full_name FROM user WHERE email=%s"
+# nur ersetzen, wenn das Passwort nicht inzwischen geändert wurde (new_hash, id, old_hash)
+REHASH_SQL = "UPDATE user SET password=%s WHERE id=%s AND password=%s"
+
+SESSION_SQL = """
+    SELECT u.id, u.email, u.full_name,
+           (o.user_id IS NOT NULL) AS is_organizer,
+           o.company,
+           TIMESTAMPDIFF(SECOND, NOW(), s.expires_at) AS expires_in
+    FROM session s
+    JOIN user u ON u.id = s.user_id
+    LEFT JOIN organizer o ON o.user_id = u.id
+    WHERE s.token=%s AND s.expires_at > NOW()
+"""
+
+def busy_response(e: Busy):
+    return {"error": "busy", "retry_after": e.retry_after}, 503
+
+
+# User-Daten für signierte Session-Tokens (user_id), Spalten wie SESSION_SQL
+USER_SQL = """
+    SELECT u.id, u.email, u.full_name,
+           (o.user_id IS NOT NULL) AS is_organizer,
+           o.company
+    FROM user u
+    LEFT JOIN organizer o ON o.user_id = u.id
+    WHERE u.id=%s
+"""
 
 class AuthService:
-    def __init__(self, get_connection):
+    def __init__(self, get_connection, session_cache=None, unknown_token_cache=None,
+                 hasher=None, throttle=None, release_connection=None, signed=None,
+                 session_max_age=7 * 24 * 3600):
         self.get_connection = get_connection
+        # sessions.SignedSessions: neue Logins bekommen signierte Tokens ohne session-Zeile;
+        # bestehende DB-Tokens bleiben gültig, bis sie ablaufen
+        self.signed = signed
+        self.session_max_age = session_max_age
+        # Hashing im Prozesspool (src.passwords); ohne Angabe im aufrufenden Thread
+        self.hasher = hasher or PasswordHasher(workers=0)
+        self.throttle = throttle
+        # gibt die Request-Verbindung vor dem Hashen zurück, damit sie nicht blockiert wartet
+        self.release_connection = release_connection
+        # token -> User-Zeile (TTL höchstens bis session.expires_at), Tag ("user", id)
+        self.session_cache = session_cache
+        # Negativ-Cache für unbekannte/abgelaufene Tokens (eigener Cache, damit
+        # zufällige Cookies die gültigen Sessions nicht verdrängen)
+        self.unknown_token_cache = unknown_token_cache
 
     def register_user(self, data: dict):
         req = ("email", "password", "full_name")
         if not (data and all(k in data for k in req)):
             return {"error": "missing fields"}, 400
 
-        pwd_hash = generate_password_hash(data["password"])
+        try:
+            pwd_hash = self.hasher.hash(data["password"])
+        except Busy as e:
+            return busy_response(e)
 
         try:
             with self.get_connection() as con, con.cursor() as cur:
@@ -32,7 +81,10 @@ class AuthService:
         if not (data and all(k in data for k in req)):
             return {"error": "missing fields"}, 400
 
-        pwd_hash = generate_password_hash(data["password"])
+        try:
+            pwd_hash = self.hasher.hash(data["password"])
+        except Busy as e:
+            return busy_response(e)
 
         try:
             with self.get_connection() as con, con.cursor() as cur:
@@ -55,27 +107,48 @@ class AuthService:
         except Exception as e:
             return {"error": str(e)}, 400
     
-    def login(self, data):
+    def login(self, data, ip=None):
         email = data.get("email")
         pwd   = data.get("password")
         if not email or not pwd:
             return {"error": "missing fields"}, 400
 
+        if self.throttle is not None:
+            wait = self.throttle.retry_after(email, ip)
+            if wait:
+                return {"error": "too_many_attempts", "retry_after": wait}, 429
+
         with self.get_connection() as con, con.cursor() as cur:
-            cur.execute("SELECT id,email,password,full_name FROM user WHERE email=%s", (email,))
+            cur.execute(LOGIN_SQL, (email,))
             u = cur.fetchone()
 
-        if not u or not check_password_hash(u["password"], pwd):
+        if self.release_connection is not None:
+            self.release_connection()
+        try:
+            ok, rehash = self.hasher.verify(u["password"] if u else None, pwd)
+        except Busy as e:
+            return busy_response(e)
+
+        if not ok:
+            if self.throttle is not None:
+                self.throttle.failed(email, ip)
             return {"error": "invalid credentials"}, 401
+        if self.throttle is not None:
+            self.throttle.succeeded(email)
+        if rehash:
+            self._rehash(u, pwd)
 
-        token   = secrets.token_urlsafe(32)
-        expires = datetime.utcnow() + timedelta(days=7)
+        if self.signed is not None:
+            token, expires = self.signed.issue(u["id"])
+        else:
+            token   = secrets.token_urlsafe(32)
+            expires = datetime.utcnow() + timedelta(seconds=self.session_max_age)
 
-        with self.get_connection() as con, con.cursor() as cur:
-            cur.execute(
-                "INSERT INTO session(token,user_id,expires_at) VALUES(%s,%s,%s)",
-                (token, u["id"], expires),
-            )
+            with self.get_connection() as con, con.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO session(token,user_id,expires_at) VALUES(%s,%s,%s)",
+                    (token, u["id"], expires),
+                )
 
         # Rückgabe der gleichen Daten wie vorher
         resp_data = {
@@ -85,8 +158,96 @@ class AuthService:
         }
         return resp_data, 200
     
+    def _rehash(self, u, pwd):
+        """Hash mit den aktuellen Parametern neu speichern; bei Überlast beim nächsten Login."""
+        try:
+            new_hash = self.hasher.hash(pwd)
+        except Busy:
+            return
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(REHASH_SQL, (new_hash, u["id"], u["password"]))
+
     def logout(self, token: str):
-        if token:
+        if token and self._is_signed(token):
+            self.signed.revoke(token)
+        elif token:
             with self.get_connection() as con, con.cursor() as cur:
                 cur.execute("DELETE FROM session WHERE token=%s", (token,))
-        return {"ok": True}
\ No newline at end of file
+            if self.session_cache is not None:
+                self.session_cache.pop(token)
+        return {"ok": True}
+
+    def _is_signed(self, token: str) -> bool:
+        return self.signed is not None and self.signed.is_signed(token)
+
+    def session_user(self, token: str):
+        """
+        Löst ein Session-Token in einer Query auf: User-Daten + Organizer-Flag + Company.
+        Gibt None zurück, wenn das Token unbekannt oder abgelaufen ist.
+        Treffer kommen aus dem Session-Cache (falls konfiguriert).
+        """
+        if not token:
+            return None
+
+        if self._is_signed(token):
+            done, found = self._signed_lookup(token)
+            if done:
+                return found
+            with self.get_connection() as con, con.cursor() as cur:
+                cur.execute(USER_SQL, (found,))
+                return self._store_user(found, cur.fetchone())
+
+        hit, user = self._cached_session(token)
+        if hit:
+            return user
+
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(SESSION_SQL, (token,))
+            row = cur.fetchone()
+
+        return self._store_session(token, row)
+
+    def _signed_lookup(self, token: str):
+        """
+        Signiertes Token ohne DB prüfen (Signatur, Alter, Widerruf):
+        (True, User oder None) wenn fertig, (False, user_id) wenn der User geladen werden muss.
+        """
+        uid = self.signed.load(token)
+        if uid is None:
+            return True, None
+        if self.session_cache is not None:
+            row = self.session_cache.get(("uid", uid))
+            if row is not MISSING:
+                return True, dict(row)
+        return False, uid
+
+    def _store_user(self, uid: int, row):
+        """Ergebnis von USER_SQL cachen (Tag ("user", id) wie die DB-Sessions)."""
+        if not row:
+            return None
+        if self.session_cache is not None:
+            self.session_cache.set(("uid", uid), row, tags=[("user", uid)])
+        return dict(row)
+
+    def _cached_session(self, token: str):
+        """(True, User oder None) bei Treffer im Session- bzw. Negativ-Cache, sonst (False, None)."""
+        if self.session_cache is not None:
+            row = self.session_cache.get(token)
+            if row is not MISSING:
+                return True, dict(row)
+        if self.unknown_token_cache is not None and self.unknown_token_cache.get(token) is not MISSING:
+            return True, None
+        return False, None
+
+    def _store_session(self, token: str, row):
+        """Ergebnis von SESSION_SQL cachen; gibt den User (ohne expires_in) oder None zurück."""
+        if not row:
+            if self.unknown_token_cache is not None:
+                self.unknown_token_cache.set(token, True)
+            return None
+
+        expires_in = row.pop("expires_in")
+        if self.session_cache is not None:
+            ttl = min(self.session_cache.ttl, expires_in or 0)
+            self.session_cache.set(token, row, ttl=ttl, tags=[("user", row["id"])])
+        return dict(row)
@@ -1,31 +1,33 @@
 # services/bookings_service.py
+
+# Buchungen eines Users inkl. eigener Bewertung (user_id, user_id)
+USER_BOOKINGS_SQL = """
+    SELECT
+      b.id              AS booking_id,
+      e.id              AS event_id,
+      e.title,
+      e.start_date,
+      e.location,
+      b.status,
+      b.qty,
+      r.rating          AS my_rating,
+      r.comment         AS my_comment
+    FROM booking b
+    JOIN event   e ON e.id = b.event_id
+    LEFT JOIN reviews r
+           ON r.user_id = %s AND r.event_id = e.id
+    WHERE b.user_id = %s
+    ORDER BY e.start_date
+"""
+
+
 class BookingsService:
     def __init__(self, get_connection):
         self.get_connection = get_connection
 
     def list_user_bookings(self, user_id: int):
         with self.get_connection() as con, con.cursor() as cur:
-            cur.execute(
-                """
-                SELECT
-                  b.id              AS booking_id,
-                  e.id              AS event_id,
-                  e.title,
-                  e.start_date,
-                  e.location,
-                  b.status,
-                  b.qty,
-                  r.rating          AS my_rating,
-                  r.comment         AS my_comment
-                FROM booking b
-                JOIN event   e ON e.id = b.event_id
-                LEFT JOIN reviews r
-                       ON r.user_id = %s AND r.event_id = e.id
-                WHERE b.user_id = %s
-                ORDER BY e.start_date
-                """,
-                (user_id, user_id),
-            )
+            cur.execute(USER_BOOKINGS_SQL, (user_id, user_id))
             return cur.fetchall()
     
     def upsert_review(self, user_id: int, event_id: int, rating: int, comment: str = ""):
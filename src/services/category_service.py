@@ -0,0 +1,145 @@
+# services/category_service.py
+#
+# Kategoriebaum (FR-Eo-04, categorie.parent_id) im Speicher.
+#
+# - CategoryTree: Nested-Set-Nummerierung (lft/rgt) aus der Adjazenzliste; Nachfahren einer
+#   Kategorie sind alle Knoten mit lft im Intervall [lft, rgt] -> eine sortierte ID-Liste,
+#   die das Event-Listing als ec.category_id IN (...) über idx_event_categorie_category nutzt.
+# - CategoryService: lädt den Baum einmal und prüft höchstens alle check_interval Sekunden
+#   per Fingerprint (eine Aggregat-Abfrage über die kleine Tabelle), ob er neu geladen werden muss.
+#   Es gibt keine Schreib-Routen für Kategorien; Änderungen kommen per SQL/Seed.
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+CATEGORIES_SQL = "SELECT id, name, parent_id FROM categorie"
+FINGERPRINT_SQL = """
+    SELECT COUNT(*) AS n,
+           COALESCE(SUM(CRC32(CONCAT_WS('|', id, name, COALESCE(parent_id, '')))), 0) AS crc
+      FROM categorie
+"""
+
+
+class CategoryTree:
+    def __init__(self, rows: List[Dict[str, Any]], fingerprint: Any = None):
+        self.fingerprint = fingerprint
+        nodes = {r["id"]: r for r in rows}
+        children: Dict[Optional[int], List[int]] = {}
+        for r in sorted(rows, key=lambda r: (r["name"].lower(), r["id"])):
+            parent = r["parent_id"] if r["parent_id"] in nodes else None
+            children.setdefault(parent, []).append(r["id"])
+
+        self._lft: Dict[int, int] = {}
+        self._rgt: Dict[int, int] = {}
+        self._depth: Dict[int, int] = {}
+        self._order: List[int] = []  # Knoten in lft-Reihenfolge (Pre-Order)
+        counter = 0
+        roots = list(children.get(None, []))
+        # Knoten in Zyklen (kaputte parent_id-Kette) hängen an keiner Wurzel -> selbst Wurzel
+        reached = set()
+        while True:
+            for root in roots:
+                counter = self._number(root, 0, counter, children, reached)
+            rest = sorted((i for i in nodes if i not in reached), key=lambda i: (nodes[i]["name"].lower(), i))
+            if not rest:
+                break
+            roots = rest[:1]
+
+        self._nodes = nodes
+        self._children = children
+        self._pos = {node: i for i, node in enumerate(self._order)}
+        self.payload = json.dumps(self.as_list(), separators=(",", ":"), default=str).encode()
+        self.etag = hashlib.sha1(self.payload).hexdigest()[:16]
+
+    def _number(self, root: int, depth: int, counter: int, children, reached) -> int:
+        # iterativ, damit tiefe Bäume nicht an die Rekursionsgrenze stoßen
+        stack = [(root, depth, False)]
+        while stack:
+            node, d, done = stack.pop()
+            if done:
+                self._rgt[node] = counter
+                counter += 1
+                continue
+            if node in reached:
+                continue
+            reached.add(node)
+            self._lft[node] = counter
+            self._depth[node] = d
+            self._order.append(node)
+            counter += 1
+            stack.append((node, d, True))
+            for child in reversed(children.get(node, [])):
+                stack.append((child, d + 1, False))
+        return counter
+
+    def __contains__(self, category_id: int) -> bool:
+        return category_id in self._lft
+
+    def descendants(self, category_id: int) -> List[int]:
+        """Kategorie selbst + alle Unterkategorien (sortiert); leer, wenn es sie nicht gibt."""
+        if category_id not in self._lft:
+            return []
+        # Pre-Order: die Nachfahren stehen direkt hinter dem Knoten, bis lft > rgt
+        rgt = self._rgt[category_id]
+        out = []
+        for node in self._order[self._pos[category_id]:]:
+            if self._lft[node] > rgt:
+                break
+            out.append(node)
+        return sorted(out)
+
+    def as_list(self) -> List[Dict[str, Any]]:
+        """Flache Liste nach Name (wie bisher /api/category) + parent_id/depth/lft/rgt."""
+        rows = sorted(self._lft, key=lambda i: (self._nodes[i]["name"].lower(), i))
+        return [{"id": i, "name": self._nodes[i]["name"], "parent_id": self._nodes[i]["parent_id"],
+                 "depth": self._depth[i], "lft": self._lft[i], "rgt": self._rgt[i]} for i in rows]
+
+    def as_tree(self) -> List[Dict[str, Any]]:
+        def build(i):
+            # lft-Vergleich lässt die Rückkante eines Zyklus weg
+            return {"id": i, "name": self._nodes[i]["name"],
+                    "children": [build(c) for c in self._children.get(i, []) if self._lft.get(c, -1) > self._lft[i]]}
+        return [build(i) for i in self._order if self._depth[i] == 0]
+
+
+class CategoryService:
+    def __init__(self, get_connection: Callable, check_interval: float = 30.0):
+        self.get_connection = get_connection
+        self.check_interval = check_interval
+        self._tree: Optional[CategoryTree] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"loads": 0, "checks": 0}
+
+    def tree(self) -> CategoryTree:
+        tree = self._tree
+        if tree is not None and time.monotonic() - self._checked < self.check_interval:
+            return tree
+        with self._lock:
+            if self._tree is not None and time.monotonic() - self._checked < self.check_interval:
+                return self._tree
+            with self.get_connection() as con, con.cursor() as cur:
+                cur.execute(FINGERPRINT_SQL)
+                fp = cur.fetchone()
+                fingerprint = (fp["n"], int(fp["crc"]))
+                self._stats["checks"] += 1
+                if self._tree is None or self._tree.fingerprint != fingerprint:
+                    cur.execute(CATEGORIES_SQL)
+                    self._tree = CategoryTree(cur.fetchall(), fingerprint)
+                    self._stats["loads"] += 1
+            self._checked = time.monotonic()
+            return self._tree
+
+    def invalidate(self) -> None:
+        """Beim nächsten Zugriff neu laden (z.B. nach Seed/Import im selben Prozess)."""
+        with self._lock:
+            self._tree = None
+
+    def descendants(self, category_id: int) -> List[int]:
+        return self.tree().descendants(category_id)
+
+    def stats(self) -> dict:
+        tree = self._tree
+        return dict(self._stats, categories=len(tree._lft) if tree else 0, etag=tree.etag if tree else None)
@@ -0,0 +1,86 @@
+from typing import Any, Callable, Dict, List, Optional
+
+# Zählerstände aus booking neu berechnet (Grundlage für Drift-Check und Reparatur)
+_ACTUAL_SQL = """
+    SELECT e.id          AS event_id,
+           e.paid_qty    AS paid_qty,
+           e.pending_qty AS pending_qty,
+           COALESCE(SUM(CASE WHEN b.status='paid'    THEN b.qty END),0) AS actual_paid,
+           COALESCE(SUM(CASE WHEN b.status='pending' THEN b.qty END),0) AS actual_pending
+      FROM event e
+      LEFT JOIN booking b ON b.event_id = e.id
+"""
+
+
+class BookingCounterService:
+    """
+    Abgleich der denormalisierten Zähler event.paid_qty / event.pending_qty
+    mit den tatsächlichen Buchungen.
+    """
+
+    def __init__(self, get_connection: Callable, list_cache=None):
+        self.get_connection = get_connection
+        self.list_cache = list_cache
+
+    def find_drift(self, event_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Alle Events, deren Zähler nicht zu booking passen."""
+        sql = _ACTUAL_SQL
+        args = []
+        if event_id is not None:
+            sql += " WHERE e.id=%s"
+            args.append(event_id)
+        sql += """
+             GROUP BY e.id
+            HAVING e.paid_qty <> actual_paid OR e.pending_qty <> actual_pending
+        """
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(sql, args)
+            return cur.fetchall()
+
+    def repair(self, event_id: int) -> Dict[str, Any]:
+        """
+        Berechnet die Zähler eines Events neu und schreibt sie.
+        Event- und Buchungszeilen sind dabei gesperrt, damit keine parallele
+        Buchung zwischen Zählen und Schreiben verloren geht.
+        """
+        with self.get_connection() as con:
+            con.begin()
+            try:
+                with con.cursor() as cur:
+                    cur.execute("SELECT id FROM event WHERE id=%s FOR UPDATE", (event_id,))
+                    if not cur.fetchone():
+                        con.rollback()
+                        return {"event_id": event_id, "repaired": False}
+                    cur.execute(
+                        """
+                        SELECT COALESCE(SUM(CASE WHEN status='paid'    THEN qty END),0) AS paid,
+                               COALESCE(SUM(CASE WHEN status='pending' THEN qty END),0) AS pending
+                          FROM booking
+                         WHERE event_id=%s
+                           FOR UPDATE
+                        """,
+                        (event_id,),
+                    )
+                    actual = cur.fetchone()
+                    cur.execute(
+                        "UPDATE event SET paid_qty=%s, pending_qty=%s WHERE id=%s",
+                        (actual["paid"], actual["pending"], event_id),
+                    )
+                    changed = cur.rowcount
+                con.commit()
+            except Exception:
+                con.rollback()
+                raise
+
+        if changed and self.list_cache:
+            self.list_cache.booking_changed(None, event_id, paid_changed=True)
+        return {"event_id": event_id, "repaired": bool(changed),
+                "paid_qty": int(actual["paid"]), "pending_qty": int(actual["pending"])}
+
+    def reconcile(self, repair: bool = False) -> List[Dict[str, Any]]:
+        """Drift finden und (mit repair=True) pro Event reparieren."""
+        drift = self.find_drift()
+        if repair:
+            for row in drift:
+                row["repair"] = self.repair(row["event_id"])
+        return drift
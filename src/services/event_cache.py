@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from src.cache import MISSING, TTLCache
+
+# Tag, den jede gecachte Event-Liste trägt (für "alles verwerfen")
+ALL_LISTINGS = ("listings",)
+
+
+class EventListCache:
+    """
+    Cache für GET /api/event.
+
+    - Listings: normalisierter Filter -> anonyme Event-Zeilen (inkl. booked/free).
+      Jede Liste ist mit ("event", id) aller enthaltenen Events getaggt.
+    - Overlays: user_id -> {event_id: my_paid} der aktiven Buchungen des Users,
+      damit eingeloggte User dieselben Listings mitbenutzen können.
+    - Versionsstempel (Zeile von LISTING_STAMP_SQL): höchstens stamp_interval Sekunden alt,
+      damit nicht jeder Cache-Treffer eine Abfrage kostet. Jede lokale Änderung (die Hooks
+      unten) verwirft ihn sofort; Änderungen anderer Prozesse sieht er nach stamp_interval.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 30.0, overlay_maxsize: int = 4096,
+                 stamp_interval: float = 1.0):
+        self.listings = TTLCache(maxsize, ttl)
+        self.overlays = TTLCache(overlay_maxsize, ttl)
+        self.stamp_interval = stamp_interval
+        self._stamp_lock = threading.Lock()
+        self._stamp: Optional[Tuple[Dict[str, Any], float]] = None  # (Zeile, geladen monotonic)
+        self._stamp_generation = 0
+        self._stamp_stats = {"hits": 0, "loads": 0}
+
+    # ---------- Listings ----------
+
+    def get_listing(self, key: Tuple, stamp: Any = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        stamp: Versionsstempel der Daten (EventsService.listing_stamp). Ist er angegeben und
+        passt nicht zum gespeicherten, gilt der Eintrag als veraltet (Änderung aus anderem Prozess).
+        """
+        entry = self.listings.get(key)
+        if entry is MISSING:
+            return None
+        cached_stamp, rows = entry
+        if stamp is not None and cached_stamp != stamp:
+            return None
+        return [dict(r) for r in rows]
+
+    def set_listing(self, key: Tuple, rows: List[Dict[str, Any]], stamp: Any = None) -> None:
+        tags = [ALL_LISTINGS] + [("event", r["id"]) for r in rows]
+        self.listings.set(key, (stamp, [dict(r) for r in rows]), tags=tags)
+
+    # ---------- Versionsstempel ----------
+
+    def cached_stamp(self) -> Tuple[Optional[Dict[str, Any]], int]:
+        """(Zeile oder None, Generation); bei None lädt der Aufrufer und ruft store_stamp auf."""
+        with self._stamp_lock:
+            if self._stamp is not None and time.monotonic() - self._stamp[1] < self.stamp_interval:
+                self._stamp_stats["hits"] += 1
+                return self._stamp[0], self._stamp_generation
+            return None, self._stamp_generation
+
+    def store_stamp(self, row: Dict[str, Any], generation: int) -> None:
+        # lief zwischen Laden und Speichern eine lokale Änderung, wäre die Zeile schon veraltet
+        with self._stamp_lock:
+            self._stamp_stats["loads"] += 1
+            if generation == self._stamp_generation:
+                self._stamp = (row, time.monotonic())
+
+    def invalidate_stamp(self) -> None:
+        with self._stamp_lock:
+            self._stamp = None
+            self._stamp_generation += 1
+
+    # ---------- Overlays ----------
+
+    def get_overlay(self, user_id: int) -> Optional[Dict[int, int]]:
+        overlay = self.overlays.get(user_id)
+        return None if overlay is MISSING else overlay
+
+    def set_overlay(self, user_id: int, overlay: Dict[int, int]) -> None:
+        self.overlays.set(user_id, overlay)
+
+    # ---------- Invalidierung ----------
+
+    def event_created(self) -> None:
+        # ein neues Event kann in jedes Listing fallen
+        self.invalidate_stamp()
+        self.listings.invalidate_tag(ALL_LISTINGS)
+
+    def event_updated(self, eid: int) -> None:
+        # geänderte Felder können das Event in andere Filter schieben
+        self.invalidate_stamp()
+        self.listings.invalidate_tag(ALL_LISTINGS)
+
+    def event_deleted(self, eid: int) -> None:
+        self.invalidate_stamp()
+        self.listings.invalidate_tag(("event", eid))
+
+    def booking_changed(self, user_id: Optional[int], eid: Optional[int] = None, paid_changed: bool = False) -> None:
+        """
+        Buchungsstatus hat sich geändert. Die Overlay des Users ist immer betroffen,
+        die Listings nur, wenn sich die bezahlte Menge (booked/free) des Events ändert.
+        Der Stempel immer: auch pending_qty setzt event.updated_at neu.
+        """
+        self.invalidate_stamp()
+        if user_id is not None:
+            self.overlays.pop(user_id)
+        if paid_changed and eid is not None:
+            self.listings.invalidate_tag(("event", eid))
+
+    def stats(self) -> dict:
+        return {"listings": self.listings.stats(), "overlays": self.overlays.stats(),
+                "stamp": dict(self._stamp_stats)}
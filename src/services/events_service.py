@@ -1,143 +1,448 @@
+import re
+from datetime import datetime
+from typing import Optional
+
+import pymysql
+from pymysql.constants import ER
+from src.db_api import is_retryable, run_transaction
+from src.http_cache import stable_last_modified
+from src.services.pagination import decode_cursor, encode_cursor, page_limit
+
+
+# aktive Buchungen eines Users -> {event_id: my_paid} (Overlay für Listings)
+OVERLAY_SQL = """
+    SELECT event_id, MAX(status='paid') AS my_paid
+      FROM booking
+     WHERE user_id=%s AND status IN ('pending','paid')
+  GROUP BY event_id
+"""
+
+# Kapazitätsprüfung + Reservierung in einem bedingten UPDATE (qty, eid, qty)
+RESERVE_SQL = """
+    UPDATE event
+       SET pending_qty = pending_qty + %s
+     WHERE id=%s AND capacity - paid_qty - pending_qty >= %s
+"""
+FREE_SQL = "SELECT capacity - paid_qty - pending_qty AS free FROM event WHERE id=%s"
+INSERT_BOOKING_SQL = "INSERT INTO booking(user_id,event_id,qty,status) VALUES(%s,%s,%s,'pending')"
+
+# Storno der pending-Buchung eines Users (user_id, event_id)
+PENDING_QTY_SQL = """
+    SELECT COALESCE(SUM(qty),0) AS qty
+      FROM booking
+     WHERE user_id=%s
+       AND event_id=%s
+       AND status='pending'
+       FOR UPDATE
+"""
+CANCEL_SQL = """
+    UPDATE booking
+       SET status='cancelled'
+     WHERE user_id=%s
+       AND event_id=%s
+       AND status='pending'
+"""
+RELEASE_PENDING_SQL = "UPDATE event SET pending_qty = pending_qty - %s WHERE id=%s"
+# vor CANCEL_SQL: Statuswechsel der betroffenen Buchungen ins Audit (user_id, event_id)
+CANCEL_AUDIT_SQL = """
+    INSERT INTO booking_audit(booking_id, old_status, new_status)
+    SELECT id, 'pending', 'cancelled'
+      FROM booking
+     WHERE user_id=%s
+       AND event_id=%s
+       AND status='pending'
+"""
+
+# Versionsstempel für Conditional GET: letzte Änderung (idx_event_updated) + letzte Löschung,
+# NOW(6) für http_cache.stable_last_modified
+LISTING_STAMP_SQL = """
+    SELECT (SELECT MAX(updated_at) FROM event) AS updated_at,
+           (SELECT changed_at FROM change_stamp WHERE name = 'event_deleted') AS deleted_at,
+           NOW(6) AS now
+"""
+EVENT_STAMP_SQL = "SELECT updated_at, NOW(6) AS now FROM event WHERE id=%s"
+TOUCH_DELETED_SQL = """
+    INSERT INTO change_stamp(name, changed_at) VALUES ('event_deleted', NOW(6))
+    ON DUPLICATE KEY UPDATE changed_at = VALUES(changed_at)
+"""
+
+
+class EventNotFound(Exception):
+    pass
+
+class SoldOut(Exception):
+    def __init__(self, free: int):
+        self.free = free
+
+class AlreadyBooked(Exception):
+    pass
+
 
 # Klasse für alle Event-Services
 class EventsService:
-    def __init__(self, get_connection):
+    def __init__(self, get_connection, list_cache=None, feed=None, categories=None):
         self.get_connection = get_connection
+        # CategoryService (optional): ?category_id= schließt Unterkategorien ein
+        self.categories = categories
+        # EventListCache (optional) für list_event
+        self.list_cache = list_cache
+        # FeedService (optional): neue/geänderte Events in die Feeds der Follower
+        self.feed = feed
+
+    # Seitengröße für GET /api/event
+    DEFAULT_LIMIT = 50
+    MAX_LIMIT = 200
+
+    # Felder, die per ?fields= angefordert werden können
+    LIST_FIELDS = (
+        "id", "title", "start_date", "end_date", "location", "price_in_cents",
+        "capacity", "booked", "free", "my_paid", "already_booked",
+    )
+
+    def listing_stamp(self, query_args):
+        """
+        (stamp, last_modified) für GET /api/event ohne die Listing-Query: letzte Änderung und
+        letzte Löschung eines Events (+ Kategoriebaum bei ?category_id=). Buchungen ändern die
+        Zähler im Event und damit updated_at, der Stempel deckt also auch booked/my_paid ab.
+        Die Stempel-Zeile kommt aus dem EventListCache (höchstens stamp_interval alt, nach
+        lokalen Änderungen neu), ein Cache-Treffer kostet also keine Abfrage.
+        Wirft ValueError bei ungültigen Filtern (wie list_event).
+        """
+        category_id = self._filter_key(query_args)[-1]
+        row, generation = self.list_cache.cached_stamp() if self.list_cache else (None, 0)
+        if row is None:
+            with self.get_connection() as con, con.cursor() as cur:
+                cur.execute(LISTING_STAMP_SQL)
+                row = cur.fetchone()
+            if self.list_cache:
+                self.list_cache.store_stamp(row, generation)
+        return self._listing_stamp(row, category_id)
+
+    def _listing_stamp(self, row, category_id):
+        tree = self.categories.tree().etag if category_id is not None and self.categories else None
+        changed_at = max((t for t in (row["updated_at"], row["deleted_at"]) if t), default=None)
+        return (row["updated_at"], row["deleted_at"], tree), stable_last_modified(changed_at, row["now"])
+
+    def event_stamp(self, eid: int):
+        """(updated_at, last_modified) eines Events, None wenn es das Event nicht gibt."""
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(EVENT_STAMP_SQL, (eid,))
+            row = cur.fetchone()
+        if not row:
+            return None
+        return row["updated_at"], stable_last_modified(row["updated_at"], row["now"])
+
+    def list_event(self, query_args, user, stamp=None):
+        """
+        Eine Seite Events nach Filter. Sortierung nach (start_date, id), bei
+        Volltextsuche (?q=) standardmäßig nach Relevanz (?sort=date erzwingt Datum).
+        Gibt (rows, next_cursor) zurück; next_cursor ist None auf der letzten Seite.
+
+        Der anonyme Teil (Events + booked/free) wird pro normalisiertem Filter
+        und Seite gecacht, my_paid/already_booked kommen als Overlay pro User dazu.
+        Mit stamp (listing_stamp) werden nur gecachte Seiten mit demselben Stempel benutzt.
+        Wirft ValueError bei ungültigem cursor/limit/fields/sort.
+        """
+        key, sort, after, limit, fields = self._parse_page(query_args)
+
+        page_key = key + (sort, after, limit)
+        rows = self.list_cache.get_listing(page_key, stamp) if self.list_cache else None
+        if rows is None:
+            # eine Zeile mehr laden, um zu wissen, ob es eine nächste Seite gibt
+            rows = self._query_listing(key, sort, after, limit + 1)
+            if self.list_cache:
+                self.list_cache.set_listing(page_key, rows, stamp)
+
+        overlay = None
+        if self._wants_overlay(fields):
+            overlay = self._user_overlay(user["id"]) if user else {}
+        return self._finish_page(rows, sort, after, limit, fields, overlay)
+
+    def _parse_page(self, query_args) -> tuple:
+        """(filter_key, sort, after, limit, fields) aus den Query-Parametern, ValueError bei Unsinn."""
+        key = self._filter_key(query_args)
+        sort = self._sort(query_args.get("sort"), key[0])
+        after = self._decode_cursor((query_args.get("cursor") or "").strip(), sort)
+        limit = page_limit(query_args.get("limit"), self.DEFAULT_LIMIT, self.MAX_LIMIT)
+        fields = self._fields(query_args.get("fields"))
+        return key, sort, after, limit, fields
+
+    @staticmethod
+    def _wants_overlay(fields) -> bool:
+        return "my_paid" in fields or "already_booked" in fields
+
+    def _finish_page(self, rows, sort, after, limit, fields, overlay):
+        """Überzählige Zeile -> next_cursor, User-Overlay einmischen, auf fields projizieren."""
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            if sort == "relevance":
+                next_cursor = self._encode_cursor({"offset": (after or 0) + limit})
+            else:
+                next_cursor = self._encode_cursor(rows[-1])
+
+        if overlay is not None:
+            for r in rows:
+                r["my_paid"] = overlay.get(r["id"], 0)
+                r["already_booked"] = 1 if r["id"] in overlay else 0
+
+        if len(fields) < len(self.LIST_FIELDS):
+            rows = [{f: r[f] for f in fields} for r in rows]
+
+        return rows, next_cursor
+
+    @staticmethod
+    def _filter_key(query_args) -> tuple:
+        """Normalisierte Filter -> Cache-Key (q, location, from, to, min_price, max_price, category_id)."""
+        def arg(name):
+            return (query_args.get(name) or "").strip()
+
+        def num(name):
+            v = arg(name)
+            return int(v) if v else None
+
+        return (
+            EventsService._fulltext_query(arg("q")),
+            EventsService._fulltext_query(arg("location")),
+            arg("from"),
+            arg("to"),
+            num("min_price"),
+            num("max_price"),
+            num("category_id"),
+        )
+
+    def _fields(self, raw) -> tuple:
+        if not raw:
+            return self.LIST_FIELDS
+        fields = tuple(f.strip() for f in raw.split(",") if f.strip())
+        if not fields or any(f not in self.LIST_FIELDS for f in fields):
+            raise ValueError("bad_fields")
+        return fields
+
+    @staticmethod
+    def _fulltext_query(text: str) -> str:
+        """
+        Suchtext -> FULLTEXT-Ausdruck (Boolean Mode): jedes Wort muss vorkommen,
+        als Präfix für Type-ahead. 'Rock Mainz' -> '+rock* +mainz*'.
+        Operatorzeichen des Boolean Mode werden dabei verworfen.
+        """
+        words = re.findall(r"\w+", text.lower())
+        return " ".join(f"+{w}*" for w in words)
+
+    @staticmethod
+    def _sort(raw, q: str) -> str:
+        sort = (raw or "").strip() or ("relevance" if q else "date")
+        if sort not in ("date", "relevance") or (sort == "relevance" and not q):
+            raise ValueError("bad_sort")
+        return sort
+
+    @staticmethod
+    def _encode_cursor(row) -> str:
+        if "offset" in row:
+            return encode_cursor("rel", row["offset"])
+        return encode_cursor(row["start_date"], row["id"])
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: str = "date"):
+        """
+        cursor -> (start_date, id) der letzten Zeile der vorherigen Seite,
+        bei Relevanz-Sortierung -> Offset (Treffermengen der Suche sind klein).
+        """
+        if not cursor:
+            return None
+        head, tail = decode_cursor(cursor, 2)
+        if (head == "rel") != (sort == "relevance"):
+            raise ValueError("bad_cursor")
+        # beide Teile landen in SQL: manipulierte Werte hier abweisen statt MySQL-Fehler (500)
+        try:
+            if head == "rel":
+                offset = int(tail)
+                if offset < 0:
+                    raise ValueError("bad_cursor")
+                return offset
+            return datetime.fromisoformat(head), int(tail)
+        except ValueError:
+            raise ValueError("bad_cursor")
+
+    def _query_listing(self, filters, sort, after, limit):
+        sql, args = self._listing_sql(filters, sort, after, limit)
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(sql, args)
+            return self._listing_rows(cur.fetchall())
+
+    def _listing_sql(self, filters, sort, after, limit):
+        """SELECT für eine Listing-Seite -> (sql, args)."""
+        q, location, date_from, date_to, min_price, max_price, category_id = filters
 
-    def list_event(self, query_args, user):
         base = [
-            "SELECT",
-            " e.id, e.title, e.start_date, e.end_date, e.location, e.price_in_cents, e.capacity,",
-            " COALESCE(SUM(CASE WHEN b.status='paid' THEN b.qty END),0) AS booked,",
-            # wenn eingeloggt: echte Prüfung, sonst 0/FALSE ohne Platzhalter
-            (" MAX(CASE WHEN b.user_id=%s AND b.status='paid' THEN 1 ELSE 0 END) AS my_paid," if user else " 0 AS my_paid,"),
-            (" EXISTS(SELECT 1 FROM booking b2 WHERE b2.event_id=e.id AND b2.user_id=%s AND b2.status IN ('pending','paid')) AS already_booked" if user else " FALSE AS already_booked"),
+            "SELECT e.id, e.title, e.start_date, e.end_date, e.location, e.price_in_cents, e.capacity,",
+            " e.paid_qty AS booked",
             "FROM event e",
-            "LEFT JOIN booking b ON b.event_id = e.id",
         ]
         where = []
         args = []
 
-        q           = (query_args.get("q") or "").strip()
-        location    = (query_args.get("location") or "").strip()
-        date_from   = (query_args.get("from") or "").strip()
-        date_to     = (query_args.get("to") or "").strip()
-        min_price   = (query_args.get("min_price") or "").strip()
-        max_price   = (query_args.get("max_price") or "").strip()
-        category_id = (query_args.get("category_id") or "").strip()
-
+        if sort == "relevance":
+            base[1] += ", MATCH(e.title, e.description, e.location) AGAINST (%s IN BOOLEAN MODE) AS relevance"
+            args.append(q)
         if q:
-            where.append("(e.title LIKE %s OR e.description LIKE %s)")
-            like = f"%{q}%"
-            args += [like, like]
+            # FULLTEXT-Index ft_event_search statt LIKE '%q%' (kein Full Scan über description)
+            where.append("MATCH(e.title, e.description, e.location) AGAINST (%s IN BOOLEAN MODE)")
+            args.append(q)
         if location:
-            where.append("e.location LIKE %s")
-            args.append(f"%{location}%")
+            where.append("MATCH(e.location) AGAINST (%s IN BOOLEAN MODE)")
+            args.append(location)
         if date_from:
             where.append("e.start_date >= %s")
             args.append(date_from)
         if date_to:
             where.append("e.end_date <= %s")
             args.append(date_to)
-        if min_price:
+        if min_price is not None:
             where.append("e.price_in_cents >= %s")
-            args.append(int(min_price))
-        if max_price:
+            args.append(min_price)
+        if max_price is not None:
             where.append("e.price_in_cents <= %s")
-            args.append(int(max_price))
-        if category_id:
-            base.append("LEFT JOIN event_categorie ec ON ec.event_id = e.id")
-            where.append("ec.category_id = %s")
-            args.append(int(category_id))
+            args.append(max_price)
+        if category_id is not None:
+            # Kategorie + Unterkategorien; EXISTS statt JOIN -> keine doppelten Events
+            # bei mehreren passenden Kategorien, Lookup über den PK (event_id, category_id)
+            ids = self.categories.descendants(category_id) if self.categories else [category_id]
+            where.append(
+                "EXISTS (SELECT 1 FROM event_categorie ec WHERE ec.event_id = e.id"
+                f" AND ec.category_id IN ({', '.join(['%s'] * len(ids))}))" if ids else "FALSE"
+            )
+            args += ids
+        if after and sort == "date":
+            # Keyset: nur Events hinter (start_date, id) der letzten Zeile
+            where.append("(e.start_date > %s OR (e.start_date = %s AND e.id > %s))")
+            args += [after[0], after[0], after[1]]
 
         if where:
             base.append("WHERE " + " AND ".join(where))
 
-        base.append("GROUP BY e.id")
-        base.append("ORDER BY e.start_date")
-
-        if user:
-            args = [user["id"], user["id"]] + args
+        if sort == "relevance":
+            base.append("ORDER BY relevance DESC, e.start_date, e.id")
+            base.append("LIMIT %s OFFSET %s")
+            args += [limit, after or 0]
+        else:
+            base.append("ORDER BY e.start_date, e.id")
+            base.append("LIMIT %s")
+            args.append(limit)
 
-        sql = "\n".join(base)
-
-        with self.get_connection() as con, con.cursor() as cur:
-            cur.execute(sql, args)
-            rows = cur.fetchall()
+        return "\n".join(base), args
 
+    @staticmethod
+    def _listing_rows(rows):
         # freie Plätze nur paid-basiert
         for r in rows:
+            r.pop("relevance", None)
             booked = r.get("booked") or 0
             r["free"] = max(0, (r.get("capacity") or 0) - booked)
 
         return rows
+
+    def _user_overlay(self, user_id: int) -> dict:
+        """{event_id: my_paid} für alle aktiven (pending/paid) Buchungen des Users."""
+        overlay = self.list_cache.get_overlay(user_id) if self.list_cache else None
+        if overlay is not None:
+            return overlay
+
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(OVERLAY_SQL, (user_id,))
+            overlay = {r["event_id"]: int(r["my_paid"]) for r in cur.fetchall()}
+
+        if self.list_cache:
+            self.list_cache.set_overlay(user_id, overlay)
+        return overlay
     
     def book_event(self, eid, user, data):
         if not user:
             return {"error": "unauthorized"}, 401
 
-        qty = int(data.get("qty", 1))
-        if qty <= 0:
-            return {"error": "qty must be > 0"}, 400
+        qty = self._qty(data)
+        if qty is None:
+            return {"error": "invalid qty"}, 400
+
+        try:
+            run_transaction(self.get_connection, lambda cur: self._reserve(cur, eid, user["id"], qty))
+        except (EventNotFound, SoldOut, AlreadyBooked, pymysql.err.OperationalError) as e:
+            return self._booking_error(e)
+
+        if self.list_cache:
+            self.list_cache.booking_changed(user["id"], eid)
+        return {"ok": True}, 200
+
+    @staticmethod
+    def _qty(data) -> Optional[int]:
+        """qty aus dem Body (Default 1); None, wenn es keine ganze Zahl > 0 ist (auch "2", 1.5, true)."""
+        qty = data.get("qty", 1)
+        if isinstance(qty, bool) or not isinstance(qty, int) or qty < 1:
+            return None
+        return qty
+
+    @staticmethod
+    def _booking_error(e: Exception):
+        """Exception aus _reserve -> (payload, status)."""
+        if isinstance(e, EventNotFound):
+            return {"error": "event not found"}, 404
+        if isinstance(e, SoldOut):
+            return {"error": "sold_out_or_not_enough", "free": e.free}, 409
+        if isinstance(e, AlreadyBooked):
+            return {"error": "already_booked"}, 409
+        # Deadlock/Lock-Timeout auch nach allen Wiederholungen
+        if is_retryable(e):
+            return {"error": "busy_try_again"}, 503
+        raise e
+
+    @staticmethod
+    def _reserve(cur, eid: int, user_id: int, qty: int) -> None:
+        """
+        Reserviert qty Plätze und legt die pending-Buchung an (innerhalb von run_transaction).
+
+        Kapazitätsprüfung und Reservierung sind ein einziges bedingtes UPDATE auf den
+        Zähler, die Event-Zeile ist also nur bis zum Commit direkt danach gesperrt.
+        "Eine aktive Buchung pro User/Event" erzwingt der UNIQUE-Index uq_booking_active.
+        """
+        cur.execute(RESERVE_SQL, (qty, eid, qty))
+        if cur.rowcount == 0:
+            # nur im Fehlerfall: Grund herausfinden
+            cur.execute(FREE_SQL, (eid,))
+            ev = cur.fetchone()
+            if not ev:
+                raise EventNotFound()
+            raise SoldOut(max(0, ev["free"]))
 
         try:
-            with self.get_connection() as con:
-                con.begin()
-                with con.cursor() as cur:
-                    # Lock event row
-                    cur.execute("SELECT capacity FROM event WHERE id=%s FOR UPDATE", (eid,))
-                    ev = cur.fetchone()
-                    if not ev:
-                        con.rollback()
-                        return {"error": "event not found"}, 404
-
-                    # Current booked
-                    cur.execute("""
-                        SELECT COALESCE(SUM(qty),0) AS booked
-                        FROM booking
-                        WHERE event_id=%s AND status IN ('pending','paid')
-                    """, (eid,))
-                    booked = cur.fetchone()["booked"]
-                    free = ev["capacity"] - booked
-                    if free < qty:
-                        con.rollback()
-                        return {"error": "sold_out_or_not_enough", "free": free}, 409
-
-                    # Already booked?
-                    cur.execute("""
-                        SELECT 1 FROM booking
-                        WHERE event_id=%s AND user_id=%s AND status IN ('pending','paid') LIMIT 1
-                    """, (eid, user["id"]))
-                    if cur.fetchone():
-                        con.rollback()
-                        return {"error": "already_booked"}, 409
-
-                    # Create booking
-                    cur.execute("""
-                        INSERT INTO booking(user_id,event_id,qty,status)
-                        VALUES(%s,%s,%s,'pending')
-                    """, (user["id"], eid, qty))
-                    con.commit()
-                    return {"ok": True}, 200
-        except Exception as e:
-            try: con.rollback()
-            except: pass
-            return {"error": str(e)}, 500
+            cur.execute(INSERT_BOOKING_SQL, (user_id, eid, qty))
+        except pymysql.err.IntegrityError as e:
+            if e.args and e.args[0] == ER.DUP_ENTRY:
+                raise AlreadyBooked()
+            raise
 
     def cancel_booking(self, eid, user):
-        with self.get_connection() as con, con.cursor() as cur:
-            cur.execute("""
-                UPDATE booking
-                   SET status='cancelled'
-                 WHERE user_id=%s
-                   AND event_id=%s
-                   AND status='pending'
-            """, (user["id"], eid))
+        def work(cur):
+            cur.execute(PENDING_QTY_SQL, (user["id"], eid))
+            qty = cur.fetchone()["qty"]
+
+            cur.execute(CANCEL_AUDIT_SQL, (user["id"], eid))
+            cur.execute(CANCEL_SQL, (user["id"], eid))
             changed = cur.rowcount
 
+            if changed:
+                cur.execute(RELEASE_PENDING_SQL, (qty, eid))
+            return changed
+
+        changed = run_transaction(self.get_connection, work)
+        return self._cancel_result(eid, user, changed)
+
+    def _cancel_result(self, eid, user, changed: int):
         if changed == 0:
             return {"error": "booking_already_paid_or_not_found"}, 400
 
+        if self.list_cache:
+            self.list_cache.booking_changed(user["id"], eid)
+
         return {"ok": True, "cancelled": changed}, 200
 
     def get_event(self, eid):
@@ -174,6 +479,10 @@ class EventsService:
             cur.execute("SELECT LAST_INSERT_ID() AS id")
             eid = cur.fetchone()["id"]
 
+        if self.list_cache:
+            self.list_cache.event_created()
+        if self.feed:
+            self.feed.event_created(eid, organizer_id)
         return eid
     
     def update_event(self, eid: int, data: dict) -> int:
@@ -190,10 +499,24 @@ class EventsService:
 
         with self.get_connection() as con, con.cursor() as cur:
             cur.execute(f"UPDATE event SET {', '.join(sets)} WHERE id=%s", vals)
-            return cur.rowcount
+            changed = cur.rowcount
+
+        if changed and self.list_cache:
+            self.list_cache.event_updated(eid)
+        if changed and self.feed:
+            self.feed.event_updated(eid, "start_date" in data)
+        return changed
     
     def delete_event(self, eid: int) -> int:
         with self.get_connection() as con, con.cursor() as cur:
             cur.execute("DELETE FROM event WHERE id=%s", (eid,))
-            return cur.rowcount
+            deleted = cur.rowcount
+            if deleted:
+                cur.execute(TOUCH_DELETED_SQL)
+
+        if deleted and self.list_cache:
+            self.list_cache.event_deleted(eid)
+        if deleted and self.feed:
+            self.feed.event_deleted(eid)
+        return deleted
     
\ No newline at end of file
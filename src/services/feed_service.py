@@ -0,0 +1,276 @@
+# services/feed_service.py
+#
+# "Demnächst von Organizern, denen ich folge" (FR-Us-08/09).
+#
+# - Kleine Organizer (<= fanout_limit Follower): neue Events werden beim Anlegen in die
+#   feed_item-Zeilen aller Follower geschrieben (fan-out-on-write, ein INSERT ... SELECT).
+# - Große Organizer (feed_large_organizer): kein Fan-out, ihre Events werden beim Lesen
+#   per idx_event_organizer(organizer_id, start_date) dazugemischt (merge-on-read).
+#   Wer einmal groß ist, bleibt es – so gehen beim Umschalten keine Events verloren.
+# - Einzeln gefolgte Events (event_subscription) werden ebenfalls beim Lesen gemischt.
+# Seiten werden pro User gecacht und über Tags (user/org/event) invalidiert.
+import heapq
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.cache import MISSING, TTLCache
+from src.services.pagination import decode_cursor, encode_cursor, page_limit
+
+FOLLOW_ORGANIZER_SQL = "INSERT IGNORE INTO organizer_subscription(follower_id, organizer_id) VALUES (%s, %s)"
+UNFOLLOW_ORGANIZER_SQL = "DELETE FROM organizer_subscription WHERE follower_id = %s AND organizer_id = %s"
+FOLLOW_EVENT_SQL = "INSERT IGNORE INTO event_subscription(follower_id, event_id) VALUES (%s, %s)"
+UNFOLLOW_EVENT_SQL = "DELETE FROM event_subscription WHERE follower_id = %s AND event_id = %s"
+
+IS_LARGE_SQL = "SELECT 1 FROM feed_large_organizer WHERE organizer_id = %s"
+PROMOTE_SQL = "INSERT IGNORE INTO feed_large_organizer(organizer_id) VALUES (%s)"
+# zählt höchstens bis limit+1 (idx_orgsub_organizer), egal wie viele Follower es gibt
+FOLLOWERS_OVER_SQL = """
+    SELECT COUNT(*) AS n FROM (
+        SELECT 1 FROM organizer_subscription WHERE organizer_id = %s LIMIT %s
+    ) t
+"""
+
+# neues Event eines kleinen Organizers an alle Follower verteilen (event_id)
+FANOUT_SQL = """
+    INSERT IGNORE INTO feed_item(user_id, start_date, event_id, organizer_id)
+    SELECT s.follower_id, e.start_date, e.id, e.organizer_id
+      FROM event e
+      JOIN organizer_subscription s ON s.organizer_id = e.organizer_id
+     WHERE e.id = %s
+"""
+# neuer Follower: kommende Events des Organizers nachtragen (user_id, organizer_id)
+BACKFILL_SQL = """
+    INSERT IGNORE INTO feed_item(user_id, start_date, event_id, organizer_id)
+    SELECT %s, start_date, id, organizer_id
+      FROM event
+     WHERE organizer_id = %s AND start_date >= NOW()
+"""
+REMOVE_ORGANIZER_ITEMS_SQL = "DELETE FROM feed_item WHERE user_id = %s AND organizer_id = %s"
+MOVE_ITEMS_SQL = """
+    UPDATE feed_item f JOIN event e ON e.id = f.event_id
+       SET f.start_date = e.start_date
+     WHERE f.event_id = %s
+"""
+EVENT_OWNER_SQL = "SELECT organizer_id FROM event WHERE id = %s"
+PRUNE_SQL = "DELETE FROM feed_item WHERE start_date < NOW() - INTERVAL %s DAY LIMIT %s"
+
+FOLLOWED_SQL = """
+    SELECT s.organizer_id, (l.organizer_id IS NOT NULL) AS large
+      FROM organizer_subscription s
+ LEFT JOIN feed_large_organizer l ON l.organizer_id = s.organizer_id
+     WHERE s.follower_id = %s
+"""
+
+# Quellen für eine Seite; jede liefert (start_date, event_id) aufsteigend, höchstens LIMIT Zeilen
+_KEYSET = "AND ({d} > %s OR ({d} = %s AND {i} > %s))"
+_INBOX_SQL = """
+    (SELECT start_date, event_id FROM feed_item
+      WHERE user_id = %s AND start_date >= NOW() {keyset}
+   ORDER BY start_date, event_id LIMIT %s)
+"""
+_LARGE_SQL = """
+    (SELECT start_date, id AS event_id FROM event
+      WHERE organizer_id = %s AND start_date >= NOW() {keyset}
+   ORDER BY start_date, id LIMIT %s)
+"""
+_FOLLOWED_EVENTS_SQL = """
+    (SELECT e.start_date, e.id AS event_id FROM event_subscription s JOIN event e ON e.id = s.event_id
+      WHERE s.follower_id = %s AND e.start_date >= NOW() {keyset}
+   ORDER BY e.start_date, e.id LIMIT %s)
+"""
+
+EVENTS_SQL = """
+    SELECT e.id, e.title, e.start_date, e.end_date, e.location, e.price_in_cents,
+           e.organizer_id, o.company AS organizer
+      FROM event e
+ LEFT JOIN organizer o ON o.user_id = e.organizer_id
+     WHERE e.id IN ({ids})
+"""
+
+
+class NotFound(Exception):
+    pass
+
+
+def merge_sources(sources: List[List[Tuple]], limit: int) -> List[Tuple]:
+    """Sortierte (start_date, event_id)-Listen zusammenführen, doppelte Events einmal, max. limit."""
+    out, seen = [], set()
+    for start, eid in heapq.merge(*sources):
+        if eid in seen:
+            continue
+        seen.add(eid)
+        out.append((start, eid))
+        if len(out) >= limit:
+            break
+    return out
+
+
+class FeedService:
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+
+    def __init__(self, get_connection: Callable, cache: Optional[TTLCache] = None, fanout_limit: int = 1000):
+        self.get_connection = get_connection
+        self.cache = cache
+        self.fanout_limit = fanout_limit
+
+    # ---------- Folgen ----------
+
+    def follow_organizer(self, user_id: int, organizer_id: int) -> bool:
+        """True, wenn neu gefolgt; NotFound, wenn es den Organizer nicht gibt."""
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute("SELECT 1 FROM organizer WHERE user_id = %s", (organizer_id,))
+            if not cur.fetchone():
+                raise NotFound()
+            cur.execute(FOLLOW_ORGANIZER_SQL, (user_id, organizer_id))
+            added = cur.rowcount > 0
+            if added and not self._is_large(cur, organizer_id):
+                cur.execute(BACKFILL_SQL, (user_id, organizer_id))
+        self._invalidate(("user", user_id))
+        return added
+
+    def unfollow_organizer(self, user_id: int, organizer_id: int) -> bool:
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(UNFOLLOW_ORGANIZER_SQL, (user_id, organizer_id))
+            removed = cur.rowcount > 0
+            cur.execute(REMOVE_ORGANIZER_ITEMS_SQL, (user_id, organizer_id))
+        self._invalidate(("user", user_id))
+        return removed
+
+    def follow_event(self, user_id: int, event_id: int) -> bool:
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute("SELECT 1 FROM event WHERE id = %s", (event_id,))
+            if not cur.fetchone():
+                raise NotFound()
+            cur.execute(FOLLOW_EVENT_SQL, (user_id, event_id))
+            added = cur.rowcount > 0
+        self._invalidate(("user", user_id))
+        return added
+
+    def unfollow_event(self, user_id: int, event_id: int) -> bool:
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(UNFOLLOW_EVENT_SQL, (user_id, event_id))
+            removed = cur.rowcount > 0
+        self._invalidate(("user", user_id))
+        return removed
+
+    def _is_large(self, cur, organizer_id: int) -> bool:
+        """Groß = schon markiert oder jetzt über fanout_limit (dann wird markiert)."""
+        cur.execute(IS_LARGE_SQL, (organizer_id,))
+        if cur.fetchone():
+            return True
+        cur.execute(FOLLOWERS_OVER_SQL, (organizer_id, self.fanout_limit + 1))
+        if cur.fetchone()["n"] > self.fanout_limit:
+            cur.execute(PROMOTE_SQL, (organizer_id,))
+            return True
+        return False
+
+    # ---------- Events (von EventsService aufgerufen) ----------
+
+    def event_created(self, event_id: int, organizer_id: int) -> None:
+        with self.get_connection() as con, con.cursor() as cur:
+            if not self._is_large(cur, organizer_id):
+                cur.execute(FANOUT_SQL, (event_id,))
+        self._invalidate(("org", organizer_id))
+
+    def event_updated(self, event_id: int, start_changed: bool) -> None:
+        if start_changed:
+            with self.get_connection() as con, con.cursor() as cur:
+                cur.execute(MOVE_ITEMS_SQL, (event_id,))
+                cur.execute(EVENT_OWNER_SQL, (event_id,))
+                row = cur.fetchone()
+            if row:
+                # neue Position: betrifft auch Seiten, auf denen das Event bisher nicht stand
+                self._invalidate(("org", row["organizer_id"]))
+        self._invalidate(("event", event_id))
+
+    def event_deleted(self, event_id: int) -> None:
+        # feed_item-Zeilen löscht der FK (ON DELETE CASCADE)
+        self._invalidate(("event", event_id))
+
+    def prune(self, keep_days: int = 1, batch: int = 10000) -> int:
+        """Vergangene feed_item-Zeilen löschen (in Batches, damit keine langen Locks entstehen)."""
+        total = 0
+        with self.get_connection() as con, con.cursor() as cur:
+            while True:
+                cur.execute(PRUNE_SQL, (keep_days, batch))
+                total += cur.rowcount
+                if cur.rowcount < batch:
+                    return total
+
+    def _invalidate(self, tag) -> None:
+        if self.cache is not None:
+            self.cache.invalidate_tag(tag)
+
+    # ---------- Lesen ----------
+
+    def get_feed(self, user_id: int, cursor: Optional[str] = None,
+                 limit=None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Kommende Events, aufsteigend nach start_date. Gibt (rows, next_cursor) zurück;
+        ValueError('bad_cursor'/'bad_limit') bei ungültigen Parametern.
+        """
+        limit = page_limit(limit, self.DEFAULT_LIMIT, self.MAX_LIMIT)
+        after = self._decode_after(cursor) if cursor else None
+        key = (user_id, cursor, limit)
+        if self.cache is not None:
+            hit = self.cache.get(key)
+            if hit is not MISSING:
+                rows, next_cursor = hit
+                return [dict(r) for r in rows], next_cursor
+
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(FOLLOWED_SQL, (user_id,))
+            followed = cur.fetchall()
+            large = [f["organizer_id"] for f in followed if f["large"]]
+
+            sql, args = self._sources_sql(user_id, large, after, limit + 1)
+            cur.execute(sql, args)
+            by_source: Dict[int, List[Tuple]] = {}
+            for r in cur.fetchall():
+                by_source.setdefault(r["src"], []).append((r["start_date"], r["event_id"]))
+            # UNION ALL garantiert keine Reihenfolge, jede Quelle ist aber klein (<= limit+1)
+            page = merge_sources([sorted(v) for v in by_source.values()], limit + 1)
+
+            rows = []
+            if page:
+                ids = [eid for _, eid in page]
+                cur.execute(EVENTS_SQL.format(ids=", ".join(["%s"] * len(ids))), ids)
+                found = {r["id"]: r for r in cur.fetchall()}
+                rows = [found[eid] for eid in ids if eid in found]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["start_date"], rows[-1]["id"])
+
+        if self.cache is not None:
+            tags = [("user", user_id)] + [("org", f["organizer_id"]) for f in followed] + \
+                   [("event", r["id"]) for r in rows]
+            self.cache.set(key, ([dict(r) for r in rows], next_cursor), tags=tags)
+        return rows, next_cursor
+
+    @staticmethod
+    def _decode_after(cursor: str) -> Tuple[datetime, int]:
+        """cursor -> (start_date, event_id) der letzten Zeile; ValueError('bad_cursor') bei Müll."""
+        start_date, event_id = decode_cursor(cursor, 2)
+        try:
+            return datetime.fromisoformat(start_date), int(event_id)
+        except ValueError:
+            raise ValueError("bad_cursor")
+
+    @staticmethod
+    def _sources_sql(user_id: int, large: List[int], after, n: int) -> Tuple[str, list]:
+        """Eine UNION ALL über Inbox, große Organizer und gefolgte Events; src unterscheidet die Quellen."""
+        parts, args = [], []
+
+        def add(template: str, key_args: list, d: str, i: str):
+            keyset = _KEYSET.format(d=d, i=i) if after else ""
+            parts.append(f"SELECT {len(parts)} AS src, t.* FROM {template.format(keyset=keyset)} t")
+            args.extend(key_args + ([after[0], after[0], after[1]] if after else []) + [n])
+
+        add(_INBOX_SQL, [user_id], "start_date", "event_id")
+        for oid in large:
+            add(_LARGE_SQL, [oid], "start_date", "id")
+        add(_FOLLOWED_EVENTS_SQL, [user_id], "e.start_date", "e.id")
+        return "\nUNION ALL\n".join(parts), args
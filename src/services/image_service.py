@@ -0,0 +1,327 @@
+# services/image_service.py
+#
+# Event-Bilder: Originale liegen content-adressiert im Dateisystem (<root>/originals/ab/<sha256>.<ext>),
+# Thumbnails einmalig erzeugt daneben (<root>/thumbs/<größe>/ab/<sha256>.jpg).
+# In event_image stehen nur noch die Metadaten (sha256, mime_type, Größe); alte Zeilen mit
+# Blob in `data` werden beim ersten Zugriff stückweise ins Dateisystem übernommen.
+#
+# Mehrere Zeilen können auf dieselbe Datei zeigen. Damit ein Delete nicht die Datei eines parallel
+# hochgeladenen Bildes mit gleichem Inhalt entfernt, laufen "Datei an ihren Platz + Zeile schreiben"
+# und "Zeile löschen + unbenutzte Datei entfernen" unter einem GET_LOCK je SHA-256.
+import hashlib
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from PIL import Image, ImageOps
+
+CHUNK = 1024 * 1024
+CONTENT_LOCK_TIMEOUT = 10
+
+log = logging.getLogger("app.images")
+
+# Pillow-Format -> (Dateiendung, MIME-Type)
+FORMATS = {
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "GIF": ("gif", "image/gif"),
+    "WEBP": ("webp", "image/webp"),
+}
+MIME_BY_EXT = {ext: mime for ext, mime in FORMATS.values()}
+EXT_BY_MIME = {mime: ext for ext, mime in FORMATS.values()}
+
+LIST_SQL = """
+    SELECT id, event_id, sha256, mime_type, size, width, height, uploaded_at
+      FROM event_image
+     WHERE event_id = %s
+  ORDER BY id
+"""
+ONE_SQL = """
+    SELECT id, event_id, sha256, mime_type, size, width, height, uploaded_at
+      FROM event_image
+     WHERE event_id = %s AND id = %s
+"""
+INSERT_SQL = """
+    INSERT INTO event_image(event_id, mime_type, data, sha256, size, width, height)
+    VALUES (%s, %s, NULL, %s, %s, %s, %s)
+"""
+BLOB_LENGTH_SQL = "SELECT LENGTH(data) AS n FROM event_image WHERE id = %s"
+BLOB_CHUNK_SQL = "SELECT SUBSTRING(data, %s, %s) AS chunk FROM event_image WHERE id = %s"
+MATERIALIZED_SQL = """
+    UPDATE event_image
+       SET sha256 = %s, mime_type = %s, size = %s, width = %s, height = %s, data = NULL
+     WHERE id = %s
+"""
+SELECT_FOR_DELETE_SQL = "SELECT sha256, mime_type FROM event_image WHERE id = %s AND event_id = %s"
+DELETE_SQL = "DELETE FROM event_image WHERE id = %s"
+STILL_USED_SQL = "SELECT 1 FROM event_image WHERE sha256 = %s LIMIT 1"
+
+
+class BadImage(ValueError):
+    pass
+
+
+class TooLarge(ValueError):
+    pass
+
+
+class ImageBusy(Exception):
+    """Sperre für einen Bildinhalt nicht rechtzeitig bekommen (-> 503)."""
+
+
+class ImageInfo(NamedTuple):
+    sha256: str
+    ext: str
+    mime_type: str
+    size: int
+    width: int
+    height: int
+
+
+class StagedImage(NamedTuple):
+    """Geprüftes Bild in einer Temp-Datei, noch nicht an seinem Inhaltspfad."""
+    path: str
+    info: ImageInfo
+
+
+def parse_sizes(raw: str) -> List[int]:
+    """"160,320,640" -> [160, 320, 640]"""
+    return sorted({int(x) for x in (raw or "").split(",") if x.strip()})
+
+
+def read_chunks(fileobj, chunk: int = CHUNK) -> Iterator[bytes]:
+    return iter(lambda: fileobj.read(chunk), b"")
+
+
+class ImageStore:
+    """Content-adressierter Bildspeicher; gleiche Bytes landen nur einmal auf der Platte."""
+
+    def __init__(self, root: str, thumb_sizes: Sequence[int], max_bytes: int, max_pixels: int):
+        self.root = root
+        self.thumb_sizes = tuple(thumb_sizes)
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+
+    def original_path(self, sha: str, ext: str) -> str:
+        return os.path.join(self.root, "originals", sha[:2], f"{sha}.{ext}")
+
+    def thumb_path(self, sha: str, size: int) -> str:
+        return os.path.join(self.root, "thumbs", str(size), sha[:2], f"{sha}.jpg")
+
+    def _tempfile(self):
+        tmp = os.path.join(self.root, "tmp")
+        os.makedirs(tmp, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=tmp, delete=False)
+
+    def put(self, chunks: Iterable[bytes]) -> ImageInfo:
+        """Wie stage() + commit() in einem Schritt."""
+        return self.commit(self.stage(chunks))
+
+    def stage(self, chunks: Iterable[bytes]) -> StagedImage:
+        """
+        Schreibt die Bytes (stückweise, mit SHA-256 nebenbei) in eine Temp-Datei und prüft sie mit
+        Pillow. Die Temp-Datei gehört danach dem Aufrufer (commit() oder discard()).
+        """
+        digest, size = hashlib.sha256(), 0
+        with self._tempfile() as tmp:
+            try:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise TooLarge(f"image larger than {self.max_bytes} bytes")
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                tmp.close()
+                fmt, width, height = self._inspect(tmp.name)
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+        ext, mime = FORMATS[fmt]
+        return StagedImage(tmp.name, ImageInfo(digest.hexdigest(), ext, mime, size, width, height))
+
+    def commit(self, staged: StagedImage) -> ImageInfo:
+        """Verschiebt die Temp-Datei atomar an ihren Inhaltspfad und erzeugt fehlende Thumbnails."""
+        info = staged.info
+        path = self.original_path(info.sha256, info.ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(staged.path, path)
+        for s in self.thumb_sizes:
+            self.ensure_thumb(info.sha256, info.ext, s)
+        return info
+
+    @staticmethod
+    def discard(staged: StagedImage) -> None:
+        if os.path.exists(staged.path):
+            os.unlink(staged.path)
+
+    def _inspect(self, path: str):
+        try:
+            with Image.open(path) as img:
+                fmt, (width, height) = img.format, img.size
+                if fmt not in FORMATS:
+                    raise BadImage(f"unsupported format {fmt}")
+                if width * height > self.max_pixels:
+                    raise BadImage("image has too many pixels")
+                img.verify()
+        except BadImage:
+            raise
+        except Exception as e:  # Pillow wirft je nach Defekt verschiedene Typen
+            raise BadImage("not a valid image") from e
+        return fmt, width, height
+
+    def ensure_thumb(self, sha: str, ext: str, size: int) -> Optional[str]:
+        """Pfad des Thumbnails (max. size×size, JPEG); wird nur erzeugt, wenn es noch fehlt."""
+        path = self.thumb_path(sha, size)
+        if os.path.exists(path):
+            return path
+        original = self.original_path(sha, ext)
+        if not os.path.exists(original):
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with Image.open(original) as img:
+            img.draft("RGB", (size, size))  # JPEG: direkt verkleinert dekodieren
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((size, size))
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA")
+                bg = Image.new("RGB", img.size, "white")
+                bg.paste(img, mask=img.getchannel("A"))
+                img = bg
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+            with self._tempfile() as tmp:
+                try:
+                    img.save(tmp, "JPEG", quality=85, optimize=True)
+                    tmp.close()
+                    os.replace(tmp.name, path)
+                finally:
+                    if os.path.exists(tmp.name):
+                        os.unlink(tmp.name)
+        return path
+
+    def remove(self, sha: str, ext: str) -> None:
+        for path in [self.original_path(sha, ext)] + [self.thumb_path(sha, s) for s in self.thumb_sizes]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def content_lock(cur, sha: str):
+    """GET_LOCK je Bildinhalt; Lock-Namen dürfen höchstens 64 Zeichen lang sein."""
+    name = f"event_image:{sha[:48]}"
+    cur.execute("SELECT GET_LOCK(%s, %s) AS ok", (name, CONTENT_LOCK_TIMEOUT))
+    if not cur.fetchone()["ok"]:
+        raise ImageBusy(sha)
+    try:
+        yield
+    finally:
+        cur.execute("SELECT RELEASE_LOCK(%s)", (name,))
+
+
+class EventImageService:
+    def __init__(self, get_connection: Callable, store: ImageStore):
+        self.get_connection = get_connection
+        self.store = store
+        # Altbestand, der sich nicht übernehmen ließ: nicht bei jedem Listing erneut aus der DB lesen
+        self._broken = set()
+
+    def _describe(self, row: Dict) -> Dict:
+        ext = EXT_BY_MIME.get(row["mime_type"], "jpg")
+        name = f"{row['sha256']}.{ext}"
+        return {
+            "id": row["id"],
+            "event_id": row["event_id"],
+            "mime_type": row["mime_type"],
+            "size": row["size"],
+            "width": row["width"],
+            "height": row["height"],
+            "uploaded_at": row["uploaded_at"],
+            "url": f"/api/images/{name}",
+            "thumbs": {str(s): f"/api/images/{name}?size={s}" for s in self.store.thumb_sizes},
+        }
+
+    def list_images(self, event_id: int) -> List[Dict]:
+        """
+        Metadaten + URLs aller Bilder eines Events (liest nie den Blob mit).
+        Defekter Altbestand wird geloggt und ausgelassen, statt das ganze Listing scheitern zu lassen.
+        """
+        images = []
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(LIST_SQL, (event_id,))
+            for row in cur.fetchall():
+                if row["sha256"] is None:
+                    if row["id"] in self._broken:
+                        continue
+                    try:
+                        row.update(self._materialize(cur, row["id"]))
+                    except (BadImage, TooLarge) as e:
+                        self._broken.add(row["id"])
+                        log.warning("image:broken", extra={"event_id": event_id, "image_id": row["id"],
+                                                           "error": str(e)})
+                        continue
+                    except ImageBusy:
+                        continue  # gleicher Inhalt wird gerade geschrieben/gelöscht; nächstes Mal
+                images.append(self._describe(row))
+        return images
+
+    def _materialize(self, cur, image_id: int) -> Dict:
+        """Altbestand: Blob in CHUNK-Stücken aus der DB in den Store kopieren, danach data=NULL."""
+        cur.execute(BLOB_LENGTH_SQL, (image_id,))
+        length = cur.fetchone()["n"] or 0
+
+        def chunks():
+            for offset in range(1, length + 1, CHUNK):  # SUBSTRING zählt ab 1
+                cur.execute(BLOB_CHUNK_SQL, (offset, CHUNK, image_id))
+                yield cur.fetchone()["chunk"]
+
+        staged = self.store.stage(chunks())
+        info = staged.info
+        try:
+            with content_lock(cur, info.sha256):
+                self.store.commit(staged)
+                cur.execute(MATERIALIZED_SQL,
+                            (info.sha256, info.mime_type, info.size, info.width, info.height, image_id))
+        finally:
+            self.store.discard(staged)
+        return {"sha256": info.sha256, "mime_type": info.mime_type, "size": info.size,
+                "width": info.width, "height": info.height}
+
+    def add_image(self, event_id: int, chunks: Iterable[bytes]) -> Dict:
+        # erst prüfen (ohne Lock), dann Datei an ihren Platz und Zeile schreiben (unter Lock):
+        # ein paralleles Delete sieht so entweder die neue Zeile oder entfernt die Datei vor uns
+        staged = self.store.stage(chunks)
+        info = staged.info
+        try:
+            with self.get_connection() as con, con.cursor() as cur:
+                with content_lock(cur, info.sha256):
+                    self.store.commit(staged)
+                    cur.execute(INSERT_SQL,
+                                (event_id, info.mime_type, info.sha256, info.size, info.width, info.height))
+                    image_id = cur.lastrowid
+                cur.execute(ONE_SQL, (event_id, image_id))
+                return self._describe(cur.fetchone())
+        finally:
+            self.store.discard(staged)
+
+    def delete_image(self, event_id: int, image_id: int) -> bool:
+        """Löscht die Zeile; die Datei nur, wenn kein anderes Bild denselben Inhalt nutzt."""
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(SELECT_FOR_DELETE_SQL, (image_id, event_id))
+            row = cur.fetchone()
+            if not row:
+                return False
+            if not row["sha256"]:
+                cur.execute(DELETE_SQL, (image_id,))
+                return cur.rowcount > 0
+            with content_lock(cur, row["sha256"]):
+                cur.execute(DELETE_SQL, (image_id,))
+                if not cur.rowcount:
+                    return False
+                cur.execute(STILL_USED_SQL, (row["sha256"],))
+                if not cur.fetchone():
+                    self.store.remove(row["sha256"], EXT_BY_MIME.get(row["mime_type"], "jpg"))
+        return True
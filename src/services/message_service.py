@@ -0,0 +1,280 @@
+# services/message_service.py
+#
+# Direktnachrichten zwischen Usern/Organizern (FR-Us-07, FR-Eo-03).
+#
+# - messages.user_lo/user_hi (generiert) + idx_messages_pair: Verlauf zweier User als Range-Scan.
+# - conversation_member: eine Zeile je (User, Gesprächspartner) mit letzter Nachricht und
+#   ungelesenen Nachrichten -> Inbox per idx_member_inbox, ohne messages zu gruppieren.
+# - message_counter: ungelesen gesamt pro User (Badge), gepflegt in derselben Transaktion.
+# - Notifier: weckt wartende Long-Polls/SSE-Streams im selben Prozess, statt die DB zu pollen.
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.db_api import run_transaction
+from src.services.pagination import decode_cursor, encode_cursor, page_limit
+
+INSERT_MESSAGE_SQL = "INSERT INTO messages(sender_id, recipient_id, body) VALUES (%s, %s, %s)"
+# (user_id, peer_id, message_id, unread_increment)
+TOUCH_MEMBER_SQL = """
+    INSERT INTO conversation_member(user_id, peer_id, last_message_id, unread)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE last_message_id = VALUES(last_message_id), unread = unread + VALUES(unread)
+"""
+BUMP_COUNTER_SQL = """
+    INSERT INTO message_counter(user_id, unread) VALUES (%s, 1)
+    ON DUPLICATE KEY UPDATE unread = unread + 1
+"""
+MEMBER_UNREAD_SQL = """
+    SELECT unread, last_message_id FROM conversation_member
+     WHERE user_id = %s AND peer_id = %s
+       FOR UPDATE
+"""
+CLEAR_MEMBER_SQL = """
+    UPDATE conversation_member SET unread = 0, last_read_id = %s
+     WHERE user_id = %s AND peer_id = %s
+"""
+DROP_COUNTER_SQL = "UPDATE message_counter SET unread = GREATEST(unread - %s, 0) WHERE user_id = %s"
+UNREAD_SQL = "SELECT unread FROM message_counter WHERE user_id = %s"
+
+MESSAGE_COLUMNS = "m.id, m.sender_id, m.recipient_id, m.body, m.created_at"
+
+
+def _inbox_sql(with_cursor: bool) -> str:
+    """Gespräche eines Users, neueste zuerst (idx_member_inbox(user_id, last_message_id))."""
+    return f"""
+        SELECT c.peer_id, u.full_name AS peer_name, c.unread, c.last_read_id,
+               p.last_read_id AS peer_read_id,
+               m.id AS last_message_id, m.sender_id AS last_sender_id,
+               LEFT(m.body, 140) AS last_body, m.created_at AS last_at
+          FROM conversation_member c
+          JOIN messages m ON m.id = c.last_message_id
+          JOIN user u ON u.id = c.peer_id
+     LEFT JOIN conversation_member p ON p.user_id = c.peer_id AND p.peer_id = c.user_id
+         WHERE c.user_id = %s
+           {"AND c.last_message_id < %s" if with_cursor else ""}
+      ORDER BY c.last_message_id DESC
+         LIMIT %s
+    """
+
+
+def _thread_sql(with_cursor: bool) -> str:
+    """Verlauf zweier User, neueste zuerst (idx_messages_pair(user_lo, user_hi, id))."""
+    return f"""
+        SELECT {MESSAGE_COLUMNS}
+          FROM messages m
+         WHERE m.user_lo = %s AND m.user_hi = %s
+           {"AND m.id < %s" if with_cursor else ""}
+      ORDER BY m.id DESC
+         LIMIT %s
+    """
+
+
+# neue Nachrichten an einen User (idx_messages_recipient(recipient_id, id))
+NEW_SINCE_SQL = f"""
+    SELECT {MESSAGE_COLUMNS}
+      FROM messages m
+     WHERE m.recipient_id = %s AND m.id > %s
+  ORDER BY m.id
+     LIMIT %s
+"""
+LATEST_ID_SQL = "SELECT COALESCE(MAX(id), 0) AS id FROM messages WHERE recipient_id = %s"
+
+
+class NotFound(Exception):
+    pass
+
+
+class _Waiter:
+    """Ein wartender Request; wake() darf aus jedem Thread kommen."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.event = asyncio.Event()
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self.event.set)
+
+    def wait(self, timeout: float) -> bool:
+        woke = self.event.wait(timeout)
+        self.event.clear()
+        return woke
+
+    async def wait_async(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.event.clear()
+
+
+class Notifier:
+    """
+    In-Process-Benachrichtigung "neue Nachricht für user_id". Ein wartender Request kostet nur
+    einen Eintrag im Dict (async) bzw. einen schlafenden Thread (WSGI) – keine DB-Abfragen.
+    Andere Prozesse bekommen nichts mit; dort endet das Warten spätestens mit dem Timeout.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: Dict[int, set] = {}
+
+    @contextmanager
+    def listen(self, user_id: int, loop: Optional[asyncio.AbstractEventLoop] = None) -> Iterator[_Waiter]:
+        """Vor der DB-Abfrage anmelden, damit keine Nachricht zwischen Abfrage und Warten verloren geht."""
+        waiter = _Waiter(loop)
+        with self._lock:
+            self._waiters.setdefault(user_id, set()).add(waiter)
+        try:
+            yield waiter
+        finally:
+            with self._lock:
+                ws = self._waiters.get(user_id)
+                if ws is not None:
+                    ws.discard(waiter)
+                    if not ws:
+                        del self._waiters[user_id]
+
+    def publish(self, user_id: int) -> int:
+        with self._lock:
+            waiters = list(self._waiters.get(user_id, ()))
+        for w in waiters:
+            w.wake()
+        return len(waiters)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"users": len(self._waiters), "waiters": sum(len(w) for w in self._waiters.values())}
+
+
+class MessageService:
+    DEFAULT_LIMIT = 30
+    MAX_LIMIT = 100
+
+    def __init__(self, get_connection: Callable, notifier: Optional[Notifier] = None, max_body: int = 5000):
+        self.get_connection = get_connection
+        self.notifier = notifier
+        self.max_body = max_body
+
+    def _check_send(self, sender_id: int, recipient_id: int, body: Any) -> str:
+        body = (body or "").strip() if isinstance(body, str) else ""
+        if not body:
+            raise ValueError("empty_body")
+        if len(body) > self.max_body:
+            raise ValueError("body_too_long")
+        if sender_id == recipient_id:
+            raise ValueError("self_message")
+        return body
+
+    def send(self, sender_id: int, recipient_id: int, body: Any) -> Dict[str, Any]:
+        """Speichert die Nachricht, pflegt beide Inbox-Zeilen + Zähler und weckt wartende Polls."""
+        body = self._check_send(sender_id, recipient_id, body)
+
+        def work(cur):
+            cur.execute("SELECT 1 FROM user WHERE id = %s", (recipient_id,))
+            if not cur.fetchone():
+                raise NotFound()
+            cur.execute(INSERT_MESSAGE_SQL, (sender_id, recipient_id, body))
+            mid = cur.lastrowid
+            # Reihenfolge immer kleinere user_id zuerst -> keine Deadlocks bei gleichzeitigen Antworten
+            for uid, peer, unread in sorted([(sender_id, recipient_id, 0), (recipient_id, sender_id, 1)]):
+                cur.execute(TOUCH_MEMBER_SQL, (uid, peer, mid, unread))
+            cur.execute(BUMP_COUNTER_SQL, (recipient_id,))
+            cur.execute(f"SELECT {MESSAGE_COLUMNS} FROM messages m WHERE m.id = %s", (mid,))
+            return cur.fetchone()
+
+        msg = run_transaction(self.get_connection, work)
+        if self.notifier:
+            self.notifier.publish(recipient_id)
+        return msg
+
+    def inbox(self, user_id: int, cursor: Optional[str] = None, limit=None) -> Tuple[List[Dict], Optional[str]]:
+        limit = page_limit(limit, self.DEFAULT_LIMIT, self.MAX_LIMIT)
+        args: list = [user_id]
+        if cursor:
+            args.append(self._cursor_id(cursor))
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(_inbox_sql(bool(cursor)), args + [limit + 1])
+            rows = cur.fetchall()
+        return self._page(rows, limit, "last_message_id")
+
+    def thread(self, user_id: int, peer_id: int, cursor: Optional[str] = None,
+               limit=None) -> Tuple[List[Dict], Optional[str]]:
+        """Nachrichten mit peer_id, neueste zuerst; ältere Seiten über den Cursor."""
+        limit = page_limit(limit, self.DEFAULT_LIMIT, self.MAX_LIMIT)
+        args: list = [min(user_id, peer_id), max(user_id, peer_id)]
+        if cursor:
+            args.append(self._cursor_id(cursor))
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(_thread_sql(bool(cursor)), args + [limit + 1])
+            rows = cur.fetchall()
+        return self._page(rows, limit, "id")
+
+    @staticmethod
+    def _cursor_id(cursor: str) -> int:
+        """cursor -> Nachrichten-ID; ValueError('bad_cursor') auch bei manipuliertem Inhalt."""
+        try:
+            return int(decode_cursor(cursor, 1)[0])
+        except ValueError:
+            raise ValueError("bad_cursor")
+
+    @staticmethod
+    def _page(rows: List[Dict], limit: int, key: str):
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][key])
+        return rows, next_cursor
+
+    def mark_read(self, user_id: int, peer_id: int) -> int:
+        """Gespräch als gelesen markieren; gibt die Zahl der eben gelesenen Nachrichten zurück."""
+        def work(cur):
+            cur.execute(MEMBER_UNREAD_SQL, (user_id, peer_id))
+            row = cur.fetchone()
+            if not row:
+                return 0
+            cur.execute(CLEAR_MEMBER_SQL, (row["last_message_id"], user_id, peer_id))
+            if row["unread"]:
+                cur.execute(DROP_COUNTER_SQL, (row["unread"], user_id))
+            return row["unread"]
+
+        return run_transaction(self.get_connection, work)
+
+    def unread_count(self, user_id: int) -> int:
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(UNREAD_SQL, (user_id,))
+            row = cur.fetchone()
+            return row["unread"] if row else 0
+
+    def latest_id(self, user_id: int) -> int:
+        """Startpunkt für Polls ohne ?since= (nur Nachrichten ab jetzt)."""
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(LATEST_ID_SQL, (user_id,))
+            return cur.fetchone()["id"]
+
+    def new_since(self, user_id: int, since_id: int, limit: int = MAX_LIMIT) -> List[Dict]:
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(NEW_SINCE_SQL, (user_id, since_id, limit))
+            return cur.fetchall()
+
+    def poll(self, user_id: int, since_id: int, timeout: float) -> List[Dict]:
+        """
+        Long-Poll: sofort zurück, wenn es Nachrichten nach since_id gibt, sonst bis zu timeout
+        Sekunden auf den Notifier warten und danach genau einmal nachsehen.
+        """
+        if self.notifier is None:
+            return self.new_since(user_id, since_id)
+        with self.notifier.listen(user_id) as waiter:
+            rows = self.new_since(user_id, since_id)
+            if rows or not waiter.wait(timeout):
+                return rows
+        return self.new_since(user_id, since_id)
@@ -1,4 +1,51 @@
-from typing import Any, Dict, List, Callable
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Callable, Optional, Tuple
+
+import pymysql
+
+from src.db_api import run_transaction
+from src.services.pagination import decode_cursor, encode_cursor, page_limit
+
+# pending -> paid inkl. Zähler, nur wenn die Kapazität reicht (booking_id)
+APPROVE_SQL = """
+    UPDATE booking b
+      JOIN event e ON e.id = b.event_id
+       SET b.status      = 'paid',
+           e.paid_qty    = e.paid_qty + b.qty,
+           e.pending_qty = e.pending_qty - b.qty
+     WHERE b.id = %s
+       AND b.status = 'pending'
+       AND e.capacity - e.paid_qty >= b.qty
+"""
+
+# pending -> cancelled inkl. Zähler (booking_id)
+REJECT_SQL = """
+    UPDATE booking b
+      JOIN event e ON e.id = b.event_id
+       SET b.status      = 'cancelled',
+           e.pending_qty = e.pending_qty - b.qty
+     WHERE b.id = %s
+       AND b.status = 'pending'
+"""
+
+# Grund, warum APPROVE_SQL/REJECT_SQL nichts getroffen hat (booking_id)
+FAILURE_SQL = """
+    SELECT b.status, b.qty, e.capacity - e.paid_qty AS free
+      FROM booking b
+      JOIN event e ON e.id = b.event_id
+     WHERE b.id=%s
+"""
+
+# Buchung (id, event_id, user_id), falls sie zu einem Event des Organizers gehört (booking_id, organizer_id)
+OWNED_BOOKING_SQL = """
+    SELECT b.id, b.event_id, b.user_id
+    FROM booking b
+    JOIN event   e ON e.id = b.event_id
+    WHERE b.id=%s AND e.organizer_id=%s
+"""
+
+AUDIT_SQL = "INSERT INTO booking_audit(booking_id, old_status, new_status) VALUES(%s,%s,%s)"
+
 
 class NotFound(Exception):
     pass
@@ -13,164 +60,342 @@ class NoCapacity(Exception):
 class BadStatus(Exception):
     pass
 
+class BadBulkRequest(Exception):
+    pass
+
 
 class OrganizerBookingService:
-    def __init__(self, get_connection: Callable):
+    def __init__(self, get_connection: Callable, list_cache=None):
         self.get_connection = get_connection
+        # EventListCache (optional), wird bei Statuswechseln invalidiert
+        self.list_cache = list_cache
 
-    def list_by_status(self, organizer_id: int, status: str) -> List[Dict[str, Any]]:
-        """Alle Buchungen für die Events des Organizers nach Status."""
-        with self.get_connection() as con, con.cursor() as cur:
-            cur.execute(
-                """
-                SELECT
-                    b.id          AS booking_id,
-                    b.event_id    AS event_id,
-                    e.title       AS event_title,
-                    b.user_id     AS user_id,
-                    u.full_name   AS user_name,
-                    u.email       AS user_email,
-                    b.qty         AS qty,
-                    b.status      AS status,
-                    b.created_at  AS created_at
-                  FROM booking b
-                  JOIN event e ON e.id = b.event_id
-                  JOIN user  u ON u.id = b.user_id
-                 WHERE e.organizer_id = %s
-                   AND b.status = %s
-              ORDER BY b.created_at DESC
-                """,
-                (organizer_id, status),
-            )
-            return cur.fetchall()
-    
-    def approve(self, booking_id: int) -> Dict[str, Any]:
+    # Seitengröße für GET /api/organizer/bookings
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 500
+
+    @staticmethod
+    def _list_sql(with_cursor: bool, with_limit: bool) -> str:
         """
-        Setzt eine 'pending'-Buchung auf 'paid', wenn noch genug freie Plätze da sind.
-        Gibt {ok: True, updated: <rowcount>} zurück oder wirft eine der Exceptions oben.
+        Buchungen der Events eines Organizers nach Status, neueste zuerst.
+        Gestützt auf idx_event_organizer (event.organizer_id) und
+        idx_booking_event_status_created (booking(event_id, status, created_at)).
         """
-        with self.get_connection() as con, con.cursor() as cur:
-            # 1) Buchung laden
-            cur.execute(
-                """
-                SELECT b.id, b.event_id, b.qty, b.status
-                  FROM booking b
-                 WHERE b.id=%s
-                """,
-                (booking_id,),
-            )
-            row = cur.fetchone()
-            if not row:
-                raise NotFound()
-
-            if row["status"] != "pending":
-                raise NotPending()
-
-            eid = row["event_id"]
-            qty = row["qty"]
-
-            # 2) Freie Plätze prüfen (bezahlt zählt als belegt)
-            cur.execute(
-                """
-                SELECT
-                    e.capacity - COALESCE((
-                        SELECT SUM(b2.qty)
-                          FROM booking b2
-                         WHERE b2.event_id = e.id
-                           AND b2.status = 'paid'
-                    ), 0) AS free
-                  FROM event e
-                 WHERE e.id=%s
-                """,
-                (eid,),
-            )
-            cap = cur.fetchone()
-            free = max(0, cap["free"]) if cap else 0
-            if free < qty:
-                raise NoCapacity(free)
-
-            # 3) Statuswechsel (nur wenn noch pending)
-            cur.execute(
-                "UPDATE booking SET status='paid' WHERE id=%s AND status='pending'",
-                (booking_id,),
-            )
-            changed = cur.rowcount
-
-            # 4) Audit (optional)
-            cur.execute(
-                """
-                INSERT INTO booking_audit(booking_id, old_status, new_status)
-                VALUES(%s,%s,%s)
-                """,
-                (booking_id, "pending", "paid"),
-            )
-
-            return {"ok": True, "updated": changed}
-        
-    def reject(self, booking_id: int) -> dict:
+        return f"""
+            SELECT
+                b.id          AS booking_id,
+                b.event_id    AS event_id,
+                e.title       AS event_title,
+                b.user_id     AS user_id,
+                u.full_name   AS user_name,
+                u.email       AS user_email,
+                b.qty         AS qty,
+                b.status      AS status,
+                b.created_at  AS created_at
+              FROM event e
+              JOIN booking b ON b.event_id = e.id
+              JOIN user  u ON u.id = b.user_id
+             WHERE e.organizer_id = %s
+               AND b.status = %s
+               {"AND (b.created_at < %s OR (b.created_at = %s AND b.id < %s))" if with_cursor else ""}
+          ORDER BY b.created_at DESC, b.id DESC
+             {"LIMIT %s" if with_limit else ""}
+        """
+
+    def list_by_status(
+        self, organizer_id: int, status: str, cursor: Optional[str] = None, limit=None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """
-        Setzt eine pending-Buchung auf 'cancelled'.
-        Gibt {ok: True, updated: <rowcount>} zurück oder wirft Exception.
+        Eine Seite Buchungen für die Events des Organizers nach Status (Keyset auf
+        (created_at, id)). Gibt (rows, next_cursor) zurück.
+        Wirft ValueError bei ungültigem cursor/limit.
         """
+        sql, args, limit = self._page_query(organizer_id, status, cursor, limit)
         with self.get_connection() as con, con.cursor() as cur:
-            # 1) Buchung prüfen
-            cur.execute(
-                "SELECT id, status FROM booking WHERE id=%s",
-                (booking_id,),
-            )
-            row = cur.fetchone()
-            if not row:
-                raise NotFound()
-            if row["status"] != "pending":
-                raise NotPending()
-
-            # 2) Update
-            cur.execute(
-                "UPDATE booking SET status='cancelled' WHERE id=%s AND status='pending'",
-                (booking_id,),
-            )
-            changed = cur.rowcount
-
-            # 3) Audit optional
-            cur.execute(
-                """
-                INSERT INTO booking_audit(booking_id, old_status, new_status)
-                VALUES(%s,%s,%s)
-                """,
-                (booking_id, "pending", "cancelled"),
-            )
-
-            return {"ok": True, "updated": changed}
-    
+            cur.execute(sql, args)
+            return self._page_result(cur.fetchall(), limit)
 
-    def list_api(self, organizer_id: int, status: str) -> list[dict]:
+    def _page_query(self, organizer_id: int, status: str, cursor: Optional[str], limit):
+        """(sql, args, limit) für eine Seite von list_by_status."""
+        limit = page_limit(limit, self.DEFAULT_LIMIT, self.MAX_LIMIT)
+        args: List[Any] = [organizer_id, status]
+        if cursor:
+            created_at, bid = decode_cursor(cursor, 2)
+            try:
+                # beide Teile prüfen: ein manipulierter Zeitstempel ginge sonst als String an MySQL
+                created_at = datetime.fromisoformat(created_at)
+                args += [created_at, created_at, int(bid)]
+            except ValueError:
+                raise ValueError("bad_cursor")
+        # eine Zeile mehr, um zu wissen, ob es eine nächste Seite gibt
+        args.append(limit + 1)
+        return self._list_sql(bool(cursor), True), args, limit
+
+    @staticmethod
+    def _page_result(rows: List[Dict[str, Any]], limit: int):
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["booking_id"])
+        return rows, next_cursor
+
+    def stream_by_status(self, organizer_id: int, status: str) -> Iterator[Dict[str, Any]]:
         """
-        Liefert Buchungen eines Organizers nach Status.
+        Alle Buchungen nach Status als Generator über einen serverseitigen Cursor
+        (SSDictCursor): Zeilen werden einzeln vom Server gelesen statt mit fetchall()
+        komplett in den Speicher geladen. Für große Exporte.
         """
+        self._check_status(status)
+        with self.get_connection() as con, con.cursor(pymysql.cursors.SSDictCursor) as cur:
+            cur.execute(self._list_sql(False, False), (organizer_id, status))
+            for row in cur:
+                yield row
+
+    @staticmethod
+    def _check_status(status: str) -> None:
         allowed = {"pending", "paid", "rejected", "cancelled"}
         if status not in allowed:
             raise BadStatus()
+    
+    def approve(self, booking: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Setzt eine 'pending'-Buchung auf 'paid', wenn noch genug freie Plätze da sind.
 
-        with self.get_connection() as con, con.cursor() as cur:
-            cur.execute(
-                """
-                SELECT
-                    b.id          AS booking_id,
-                    b.created_at  AS created_at,
-                    b.status      AS status,
-                    b.qty         AS qty,
-                    e.id          AS event_id,
-                    e.title       AS event_title,
-                    u2.id         AS user_id,
-                    u2.full_name  AS user_name,
-                    u2.email      AS user_email
-                FROM booking b
-                JOIN event e ON e.id = b.event_id
-                JOIN user u2 ON u2.id = b.user_id
-                WHERE e.organizer_id = %s
-                  AND b.status = %s
-                ORDER BY b.created_at DESC
-                """,
-                (organizer_id, status),
-            )
-            return cur.fetchall()
\ No newline at end of file
+        booking ist die Zeile aus der Ownership-Prüfung (id, event_id, user_id).
+        Kapazitätsprüfung, Statuswechsel und Zähler sind ein einziges bedingtes UPDATE,
+        das Audit läuft in derselben Transaktion. Nur wenn das UPDATE nichts trifft,
+        wird der Grund nachgelesen.
+        Gibt {ok: True, updated: 1} zurück oder wirft eine der Exceptions oben.
+        """
+        def work(cur):
+            cur.execute(APPROVE_SQL, (booking["id"],))
+            if cur.rowcount == 0:
+                self._raise_failure(cur, booking["id"])
+            self._audit(cur, booking["id"], "pending", "paid")
+
+        run_transaction(self.get_connection, work)
+
+        if self.list_cache:
+            self.list_cache.booking_changed(booking["user_id"], booking["event_id"], paid_changed=True)
+        return {"ok": True, "updated": 1}
+        
+    def reject(self, booking: Dict[str, Any]) -> dict:
+        """
+        Setzt eine pending-Buchung auf 'cancelled' (inkl. pending_qty und Audit, eine Transaktion).
+        booking wie bei approve. Gibt {ok: True, updated: 1} zurück oder wirft Exception.
+        """
+        def work(cur):
+            cur.execute(REJECT_SQL, (booking["id"],))
+            if cur.rowcount == 0:
+                self._raise_failure(cur, booking["id"])
+            self._audit(cur, booking["id"], "pending", "cancelled")
+
+        run_transaction(self.get_connection, work)
+
+        if self.list_cache:
+            self.list_cache.booking_changed(booking["user_id"], booking["event_id"])
+        return {"ok": True, "updated": 1}
+
+    # max. Buchungen pro Bulk-Aufruf
+    BULK_MAX = 5000
+
+    def bulk(
+        self,
+        organizer_id: int,
+        action: str,
+        booking_ids: Optional[List[int]] = None,
+        event_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Nimmt viele Anfragen auf einmal an bzw. lehnt sie ab.
+
+        Entweder booking_ids (explizite Liste) oder event_id (alle pending-Buchungen
+        des Events, älteste zuerst, optional höchstens limit Stück).
+        Ownership wird in einer Query geprüft, Kapazität strikt FIFO (nach created_at)
+        vergeben: passt eine Buchung nicht mehr, bekommen auch alle späteren desselben
+        Events no_capacity. Status, Zähler und Audit werden gebündelt in einer
+        Transaktion geschrieben.
+        Gibt {ok, results: [{booking_id, result}], <result>: anzahl...} zurück.
+        """
+        if action not in ("approve", "reject"):
+            raise BadBulkRequest("bad_action")
+        if (booking_ids is None) == (event_id is None):
+            raise BadBulkRequest("need_booking_ids_or_event_id")
+        if booking_ids is not None:
+            # nur eine JSON-Liste positiver Ganzzahlen ("123" oder true würden sonst zu IDs)
+            if not isinstance(booking_ids, list):
+                raise BadBulkRequest("invalid_payload")
+            if len(booking_ids) > self.BULK_MAX:
+                raise BadBulkRequest("too_many_booking_ids")
+            booking_ids = list(dict.fromkeys(self._positive_int(b, "invalid_booking_id") for b in booking_ids))
+            if not booking_ids:
+                raise BadBulkRequest("no_booking_ids")
+        else:
+            event_id = self._positive_int(event_id, "invalid_event_id")
+        limit = self.BULK_MAX if limit is None else min(self._positive_int(limit, "bad_limit"), self.BULK_MAX)
+
+        def work(cur):
+            results: Dict[int, str] = {}
+            if booking_ids is not None:
+                rows = self._load_by_ids(cur, booking_ids, organizer_id, results)
+            else:
+                rows = self._load_pending_for_event(cur, event_id, organizer_id, limit)
+                if rows is None:
+                    return None
+
+            # FIFO-Vergabe der freien Plätze pro Event
+            free: Dict[int, int] = {}
+            full = set()
+            done = []
+            for r in rows:
+                if r["status"] != "pending":
+                    results[r["id"]] = "not_pending"
+                    continue
+                if action == "approve":
+                    eid = r["event_id"]
+                    free.setdefault(eid, max(0, r["free"]))
+                    if eid in full or r["qty"] > free[eid]:
+                        full.add(eid)
+                        results[r["id"]] = "no_capacity"
+                        continue
+                    free[eid] -= r["qty"]
+                results[r["id"]] = "approved" if action == "approve" else "rejected"
+                done.append(r)
+
+            if done:
+                self._write_bulk(cur, action, done)
+            return results, done
+
+        outcome = run_transaction(self.get_connection, work)
+        if outcome is None:
+            # Event gehört nicht dem Organizer (oder existiert nicht)
+            raise NotFound()
+        results, done = outcome
+
+        if self.list_cache:
+            for r in done:
+                self.list_cache.booking_changed(r["user_id"], r["event_id"], paid_changed=action == "approve")
+
+        order = booking_ids if booking_ids is not None else list(results)
+        out = {"ok": True, "results": [{"booking_id": bid, "result": results[bid]} for bid in order]}
+        for res in results.values():
+            out[res] = out.get(res, 0) + 1
+        return out
+
+    @staticmethod
+    def _positive_int(value: Any, error: str) -> int:
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise BadBulkRequest(error)
+        return value
+
+    @staticmethod
+    def _load_by_ids(cur, booking_ids: List[int], organizer_id: int, results: Dict[int, str]) -> List[Dict[str, Any]]:
+        """Lädt + sperrt die Buchungen inkl. Event; fremde/fehlende landen direkt in results."""
+        placeholders = ", ".join(["%s"] * len(booking_ids))
+        cur.execute(
+            f"""
+            SELECT b.id, b.event_id, b.user_id, b.qty, b.status,
+                   e.organizer_id, e.capacity - e.paid_qty AS free
+              FROM booking b
+              JOIN event e ON e.id = b.event_id
+             WHERE b.id IN ({placeholders})
+          ORDER BY b.created_at, b.id
+               FOR UPDATE
+            """,
+            booking_ids,
+        )
+        rows = []
+        for r in cur.fetchall():
+            if r["organizer_id"] != organizer_id:
+                results[r["id"]] = "forbidden"
+            else:
+                rows.append(r)
+        found = {r["id"] for r in rows}
+        for bid in booking_ids:
+            if bid not in results and bid not in found:
+                results[bid] = "not_found"
+        return rows
+
+    @staticmethod
+    def _load_pending_for_event(cur, event_id: int, organizer_id: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Sperrt das Event (Ownership inklusive) und lädt die ältesten pending-Buchungen."""
+        cur.execute(
+            "SELECT capacity - paid_qty AS free FROM event WHERE id=%s AND organizer_id=%s FOR UPDATE",
+            (event_id, organizer_id),
+        )
+        ev = cur.fetchone()
+        if not ev:
+            return None
+        cur.execute(
+            """
+            SELECT id, event_id, user_id, qty, status
+              FROM booking
+             WHERE event_id=%s AND status='pending'
+          ORDER BY created_at, id
+             LIMIT %s
+               FOR UPDATE
+            """,
+            (event_id, limit),
+        )
+        rows = cur.fetchall()
+        for r in rows:
+            r["free"] = ev["free"]
+        return rows
+
+    @staticmethod
+    def _write_bulk(cur, action: str, rows: List[Dict[str, Any]]) -> None:
+        """Status, Zähler (ein UPDATE für alle Events) und Audit (ein Multi-Row-INSERT)."""
+        new_status = "paid" if action == "approve" else "cancelled"
+        ids = [r["id"] for r in rows]
+        cur.execute(
+            f"UPDATE booking SET status=%s WHERE status='pending' AND id IN ({', '.join(['%s'] * len(ids))})",
+            [new_status] + ids,
+        )
+
+        per_event: Dict[int, int] = {}
+        for r in rows:
+            per_event[r["event_id"]] = per_event.get(r["event_id"], 0) + r["qty"]
+        cases = " ".join(["WHEN %s THEN %s"] * len(per_event))
+        case_args = [x for item in per_event.items() for x in item]
+        eids = list(per_event)
+        paid_set = f"paid_qty = paid_qty + CASE id {cases} END, " if action == "approve" else ""
+        cur.execute(
+            f"""
+            UPDATE event
+               SET {paid_set}pending_qty = pending_qty - CASE id {cases} END
+             WHERE id IN ({', '.join(['%s'] * len(eids))})
+            """,
+            (case_args if action == "approve" else []) + case_args + eids,
+        )
+
+        cur.executemany(AUDIT_SQL, [(bid, "pending", new_status) for bid in ids])
+
+    @staticmethod
+    def _audit(cur, booking_id: int, old_status: str, new_status: str) -> None:
+        cur.execute(AUDIT_SQL, (booking_id, old_status, new_status))
+
+    @staticmethod
+    def _raise_failure(cur, booking_id: int) -> None:
+        """Bedingtes UPDATE hat nichts getroffen -> passende Exception werfen."""
+        cur.execute(FAILURE_SQL, (booking_id,))
+        raise OrganizerBookingService._failure(cur.fetchone())
+
+    @staticmethod
+    def _failure(row: Optional[Dict[str, Any]]) -> Exception:
+        """Zeile aus FAILURE_SQL -> Exception, die den Grund beschreibt."""
+        if not row:
+            return NotFound()
+        if row["status"] != "pending":
+            return NotPending()
+        return NoCapacity(max(0, row["free"]))
+    
+
+    def list_api(
+        self, organizer_id: int, status: str, cursor: Optional[str] = None, limit=None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Liefert eine Seite Buchungen eines Organizers nach Status (siehe list_by_status).
+        """
+        self._check_status(status)
+        return self.list_by_status(organizer_id, status, cursor, limit)
@@ -1,5 +1,14 @@
 from typing import Any, List, Optional, Dict, Callable
 
+from src.http_cache import stable_last_modified
+
+# Versionsstempel für /api/organizer/events (idx_event_organizer_updated); COUNT erfasst Löschungen
+EVENTS_STAMP_SQL = """
+    SELECT MAX(updated_at) AS updated_at, COUNT(*) AS n, NOW(6) AS now
+      FROM event
+     WHERE organizer_id=%s
+"""
+
 class OrganizerService:
     def __init__(self, get_connection: Callable):
         self.get_connection = get_connection
@@ -18,6 +27,13 @@ class OrganizerService:
             )
             return cur.fetchall()
 
+    def events_stamp(self, organizer_id: int):
+        """((updated_at, Anzahl), last_modified) der Events des Organizers, ohne die Liste zu laden."""
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(EVENTS_STAMP_SQL, (organizer_id,))
+            row = cur.fetchone()
+        return (row["updated_at"], row["n"]), stable_last_modified(row["updated_at"], row["now"])
+
     def get_event(self, eid: int) -> Optional[Dict[str, Any]]:
         """Event-Daten per ID (für /api/organizer/event/<id>)."""
         with self.get_connection() as con, con.cursor() as cur:
@@ -0,0 +1,35 @@
+import base64
+from typing import List
+
+# Hilfsfunktionen für Keyset-Pagination: der Cursor ist base64("teil1|teil2|...")
+# und enthält die Sortierschlüssel der letzten Zeile der vorherigen Seite.
+
+
+def encode_cursor(*parts) -> str:
+    raw = "|".join(str(p) for p in parts)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, n: int) -> List[str]:
+    """cursor -> n Teile (als Strings); ValueError('bad_cursor') bei Müll."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("bad_cursor")
+    parts = raw.rsplit("|", n - 1)
+    if len(parts) != n:
+        raise ValueError("bad_cursor")
+    return parts
+
+
+def page_limit(raw, default: int, maximum: int) -> int:
+    """?limit= -> Seitengröße (default falls leer, gedeckelt auf maximum)."""
+    if not raw:
+        return default
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise ValueError("bad_limit")
+    if limit <= 0:
+        raise ValueError("bad_limit")
+    return min(limit, maximum)
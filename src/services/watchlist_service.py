@@ -0,0 +1,97 @@
+# services/watchlist_service.py
+#
+# Watchlist (FR-Us-05): beobachtete Events mit freien Plätzen und eigenem Buchungsstand.
+#
+# - Liste: genau eine Abfrage, egal wie viele Events beobachtet werden. watchlist wird über
+#   den PK (user_id, event_id) gelesen, die eigene Buchung per uq_booking_active(user_id, event_id, active).
+# - Hinzufügen/Entfernen mehrerer Events: jeweils ein Statement mit IN-Liste.
+from typing import Any, Callable, Dict, Iterable, List
+
+# free wie beim Buchen (capacity - paid - pending), nicht nur bezahlte Plätze
+LIST_SQL = """
+    SELECT e.id AS event_id, e.title, e.start_date, e.location, e.capacity,
+           GREATEST(e.capacity - e.paid_qty - e.pending_qty, 0) AS free,
+           b.id AS booking_id, b.status AS my_status, b.qty AS my_qty,
+           w.added_at
+      FROM watchlist w
+      JOIN event e ON e.id = w.event_id
+ LEFT JOIN booking b ON b.user_id = w.user_id AND b.event_id = w.event_id AND b.active = 1
+     WHERE w.user_id = %s
+  ORDER BY e.start_date, e.id
+"""
+
+
+class NotFound(Exception):
+    pass
+
+
+def _in_list(ids: List[int]) -> str:
+    return ", ".join(["%s"] * len(ids))
+
+
+def add_sql(n: int) -> str:
+    # nur existierende Events (kein FK-Fehler für die ganze Liste), Dubletten ignorieren
+    return f"""
+        INSERT IGNORE INTO watchlist(user_id, event_id)
+        SELECT %s, id FROM event WHERE id IN ({_in_list([0] * n)})
+    """
+
+
+def remove_sql(n: int) -> str:
+    return f"DELETE FROM watchlist WHERE user_id = %s AND event_id IN ({_in_list([0] * n)})"
+
+
+def parse_event_ids(raw: Any, max_items: int) -> List[int]:
+    """Event-IDs aus dem Request-Body (Liste von Zahlen), ohne Dubletten, Reihenfolge bleibt."""
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("event_ids_required")
+    if len(raw) > max_items:
+        raise ValueError("too_many_event_ids")
+    ids: Dict[int, None] = {}
+    for x in raw:
+        if isinstance(x, bool):
+            raise ValueError("invalid_event_id")
+        try:
+            ids[int(x)] = None
+        except (TypeError, ValueError):
+            raise ValueError("invalid_event_id")
+    return list(ids)
+
+
+class WatchlistService:
+    MAX_BULK = 200
+
+    def __init__(self, get_connection: Callable):
+        self.get_connection = get_connection
+
+    def list(self, user_id: int) -> List[Dict[str, Any]]:
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(LIST_SQL, (user_id,))
+            return cur.fetchall()
+
+    def add(self, user_id: int, event_ids: Iterable[int]) -> int:
+        """Gibt die Zahl der neu beobachteten Events zurück."""
+        ids = list(event_ids)
+        if not ids:
+            return 0
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(add_sql(len(ids)), [user_id] + ids)
+            return cur.rowcount
+
+    def remove(self, user_id: int, event_ids: Iterable[int]) -> int:
+        ids = list(event_ids)
+        if not ids:
+            return 0
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(remove_sql(len(ids)), [user_id] + ids)
+            return cur.rowcount
+
+    def add_one(self, user_id: int, event_id: int) -> bool:
+        """True, wenn neu hinzugefügt; NotFound, wenn es das Event nicht gibt."""
+        if self.add(user_id, [event_id]):
+            return True
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute("SELECT 1 FROM event WHERE id = %s", (event_id,))
+            if not cur.fetchone():
+                raise NotFound()
+        return False
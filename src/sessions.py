@@ -0,0 +1,219 @@
+# Session-Verwaltung: Aufräumen abgelaufener Sessions + optionale signierte (zustandslose) Tokens.
+#
+# - SessionSweeper: löscht abgelaufene session-Zeilen in kleinen Batches (idx_session_exp),
+#   damit kein langer DELETE die Tabelle sperrt. Nur ein Prozess fegt gleichzeitig (GET_LOCK).
+# - SignedSessions (SESSIONS["mode"] = "signed"): das Cookie ist ein mit itsdangerous
+#   signiertes Token (User-ID, Token-ID, Ausstellungszeit) -> kein session-Lookup pro Request.
+#   Logout trägt die Token-ID in die RevocationList ein (sofort im eigenen Prozess) und in
+#   session_revocation, von wo andere Prozesse sie alle sync_interval Sekunden nachladen.
+# - SessionMaintenance: ein Hintergrund-Thread pro Prozess für beides.
+import base64
+import logging
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+log = logging.getLogger("app.sessions")
+
+SWEEP_LOCK = "session_sweep"
+SWEEP_SQL = "DELETE FROM session WHERE expires_at < NOW() LIMIT %s"
+SWEEP_REVOCATIONS_SQL = "DELETE FROM session_revocation WHERE expires_at < NOW() LIMIT %s"
+
+REVOKE_SQL = "INSERT INTO session_revocation(jti, expires_at) VALUES (%s, %s)"
+# neue Einträge seit dem letzten Abgleich (PK-Range)
+REVOCATIONS_SINCE_SQL = """
+    SELECT id, jti, expires_at FROM session_revocation
+     WHERE id > %s AND expires_at > NOW()
+  ORDER BY id
+     LIMIT %s
+"""
+
+
+class SessionSweeper:
+    def __init__(self, get_connection: Callable, batch: int = 1000, pause: float = 0.05):
+        self.get_connection = get_connection
+        self.batch = batch
+        self.pause = pause
+
+    def sweep(self, max_batches: int = 1000) -> Optional[int]:
+        """
+        Löscht abgelaufene Sessions und Revocation-Einträge batchweise.
+        Gibt die Zahl der gelöschten Sessions zurück, None wenn ein anderer Prozess gerade fegt.
+        """
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute("SELECT GET_LOCK(%s, 0) AS ok", (SWEEP_LOCK,))
+            if not cur.fetchone()["ok"]:
+                return None
+            try:
+                total = self._delete_batches(cur, SWEEP_SQL, max_batches)
+                self._delete_batches(cur, SWEEP_REVOCATIONS_SQL, max_batches)
+                return total
+            finally:
+                cur.execute("SELECT RELEASE_LOCK(%s)", (SWEEP_LOCK,))
+
+    def _delete_batches(self, cur, sql: str, max_batches: int) -> int:
+        total = 0
+        for _ in range(max_batches):
+            cur.execute(sql, (self.batch,))
+            total += cur.rowcount
+            if cur.rowcount < self.batch:
+                break
+            # anderen Schreibern zwischen den Batches Luft lassen
+            time.sleep(self.pause)
+        return total
+
+
+class RevocationList:
+    """Widerrufene Token-IDs (12 Byte) bis zum Ablauf des jeweiligen Tokens."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked: Dict[bytes, float] = {}  # jti -> Ablauf (epoch)
+        self._next_prune = 0.0
+        self.last_id = 0  # höchste übernommene session_revocation.id
+
+    @staticmethod
+    def _key(jti: str) -> bytes:
+        return base64.urlsafe_b64decode(jti + "=" * (-len(jti) % 4))
+
+    def add(self, jti: str, expires: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._revoked[self._key(jti)] = expires
+            if now >= self._next_prune:
+                self._revoked = {k: v for k, v in self._revoked.items() if v > now}
+                self._next_prune = now + 60
+
+    def __contains__(self, jti: str) -> bool:
+        with self._lock:
+            expires = self._revoked.get(self._key(jti))
+        return expires is not None and expires > time.time()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+class SignedSessions:
+    def __init__(self, secret: str, max_age: int, get_connection: Callable,
+                 revocations: Optional[RevocationList] = None):
+        if not secret:
+            raise ValueError("SESSION_SECRET is required for signed sessions")
+        self.max_age = max_age
+        self.get_connection = get_connection
+        self.revocations = revocations if revocations is not None else RevocationList()
+        self._serializer = URLSafeTimedSerializer(secret, salt="session")
+
+    @staticmethod
+    def is_signed(token: str) -> bool:
+        # DB-Tokens (token_urlsafe) enthalten keinen Punkt, signierte immer
+        return "." in token
+
+    def issue(self, user_id: int):
+        """(token, expires als UTC-datetime)."""
+        jti = base64.urlsafe_b64encode(secrets.token_bytes(12)).decode()
+        return self._serializer.dumps({"u": user_id, "j": jti}), datetime.utcnow() + timedelta(seconds=self.max_age)
+
+    def _claims(self, token: str):
+        try:
+            claims, issued = self._serializer.loads(token, max_age=self.max_age, return_timestamp=True)
+        except (BadSignature, ValueError):
+            return None
+        if not isinstance(claims, dict) or "u" not in claims or "j" not in claims:
+            return None
+        return claims, issued
+
+    def load(self, token: str) -> Optional[int]:
+        """User-ID aus einem gültigen, nicht widerrufenen Token, sonst None."""
+        found = self._claims(token)
+        if found is None:
+            return None
+        claims, _ = found
+        if claims["j"] in self.revocations:
+            return None
+        return claims["u"]
+
+    def revoke(self, token: str) -> bool:
+        found = self._claims(token)
+        if found is None:
+            return False
+        claims, issued = found
+        expires = issued.timestamp() + self.max_age
+        self.revocations.add(claims["j"], expires)
+        with self.get_connection() as con, con.cursor() as cur:
+            cur.execute(REVOKE_SQL, (claims["j"], datetime.utcfromtimestamp(expires)))
+        return True
+
+    def sync(self, batch: int = 1000) -> int:
+        """Widerrufe anderer Prozesse nachladen; gibt die Zahl neuer Einträge zurück."""
+        n = 0
+        with self.get_connection() as con, con.cursor() as cur:
+            while True:
+                cur.execute(REVOCATIONS_SINCE_SQL, (self.revocations.last_id, batch))
+                rows = cur.fetchall()
+                for r in rows:
+                    self.revocations.add(r["jti"], _utc_ts(r["expires_at"]))
+                    self.revocations.last_id = r["id"]
+                n += len(rows)
+                if len(rows) < batch:
+                    return n
+
+
+def _utc_ts(dt: datetime) -> float:
+    # DATETIME-Spalten sind naive UTC-Zeiten (wie session.expires_at)
+    return (dt - datetime(1970, 1, 1)).total_seconds()
+
+
+class SessionMaintenance:
+    """Hintergrund-Thread: Revocations abgleichen (häufig) und Sessions fegen (selten)."""
+
+    def __init__(self, sweeper: Optional[SessionSweeper], sweep_interval: float,
+                 signed: Optional[SignedSessions] = None, sync_interval: float = 2.0):
+        self.sweeper = sweeper
+        self.sweep_interval = sweep_interval
+        self.signed = signed
+        self.sync_interval = sync_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats = {"swept": 0, "sweeps": 0, "synced": 0, "errors": 0}
+
+    def start(self) -> None:
+        """Startet den Thread einmalig; weitere Aufrufe (z. B. je Request) kosten nur eine Abfrage."""
+        if self._thread is not None or (self.sweep_interval <= 0 and self.signed is None):
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="session-maintenance", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        # erster Sweep erst nach einem Intervall (mit Streuung), damit nicht alle Worker gleichzeitig starten
+        next_sweep = time.monotonic() + self.sweep_interval * (1 + secrets.randbelow(100) / 100)
+        tick = self.sync_interval if self.signed is not None else self.sweep_interval
+        while not self._stop.wait(tick):
+            try:
+                if self.signed is not None:
+                    self._stats["synced"] += self.signed.sync()
+                if self.sweeper is not None and self.sweep_interval > 0 and time.monotonic() >= next_sweep:
+                    next_sweep = time.monotonic() + self.sweep_interval
+                    n = self.sweeper.sweep()
+                    if n is not None:
+                        self._stats["sweeps"] += 1
+                        self._stats["swept"] += n
+            except Exception:
+                self._stats["errors"] += 1
+                log.exception("session maintenance failed")
+
+    def stats(self) -> dict:
+        out = dict(self._stats, running=self._thread is not None and self._thread.is_alive())
+        if self.signed is not None:
+            out["revoked"] = len(self.signed.revocations)
+        return out
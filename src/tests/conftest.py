@@ -0,0 +1,183 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src import app as app_module
+from src import db_api
+
+# u. a. kein Session-Wartungsthread aus den Test-Requests heraus
+app_module.app.config["TESTING"] = True
+
+ORGANIZER = {"id": 1, "email": "alice@example.com", "full_name": "Alice",
+             "is_organizer": 1, "company": "Alice Events GmbH"}
+
+
+class Rows(list):
+    """Antwort mit eigenem rowcount/lastrowid, z. B. ein UPDATE, das Zeilen trifft, aber keine liefert."""
+
+    def __init__(self, rows=(), rowcount=None, lastrowid=None):
+        super().__init__(dict(r) if isinstance(r, dict) else r for r in rows)
+        self.rowcount = len(self) if rowcount is None else rowcount
+        self.lastrowid = lastrowid
+
+
+class ScriptedDB:
+    """
+    Gemeinsame Fake-Datenbank der Tests. answers: Marker im SQL -> Zeilen oder Funktion(args) -> Zeilen
+    (darf auch werfen); der erste passende Marker gewinnt, ohne Treffer gibt es keine Zeilen.
+    rowcount = Zahl der Zeilen (Rows(...) für Abweichungen), GET_LOCK ist ohne eigenen Marker frei.
+    Selbst als get_connection verwendbar: db() öffnet eine neue Verbindung; alle Statements
+    landen als (sql, args) in executed.
+    """
+
+    def __init__(self, answers=None):
+        self.answers = answers if answers is not None else {}
+        self.executed = []
+        self.connections = []
+        self.cursor_classes = []
+        self.commits = self.rollbacks = self.streamed = 0
+
+    def __call__(self):
+        con = ScriptedConnection(self)
+        self.connections.append(con)
+        return con
+
+    def rows(self, sql, args) -> Rows:
+        for marker, answer in list(self.answers.items()) + [("GET_LOCK(", [{"ok": 1}])]:
+            if marker in sql:
+                rows = answer(args) if callable(answer) else answer
+                return rows if isinstance(rows, Rows) else Rows(rows)
+        return Rows()
+
+    def statements(self, marker: str = "") -> list:
+        """SQL aller ausgeführten Statements, die marker enthalten."""
+        return [sql for sql, _ in self.executed if marker in sql]
+
+    def pool(self):
+        """Pool-Ersatz für async_db (acquire/release mit asynchronen Verbindungen)."""
+        return AsyncScriptedPool(self)
+
+
+class ScriptedCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = 0
+        self.lastrowid = None
+        self._rows = Rows()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        pass
+
+    def execute(self, sql, args=None):
+        self.db.executed.append((sql, args))
+        self._rows = self.db.rows(sql, args)
+        self.rowcount, self.lastrowid = self._rows.rowcount, self._rows.lastrowid
+
+    def executemany(self, sql, seq):
+        seq = list(seq)
+        self.db.executed.append((sql, seq))
+        self.rowcount = sum(self.db.rows(sql, args).rowcount for args in seq)
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+    def __iter__(self):
+        # serverseitiger Cursor: zählt, wie viele Zeilen wirklich abgeholt wurden
+        for row in self._rows:
+            self.db.streamed += 1
+            yield row
+
+
+class ScriptedConnection:
+    def __init__(self, db):
+        self.db = db
+        self.released = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.released += 1
+        return False
+
+    def close(self):
+        pass
+
+    def cursor(self, cls=None):
+        self.db.cursor_classes.append(cls)
+        return ScriptedCursor(self.db)
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        self.db.commits += 1
+
+    def rollback(self):
+        self.db.rollbacks += 1
+
+
+class AsyncScriptedCursor(ScriptedCursor):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, args=None):
+        ScriptedCursor.execute(self, sql, args)
+
+    async def fetchone(self):
+        return ScriptedCursor.fetchone(self)
+
+    async def fetchall(self):
+        return ScriptedCursor.fetchall(self)
+
+
+class AsyncScriptedConnection(ScriptedConnection):
+    def cursor(self, cls=None):
+        return AsyncScriptedCursor(self.db)
+
+    async def begin(self):
+        pass
+
+    async def commit(self):
+        ScriptedConnection.commit(self)
+
+    async def rollback(self):
+        ScriptedConnection.rollback(self)
+
+
+class AsyncScriptedPool:
+    def __init__(self, db):
+        self.db = db
+        self.size = self.freesize = 1
+
+    async def acquire(self):
+        return AsyncScriptedConnection(self.db)
+
+    def release(self, con):
+        pass
+
+
+@pytest.fixture
+def checkouts(monkeypatch):
+    db = ScriptedDB({
+        "FROM session": [dict(ORGANIZER, expires_in=3600)],
+        "SELECT 1 FROM event": [{"1": 1}],
+        "UPDATE event": Rows(rowcount=1),
+    })
+    # nur der Pool ist gefälscht; get_connection() (mit Query-Instrumentierung) bleibt echt
+    monkeypatch.setattr(db_api, "pool", SimpleNamespace(connection=db))
+    app_module.session_cache.clear()
+    app_module.unknown_token_cache.clear()
+    return db.connections
@@ -0,0 +1,121 @@
+from datetime import date
+
+import pytest
+
+from src import app as app_module
+from src.services import analytics_charts
+from src.services.analytics_service import (
+    BUMP_VERSION_SQL, DIRTY_EVENTS_SQL, HIGH_WATER_SQL, SAVE_STATE_SQL, STATE_SQL, AnalyticsService, build_daily_rows,
+    daily_series, event_table,
+)
+from src.tests.conftest import ScriptedDB
+
+D1, D2 = date(2025, 3, 1), date(2025, 3, 2)
+
+
+def test_build_daily_rows_pivots_status_and_reviews():
+    bookings = [
+        {"event_id": 1, "day": D1, "status": "paid", "n": 2, "qty": 5},
+        {"event_id": 1, "day": D1, "status": "pending", "n": 1, "qty": 1},
+        {"event_id": 1, "day": D2, "status": "cancelled", "n": 1, "qty": 3},
+        {"event_id": 9, "day": D1, "status": "paid", "n": 1, "qty": 1},  # Event gelöscht
+    ]
+    reviews = [{"event_id": 1, "day": D2, "n": 2, "rating_sum": 9}]
+    rows = build_daily_rows(bookings, reviews, {1: 42})
+    assert rows == [
+        # event, day, organizer, bookings, booked, pending, paid, cancelled, rejected, reviews, rating_sum
+        (1, D1, 42, 3, 6, 1, 5, 0, 0, 0, 0),
+        (1, D2, 42, 1, 3, 0, 0, 3, 0, 2, 9),
+    ]
+
+
+def _day(day, **kw):
+    row = dict.fromkeys(("bookings", "booked_qty", "pending_qty", "paid_qty", "cancelled_qty", "rejected_qty",
+                         "reviews", "rating_sum"), 0)
+    return dict(row, day=day, **kw)
+
+
+def test_daily_series_is_cumulative_and_cut_after_computing():
+    rows = [_day(D1, booked_qty=10, paid_qty=4, pending_qty=6, reviews=1, rating_sum=5),
+            _day(D2, booked_qty=10, paid_qty=6, cancelled_qty=4, reviews=1, rating_sum=3)]
+    s = daily_series(rows, capacity=40)
+    assert s["fill_rate"] == [0.25, 0.4]
+    assert s["conversion"] == [0.4, 0.5]
+    assert s["rating_avg"] == [5.0, 4.0]
+    assert s["totals"]["paid_qty"] == 10 and s["totals"]["fill_rate"] == 0.4
+
+    cut = daily_series(rows, capacity=40, since=D2)
+    assert cut["days"] == ["2025-03-02"] and cut["fill_rate"] == [0.4]
+    assert cut["totals"] == s["totals"]
+
+
+def test_event_table_handles_zero_capacity_and_no_bookings():
+    rows = [dict(_day(D1, paid_qty=5, booked_qty=10), event_id=1, title="A", start_date=D2, capacity=20),
+            dict(_day(D1), event_id=2, title="B", start_date=D2, capacity=0)]
+    a, b = event_table(rows)
+    assert (a["fill_rate"], a["conversion"], a["rating_avg"]) == (0.25, 0.5, None)
+    assert (b["fill_rate"], b["conversion"]) == (None, None)
+
+
+def test_charts_render_png_and_svg():
+    s = daily_series([_day(D1, booked_qty=3, paid_qty=2, pending_qty=1, reviews=1, rating_sum=4)], capacity=10)
+    assert analytics_charts.render("bookings", s, "Test", "png").startswith(b"\x89PNG")
+    assert b"<svg" in analytics_charts.render("fill", s, "Test", "svg")
+    assert analytics_charts.render("rating", daily_series([]), "leer", "png").startswith(b"\x89PNG")
+
+
+def _analytics_db(bookings, state):
+    """booking (id -> event_id) + analytics_state; merkt sich, welche Events neu gerechnet wurden."""
+    rebuilt = []
+
+    def organizers(ids):
+        rebuilt.extend(ids)
+        return [{"id": eid, "organizer_id": 1} for eid in ids]
+
+    db = ScriptedDB({
+        STATE_SQL: lambda args: [{"name": k, "value": v} for k, v in state.items()],
+        HIGH_WATER_SQL: lambda args: [{"booking": max(bookings, default=0), "booking_audit": 0, "reviews": 0}],
+        DIRTY_EVENTS_SQL: lambda args: [{"event_id": e} for bid, e in sorted(bookings.items())
+                                        if args[0] < bid <= args[1]],
+        SAVE_STATE_SQL: lambda args: state.__setitem__(*args) or [],
+        "SELECT id, organizer_id FROM event": organizers,
+    })
+    return db, rebuilt
+
+
+@pytest.mark.parametrize("overlap, found", [(0, []), (50, [3, 5])])
+def test_refresh_rescans_an_overlap_for_late_commits(overlap, found):
+    bookings, state = {101: 5}, {}
+    db, rebuilt = _analytics_db(bookings, state)
+    svc = AnalyticsService(db, overlap_ids=overlap)
+    svc.refresh()
+    assert rebuilt == [5] and state["booking"] == 101
+
+    # Buchung 100 committet erst nach dem Lauf, der 101 schon gesehen hat
+    bookings[100] = 3
+    rebuilt.clear()
+    svc.refresh()
+    assert rebuilt == found
+
+
+def test_event_deleted_rebuilds_the_organizer_rollup_and_bumps_its_version():
+    db = ScriptedDB()
+    AnalyticsService(db).event_deleted(7)
+    assert [sql.split()[0] for sql in db.statements()] == ["DELETE", "INSERT", "INSERT"]
+    assert "FROM event_daily_stats" in db.statements("INSERT INTO organizer_daily_stats")[0]
+    assert next(args for sql, args in db.executed if sql == BUMP_VERSION_SQL) == [(7,)]
+    assert db.commits == 1
+
+
+def test_delete_route_updates_analytics_only_when_something_was_deleted(checkouts, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module.analytics_service, "event_deleted", calls.append)
+    client = app_module.app.test_client()
+    client.set_cookie("session", "tok")
+
+    monkeypatch.setattr(app_module.events_service, "delete_event", lambda eid: 0)
+    client.delete("/api/event/7")
+    assert calls == []
+    monkeypatch.setattr(app_module.events_service, "delete_event", lambda eid: 1)
+    assert client.delete("/api/event/7").get_json() == {"deleted": 1}
+    assert calls == [1]  # Organizer aus der Session
@@ -0,0 +1,187 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from src import app as app_module
+from src import async_db, request_context
+from src.services.events_service import CANCEL_SQL, FREE_SQL, PENDING_QTY_SQL, RESERVE_SQL
+from src.services.message_service import LATEST_ID_SQL, NEW_SINCE_SQL
+from src.services.organizer_booking_service import APPROVE_SQL, FAILURE_SQL, OWNED_BOOKING_SQL, REJECT_SQL
+from src.tests.conftest import ScriptedDB
+
+asgi = pytest.importorskip("src.asgi")
+
+T1 = datetime(2030, 1, 1, 10)
+ORGANIZER = {"id": 1, "email": "alice@example.com", "full_name": "Alice", "is_organizer": 1, "company": "A GmbH"}
+USER = {"id": 2, "email": "bob@example.com", "full_name": "Bob", "is_organizer": 0, "company": None}
+
+
+def _session(args):
+    user = {"org": ORGANIZER, "user": USER}.get(args[0])
+    return [dict(user, expires_in=3600)] if user else []
+
+
+def scripted_answers():
+    """Gemeinsame Antworten für die Flask- und die ASGI-Seite; UPDATEs antworten mit [{}] (trifft) bzw. []."""
+    return {
+        "FROM session s": _session,
+        "MAX(updated_at)": [{"updated_at": T1, "deleted_at": None, "now": T1 + timedelta(minutes=1)}],
+        RESERVE_SQL: [{}],
+        FREE_SQL: [{"free": 0}],
+        PENDING_QTY_SQL: [{"qty": 1}],
+        CANCEL_SQL: [{}],
+        OWNED_BOOKING_SQL: [{"id": 5, "event_id": 7, "user_id": 2}],
+        APPROVE_SQL: [{}],
+        REJECT_SQL: [{}],
+        FAILURE_SQL: [],
+        LATEST_ID_SQL: [{"id": 10}],
+        NEW_SINCE_SQL: [],
+        "FROM event e": [{"id": 1, "start_date": T1}, {"id": 2, "start_date": T1}],
+    }
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = ScriptedDB(scripted_answers())
+    monkeypatch.setattr(request_context, "get_connection", db)
+    monkeypatch.setattr(app_module.message_poller, "get_connection", db)
+    monkeypatch.setattr(async_db, "_pool", db.pool())
+    for cache in (app_module.session_cache, app_module.unknown_token_cache,
+                  app_module.event_list_cache.listings, app_module.event_list_cache.overlays):
+        cache.clear()
+    app_module.event_list_cache.invalidate_stamp()
+    return db
+
+
+def call_asgi(method, path, body=b"", headers=None):
+    path, _, query = path.partition("?")
+    headers = dict(headers or {})
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi.app(scope, receive, send))
+    start = sent[0]
+    resp_headers = {k.decode().lower(): v.decode() for k, v in start["headers"]}
+    data = b"".join(m.get("body", b"") for m in sent[1:])
+    return start["status"], resp_headers, data
+
+
+def call_flask(method, path, body=b"", headers=None):
+    headers = dict(headers or {})
+    client = app_module.app.test_client()
+    # der Werkzeug-Testclient setzt Cookies nur über seine Cookie-Jar
+    cookie = headers.pop("Cookie", None)
+    if cookie:
+        client.set_cookie(*cookie.split("=", 1))
+    resp = client.open(path, method=method, data=body, headers=headers)
+    return resp.status_code, {k.lower(): v for k, v in resp.headers.items()}, resp.data
+
+
+COMPARED_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "x-next-cursor")
+
+
+def both(method, path, body=b"", token=None, headers=None):
+    """Gleicher Request gegen Flask und ASGI; prüft Status, Header und JSON auf Gleichheit."""
+    headers = dict(headers or {})
+    if token:
+        headers["Cookie"] = f"session={token}"
+    results = []
+    for call in (call_flask, call_asgi):
+        status, resp_headers, data = call(method, path, body, headers)
+        results.append((status, {h: resp_headers.get(h) for h in COMPARED_HEADERS},
+                        json.loads(data) if data else None))
+    (f_status, f_headers, f_json), (a_status, a_headers, a_json) = results
+    assert a_status == f_status
+    assert a_headers == f_headers
+    assert a_json == f_json
+    return a_status, a_headers, a_json
+
+
+def test_list_event_200_304_and_400(db):
+    status, headers, rows = both("GET", "/api/event?limit=1")
+    assert status == 200 and [r["id"] for r in rows] == [1]
+    assert headers["etag"] and headers["x-next-cursor"]
+
+    status, _, _ = both("GET", "/api/event?limit=1", headers={"If-None-Match": headers["etag"]})
+    assert status == 304
+    status, _, body = both("GET", "/api/event?limit=abc")
+    assert status == 400 and body == {"error": "bad_limit"}
+
+
+def test_book_and_cancel(db):
+    assert both("POST", "/api/event/7/book", b'{"qty": 1}')[0] == 401
+    assert both("POST", "/api/event/7/book", b'{"qty": 1}', token="user")[2] == {"ok": True}
+
+    db.answers[RESERVE_SQL] = []
+    status, _, body = both("POST", "/api/event/7/book", b'{"qty": 1}', token="user")
+    assert status == 409 and body == {"error": "sold_out_or_not_enough", "free": 0}
+
+    assert both("DELETE", "/api/event/7/book", token="org")[0] == 403
+    assert both("DELETE", "/api/event/7/book", token="user")[2] == {"ok": True, "cancelled": 1}
+    db.answers[CANCEL_SQL] = []
+    assert both("DELETE", "/api/event/7/book", token="user")[0] == 400
+
+
+def test_malformed_booking_body_is_400_not_500(db):
+    for body in (b"{nope", b"[1, 2]"):
+        status, _, data = both("POST", "/api/event/7/book", body, token="user")
+        assert status == 400 and data == {"error": "invalid json"}
+    for body in (b'{"qty": "abc"}', b'{"qty": null}', b'{"qty": 1.5}', b'{"qty": "2"}', b'{"qty": true}',
+                 b'{"qty": 0}', b'{"qty": -1}'):
+        status, _, data = both("POST", "/api/event/7/book", body, token="user")
+        assert status == 400 and data == {"error": "invalid qty"}, body
+
+
+@pytest.mark.parametrize("failure, status, error", [
+    ([], 404, {"error": "not_found"}),
+    ([{"status": "paid", "qty": 1, "free": 3}], 409, {"error": "not_pending"}),
+    ([{"status": "pending", "qty": 4, "free": 2}], 409, {"error": "no_capacity", "free": 2}),
+])
+def test_organizer_approve_error_codes(db, failure, status, error):
+    db.answers[APPROVE_SQL] = []
+    db.answers[FAILURE_SQL] = failure
+    got_status, _, body = both("POST", "/api/organizer/booking/5/approve", token="org")
+    assert (got_status, body) == (status, error)
+
+
+def test_organizer_approve_reject_ownership_and_success(db):
+    assert both("POST", "/api/organizer/booking/5/approve", token="user")[0] == 403
+    assert both("POST", "/api/organizer/booking/5/reject", token="org")[2] == {"ok": True, "updated": 1}
+    db.answers[REJECT_SQL] = []
+    db.answers[FAILURE_SQL] = [{"status": "cancelled", "qty": 1, "free": 3}]
+    assert both("POST", "/api/organizer/booking/5/reject", token="org")[0] == 409
+    db.answers[OWNED_BOOKING_SQL] = []
+    assert both("POST", "/api/organizer/booking/5/reject", token="org")[0] == 403
+
+
+def test_message_poll(db):
+    status, _, body = both("GET", "/api/messages/poll?timeout=0", token="user")
+    assert status == 200 and body == {"messages": [], "last_id": 10}
+
+    db.answers[NEW_SINCE_SQL] = [{"id": 11, "sender_id": 1, "recipient_id": 2, "body": "Hallo", "created_at": T1}]
+    status, _, body = both("GET", "/api/messages/poll?since=10&timeout=0", token="user")
+    assert body["last_id"] == 11 and body["messages"][0]["body"] == "Hallo"
+    assert both("GET", "/api/messages/poll")[0] == 401
+    status, _, body = both("GET", "/api/messages/poll?since=abc&timeout=0", token="user")
+    assert status == 400 and body == {"error": "bad_since"}
+
+
+def test_async_services_are_not_sync_substitutes():
+    from src.services.events_service import EventsService
+    from src.services.message_service import MessageService
+    assert not isinstance(asgi.events_service, EventsService)
+    assert not isinstance(asgi.message_service, MessageService)
+    assert asgi.events_service.base.get_connection is None
@@ -0,0 +1,47 @@
+import pytest
+
+from src.bench.serving import percentile, summarize
+
+
+def test_percentile_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile([], 95) == 0.0
+
+
+def test_summarize_counts_errors_separately():
+    s = summarize([0.01, 0.02, 0.03], errors=1, elapsed=1.0)
+    assert s["requests"] == 4 and s["errors"] == 1
+    assert s["rps"] == 3.0
+    assert s["p50_ms"] == 20.0
+
+
+def test_parse_mix_and_unknown_operation():
+    from src.bench.loadtest import DEFAULT_MIX, parse_mix
+    assert parse_mix(None) == DEFAULT_MIX
+    assert parse_mix("list=3, book=1") == {"list": 3, "book": 1}
+    with pytest.raises(ValueError):
+        parse_mix("delete_everything=1")
+
+
+def test_op_stats_summary_and_compare():
+    from src.bench.loadtest import OpStats, compare
+    s = OpStats()
+    for ms, q in [(10, 2), (20, 2), (30, 5)]:
+        s.add(ms / 1000, 200, {"x-query-count": str(q)})
+    summary = s.summary(elapsed=1.0)
+    assert summary["count"] == 3 and summary["status"] == {"200": 3}
+    assert summary["queries_per_request"] == 3.0
+
+    old = {"commit": "a", "total": summary, "ops": {"list": summary}}
+    new = {"commit": "b", "total": dict(summary, rps=6.0), "ops": {"list": summary}}
+    lines = compare(old, new)
+    assert lines[0] == "a -> b"
+    assert "+100.0%" in lines[1]
+
+
+def test_session_cookie():
+    from src.bench.client import session_cookie
+    assert session_cookie({"set-cookie": "session=abc; HttpOnly; Path=/"}) == "abc"
+    assert session_cookie({}) is None
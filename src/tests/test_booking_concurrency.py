@@ -0,0 +1,93 @@
+"""
+Stresstest gegen eine echte MySQL-Datenbank (Schema aus src/db/create.sql, Zugang wie in config.py).
+Wird übersprungen, wenn keine Datenbank erreichbar ist.
+"""
+import secrets
+import threading
+
+import pytest
+
+from src.db_api import ConnectionPool, connect
+from src.services.events_service import EventsService
+
+BOOKERS = 300
+CAPACITY = 50
+
+
+@pytest.fixture
+def db_pool():
+    try:
+        connect().close()
+    except Exception as e:
+        pytest.skip(f"keine Datenbank erreichbar: {e}")
+    pool = ConnectionPool(connect, min_size=0, max_size=32, timeout=30)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def on_sale(db_pool):
+    tag = secrets.token_hex(4)
+    with db_pool.connection() as con, con.cursor() as cur:
+        cur.execute(
+            "INSERT INTO user(full_name,email,password) VALUES(%s,%s,'x')",
+            (f"Org {tag}", f"org-{tag}@example.com"),
+        )
+        org_id = cur.lastrowid
+        cur.execute(
+            """
+            INSERT INTO event(organizer_id,title,start_date,end_date,price_in_cents,capacity)
+            VALUES(%s,%s,'2030-01-01 20:00:00','2030-01-01 23:00:00',0,%s)
+            """,
+            (org_id, f"On-Sale {tag}", CAPACITY),
+        )
+        eid = cur.lastrowid
+        cur.executemany(
+            "INSERT INTO user(full_name,email,password) VALUES(%s,%s,'x')",
+            [(f"Fan {i}", f"fan-{tag}-{i}@example.com") for i in range(BOOKERS)],
+        )
+        cur.execute("SELECT id FROM user WHERE email LIKE %s", (f"fan-{tag}-%",))
+        user_ids = [r["id"] for r in cur.fetchall()]
+
+    yield eid, user_ids
+
+    with db_pool.connection() as con, con.cursor() as cur:
+        cur.execute("DELETE FROM event WHERE id=%s", (eid,))
+        cur.execute("DELETE FROM user WHERE email LIKE %s OR id=%s", (f"fan-{tag}-%", org_id))
+
+
+def test_parallel_bookers_never_overbook(db_pool, on_sale):
+    eid, user_ids = on_sale
+    svc = EventsService(db_pool.connection)
+    results = []
+    start = threading.Barrier(len(user_ids) * 2)
+
+    def book(uid):
+        start.wait()
+        results.append(svc.book_event(eid, {"id": uid}, {"qty": 1})[1])
+
+    # jeder User bucht zweimal gleichzeitig -> zweiter Versuch muss am UNIQUE-Index scheitern
+    threads = [threading.Thread(target=book, args=(uid,)) for uid in user_ids for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count(200) == CAPACITY
+    assert results.count(503) == 0
+    assert set(results) <= {200, 409}
+
+    with db_pool.connection() as con, con.cursor() as cur:
+        cur.execute("SELECT capacity, paid_qty, pending_qty FROM event WHERE id=%s", (eid,))
+        ev = cur.fetchone()
+        cur.execute(
+            """
+            SELECT COALESCE(SUM(qty),0) AS qty, COUNT(DISTINCT user_id) AS users, COUNT(*) AS bookings
+              FROM booking WHERE event_id=%s AND status IN ('pending','paid')
+            """,
+            (eid,),
+        )
+        actual = cur.fetchone()
+
+    assert ev["pending_qty"] == actual["qty"] == CAPACITY
+    assert actual["users"] == actual["bookings"]
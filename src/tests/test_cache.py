@@ -0,0 +1,141 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from src.cache import MISSING, TTLCache
+from src.services.pagination import encode_cursor
+from src.tests.conftest import ScriptedDB
+
+
+def test_get_set_and_missing():
+    c = TTLCache(maxsize=4, ttl=10)
+    assert c.get("a") is MISSING
+    c.set("a", None)
+    assert c.get("a") is None
+    assert c.stats()["hits"] == 1 and c.stats()["misses"] == 1
+
+
+def test_lru_eviction_keeps_recently_used():
+    c = TTLCache(maxsize=2, ttl=10)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")
+    c.set("c", 3)
+    assert c.get("b") is MISSING
+    assert c.get("a") == 1 and c.get("c") == 3
+    assert c.stats()["evictions"] == 1
+
+
+def test_per_key_ttl_expires():
+    c = TTLCache(maxsize=4, ttl=10)
+    c.set("short", 1, ttl=0.01)
+    c.set("long", 2)
+    time.sleep(0.02)
+    assert c.get("short") is MISSING
+    assert c.get("long") == 2
+    assert c.stats()["expirations"] == 1
+
+
+def test_invalidate_tag():
+    c = TTLCache(maxsize=10, ttl=10)
+    c.set("t1", "u1", tags=[("user", 1)])
+    c.set("t2", "u1", tags=[("user", 1)])
+    c.set("t3", "u2", tags=[("user", 2)])
+    assert c.invalidate_tag(("user", 1)) == 2
+    assert c.get("t1") is MISSING and c.get("t2") is MISSING
+    assert c.get("t3") == "u2"
+    assert c.invalidate_tag(("user", 1)) == 0
+
+
+def make_events_service():
+    from src.services.event_cache import EventListCache
+    from src.services.events_service import EventsService
+
+    db = ScriptedDB({
+        "my_paid": [{"event_id": 2, "my_paid": 1}],
+        "FROM event e": [
+            {"id": 1, "title": "Tech Meetup", "start_date": "2025-09-15 18:00:00", "capacity": 10, "booked": 2},
+            {"id": 2, "title": "City Concert", "start_date": "2025-10-10 19:30:00", "capacity": 5, "booked": 5},
+        ],
+    })
+    cache = EventListCache(maxsize=8, ttl=10)
+    return EventsService(db, cache), db, cache
+
+
+def test_listing_is_shared_between_anonymous_and_users():
+    svc, db, cache = make_events_service()
+
+    anon, _ = svc.list_event({"q": " Rock "}, None)
+    mine, _ = svc.list_event({"q": "rock"}, {"id": 9})
+
+    assert [r["already_booked"] for r in anon] == [0, 0]
+    assert [(r["my_paid"], r["already_booked"], r["free"]) for r in mine] == [(0, 0, 8), (1, 1, 0)]
+    # 1x Listing + 1x Overlay, das zweite Listing kommt aus dem Cache
+    assert len(db.executed) == 2
+    assert cache.stats()["listings"]["hits"] == 1
+
+
+def test_booking_change_invalidates_only_affected_entries():
+    svc, db, cache = make_events_service()
+    svc.list_event({}, {"id": 9})
+    svc.list_event({"q": "x"}, None)
+
+    page = ("date", None, svc.DEFAULT_LIMIT)
+    cache.booking_changed(9, 2)                     # pending: nur Overlay
+    assert cache.get_overlay(9) is None
+    assert cache.get_listing(svc._filter_key({}) + page) is not None
+
+    cache.booking_changed(9, 2, paid_changed=True)  # paid: Listings mit Event 2
+    assert cache.get_listing(svc._filter_key({}) + page) is None
+    assert cache.get_listing(svc._filter_key({"q": "x"}) + ("relevance", None, svc.DEFAULT_LIMIT)) is None
+
+
+def test_book_event_refreshes_the_users_overlay():
+    svc, db, cache = make_events_service()
+    before, _ = svc.list_event({}, {"id": 9})
+    assert [r["already_booked"] for r in before] == [0, 1]
+
+    svc._reserve = lambda cur, eid, user_id, qty: None
+    db.answers["my_paid"] = [{"event_id": 1, "my_paid": 0}, {"event_id": 2, "my_paid": 1}]
+    assert svc.book_event(1, {"id": 9}, {"qty": 1}) == ({"ok": True}, 200)
+
+    after, _ = svc.list_event({}, {"id": 9})
+    assert [r["already_booked"] for r in after] == [1, 1]
+
+
+def test_keyset_pagination_and_projection():
+    svc, db, cache = make_events_service()
+
+    page1, cursor = svc.list_event({"limit": "1", "fields": "id,title,free"}, None)
+    assert page1 == [{"id": 1, "title": "Tech Meetup", "free": 8}]
+    assert cursor
+
+    svc.list_event({"limit": "1", "cursor": cursor}, None)
+    assert db.statements()[-1].rstrip().endswith("LIMIT %s")
+    assert "(e.start_date > %s OR (e.start_date = %s AND e.id > %s))" in db.statements()[-1]
+    assert svc._decode_cursor(cursor) == (datetime(2025, 9, 15, 18), 1)
+
+
+@pytest.mark.parametrize("cursor, sort", [
+    ("%%%", "date"), (encode_cursor("garbage", 1), "date"), (encode_cursor("2025-09-15 18:00:00", "x"), "date"),
+    (encode_cursor("rel", -5), "relevance"), (encode_cursor("rel", "x"), "relevance"),
+    (encode_cursor("rel", 1), "date"),
+])
+def test_tampered_listing_cursor_is_bad_cursor(cursor, sort):
+    svc, db, cache = make_events_service()
+    query = {"cursor": cursor} if sort == "date" else {"cursor": cursor, "q": "tech"}
+    with pytest.raises(ValueError, match="^bad_cursor$"):
+        svc.list_event(query, None)
+    assert db.executed == []
+
+
+def test_search_uses_fulltext_with_prefix_and_relevance():
+    svc, db, cache = make_events_service()
+
+    _, cursor = svc.list_event({"q": "Tech +meet(", "limit": "1"}, None)
+    sql = db.statements()[-1]
+    assert "LIKE" not in sql
+    assert "ORDER BY relevance DESC" in sql
+    assert svc._filter_key({"q": "Tech +meet("})[0] == "+tech* +meet*"
+    assert svc._decode_cursor(cursor, "relevance") == 1
@@ -0,0 +1,53 @@
+from src.services.category_service import CategoryService, CategoryTree
+from src.services.events_service import EventsService
+from src.tests.conftest import ScriptedDB
+
+ROWS = [
+    {"id": 1, "name": "Musik", "parent_id": None},
+    {"id": 2, "name": "Rock", "parent_id": 1},
+    {"id": 3, "name": "Jazz", "parent_id": 1},
+    {"id": 4, "name": "Punk", "parent_id": 2},
+    {"id": 5, "name": "Sport", "parent_id": None},
+]
+
+
+def test_nested_set_descendants():
+    tree = CategoryTree(ROWS)
+    assert tree.descendants(1) == [1, 2, 3, 4]
+    assert tree.descendants(2) == [2, 4]
+    assert tree.descendants(5) == [5]
+    assert tree.descendants(99) == []
+    assert [c["name"] for c in tree.as_list()] == ["Jazz", "Musik", "Punk", "Rock", "Sport"]
+    assert tree.as_tree()[0] == {"id": 1, "name": "Musik", "children": [
+        {"id": 3, "name": "Jazz", "children": []},
+        {"id": 2, "name": "Rock", "children": [{"id": 4, "name": "Punk", "children": []}]},
+    ]}
+
+
+def test_cycle_and_dangling_parent_do_not_break_the_tree():
+    tree = CategoryTree([{"id": 1, "name": "A", "parent_id": 2}, {"id": 2, "name": "B", "parent_id": 1},
+                         {"id": 3, "name": "C", "parent_id": 42}])
+    assert tree.descendants(1) == [1, 2]
+    assert tree.descendants(3) == [3]
+
+
+def test_service_reloads_only_when_fingerprint_changes():
+    answers = {"COUNT(*)": [{"n": 5, "crc": 100}], "SELECT id, name, parent_id": ROWS}
+    db = ScriptedDB(answers)
+    svc = CategoryService(db, check_interval=0)
+    etag = svc.tree().etag
+    svc.tree()
+    assert svc.stats()["loads"] == 1 and svc.stats()["checks"] == 2
+
+    answers["COUNT(*)"] = [{"n": 6, "crc": 7}]
+    answers["SELECT id, name, parent_id"] = ROWS + [{"id": 6, "name": "Metal", "parent_id": 2}]
+    assert svc.descendants(2) == [2, 4, 6]
+    assert svc.tree().etag != etag and svc.stats()["loads"] == 2
+
+
+def test_listing_filters_parent_category_with_one_predicate():
+    db = ScriptedDB({"COUNT(*)": [{"n": 5, "crc": 1}], "SELECT id, name, parent_id": ROWS})
+    svc = EventsService(db, categories=CategoryService(db))
+    sql, args = svc._listing_sql(svc._filter_key({"category_id": "1"}), "date", None, 10)
+    assert "EXISTS (SELECT 1 FROM event_categorie ec WHERE ec.event_id = e.id AND ec.category_id IN" in sql
+    assert "JOIN event_categorie" not in sql and args[:4] == [1, 2, 3, 4]
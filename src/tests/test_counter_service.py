@@ -0,0 +1,71 @@
+from src.services.counter_service import BookingCounterService
+from src.tests.conftest import Rows, ScriptedDB
+
+
+class RecordingCache:
+    def __init__(self):
+        self.calls = []
+
+    def booking_changed(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+
+
+def _counter_db(event, bookings):
+    """Ein Event mit Zählern + Buchungen; das UPDATE meldet wie MySQL nur wirklich geänderte Zeilen."""
+
+    def actual():
+        return {status: sum(b["qty"] for b in bookings if b["status"] == status) for status in ("paid", "pending")}
+
+    def drift(args):
+        now = actual()
+        if (event["paid_qty"], event["pending_qty"]) == (now["paid"], now["pending"]):
+            return []
+        return [dict(event_id=event["id"], paid_qty=event["paid_qty"], pending_qty=event["pending_qty"],
+                     actual_paid=now["paid"], actual_pending=now["pending"])]
+
+    def update(args):
+        paid, pending, event_id = args
+        changed = (event["paid_qty"], event["pending_qty"]) != (paid, pending)
+        event.update(paid_qty=paid, pending_qty=pending)
+        return Rows(rowcount=int(changed))
+
+    return ScriptedDB({
+        "LEFT JOIN booking b": drift,
+        "SELECT id FROM event": lambda args: [{"id": event["id"]}] if args == (event["id"],) else [],
+        "THEN qty END": lambda args: [actual()],
+        "UPDATE event SET paid_qty": update,
+    })
+
+
+def test_drift_is_found_and_repaired_once():
+    event = {"id": 7, "paid_qty": 1, "pending_qty": 0}
+    db = _counter_db(event, [{"status": "paid", "qty": 3}, {"status": "pending", "qty": 1},
+                             {"status": "cancelled", "qty": 5}])
+    cache = RecordingCache()
+    svc = BookingCounterService(db, cache)
+
+    [row] = svc.reconcile(repair=True)
+    assert (row["paid_qty"], row["actual_paid"], row["actual_pending"]) == (1, 3, 1)
+    assert row["repair"] == {"event_id": 7, "repaired": True, "paid_qty": 3, "pending_qty": 1}
+    assert event == {"id": 7, "paid_qty": 3, "pending_qty": 1}
+    assert cache.calls == [((None, 7), {"paid_changed": True})]
+    assert db.commits == 1 and svc.find_drift() == []
+
+    # Zähler stimmen schon: UPDATE ändert nichts -> kein Cache-Invalidieren
+    assert svc.repair(7)["repaired"] is False
+    assert len(cache.calls) == 1 and db.commits == 2
+
+
+def test_find_drift_for_one_event_filters_in_sql():
+    db = _counter_db({"id": 7, "paid_qty": 0, "pending_qty": 0}, [])
+    assert BookingCounterService(db).find_drift(7) == []
+    [(sql, args)] = db.executed
+    assert "WHERE e.id=%s" in sql and sql.index("WHERE e.id") < sql.index("GROUP BY") and args == [7]
+
+
+def test_repair_of_unknown_event_rolls_back_without_writing():
+    db = _counter_db({"id": 7, "paid_qty": 2, "pending_qty": 0}, [])
+    cache = RecordingCache()
+    assert BookingCounterService(db, cache).repair(99) == {"event_id": 99, "repaired": False}
+    assert db.rollbacks == 1 and db.commits == 0
+    assert not db.statements("UPDATE event") and cache.calls == []
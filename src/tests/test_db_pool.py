@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from src.db_api import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.open = True
+        self.server_status = 0
+        self.pings = 0
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.open:
+            raise OSError("gone")
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.server_status = 0
+
+    def close(self):
+        self.open = False
+
+
+def make_pool(**kw):
+    created = []
+
+    def connect():
+        c = FakeConnection()
+        created.append(c)
+        return c
+
+    return ConnectionPool(connect, **kw), created
+
+
+def test_connection_is_reused():
+    pool, created = make_pool(max_size=2)
+    with pool.connection() as con:
+        first = con._slot.raw
+    with pool.connection() as con:
+        assert con._slot.raw is first
+    assert len(created) == 1
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_timeout_when_exhausted():
+    pool, _ = make_pool(max_size=1, timeout=0.05)
+    held = pool.connection()
+    with pytest.raises(PoolTimeout):
+        pool.connection()
+    held.close()
+    assert pool.stats()["timeouts"] == 1
+    with pool.connection():
+        pass
+
+
+def test_waiter_gets_released_connection():
+    pool, created = make_pool(max_size=1, timeout=2)
+    held = pool.connection()
+    threading.Timer(0.05, held.close).start()
+    with pool.connection():
+        pass
+    s = pool.stats()
+    assert s["waits"] == 1 and s["wait_time_max_ms"] > 0
+    assert len(created) == 1
+
+
+def test_open_transaction_is_rolled_back_on_release():
+    pool, created = make_pool()
+    with pool.connection() as con:
+        con._slot.raw.server_status = 1  # SERVER_STATUS_IN_TRANS
+    assert created[0].rollbacks == 1
+
+
+def test_dead_connection_replaced_on_checkout():
+    pool, created = make_pool(ping_after=0)
+    with pool.connection():
+        pass
+    created[0].open = False
+    with pool.connection() as con:
+        assert con._slot.raw is created[1]
+    s = pool.stats()
+    assert s["health_check_failures"] == 1
+    assert s["size"] == 1
+
+
+def test_idle_connections_are_reaped_down_to_min_size():
+    pool, created = make_pool(min_size=1, max_size=3, max_idle=0.01)
+    a, b, c = pool.connection(), pool.connection(), pool.connection()
+    for con in (a, b, c):
+        con.close()
+    time.sleep(0.02)
+    with pool.connection():
+        pass
+    s = pool.stats()
+    assert s["size"] == 1
+    assert s["closed"] == 2
+
+
+def test_threaded_checkouts_never_exceed_max_size():
+    pool, created = make_pool(max_size=4, timeout=5)
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(50):
+                with pool.connection():
+                    assert pool.stats()["in_use"] <= 4
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(created) <= 4
+    assert pool.stats()["checkouts"] == 16 * 50
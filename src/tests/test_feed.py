@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pytest
+
+from src.cache import TTLCache
+from src.services.feed_service import FeedService, merge_sources
+from src.services.pagination import decode_cursor, encode_cursor
+from src.tests.conftest import ScriptedDB
+
+T1, T2, T3 = datetime(2030, 1, 1, 10), datetime(2030, 1, 2, 10), datetime(2030, 1, 3, 10)
+
+
+def _service(answers):
+    db = ScriptedDB(answers)
+    return FeedService(db, TTLCache(100, 60), fanout_limit=2), db
+
+
+def test_merge_sources_dedupes_and_limits():
+    inbox = [(T1, 1), (T3, 3)]
+    large = [(T1, 1), (T2, 2)]
+    assert merge_sources([inbox, large], 10) == [(T1, 1), (T2, 2), (T3, 3)]
+    assert merge_sources([inbox, large], 2) == [(T1, 1), (T2, 2)]
+
+
+def test_feed_merges_inbox_with_large_organizers_and_caches():
+    svc, db = _service({
+        "LEFT JOIN feed_large_organizer": [{"organizer_id": 5, "large": 0}, {"organizer_id": 6, "large": 1}],
+        "UNION ALL": [{"src": 1, "start_date": T2, "event_id": 20},
+                      {"src": 0, "start_date": T3, "event_id": 30},
+                      {"src": 0, "start_date": T1, "event_id": 10}],
+        "WHERE e.id IN": [{"id": i, "title": f"E{i}", "start_date": t} for i, t in ((10, T1), (20, T2), (30, T3))],
+        "FROM feed_large_organizer WHERE": [{"1": 1}],
+    })
+
+    rows, cursor = svc.get_feed(1, limit=2)
+    assert [r["id"] for r in rows] == [10, 20]
+    assert decode_cursor(cursor, 2) == [str(T2), "20"]
+    union_sql, union_args = next(e for e in db.executed if "UNION ALL" in e[0])
+    assert union_sql.count("FROM feed_item") == 1 and union_args[:4] == [1, 3, 6, 3]  # großer Organizer live gemischt
+
+    n = len(db.executed)
+    assert svc.get_feed(1, limit=2)[0] == rows
+    assert len(db.executed) == n  # Cache-Treffer
+
+    svc.event_created(99, 6)  # großer Organizer: kein Fan-out, aber Seiten verwerfen
+    assert not any("INSERT IGNORE INTO feed_item" in sql for sql, _ in db.executed[n:])
+    svc.get_feed(1, limit=2)
+    assert len(db.executed) > n + 1
+
+
+def test_small_organizer_event_fans_out():
+    svc, db = _service({"COUNT(*)": [{"n": 2}]})
+    svc.event_created(7, 5)
+    assert any("INSERT IGNORE INTO feed_item" in sql and args == (7,) for sql, args in db.executed)
+
+
+def test_organizer_over_limit_is_promoted_instead_of_fan_out():
+    svc, db = _service({"COUNT(*)": [{"n": 3}]})
+    svc.event_created(7, 5)
+    sqls = [sql for sql, _ in db.executed]
+    assert any("INSERT IGNORE INTO feed_large_organizer" in s for s in sqls)
+    assert not any("INSERT IGNORE INTO feed_item" in s for s in sqls)
+
+
+@pytest.mark.parametrize("cursor", ["%%%", encode_cursor("gestern", 5), encode_cursor(T1, "abc")])
+def test_tampered_feed_cursor_is_bad_cursor(cursor):
+    svc, db = _service({})
+    with pytest.raises(ValueError, match="^bad_cursor$"):
+        svc.get_feed(1, cursor)
+    assert db.executed == []
+
+
+def test_feed_cursor_round_trips_as_datetime_and_id():
+    svc, db = _service({"UNION ALL": []})
+    svc.get_feed(1, encode_cursor(T2, 20))
+    _, args = next(e for e in db.executed if "UNION ALL" in e[0])
+    assert args[1:4] == [T2, T2, 20]
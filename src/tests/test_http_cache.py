@@ -0,0 +1,159 @@
+import gzip
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask, Response, jsonify
+
+from src import app as app_module
+from src import http_cache
+from src.services.event_cache import EventListCache
+from src.services.events_service import EventsService
+from src.tests.conftest import ScriptedDB
+
+CFG = {"compress_min_size": 200, "gzip_level": 6, "brotli_quality": 5}
+T1, T2, T3 = datetime(2030, 1, 1, 10, 0, 0, 123456), datetime(2030, 1, 2, 10), datetime(2030, 1, 3, 10)
+
+
+def _app():
+    app = Flask(__name__)
+    http_cache.init_app(app, CFG)
+
+    @app.get("/big")
+    def big():
+        return http_cache.set_validators(jsonify([{"id": i, "title": "Konzert"} for i in range(50)]), "v1", T1)
+
+    @app.get("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    @app.get("/stream")
+    def stream():
+        return Response((b"x" * 100 for _ in range(10)), mimetype="text/plain")
+
+    return app
+
+
+def test_large_json_is_gzipped_with_weak_etag():
+    resp = _app().test_client().get("/big", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.headers["ETag"] == 'W/"v1"'
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert gzip.decompress(resp.data).startswith(b'[{"id":0')
+
+
+def test_brotli_is_preferred_when_accepted():
+    brotli = pytest.importorskip("brotli")
+    resp = _app().test_client().get("/big", headers={"Accept-Encoding": "gzip, br"})
+    assert resp.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(resp.data).startswith(b'[{"id":0')
+
+
+def test_small_streamed_and_unaccepted_responses_stay_raw():
+    client = _app().test_client()
+    assert "Content-Encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "Content-Encoding" not in client.get("/stream", headers={"Accept-Encoding": "gzip"}).headers
+    resp = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in resp.headers and resp.headers["ETag"] == '"v1"'
+
+
+def test_is_fresh_prefers_if_none_match_and_compares_weakly():
+    assert http_cache.is_fresh("v1", T1, 'W/"v1"', None)
+    assert not http_cache.is_fresh("v1", T1, '"v0"', "Sat, 01 Jan 2030 10:00:00 GMT")
+    # Last-Modified hat Sekundenauflösung, Mikrosekunden zählen nicht
+    assert http_cache.is_fresh("v1", T1, None, "Tue, 01 Jan 2030 10:00:00 GMT")
+    assert not http_cache.is_fresh("v1", T2, None, "Tue, 01 Jan 2030 10:00:00 GMT")
+
+
+def test_event_list_answers_304_without_listing_query(monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module.events_service, "listing_stamp", lambda args: ((T1, None, None), T1))
+    monkeypatch.setattr(app_module.events_service, "list_event",
+                        lambda args, user, stamp=None: calls.append(stamp) or ([{"id": 1}], None))
+    monkeypatch.setattr(app_module, "current_user", lambda: None)
+    client = app_module.app.test_client()
+
+    first = client.get("/api/event?limit=5")
+    assert first.status_code == 200 and calls == [(T1, None, None)]
+    again = client.get("/api/event?limit=5", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.headers["ETag"] == first.headers["ETag"]
+    assert len(calls) == 1
+    # anderer Filter -> anderes ETag
+    assert client.get("/api/event?limit=6", headers={"If-None-Match": first.headers["ETag"]}).status_code == 200
+
+
+def test_cached_listing_is_ignored_when_stamp_changed():
+    db = ScriptedDB({"FROM event e": [{"id": 1, "start_date": T1}]})
+    svc = EventsService(db, EventListCache(100, 60))
+    svc.list_event({}, None, stamp=(T1, None, None))
+    svc.list_event({}, None, stamp=(T1, None, None))
+    listings = [sql for sql, _ in db.executed if "FROM event e" in sql]
+    assert len(listings) == 1
+
+    svc.list_event({}, None, stamp=(T2, None, None))
+    assert len([sql for sql, _ in db.executed if "FROM event e" in sql]) == 2
+
+
+def test_listing_stamp_combines_updates_deletes_and_category_tree():
+    db = ScriptedDB({"MAX(updated_at)": [{"updated_at": T1, "deleted_at": T2, "now": T3}]})
+    svc = EventsService(db)
+    stamp, last_modified = svc.listing_stamp({})
+    assert stamp == (T1, T2, None) and last_modified == T2
+
+
+def test_listing_stamp_is_cached_until_a_local_write():
+    db = ScriptedDB({"MAX(updated_at)": [{"updated_at": T1, "deleted_at": None, "now": T3}]})
+    cache = EventListCache(100, 60, stamp_interval=60)
+    svc = EventsService(db, cache)
+
+    def stamp_queries():
+        return len([sql for sql, _ in db.executed if "MAX(updated_at)" in sql])
+
+    svc.listing_stamp({})
+    svc.listing_stamp({"limit": "5"})
+    assert stamp_queries() == 1
+    cache.booking_changed(3, 7)
+    svc.listing_stamp({})
+    assert stamp_queries() == 2
+
+
+def test_stamp_loaded_during_a_local_write_is_not_kept():
+    cache = EventListCache(100, 60, stamp_interval=60)
+    row, generation = cache.cached_stamp()
+    assert row is None
+    cache.event_updated(7)  # Änderung zwischen Laden und Speichern
+    cache.store_stamp({"updated_at": T1}, generation)
+    assert cache.cached_stamp()[0] is None
+
+
+def test_last_modified_only_once_the_second_is_over():
+    # Änderung vor weniger als einer Sekunde: eine zweite in derselben Sekunde hätte dasselbe
+    # Last-Modified -> kein Last-Modified, nur ETag
+    assert http_cache.stable_last_modified(T1, T1 + timedelta(milliseconds=400)) is None
+    assert http_cache.stable_last_modified(T1, T1 + timedelta(seconds=1)) == T1
+    assert http_cache.stable_last_modified(None, T1) is None
+
+
+def test_same_second_change_is_not_answered_with_304(monkeypatch):
+    first, second = T1, T1 + timedelta(milliseconds=300)  # beide in 10:00:00
+    stamp_row = {"updated_at": first, "deleted_at": None, "now": first + timedelta(milliseconds=100)}
+    db = ScriptedDB({"MAX(updated_at)": [stamp_row], "FROM event e": [{"id": 1, "start_date": T2}]})
+    monkeypatch.setattr(app_module.events_service, "get_connection", db)
+    monkeypatch.setattr(app_module, "current_user", lambda: None)
+    app_module.event_list_cache.invalidate_stamp()
+    client = app_module.app.test_client()
+    since = {"If-Modified-Since": "Tue, 01 Jan 2030 10:00:00 GMT"}
+
+    # Änderung noch in der laufenden Sekunde -> kein Last-Modified
+    assert "Last-Modified" not in client.get("/api/event").headers
+
+    # zweite Änderung in derselben Sekunde: ein Client mit nur If-Modified-Since bekommt 200
+    stamp_row.update(updated_at=second, now=second + timedelta(milliseconds=100))
+    app_module.event_list_cache.invalidate_stamp()
+    assert client.get("/api/event", headers=since).status_code == 200
+
+    # erst wenn die Sekunde vorbei ist, gibt es Last-Modified und damit 304
+    stamp_row.update(now=second + timedelta(seconds=2))
+    app_module.event_list_cache.invalidate_stamp()
+    resp = client.get("/api/event")
+    assert resp.headers["Last-Modified"] == "Tue, 01 Jan 2030 10:00:00 GMT"
+    assert client.get("/api/event", headers=since).status_code == 304
@@ -0,0 +1,167 @@
+import io
+import logging
+import os
+
+import pytest
+from PIL import Image
+
+from src import app as app_module
+from src.services import image_service
+from src.services.image_service import BadImage, EventImageService, ImageStore, TooLarge, read_chunks
+from src.tests.conftest import Rows, ScriptedDB
+
+
+def _png(w=800, h=400, color=(200, 30, 30, 128)):
+    buf = io.BytesIO()
+    Image.new("RGBA", (w, h), color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    s = ImageStore(str(tmp_path), (160, 320), max_bytes=1024 * 1024, max_pixels=10_000_000)
+    monkeypatch.setattr(app_module, "image_store", s)
+    return s
+
+
+def test_put_is_content_addressed_and_builds_thumbnails(store):
+    data = _png()
+    info = store.put(read_chunks(io.BytesIO(data), 1000))
+    assert (info.ext, info.mime_type, info.width, info.height, info.size) == ("png", "image/png", 800, 400, len(data))
+    assert store.put([data]).sha256 == info.sha256  # gleicher Inhalt -> gleicher Pfad
+
+    with Image.open(store.thumb_path(info.sha256, 160)) as thumb:
+        assert thumb.format == "JPEG" and thumb.size == (160, 80)
+
+
+def test_put_rejects_garbage_and_oversize(store, tmp_path):
+    with pytest.raises(BadImage):
+        store.put([b"kein bild"])
+    with pytest.raises(TooLarge):
+        store.put([b"x" * (1024 * 1024 + 1)])
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+def test_serve_uses_etag_and_immutable_cache_without_db(store):
+    info = store.put([_png()])
+    client = app_module.app.test_client()
+    url = f"/api/images/{info.sha256}.png"
+
+    resp = client.get(url)
+    assert resp.status_code == 200 and resp.mimetype == "image/png"
+    assert resp.headers["ETag"] == f'"{info.sha256}"'
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert resp.headers["X-Query-Count"] == "0"
+
+    again = client.get(url, headers={"If-None-Match": resp.headers["ETag"]})
+    assert again.status_code == 304 and again.data == b""
+
+    thumb = client.get(url + "?size=320")
+    assert thumb.status_code == 200 and thumb.mimetype == "image/jpeg"
+    assert client.get(url + "?size=999").status_code == 400
+    assert client.get("/api/images/" + "0" * 64 + ".png").status_code == 404
+
+
+class ImageTable:
+    """event_image im Speicher als Antworten für ScriptedDB; on_lock läuft beim ersten GET_LOCK (der Konkurrent)."""
+
+    def __init__(self):
+        self.rows, self.next_id, self.on_lock = {}, 1, None
+        self.db = ScriptedDB({
+            "GET_LOCK(": self._lock,
+            image_service.INSERT_SQL: self._insert,
+            image_service.ONE_SQL: lambda args: self._select(args[1], args[0]),
+            image_service.LIST_SQL: lambda args: [self._public(r) for r in self.rows.values()
+                                                  if r["event_id"] == args[0]],
+            image_service.SELECT_FOR_DELETE_SQL: lambda args: self._select(*args),
+            image_service.DELETE_SQL: lambda args: [{}] if self.rows.pop(args[0], None) else [],
+            image_service.STILL_USED_SQL: lambda args: [{"1": 1}] if any(r["sha256"] == args[0]
+                                                                         for r in self.rows.values()) else [],
+            image_service.BLOB_LENGTH_SQL: lambda args: [{"n": len(self.rows[args[0]]["data"])}],
+            image_service.BLOB_CHUNK_SQL: self._chunk,
+            image_service.MATERIALIZED_SQL: self._materialized,
+        })
+
+    def add_legacy(self, event_id, data):
+        row = dict(id=self.next_id, event_id=event_id, sha256=None, mime_type="image/jpeg", size=None,
+                   width=None, height=None, uploaded_at=None, data=data)
+        self.rows[row["id"]], self.next_id = row, self.next_id + 1
+        return row["id"]
+
+    @staticmethod
+    def _public(row):
+        return {k: v for k, v in row.items() if k != "data"}
+
+    def _select(self, image_id, event_id):
+        row = self.rows.get(image_id)
+        return [self._public(row)] if row and row["event_id"] == event_id else []
+
+    def _lock(self, args):
+        hook, self.on_lock = self.on_lock, None
+        if hook:
+            hook()
+        return [{"ok": 1}]
+
+    def _insert(self, args):
+        event_id, mime, sha, size, width, height = args
+        image_id = self.next_id
+        self.rows[image_id] = dict(id=image_id, event_id=event_id, sha256=sha, mime_type=mime, size=size,
+                                   width=width, height=height, uploaded_at=None, data=None)
+        self.next_id += 1
+        return Rows(rowcount=1, lastrowid=image_id)
+
+    def _chunk(self, args):
+        offset, n, image_id = args
+        return [{"chunk": self.rows[image_id]["data"][offset - 1:offset - 1 + n]}]
+
+    def _materialized(self, args):
+        sha, mime, size, width, height, image_id = args
+        self.rows[image_id].update(sha256=sha, mime_type=mime, size=size, width=width, height=height, data=None)
+        return Rows(rowcount=1)
+
+
+@pytest.fixture
+def images(store):
+    table = ImageTable()
+    return EventImageService(table.db, store), table
+
+
+def test_delete_removes_file_only_with_last_reference(images):
+    svc, table = images
+    data = _png()
+    first, second = svc.add_image(7, [data]), svc.add_image(8, [data])
+    sha = table.rows[first["id"]]["sha256"]
+    path = svc.store.original_path(sha, "png")
+
+    assert svc.delete_image(7, first["id"]) and os.path.exists(path)
+    assert not svc.delete_image(7, second["id"])  # gehört zu Event 8
+    assert svc.delete_image(8, second["id"]) and not os.path.exists(path)
+
+
+def test_delete_racing_upload_of_same_content_keeps_the_file(images):
+    svc, table = images
+    data = _png()
+    old = svc.add_image(7, [data])
+    # das Delete des letzten alten Bildes kommt dem Upload zwischen Prüfen und Schreiben zuvor
+    table.on_lock = lambda: svc.delete_image(7, old["id"])
+    new = svc.add_image(7, [data])
+
+    assert list(table.rows) == [new["id"]]
+    assert os.path.exists(svc.store.original_path(table.rows[new["id"]]["sha256"], "png"))
+
+
+def test_broken_legacy_blob_is_logged_and_skipped(images, caplog):
+    svc, table = images
+    broken = table.add_legacy(7, b"kein bild")
+    good = table.add_legacy(7, _png(40, 20))
+
+    with caplog.at_level(logging.WARNING, logger="app.images"):
+        listed = svc.list_images(7)
+    assert [img["id"] for img in listed] == [good]
+    assert listed[0]["mime_type"] == "image/png" and table.rows[good]["data"] is None
+    assert any(r.msg == "image:broken" and r.image_id == broken for r in caplog.records)
+
+    # defekter Blob wird nicht bei jedem Listing erneut gelesen
+    table.db.executed.clear()
+    assert [img["id"] for img in svc.list_images(7)] == [good]
+    assert not table.db.statements(image_service.BLOB_LENGTH_SQL)
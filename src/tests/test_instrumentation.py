@@ -0,0 +1,85 @@
+import logging
+
+from src import app as app_module
+from src import db_api, instrumentation
+from src.config import INSTRUMENTATION
+from src.instrumentation import Histogram, normalize_sql, parse_profile_routes
+from src.log_setup import SamplingFilter, parse_sample_rates
+
+
+def test_normalize_sql_strips_parameters_and_literals():
+    sql = """
+        SELECT * FROM booking
+         WHERE id IN (%s, %s, %s) AND status = 'pending' AND qty > 3
+    """
+    assert normalize_sql(sql) == "SELECT * FROM booking WHERE id IN (?+) AND status = ? AND qty > ?"
+    assert normalize_sql("INSERT INTO t(a,b) VALUES (%s,%s), (%s,%s), (%s,%s)") == \
+        "INSERT INTO t(a,b) VALUES (?+), ..."
+
+
+def test_histogram_quantiles_use_bucket_bounds():
+    h = Histogram((1, 10, 100))
+    for v in [0.5] * 90 + [50] * 9 + [500]:
+        h.observe(v)
+    assert h.quantile(0.5) == 1
+    assert h.quantile(0.95) == 100
+    assert h.quantile(1.0) == 500
+    assert h.to_dict()["buckets"] == {"le_1": 90, "le_10": 0, "le_100": 9, "inf": 1}
+
+
+def test_parse_profile_routes():
+    assert parse_profile_routes("list_event:0.1, me") == {"list_event": 0.1, "me": 1.0}
+    assert parse_profile_routes("") == {}
+
+
+def test_request_totals_header_and_metrics(checkouts):
+    instrumentation.metrics.reset()
+    client = app_module.app.test_client()
+    client.set_cookie("session", "tok")
+
+    resp = client.put("/api/event/7", json={"title": "Neu"})
+
+    timing = dict(part.strip().split(";dur=") for part in resp.headers["Server-Timing"].split(","))
+    assert set(timing) == {"db", "app", "total"}
+    assert float(timing["total"]) >= float(timing["db"])
+
+    snap = client.get("/metrics").get_json()
+    route = snap["routes"]["PUT /api/event/<int:eid>"]
+    assert route["queries"]["count"] == 1 and route["queries"]["sum"] == 3
+    assert any(s["sql"].startswith("UPDATE event SET") for s in snap["statements"])
+
+
+def test_sampled_profile_is_written(checkouts, tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation.profiler, "profile_dir", str(tmp_path))
+    instrumentation.profiler.enable("me", 1.0)
+    try:
+        with caplog.at_level(logging.INFO, logger="profile"):
+            app_module.app.test_client().get("/api/me")
+    finally:
+        instrumentation.profiler.disable("me")
+    assert [p.suffix for p in tmp_path.iterdir()] == [".prof"]
+    # die Zusammenfassung darf nicht im LOG_SAMPLE-Sampling des perf-Loggers landen
+    [record] = [r for r in caplog.records if r.name == "profile"]
+    assert record.profile == str(next(tmp_path.iterdir()))
+    assert SamplingFilter(parse_sample_rates("perf:0.0")).filter(record)
+
+
+def test_queries_outside_the_request_connection_are_recorded(checkouts):
+    instrumentation.metrics.reset()
+    # z.B. CategoryService/SessionSweeper/CLI: direkt get_connection(), kein Request-Kontext
+    with db_api.get_connection() as con, con.cursor() as cur:
+        cur.execute("UPDATE event SET pending_qty = 0 WHERE id = %s", (7,))
+    stmts = instrumentation.metrics.snapshot()["statements"]
+    assert [s["sql"] for s in stmts] == ["UPDATE event SET pending_qty = ? WHERE id = ?"]
+
+
+def test_metrics_requires_token_or_allowed_address(monkeypatch):
+    monkeypatch.setitem(INSTRUMENTATION, "metrics_token", "s3cret")
+    client = app_module.app.test_client()
+    remote = {"REMOTE_ADDR": "203.0.113.9"}
+
+    assert client.get("/metrics", environ_base=remote).status_code == 403
+    assert client.get("/metrics", environ_base=remote, headers={"Authorization": "Bearer nope"}).status_code == 403
+    resp = client.get("/metrics?top=x", environ_base=remote, headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200 and "statements" in resp.get_json()
+    assert client.get("/metrics?top=-3").status_code == 200
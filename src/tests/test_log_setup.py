@@ -0,0 +1,71 @@
+import json
+import logging
+import queue
+
+from src import app as app_module
+from src.log_setup import (
+    JsonFormatter, NonBlockingQueueHandler, RequestIdFilter, SamplingFilter, SizedTimedRotatingFileHandler,
+    bind_request_id, new_request_id, parse_sample_rates, reset_request_id,
+)
+
+
+def _record(name="app", level=logging.INFO, msg="hallo", **extra):
+    rec = logging.LogRecord(name, level, __file__, 1, msg, None, None)
+    rec.__dict__.update(extra)
+    return rec
+
+
+def test_json_line_has_request_id_and_extra_fields():
+    rec = _record(msg="user:create_event", event_id=7)
+    token = bind_request_id("abc123")
+    try:
+        RequestIdFilter().filter(rec)
+    finally:
+        reset_request_id(token)
+    line = json.loads(JsonFormatter().format(rec))
+    assert line["msg"] == "user:create_event"
+    assert line["request_id"] == "abc123"
+    assert line["event_id"] == 7
+    assert line["level"] == "INFO" and line["logger"] == "app"
+
+
+def test_new_request_id_accepts_only_sane_ids():
+    assert new_request_id("req-1.a_B") == "req-1.a_B"
+    assert new_request_id("bad id\n") != "bad id\n"
+    assert len(new_request_id(None)) == 32
+
+
+def test_sampling_keeps_warnings_and_thins_info():
+    f = SamplingFilter(parse_sample_rates("perf:0"))
+    assert not f.filter(_record("perf.sql"))
+    assert f.filter(_record("perf", logging.WARNING))
+    assert f.filter(_record("app"))
+    assert f.dropped == 1
+
+
+def test_full_queue_drops_instead_of_blocking():
+    h = NonBlockingQueueHandler(queue.Queue(1))
+    h.handle(_record(msg="eins"))
+    h.handle(_record(msg="zwei"))
+    assert h.dropped == 1
+    assert h.queue.get_nowait().msg == "eins"
+
+
+def test_rotates_by_size_without_overwriting(tmp_path):
+    path = tmp_path / "app.log"
+    h = SizedTimedRotatingFileHandler(str(path), max_bytes=200, backup_count=10)
+    h.setFormatter(JsonFormatter())
+    for i in range(10):
+        h.handle(_record(msg=f"zeile {i}"))
+    h.close()
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert len(files) > 2
+    lines = [json.loads(l) for p in tmp_path.iterdir() for l in p.read_text().splitlines()]
+    assert sorted(l["msg"] for l in lines) == [f"zeile {i}" for i in range(10)]
+
+
+def test_request_id_header_is_echoed():
+    client = app_module.app.test_client()
+    resp = client.get("/api/does-not-exist", headers={"X-Request-ID": "trace-42"})
+    assert resp.headers["X-Request-ID"] == "trace-42"
+    assert client.get("/api/does-not-exist").headers["X-Request-ID"]
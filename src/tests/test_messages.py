@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from src import app as app_module
+from src.services.message_service import MessageService, Notifier
+from src.services.pagination import encode_cursor
+from src.tests.conftest import ScriptedDB
+
+
+def test_notifier_wakes_only_the_addressed_user():
+    n = Notifier()
+    with n.listen(1) as a, n.listen(2) as b:
+        assert n.stats() == {"users": 2, "waiters": 2}
+        assert n.publish(1) == 1
+        assert a.wait(0) is True
+        assert b.wait(0.01) is False
+    assert n.stats() == {"users": 0, "waiters": 0}
+    assert n.publish(1) == 0
+
+
+@pytest.mark.parametrize("body, error", [("  ", "empty_body"), (None, "empty_body"),
+                                         ("x" * 11, "body_too_long"), ("hi", "self_message")])
+def test_send_validates_before_touching_the_db(body, error):
+    db = ScriptedDB({})
+    svc = MessageService(db, Notifier(), max_body=10)
+    with pytest.raises(ValueError, match=error):
+        svc.send(1, 1 if error == "self_message" else 2, body)
+    assert db.executed == []
+
+
+def test_poll_returns_immediately_when_messages_exist():
+    db = ScriptedDB({"m.id > %s": [{"id": 5}]})
+    svc = MessageService(db, Notifier())
+    assert svc.poll(1, 4, timeout=5) == [{"id": 5}]
+
+
+def test_poll_waits_for_publish_then_queries_again():
+    answers = {}
+    db = ScriptedDB(answers)
+    notifier = Notifier()
+    svc = MessageService(db, notifier)
+
+    def deliver():
+        while not notifier.stats()["waiters"]:
+            threading.Event().wait(0.001)
+        answers["m.id > %s"] = [{"id": 7}]
+        notifier.publish(1)
+
+    t = threading.Thread(target=deliver)
+    t.start()
+    assert svc.poll(1, 6, timeout=5) == [{"id": 7}]
+    t.join()
+    assert sum("m.id > %s" in sql for sql, _ in db.executed) == 2
+
+
+def test_poll_times_out_with_empty_result():
+    db = ScriptedDB({})
+    svc = MessageService(db, Notifier())
+    assert svc.poll(1, 0, timeout=0.01) == []
+
+
+@pytest.mark.parametrize("cursor", ["%%%", encode_cursor("abc"), encode_cursor("1|2")])
+def test_tampered_cursor_is_bad_cursor(cursor):
+    db = ScriptedDB({})
+    svc = MessageService(db, Notifier())
+    with pytest.raises(ValueError, match="^bad_cursor$"):
+        svc.inbox(1, cursor)
+    with pytest.raises(ValueError, match="^bad_cursor$"):
+        svc.thread(1, 2, cursor)
+    assert db.executed == []
+
+
+def test_routes_answer_tampered_cursor_and_since_with_400(monkeypatch):
+    monkeypatch.setattr(app_module.auth_service, "session_user",
+                        lambda token: {"id": 1, "email": "a@x.de", "full_name": "A", "is_organizer": 0})
+    client = app_module.app.test_client()
+    client.set_cookie("session", "user")
+    bad = encode_cursor("abc")
+    for url in ("/api/messages?cursor=" + bad, "/api/messages/2?cursor=" + bad, "/api/feed?cursor=" + bad):
+        resp = client.get(url)
+        assert (resp.status_code, resp.get_json()) == (400, {"error": "bad_cursor"}), url
+    for url in ("/api/messages/poll?since=abc&timeout=0", "/api/messages/stream?since=abc"):
+        resp = client.get(url)
+        assert (resp.status_code, resp.get_json()) == (400, {"error": "bad_since"}), url
@@ -0,0 +1,82 @@
+import pymysql
+import pytest
+
+from src.index_advisor import plan_issues
+from src.migrations import MigrationError, MigrationRunner, load_migrations, split_statements
+from src.tests.conftest import ScriptedDB
+
+
+def test_split_statements_skips_comments_and_joins_lines():
+    sql = """
+    -- Kommentar
+    ALTER TABLE event
+      ADD COLUMN x INT;
+    CREATE INDEX i ON event(x);
+    """
+    assert split_statements(sql) == [
+        "ALTER TABLE event\n      ADD COLUMN x INT",
+        "CREATE INDEX i ON event(x)",
+    ]
+
+
+def test_bundled_migrations_are_numbered_without_gaps():
+    versions = [m.version for m in load_migrations()]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+def test_duplicate_versions_are_rejected(tmp_path):
+    (tmp_path / "0001_a.sql").write_text("SELECT 1;")
+    (tmp_path / "001_b.sql").write_text("SELECT 1;")
+    with pytest.raises(MigrationError):
+        load_migrations(str(tmp_path))
+
+
+def _raise(exc):
+    def answer(args):
+        raise exc
+    return answer
+
+
+def _migration_db():
+    """ScriptedDB, die sich angewendete Versionen (version -> checksum) in db.applied merkt."""
+    applied = {}
+    db = ScriptedDB({
+        "SELECT version": lambda args: [dict(version=v, name="", checksum=c, applied_at=None)
+                                        for v, c in applied.items()],
+        "INSERT INTO schema_migrations": lambda args: applied.__setitem__(args[0], args[2]) or [],
+        "CREATE INDEX dup": _raise(pymysql.err.OperationalError(1061, "Duplicate key name 'dup'")),
+        "BROKEN": _raise(pymysql.err.ProgrammingError(1064, "syntax error")),
+    })
+    db.applied = applied
+    return db
+
+
+def test_runner_applies_pending_once_and_skips_existing_objects(tmp_path):
+    (tmp_path / "0001_first.sql").write_text("CREATE INDEX dup ON t(a);\nCREATE INDEX new ON t(b);\n")
+    (tmp_path / "0002_second.sql").write_text("ALTER TABLE t ADD COLUMN c INT;\n")
+    db = _migration_db()
+    runner = MigrationRunner(db, str(tmp_path))
+
+    assert [m.version for m in runner.migrate()] == [1, 2]
+    assert "CREATE INDEX new ON t(b)" in db.statements()
+    assert runner.migrate() == []
+    assert [m["state"] for m in runner.status()] == ["applied", "applied"]
+
+    (tmp_path / "0002_second.sql").write_text("ALTER TABLE t ADD COLUMN d INT;\n")
+    assert [m["state"] for m in runner.status()] == ["applied", "changed"]
+
+
+def test_runner_stops_on_real_errors(tmp_path):
+    (tmp_path / "0001_bad.sql").write_text("BROKEN;\n")
+    db = _migration_db()
+    with pytest.raises(MigrationError):
+        MigrationRunner(db, str(tmp_path)).migrate()
+    assert db.applied == {}
+    assert db.statements()[-1].startswith("SELECT RELEASE_LOCK")
+
+
+def test_plan_issues():
+    assert plan_issues({"table": "event", "type": "ALL", "rows": 5000, "Extra": "Using where; Using filesort"}) \
+        == ["full_scan", "filesort"]
+    assert plan_issues({"table": "categorie", "type": "ALL", "rows": 12, "Extra": None}) == []
+    assert plan_issues({"table": "b", "type": "ref", "key": "idx", "rows": 3, "Extra": "Using index"}) == []
@@ -0,0 +1,174 @@
+import json
+from datetime import datetime, timedelta
+
+import pymysql
+import pytest
+
+from src import app as app_module
+from src.services.pagination import encode_cursor
+from src.services.organizer_booking_service import (
+    AUDIT_SQL, FAILURE_SQL, BadBulkRequest, NoCapacity, NotPending, OrganizerBookingService,
+)
+from src.tests.conftest import Rows, ScriptedDB
+
+
+def _statements(db):
+    return [" ".join(sql.split()) for sql, _ in db.executed]
+
+
+BOOKING = {"id": 5, "event_id": 2, "user_id": 9}
+
+
+def test_approve_is_one_update_plus_audit():
+    db = ScriptedDB({"UPDATE": Rows(rowcount=2)})
+    res = OrganizerBookingService(db).approve(BOOKING)
+
+    assert res == {"ok": True, "updated": 1}
+    assert [s.split()[0] for s in _statements(db)] == ["UPDATE", "INSERT"]
+    assert "e.capacity - e.paid_qty >= b.qty" in _statements(db)[0]
+    assert db.commits == 1
+
+
+def test_approve_without_capacity_rolls_back_and_reports_free():
+    db = ScriptedDB({FAILURE_SQL: [{"status": "pending", "qty": 3, "free": 1}]})
+    with pytest.raises(NoCapacity) as e:
+        OrganizerBookingService(db).approve(BOOKING)
+
+    assert e.value.free == 1
+    assert not any(s.startswith("INSERT") for s in _statements(db))
+    assert db.rollbacks == 1 and db.commits == 0
+
+
+def test_reject_of_paid_booking_raises_not_pending():
+    db = ScriptedDB({FAILURE_SQL: [{"status": "paid", "qty": 1, "free": 0}]})
+    with pytest.raises(NotPending):
+        OrganizerBookingService(db).reject(BOOKING)
+
+
+def test_bulk_approve_allocates_fifo_and_batches_writes():
+    rows = [
+        # bereits nach created_at sortiert, Event 2 hat noch 3 freie Plätze
+        {"id": 1, "event_id": 2, "user_id": 11, "qty": 2, "status": "pending", "organizer_id": 7, "free": 3},
+        {"id": 2, "event_id": 2, "user_id": 12, "qty": 2, "status": "pending", "organizer_id": 7, "free": 3},
+        {"id": 3, "event_id": 2, "user_id": 13, "qty": 1, "status": "pending", "organizer_id": 7, "free": 3},
+        {"id": 4, "event_id": 3, "user_id": 14, "qty": 1, "status": "paid", "organizer_id": 7, "free": 9},
+        {"id": 5, "event_id": 8, "user_id": 15, "qty": 1, "status": "pending", "organizer_id": 99, "free": 9},
+    ]
+    db = ScriptedDB({"SELECT": rows})
+    res = OrganizerBookingService(db).bulk(7, "approve", booking_ids=[1, 2, 3, 4, 5, 6])
+
+    assert [r["result"] for r in res["results"]] == [
+        "approved", "no_capacity", "no_capacity", "not_pending", "forbidden", "not_found",
+    ]
+    assert res["approved"] == 1
+    # SELECT (Ownership+Lock), UPDATE booking, UPDATE event, INSERT audit
+    assert [s.split()[0] for s in _statements(db)] == ["SELECT", "UPDATE", "UPDATE", "INSERT"]
+    assert next(args for sql, args in db.executed if sql == AUDIT_SQL) == [(1, "pending", "paid")]
+    assert db.commits == 1
+
+
+@pytest.mark.parametrize("kwargs, error", [
+    ({"booking_ids": "123"}, "invalid_payload"),
+    ({"booking_ids": [True, 2]}, "invalid_booking_id"),
+    ({"booking_ids": [0]}, "invalid_booking_id"),
+    ({"booking_ids": ["5"]}, "invalid_booking_id"),
+    ({"booking_ids": []}, "no_booking_ids"),
+    ({"event_id": True}, "invalid_event_id"),
+    ({"event_id": 4, "limit": -5}, "bad_limit"),
+    ({"event_id": 4, "limit": "x"}, "bad_limit"),
+])
+def test_bulk_rejects_malformed_payload_before_touching_the_db(kwargs, error):
+    db = ScriptedDB()
+    with pytest.raises(BadBulkRequest, match=error):
+        OrganizerBookingService(db).bulk(7, "approve", **kwargs)
+    assert db.executed == []
+
+
+T0 = datetime(2030, 1, 1, 10)
+# zwei Buchungen mit gleichem created_at: der Cursor muss über die id weiterblättern
+BOOKINGS = [{"booking_id": i, "status": "pending", "created_at": T0 + timedelta(minutes=i // 2)} for i in range(1, 8)]
+BOOKINGS.append({"booking_id": 99, "status": "paid", "created_at": T0})
+
+
+def booking_table(rows):
+    """
+    ScriptedDB, die die Keyset-Bedingung von _list_sql selbst auswertet; die Argumente sind
+    (organizer, status[, created_at, created_at, id][, limit]) -> Seite bzw. Export ohne LIMIT.
+    """
+    rows = sorted(rows, key=lambda r: (r["created_at"], r["booking_id"]), reverse=True)
+
+    def page(args):
+        found = [r for r in rows if r["status"] == args[1]]
+        if len(args) > 3:
+            created_at, _, bid = args[2:5]
+            found = [r for r in found if (r["created_at"], r["booking_id"]) < (created_at, bid)]
+        return found[:args[-1]] if len(args) in (3, 6) else found
+
+    return ScriptedDB({"FROM event e": page})
+
+
+def test_keyset_pages_round_trip_through_the_cursor():
+    svc = OrganizerBookingService(booking_table(BOOKINGS))
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = svc.list_api(1, "pending", cursor, "3")
+        seen += [r["booking_id"] for r in rows]
+        pages += 1
+        if not cursor:
+            break
+    assert seen == [7, 6, 5, 4, 3, 2, 1] and pages == 3
+    assert [args[-1] for _, args in svc.get_connection.executed] == [4, 4, 4]  # limit + 1
+
+
+@pytest.mark.parametrize("cursor", ["%%%", encode_cursor("x"), encode_cursor("gestern", 5),
+                                    encode_cursor(T0, "abc")])
+def test_tampered_cursor_is_bad_cursor(cursor):
+    table = booking_table(BOOKINGS)
+    with pytest.raises(ValueError, match="bad_cursor"):
+        OrganizerBookingService(table).list_api(1, "pending", cursor, "3")
+    assert table.executed == []
+
+
+def test_stream_by_status_reads_rows_one_by_one_from_a_server_side_cursor():
+    table = booking_table(BOOKINGS)
+    rows = OrganizerBookingService(table).stream_by_status(1, "pending")
+    assert next(rows)["booking_id"] == 7
+    assert table.streamed == 1 and table.cursor_classes == [pymysql.cursors.SSDictCursor]
+    assert "LIMIT" not in table.statements()[0]
+    assert [r["booking_id"] for r in rows] == [6, 5, 4, 3, 2, 1]
+
+
+@pytest.fixture
+def organizer_client(monkeypatch):
+    table = booking_table(BOOKINGS)
+    monkeypatch.setattr(app_module.organizer_booking_service, "get_connection", table)
+    monkeypatch.setattr(app_module.auth_service, "session_user",
+                        lambda token: {"id": 1, "email": "a@x.de", "full_name": "A", "is_organizer": 1})
+    client = app_module.app.test_client()
+    client.set_cookie("session", "org")
+    return client, table
+
+
+def test_bookings_route_pages_with_x_next_cursor(organizer_client):
+    client, _ = organizer_client
+    first = client.get("/api/organizer/bookings?limit=4")
+    assert [r["booking_id"] for r in first.get_json()] == [7, 6, 5, 4]
+    second = client.get("/api/organizer/bookings?limit=4&cursor=" + first.headers["X-Next-Cursor"])
+    assert [r["booking_id"] for r in second.get_json()] == [3, 2, 1]
+    assert "X-Next-Cursor" not in second.headers
+
+    assert client.get("/api/organizer/bookings?cursor=kaputt").get_json() == {"error": "bad_cursor"}
+    assert client.get("/api/organizer/bookings?cursor=kaputt").status_code == 400
+    assert client.get("/api/organizer/bookings?limit=0").status_code == 400
+    assert client.get("/api/organizer/bookings?status=foo").get_json() == {"error": "bad_status"}
+
+
+def test_export_route_streams_a_json_array(organizer_client):
+    client, table = organizer_client
+    resp = client.get("/api/organizer/bookings/export?status=pending")
+    assert resp.status_code == 200 and resp.is_streamed and resp.mimetype == "application/json"
+    assert [r["booking_id"] for r in json.loads(resp.get_data())] == [7, 6, 5, 4, 3, 2, 1]
+
+    empty = client.get("/api/organizer/bookings/export?status=rejected")
+    assert json.loads(empty.get_data()) == []
+    assert client.get("/api/organizer/bookings/export?status=foo").status_code == 400
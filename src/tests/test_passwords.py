@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from src.passwords import Busy, LoginThrottle, PasswordHasher, normalize_method
+from src.services.auth_service import AuthService
+from src.tests.conftest import ScriptedDB
+
+FAST = "pbkdf2:sha256:1000"
+
+
+def test_normalize_method_fills_werkzeug_defaults():
+    assert normalize_method("scrypt") == "scrypt:32768:8:1"
+    assert normalize_method("scrypt:16384") == "scrypt:16384:8:1"
+    assert normalize_method(FAST) == FAST
+    with pytest.raises(ValueError):
+        normalize_method("md5")
+
+
+def test_verify_reports_rehash_for_other_parameters():
+    hasher = PasswordHasher(FAST, workers=0)
+    assert hasher.verify(hasher.hash("pw"), "pw") == (True, False)
+    old = generate_password_hash("pw", "pbkdf2:sha256:500")
+    assert hasher.verify(old, "pw") == (True, True)
+    assert hasher.verify(old, "wrong") == (False, False)
+    assert hasher.verify("hash-legacy", "pw") == (False, False)
+    assert hasher.verify(None, "pw") == (False, False)
+
+
+def test_admission_rejects_when_all_slots_busy():
+    hasher = PasswordHasher(FAST, workers=0, max_pending=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow(_pw):
+        started.set()
+        release.wait(5)
+        return "x"
+
+    t = threading.Thread(target=hasher._run, args=(slow, "pw"))
+    t.start()
+    started.wait(5)
+    with pytest.raises(Busy):
+        hasher.hash("pw")
+    release.set()
+    t.join()
+    assert hasher.stats()["rejected"] == 1 and hasher.stats()["pending"] == 0
+    assert hasher.hash("pw")
+
+
+def test_process_pool_hashes_off_thread():
+    hasher = PasswordHasher(FAST, workers=1, timeout=30)
+    try:
+        assert hasher.verify(hasher.hash("pw"), "pw") == (True, False)
+    finally:
+        hasher.shutdown()
+
+
+def test_throttle_locks_account_until_success():
+    t = LoginThrottle(max_account=2, max_ip=3, window=60)
+    t.failed("A@x.de", "1.1.1.1")
+    assert t.retry_after("a@x.de", "1.1.1.1") == 0
+    t.failed("a@x.de", "1.1.1.1")
+    assert 0 < t.retry_after("a@x.de", "2.2.2.2") <= 60
+    t.succeeded("a@x.de")
+    assert t.retry_after("a@x.de", "2.2.2.2") == 0
+    t.failed("b@x.de", "1.1.1.1")
+    assert t.retry_after("c@x.de", "1.1.1.1") > 0  # IP-Limit erreicht
+
+
+def test_login_rehashes_old_hash_and_throttles_failures():
+    old = generate_password_hash("pw", "pbkdf2:sha256:500")
+    db = ScriptedDB({"FROM user WHERE email": [{"id": 1, "email": "a@x.de", "password": old,
+                                                         "full_name": "A"}]})
+    svc = AuthService(db, hasher=PasswordHasher(FAST, workers=0),
+                      throttle=LoginThrottle(max_account=1, max_ip=0))
+
+    assert svc.login({"email": "a@x.de", "password": "pw"})[1] == 200
+    (sql, args), = [e for e in db.executed if e[0].startswith("UPDATE user SET password")]
+    assert args[0].startswith(FAST + "$") and args[1:] == (1, old)
+
+    assert svc.login({"email": "a@x.de", "password": "nope"})[1] == 401
+    body, status = svc.login({"email": "a@x.de", "password": "pw"})
+    assert status == 429 and body["retry_after"] > 0
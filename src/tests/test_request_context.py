@@ -0,0 +1,34 @@
+from src import app as app_module
+
+
+def test_update_event_uses_one_connection_and_three_queries(checkouts):
+    client = app_module.app.test_client()
+    client.set_cookie("session", "tok")
+
+    resp = client.put("/api/event/7", json={"title": "Neu"})
+
+    assert resp.status_code == 200
+    assert resp.get_json() == {"updated": 1}
+    # Session + Ownership + UPDATE
+    assert resp.headers["X-Query-Count"] == "3"
+    assert len(checkouts) == 1
+    assert checkouts[0].released == 1
+
+
+def test_anonymous_request_does_not_touch_db(checkouts):
+    client = app_module.app.test_client()
+    resp = client.get("/api/me")
+    assert resp.status_code == 401
+    assert resp.headers["X-Query-Count"] == "0"
+    assert checkouts == []
+
+
+def test_session_is_cached_across_requests(checkouts):
+    client = app_module.app.test_client()
+    client.set_cookie("session", "tok")
+
+    client.put("/api/event/7", json={"title": "Neu"})
+    resp = client.put("/api/event/7", json={"title": "Neu"})
+
+    # zweiter Request: Session kommt aus dem Cache
+    assert resp.headers["X-Query-Count"] == "2"
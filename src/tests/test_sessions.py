@@ -0,0 +1,98 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from werkzeug.security import generate_password_hash
+
+from src import app as app_module
+from src import sessions
+from src.cache import TTLCache
+from src.passwords import PasswordHasher
+from src.services.auth_service import AuthService
+from src.sessions import SessionMaintenance, SessionSweeper, SignedSessions
+from src.tests.conftest import Rows, ScriptedDB
+
+USER = {"id": 7, "email": "a@x.de", "full_name": "A", "is_organizer": 0, "company": None}
+
+
+def _signed(db, max_age=3600):
+    return SignedSessions("test-secret", max_age, db)
+
+
+def test_signed_token_roundtrip_tamper_and_revoke():
+    db = ScriptedDB({})
+    signed = _signed(db)
+    token, expires = signed.issue(7)
+    assert signed.is_signed(token) and expires > datetime.utcnow()
+    assert signed.load(token) == 7
+    assert signed.load(token[:-2] + "xx") is None
+    assert _signed(db, max_age=-1).load(token) is None  # abgelaufen
+
+    assert signed.revoke(token)
+    assert signed.load(token) is None
+    (sql, args), = db.executed
+    assert "INSERT INTO session_revocation" in sql and len(args[0]) == 16
+
+
+def test_revocations_from_other_processes_are_synced():
+    db = ScriptedDB({"FROM session_revocation": []})
+    issuer, other = _signed(db), _signed(db)
+    token, _ = issuer.issue(7)
+    issuer.revoke(token)
+    jti, expires = db.executed[0][1]
+    db.answers["FROM session_revocation"] = [{"id": 3, "jti": jti, "expires_at": expires}]
+
+    assert other.load(token) == 7
+    assert other.sync() == 1 and other.revocations.last_id == 3
+    assert other.load(token) is None
+
+
+def test_signed_sessions_authenticate_without_db_after_first_request():
+    db = ScriptedDB({
+        "FROM user WHERE email": [dict(USER, password=generate_password_hash("pw", "pbkdf2:sha256:1000"))],
+        "WHERE u.id=%s": [dict(USER)],
+    })
+    svc = AuthService(db, TTLCache(100, 60), TTLCache(100, 60),
+                      hasher=PasswordHasher("pbkdf2:sha256:1000", workers=0), signed=_signed(db))
+    body, status = svc.login({"email": "a@x.de", "password": "pw"})
+    token = body["cookie"]["token"]
+    assert status == 200 and not any("INSERT INTO session(" in sql for sql, _ in db.executed)
+
+    assert svc.session_user(token)["id"] == 7
+    n = len(db.executed)
+    assert svc.session_user(token)["id"] == 7
+    assert len(db.executed) == n  # aus dem Cache, kein Lookup
+
+    svc.logout(token)
+    assert svc.session_user(token) is None
+
+
+def test_sweeper_deletes_in_batches_until_short_batch():
+    deletes = iter([2, 2, 1, 0])
+    db = ScriptedDB({"DELETE": lambda args: Rows(rowcount=next(deletes))})
+
+    assert SessionSweeper(db, batch=2, pause=0).sweep() == 5
+    assert len(db.statements("DELETE FROM session ")) == 3
+    assert db.statements()[-1].startswith("SELECT RELEASE_LOCK")
+
+
+def test_maintenance_starts_with_first_request_not_on_import(monkeypatch):
+    assert app_module.session_maintenance.stats()["running"] is False
+    started = []
+    monkeypatch.setattr(app_module, "session_maintenance", SimpleNamespace(start=lambda: started.append(1)))
+    client = app_module.app.test_client()
+
+    client.get("/nicht-vorhanden")
+    assert started == []  # TESTING
+    monkeypatch.setitem(app_module.app.config, "TESTING", False)
+    client.get("/nicht-vorhanden")
+    assert started == [1]
+
+
+def test_maintenance_start_is_idempotent(monkeypatch):
+    threads = []
+    monkeypatch.setattr(sessions.threading, "Thread",
+                        lambda **kw: threads.append(kw) or SimpleNamespace(start=lambda: None))
+    m = SessionMaintenance(None, 600)
+    m.start()
+    m.start()
+    assert len(threads) == 1
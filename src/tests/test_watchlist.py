@@ -0,0 +1,36 @@
+import pytest
+
+from src.services.watchlist_service import NotFound, WatchlistService, parse_event_ids
+from src.tests.conftest import ScriptedDB
+
+
+def test_parse_event_ids_dedupes_and_validates():
+    assert parse_event_ids([3, "1", 3, 2], 10) == [3, 1, 2]
+    for raw, error in (([], "event_ids_required"), (None, "event_ids_required"),
+                       ([1, "x"], "invalid_event_id"), ([True], "invalid_event_id"),
+                       (list(range(11)), "too_many_event_ids")):
+        with pytest.raises(ValueError, match=error):
+            parse_event_ids(raw, 10)
+
+
+def test_bulk_add_and_remove_are_single_statements():
+    db = ScriptedDB({})
+    svc = WatchlistService(db)
+    svc.add(1, [4, 5, 6])
+    svc.remove(1, [4, 5])
+    (add_sql, add_args), (rm_sql, rm_args) = db.executed
+    assert "INSERT IGNORE INTO watchlist" in add_sql and add_sql.count("%s") == 4 and add_args == [1, 4, 5, 6]
+    assert "DELETE FROM watchlist" in rm_sql and rm_args == [1, 4, 5]
+    assert svc.add(1, []) == 0 and len(db.executed) == 2
+
+
+def test_list_is_one_query():
+    db = ScriptedDB({"FROM watchlist w": [{"event_id": i} for i in range(50)]})
+    assert len(WatchlistService(db).list(1)) == 50
+    assert len(db.executed) == 1
+
+
+def test_add_one_unknown_event():
+    db = ScriptedDB({})
+    with pytest.raises(NotFound):
+        WatchlistService(db).add_one(1, 99)
@@ -26,16 +26,25 @@ function collectFilters() {
   return params;
 }
 
-// Events laden (komplett oder mit Filter) + dynamischer Buchungs-Button (enthält noch Fehler)
-async function loadEvents(params = {}) {
+// nur die Felder, die die Liste unten wirklich rendert
+const LIST_FIELDS = "id,title,start_date,location,capacity,booked,my_paid,already_booked";
+let nextCursor = null;
+
+// Events laden (erste Seite oder mit append=true die nächste) + dynamischer Buchungs-Button (enthält noch Fehler)
+async function loadEvents(params = {}, append = false) {
   disable_element("btn-load", true);
   try {
-    const qs = new URLSearchParams(params).toString();
-    const data = await fetchJSON("/api/event" + (qs ? `?${qs}` : ""));
+    const query = { ...params, fields: LIST_FIELDS };
+    if (append && nextCursor) query.cursor = nextCursor;
+    const res = await fetch("/api/event?" + new URLSearchParams(query).toString(),
+                            {headers: {'Content-Type': 'application/json'}});
+    if (!res.ok) throw new Error(await res.text());
+    nextCursor = res.headers.get("X-Next-Cursor");
+    const data = await res.json();
 
     const me = window.__ME__ || null;
 
-    $("#list").innerHTML = data.map(e => {
+    const html = data.map(e => {
       const capacity = e.capacity ?? 0;
       const booked   = e.booked   ?? 0;
       const free     = Math.max(0, capacity - booked);
@@ -74,6 +83,12 @@ async function loadEvents(params = {}) {
         </li>
       `;
     }).join("");
+
+    if (append) $("#list").insertAdjacentHTML("beforeend", html);
+    else $("#list").innerHTML = html;
+
+    const more = $("#btn-more");
+    if (more) more.style.display = nextCursor ? "" : "none";
   } catch (e) {
     show_msg("Fehler beim Laden: " + e.message, false);
   } finally {
@@ -82,6 +97,7 @@ async function loadEvents(params = {}) {
 }
 
 $("#btn-load")?.addEventListener("click", () => loadEvents(collectFilters()));
+$("#btn-more")?.addEventListener("click", () => loadEvents(collectFilters(), true));
 $("#btn-filter")?.addEventListener("click", () => loadEvents(collectFilters()));
 
 // Neues Event speichern (Formular f)